@@ -7,17 +7,18 @@ from historical medical billing data. Designed to work with the MedicalBillingDB
 schema and provide both high-level trends and granular analysis.
 """
 
-import sqlite3
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import json
+import calendar
 
 from medical_billing_db import MedicalBillingDB
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.revenue_cube import cube_enabled, get_revenue_cube, year_filter as cube_year_filter
+from utils.analytics_engine import duckdb_engine_enabled, get_analytics_engine
+from utils.db_open import connect_db
 
 logger = get_logger()
 config = get_config()
@@ -25,14 +26,45 @@ config = get_config()
 class AdvancedAnalytics:
     """Advanced analytics engine for medical billing data"""
     
-    def __init__(self, db_path: str = None):
-        """Initialize analytics engine"""
+    def __init__(self, db_path: str = None, engine: str = None):
+        """Initialize analytics engine
+        
+        Args:
+            db_path: Path to the SQLite database
+            engine: "sqlite" or "duckdb" for the transaction-level queries
+                (default: analytics.engine)
+        """
         self.db_path = db_path or config.get("database.db_path", "medical_billing.db")
         self.db = MedicalBillingDB(self.db_path)
+        # Pre-aggregated (year, month, provider, payer) rollup used instead of
+        # scanning payment_transactions when enabled
+        self.cube = get_revenue_cube(self.db_path) if cube_enabled() else None
+        # DuckDB over the Parquet snapshot for the queries that need
+        # individual transactions (exact distinct counts, windows over time)
+        self.engine = get_analytics_engine(self.db_path) if duckdb_engine_enabled(engine) else None
         
     def get_overall_business_summary(self, years: List[str] = None) -> Dict:
         """Get comprehensive business overview across all years"""
         
+        if self.cube is not None:
+            cube_filter, cube_params = cube_year_filter(years, "c.year")
+            result = self.cube.query(f"""
+            SELECT 
+                COUNT(DISTINCT NULLIF(c.year, 0)) as years_covered,
+                COUNT(DISTINCT NULLIF(c.provider_id, 0)) as unique_providers,
+                COUNT(DISTINCT NULLIF(c.payer_name, '')) as unique_payers,
+                SUM(c.txn_count) as total_transactions,
+                SUM(c.revenue) as total_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as avg_transaction_value,
+                MIN(c.min_date) as earliest_date,
+                MAX(c.max_date) as latest_date,
+                SUM(c.positive_count) as positive_transactions,
+                SUM(c.nonpositive_count) as zero_negative_transactions
+            FROM revenue_cube c
+            WHERE 1 = 1 {cube_filter}
+            """, cube_params)
+            return self._finish_business_summary(result)
+        
         year_filter = ""
         params = []
         if years:
@@ -56,11 +88,15 @@ class AdvancedAnalytics:
         {year_filter}
         """
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         result = pd.read_sql_query(query, conn, params=params)
         conn.close()
         
-        if result.empty:
+        return self._finish_business_summary(result)
+    
+    def _finish_business_summary(self, result: pd.DataFrame) -> Dict:
+        """Add calculated metrics to a business summary query result"""
+        if result.empty or not result.iloc[0]['total_transactions']:
             return {"error": "No data found"}
         
         summary = result.iloc[0].to_dict()
@@ -75,6 +111,25 @@ class AdvancedAnalytics:
     def get_yearly_trends(self) -> pd.DataFrame:
         """Get year-over-year trends and growth rates"""
         
+        if self.cube is not None:
+            df = self.cube.query("""
+            SELECT 
+                printf('%04d', c.year) as year,
+                SUM(c.txn_count) as transaction_count,
+                SUM(c.revenue) as total_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as avg_transaction_value,
+                COUNT(DISTINCT NULLIF(c.provider_id, 0)) as active_providers,
+                COUNT(DISTINCT NULLIF(c.payer_name, '')) as active_payers,
+                (SELECT distinct_patients(m.patient_sketch) FROM revenue_cube_patients m WHERE m.year = c.year) as unique_patients,
+                SUM(c.revenue) / COUNT(DISTINCT NULLIF(c.provider_id, 0)) as revenue_per_provider,
+                SUM(c.txn_count) / COUNT(DISTINCT NULLIF(c.provider_id, 0)) as transactions_per_provider
+            FROM revenue_cube c
+            WHERE c.year > 0
+            GROUP BY c.year
+            ORDER BY c.year
+            """)
+            return self._add_yearly_growth(df)
+        
         query = """
         SELECT 
             strftime('%Y', pt.transaction_date) as year,
@@ -92,10 +147,14 @@ class AdvancedAnalytics:
         ORDER BY year
         """
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         df = pd.read_sql_query(query, conn)
         conn.close()
         
+        return self._add_yearly_growth(df)
+    
+    def _add_yearly_growth(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add year-over-year growth rate columns to yearly trends"""
         if len(df) > 1:
             # Calculate year-over-year growth rates
             df['revenue_growth_rate'] = df['total_revenue'].pct_change() * 100
@@ -107,6 +166,30 @@ class AdvancedAnalytics:
     def get_monthly_trends(self, years: List[str] = None) -> pd.DataFrame:
         """Get detailed monthly trends with seasonality analysis"""
         
+        if self.cube is not None:
+            cube_filter, cube_params = cube_year_filter(years, "c.year")
+            return self.cube.query(f"""
+            SELECT 
+                printf('%04d-%02d', c.year, c.month) as year_month,
+                printf('%04d', c.year) as year,
+                printf('%02d', c.month) as month,
+                CASE 
+                    WHEN c.month IN (12,1,2) THEN 'Winter'
+                    WHEN c.month IN (3,4,5) THEN 'Spring'
+                    WHEN c.month IN (6,7,8) THEN 'Summer'
+                    ELSE 'Fall'
+                END as season,
+                SUM(c.txn_count) as transaction_count,
+                SUM(c.revenue) as total_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as avg_transaction_value,
+                COUNT(DISTINCT NULLIF(c.provider_id, 0)) as active_providers,
+                (SELECT distinct_patients(m.patient_sketch) FROM revenue_cube_patients m WHERE m.year = c.year AND m.month = c.month) as unique_patients
+            FROM revenue_cube c
+            WHERE c.year > 0 {cube_filter}
+            GROUP BY c.year, c.month
+            ORDER BY c.year, c.month
+            """, cube_params)
+        
         year_filter = ""
         params = []
         if years:
@@ -136,7 +219,7 @@ class AdvancedAnalytics:
         ORDER BY year_month
         """
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         df = pd.read_sql_query(query, conn, params=params)
         conn.close()
         
@@ -177,7 +260,7 @@ class AdvancedAnalytics:
         ORDER BY p.provider_name, year_month
         """
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         df = pd.read_sql_query(query, conn)
         conn.close()
         
@@ -186,6 +269,76 @@ class AdvancedAnalytics:
     def get_payer_analysis(self) -> Dict:
         """Comprehensive payer analysis including trends and reliability"""
         
+        if self.engine is not None:
+            payer_overview = self.engine.query("""
+            SELECT 
+                pt.payer_name,
+                COUNT(*) as total_claims,
+                SUM(pt.cash_applied) as total_revenue,
+                AVG(pt.cash_applied) as avg_claim_value,
+                COUNT(DISTINCT pt.provider_id) as providers_used,
+                COUNT(DISTINCT date_trunc('month', pt.transaction_date)) as months_active,
+                strftime(MIN(pt.transaction_date), '%Y-%m-%d') as first_claim_date,
+                strftime(MAX(pt.transaction_date), '%Y-%m-%d') as last_claim_date,
+                COUNT(*) FILTER (WHERE pt.cash_applied > 0) as paid_claims,
+                COUNT(*) FILTER (WHERE pt.cash_applied <= 0) as zero_paid_claims,
+                SUM(pt.cash_applied) * 100.0 / (
+                    SELECT SUM(cash_applied) FROM payment_transactions WHERE cash_applied > 0
+                ) as revenue_market_share
+            FROM payment_transactions pt
+            WHERE pt.payer_name IS NOT NULL AND pt.payer_name != ''
+            GROUP BY pt.payer_name
+            ORDER BY total_revenue DESC
+            """)
+            payer_trends = self.engine.query("""
+            SELECT 
+                pt.payer_name,
+                strftime(pt.transaction_date, '%Y') as year,
+                COUNT(*) as yearly_claims,
+                SUM(pt.cash_applied) as yearly_revenue,
+                AVG(pt.cash_applied) as yearly_avg_claim
+            FROM payment_transactions pt
+            WHERE pt.payer_name IS NOT NULL AND pt.payer_name != ''
+            GROUP BY pt.payer_name, year
+            ORDER BY pt.payer_name, year NULLS FIRST
+            """)
+            return self._finish_payer_analysis(payer_overview, payer_trends)
+        
+        if self.cube is not None:
+            payer_overview = self.cube.query("""
+            SELECT 
+                c.payer_name,
+                SUM(c.txn_count) as total_claims,
+                SUM(c.revenue) as total_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as avg_claim_value,
+                COUNT(DISTINCT NULLIF(c.provider_id, 0)) as providers_used,
+                COUNT(DISTINCT CASE WHEN c.year > 0 THEN c.year * 100 + c.month END) as months_active,
+                MIN(c.min_date) as first_claim_date,
+                MAX(c.max_date) as last_claim_date,
+                SUM(c.positive_count) as paid_claims,
+                SUM(c.nonpositive_count) as zero_paid_claims,
+                SUM(c.revenue) * 100.0 / (
+                    SELECT SUM(positive_revenue) FROM revenue_cube
+                ) as revenue_market_share
+            FROM revenue_cube c
+            WHERE c.payer_name != ''
+            GROUP BY c.payer_name
+            ORDER BY total_revenue DESC
+            """)
+            payer_trends = self.cube.query("""
+            SELECT 
+                c.payer_name,
+                CASE WHEN c.year > 0 THEN printf('%04d', c.year) END as year,
+                SUM(c.txn_count) as yearly_claims,
+                SUM(c.revenue) as yearly_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as yearly_avg_claim
+            FROM revenue_cube c
+            WHERE c.payer_name != ''
+            GROUP BY c.payer_name, c.year
+            ORDER BY c.payer_name, c.year
+            """)
+            return self._finish_payer_analysis(payer_overview, payer_trends)
+        
         # Overall payer performance
         payer_overview_query = """
         SELECT 
@@ -227,13 +380,17 @@ class AdvancedAnalytics:
         ORDER BY pt.payer_name, year
         """
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         
         payer_overview = pd.read_sql_query(payer_overview_query, conn)
         payer_trends = pd.read_sql_query(payer_trends_query, conn)
         
         conn.close()
         
+        return self._finish_payer_analysis(payer_overview, payer_trends)
+    
+    def _finish_payer_analysis(self, payer_overview: pd.DataFrame, payer_trends: pd.DataFrame) -> Dict:
+        """Add reliability metrics to payer overview and trend results"""
         # Calculate additional metrics
         payer_overview['payment_success_rate'] = (payer_overview['paid_claims'] / payer_overview['total_claims'] * 100)
         payer_overview['consistency_score'] = payer_overview['months_active'] / payer_overview['months_active'].max() * 100
@@ -246,6 +403,45 @@ class AdvancedAnalytics:
     def get_seasonal_analysis(self) -> Dict:
         """Analyze seasonal patterns in revenue and activity"""
         
+        if self.cube is not None:
+            seasonal_data = self.cube.query("""
+            SELECT 
+                CASE 
+                    WHEN c.month IN (12,1,2) THEN 'Winter'
+                    WHEN c.month IN (3,4,5) THEN 'Spring'
+                    WHEN c.month IN (6,7,8) THEN 'Summer'
+                    ELSE 'Fall'
+                END as season,
+                printf('%02d', c.month) as month,
+                SUM(c.txn_count) as total_transactions,
+                SUM(c.revenue) as total_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as avg_transaction_value,
+                COUNT(DISTINCT NULLIF(c.provider_id, 0)) as active_providers
+            FROM revenue_cube c
+            WHERE c.year > 0
+            GROUP BY c.month
+            ORDER BY c.month
+            """)
+            monthly_patterns = self.cube.query("""
+            SELECT 
+                printf('%02d', monthly_data.month) as month_num,
+                AVG(monthly_revenue) as avg_monthly_revenue,
+                AVG(monthly_transactions) as avg_monthly_transactions
+            FROM (
+                SELECT c.year, c.month, SUM(c.revenue) as monthly_revenue, SUM(c.txn_count) as monthly_transactions
+                FROM revenue_cube c
+                WHERE c.year > 0
+                GROUP BY c.year, c.month
+            ) monthly_data
+            GROUP BY monthly_data.month
+            ORDER BY monthly_data.month
+            """)
+            monthly_patterns.insert(1, 'month_name', [calendar.month_name[int(m)] for m in monthly_patterns['month_num']])
+            return {
+                'seasonal_summary': seasonal_data,
+                'monthly_averages': monthly_patterns
+            }
+        
         seasonal_query = """
         SELECT 
             CASE 
@@ -267,8 +463,8 @@ class AdvancedAnalytics:
         
         monthly_patterns_query = """
         SELECT 
-            strftime('%m', pt.transaction_date) as month_num,
-            CASE strftime('%m', pt.transaction_date)
+            monthly_data.month as month_num,
+            CASE monthly_data.month
                 WHEN '01' THEN 'January'
                 WHEN '02' THEN 'February'
                 WHEN '03' THEN 'March'
@@ -298,7 +494,7 @@ class AdvancedAnalytics:
         ORDER BY month_num
         """
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         
         seasonal_data = pd.read_sql_query(seasonal_query, conn)
         monthly_patterns = pd.read_sql_query(monthly_patterns_query, conn)
@@ -313,9 +509,24 @@ class AdvancedAnalytics:
     def get_business_growth_metrics(self) -> Dict:
         """Calculate key business growth and health metrics"""
         
-        # Growth trajectory analysis
-        growth_query = """
-        WITH yearly_metrics AS (
+        if self.engine is not None:
+            return self._get_business_growth_metrics_duckdb()
+        
+        if self.cube is not None:
+            yearly_metrics = """
+            SELECT 
+                printf('%04d', c.year) as year,
+                SUM(c.revenue) as annual_revenue,
+                SUM(c.txn_count) as annual_transactions,
+                COUNT(DISTINCT NULLIF(c.provider_id, 0)) as annual_providers,
+                (SELECT distinct_patients(m.patient_sketch) FROM revenue_cube_patients m WHERE m.year = c.year) as annual_patients
+            FROM revenue_cube c
+            WHERE c.year > 0
+            GROUP BY c.year
+            ORDER BY c.year
+            """
+        else:
+            yearly_metrics = """
             SELECT 
                 strftime('%Y', pt.transaction_date) as year,
                 SUM(pt.cash_applied) as annual_revenue,
@@ -326,7 +537,11 @@ class AdvancedAnalytics:
             WHERE pt.transaction_date IS NOT NULL
             GROUP BY year
             ORDER BY year
-        ),
+            """
+        
+        # Growth trajectory analysis
+        growth_query = f"""
+        WITH yearly_metrics AS ({yearly_metrics}),
         growth_rates AS (
             SELECT 
                 year,
@@ -347,23 +562,41 @@ class AdvancedAnalytics:
             annual_patients,
             CASE 
                 WHEN prev_revenue > 0 THEN 
-                    ((annual_revenue - prev_revenue) / prev_revenue) * 100
+                    (annual_revenue - prev_revenue) * 100.0 / prev_revenue
                 ELSE NULL 
             END as revenue_growth_rate,
             CASE 
                 WHEN prev_transactions > 0 THEN 
-                    ((annual_transactions - prev_transactions) / prev_transactions) * 100
+                    (annual_transactions - prev_transactions) * 100.0 / prev_transactions
                 ELSE NULL 
             END as transaction_growth_rate,
             CASE 
                 WHEN prev_providers > 0 THEN 
-                    ((annual_providers - prev_providers) / prev_providers) * 100
+                    (annual_providers - prev_providers) * 100.0 / prev_providers
                 ELSE NULL 
             END as provider_growth_rate
         FROM growth_rates
         ORDER BY year
         """
         
+        if self.cube is not None:
+            return {
+                'growth_trajectory': self.cube.query(growth_query),
+                'efficiency_metrics': self.cube.query("""
+                SELECT 
+                    printf('%04d', c.year) as year,
+                    SUM(c.revenue) / COUNT(DISTINCT NULLIF(c.provider_id, 0)) as revenue_per_provider,
+                    SUM(c.txn_count) / COUNT(DISTINCT NULLIF(c.provider_id, 0)) as transactions_per_provider,
+                    SUM(c.revenue) / (SELECT distinct_patients(m.patient_sketch) FROM revenue_cube_patients m WHERE m.year = c.year) as revenue_per_patient,
+                    SUM(c.txn_count) / (SELECT distinct_patients(m.patient_sketch) FROM revenue_cube_patients m WHERE m.year = c.year) as transactions_per_patient,
+                    SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as avg_transaction_value
+                FROM revenue_cube c
+                WHERE c.year > 0
+                GROUP BY c.year
+                ORDER BY c.year
+                """)
+            }
+        
         # Performance efficiency metrics
         efficiency_query = """
         SELECT 
@@ -379,7 +612,7 @@ class AdvancedAnalytics:
         ORDER BY year
         """
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         
         growth_data = pd.read_sql_query(growth_query, conn)
         efficiency_data = pd.read_sql_query(efficiency_query, conn)
@@ -391,11 +624,112 @@ class AdvancedAnalytics:
             'efficiency_metrics': efficiency_data
         }
     
+    def _get_business_growth_metrics_duckdb(self) -> Dict:
+        """Growth and efficiency metrics from the DuckDB engine (exact patient counts)"""
+        growth_data = self.engine.query("""
+        WITH yearly_metrics AS (
+            SELECT 
+                strftime(pt.transaction_date, '%Y') as year,
+                SUM(pt.cash_applied) as annual_revenue,
+                COUNT(*) as annual_transactions,
+                COUNT(DISTINCT pt.provider_id) as annual_providers,
+                COUNT(DISTINCT pt.patient_id) as annual_patients
+            FROM payment_transactions pt
+            WHERE pt.transaction_date IS NOT NULL
+            GROUP BY year
+        ),
+        growth_rates AS (
+            SELECT 
+                *,
+                LAG(annual_revenue) OVER (ORDER BY year) as prev_revenue,
+                LAG(annual_transactions) OVER (ORDER BY year) as prev_transactions,
+                LAG(annual_providers) OVER (ORDER BY year) as prev_providers
+            FROM yearly_metrics
+        )
+        SELECT 
+            year,
+            annual_revenue,
+            annual_transactions,
+            annual_providers,
+            annual_patients,
+            CASE WHEN prev_revenue > 0 THEN (annual_revenue - prev_revenue) * 100.0 / prev_revenue END as revenue_growth_rate,
+            CASE WHEN prev_transactions > 0 THEN (annual_transactions - prev_transactions) * 100.0 / prev_transactions END as transaction_growth_rate,
+            CASE WHEN prev_providers > 0 THEN (annual_providers - prev_providers) * 100.0 / prev_providers END as provider_growth_rate
+        FROM growth_rates
+        ORDER BY year
+        """)
+        
+        # // keeps the per-provider and per-patient counts whole, as in SQLite
+        efficiency_data = self.engine.query("""
+        SELECT 
+            strftime(pt.transaction_date, '%Y') as year,
+            SUM(pt.cash_applied) / COUNT(DISTINCT pt.provider_id) as revenue_per_provider,
+            COUNT(*) // COUNT(DISTINCT pt.provider_id) as transactions_per_provider,
+            SUM(pt.cash_applied) / COUNT(DISTINCT pt.patient_id) as revenue_per_patient,
+            COUNT(*) // COUNT(DISTINCT pt.patient_id) as transactions_per_patient,
+            AVG(pt.cash_applied) as avg_transaction_value
+        FROM payment_transactions pt
+        WHERE pt.transaction_date IS NOT NULL
+        GROUP BY year
+        ORDER BY year
+        """)
+        
+        return {
+            'growth_trajectory': growth_data,
+            'efficiency_metrics': efficiency_data
+        }
+    
+    def _lifecycle_cutoffs(self) -> Dict[str, str]:
+        """Reference time and status cutoffs for the lifecycle analysis
+        
+        Computed once here and passed to either engine, so SQLite and DuckDB
+        classify providers against the same dates.
+        """
+        as_of = pd.Timestamp.now(tz="UTC").tz_localize(None)
+        today = as_of.normalize()
+        return {
+            "as_of": as_of.isoformat(sep=" ", timespec="milliseconds"),
+            "recent_start": (today - pd.DateOffset(months=6)).strftime("%Y-%m-%d"),
+            "active_since": (today - pd.DateOffset(months=3)).strftime("%Y-%m-%d"),
+            "inactive_since": (today - pd.DateOffset(months=12)).strftime("%Y-%m-%d"),
+        }
+    
     def get_provider_lifecycle_analysis(self) -> pd.DataFrame:
-        """Analyze provider lifecycle: when they started, peak performance, current status"""
+        """Analyze provider lifecycle: when they started, peak performance, current status
+        
+        The peak is the provider's best six consecutive calendar months of
+        revenue, computed with one window over monthly revenue.
+        """
+        cutoffs = self._lifecycle_cutoffs()
+        if self.engine is not None:
+            return self._get_provider_lifecycle_duckdb(cutoffs)
         
         query = """
-        WITH provider_timeline AS (
+        WITH monthly AS (
+            SELECT 
+                provider_id,
+                CAST(strftime('%Y', transaction_date) AS INTEGER) * 12
+                    + CAST(strftime('%m', transaction_date) AS INTEGER) as month_index,
+                SUM(cash_applied) as monthly_revenue
+            FROM payment_transactions
+            WHERE date(transaction_date) IS NOT NULL
+            GROUP BY provider_id, month_index
+        ),
+        peaks AS (
+            -- Peak performance period (best 6-month period)
+            SELECT provider_id, MAX(six_month_revenue) as peak_six_month_revenue
+            FROM (
+                SELECT 
+                    provider_id,
+                    SUM(monthly_revenue) OVER (
+                        PARTITION BY provider_id ORDER BY month_index
+                        RANGE BETWEEN 5 PRECEDING AND CURRENT ROW
+                    ) as six_month_revenue
+                FROM monthly
+            )
+            GROUP BY provider_id
+        ),
+        provider_timeline AS (
             SELECT 
                 p.provider_name,
                 MIN(pt.transaction_date) as start_date,
@@ -403,42 +737,26 @@ class AdvancedAnalytics:
                 COUNT(*) as total_transactions,
                 SUM(pt.cash_applied) as lifetime_revenue,
                 AVG(pt.cash_applied) as avg_transaction_value,
-                
-                -- Peak performance period (best 6-month period)
-                (
-                    SELECT MAX(six_month_revenue)
-                    FROM (
-                        SELECT 
-                            SUM(pt2.cash_applied) as six_month_revenue
-                        FROM payment_transactions pt2
-                        WHERE pt2.provider_id = p.provider_id
-                            AND pt2.transaction_date BETWEEN pt.transaction_date 
-                            AND date(pt.transaction_date, '+6 months')
-                        GROUP BY strftime('%Y-%m', pt2.transaction_date)
-                    )
-                ) as peak_six_month_revenue,
+                MAX(pk.peak_six_month_revenue) as peak_six_month_revenue,
                 
                 -- Recent performance (last 6 months)
-                (
-                    SELECT COALESCE(SUM(pt3.cash_applied), 0)
-                    FROM payment_transactions pt3
-                    WHERE pt3.provider_id = p.provider_id
-                        AND pt3.transaction_date >= date('now', '-6 months')
-                ) as recent_six_month_revenue,
+                COALESCE(SUM(CASE WHEN pt.transaction_date >= :recent_start THEN pt.cash_applied END), 0)
+                    as recent_six_month_revenue,
                 
                 -- Activity status
                 CASE 
-                    WHEN MAX(pt.transaction_date) >= date('now', '-3 months') THEN 'Active'
-                    WHEN MAX(pt.transaction_date) >= date('now', '-12 months') THEN 'Inactive'
+                    WHEN MAX(pt.transaction_date) >= :active_since THEN 'Active'
+                    WHEN MAX(pt.transaction_date) >= :inactive_since THEN 'Inactive'
                     ELSE 'Departed'
                 END as status,
                 
                 -- Calculate days since first and last transaction
-                julianday('now') - julianday(MIN(pt.transaction_date)) as days_since_start,
-                julianday('now') - julianday(MAX(pt.transaction_date)) as days_since_last_transaction
+                julianday(:as_of) - julianday(MIN(pt.transaction_date)) as days_since_start,
+                julianday(:as_of) - julianday(MAX(pt.transaction_date)) as days_since_last_transaction
                 
             FROM providers p
             LEFT JOIN payment_transactions pt ON p.provider_id = pt.provider_id
+            LEFT JOIN peaks pk ON pk.provider_id = p.provider_id
             WHERE pt.transaction_date IS NOT NULL
             GROUP BY p.provider_id, p.provider_name
         )
@@ -462,12 +780,109 @@ class AdvancedAnalytics:
         ORDER BY lifetime_revenue DESC
         """
         
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query(query, conn)
+        conn = connect_db(self.db_path)
+        df = pd.read_sql_query(query, conn, params=cutoffs)
         conn.close()
         
         return df
     
+    def _get_provider_lifecycle_duckdb(self, cutoffs: Dict[str, str]) -> pd.DataFrame:
+        """Provider lifecycle from the DuckDB engine (same definitions as SQLite)"""
+        return self.engine.query("""
+        WITH monthly AS (
+            SELECT 
+                pt.provider_id,
+                date_trunc('month', pt.transaction_date) as month,
+                SUM(pt.cash_applied) as monthly_revenue
+            FROM payment_transactions pt
+            WHERE pt.transaction_date IS NOT NULL
+            GROUP BY pt.provider_id, month
+        ),
+        peaks AS (
+            SELECT provider_id, MAX(six_month_revenue) as peak_six_month_revenue
+            FROM (
+                SELECT 
+                    provider_id,
+                    SUM(monthly_revenue) OVER (
+                        PARTITION BY provider_id ORDER BY month
+                        RANGE BETWEEN INTERVAL 5 MONTH PRECEDING AND CURRENT ROW
+                    ) as six_month_revenue
+                FROM monthly
+            )
+            GROUP BY provider_id
+        ),
+        provider_timeline AS (
+            SELECT 
+                p.provider_name,
+                strftime(MIN(pt.transaction_date), '%Y-%m-%d') as start_date,
+                strftime(MAX(pt.transaction_date), '%Y-%m-%d') as last_transaction_date,
+                COUNT(*) as total_transactions,
+                SUM(pt.cash_applied) as lifetime_revenue,
+                AVG(pt.cash_applied) as avg_transaction_value,
+                ANY_VALUE(pk.peak_six_month_revenue) as peak_six_month_revenue,
+                COALESCE(SUM(pt.cash_applied) FILTER (
+                    WHERE pt.transaction_date >= CAST($2 AS DATE)
+                ), 0) as recent_six_month_revenue,
+                CASE 
+                    WHEN MAX(pt.transaction_date) >= CAST($3 AS DATE) THEN 'Active'
+                    WHEN MAX(pt.transaction_date) >= CAST($4 AS DATE) THEN 'Inactive'
+                    ELSE 'Departed'
+                END as status,
+                (epoch(CAST($1 AS TIMESTAMP)) - epoch(CAST(MIN(pt.transaction_date) AS TIMESTAMP))) / 86400.0
+                    as days_since_start,
+                (epoch(CAST($1 AS TIMESTAMP)) - epoch(CAST(MAX(pt.transaction_date) AS TIMESTAMP))) / 86400.0
+                    as days_since_last_transaction
+            FROM providers p
+            JOIN payment_transactions pt ON p.provider_id = pt.provider_id
+            LEFT JOIN peaks pk ON pk.provider_id = p.provider_id
+            WHERE pt.transaction_date IS NOT NULL
+            GROUP BY p.provider_id, p.provider_name
+        )
+        SELECT 
+            *,
+            CASE 
+                WHEN days_since_start < 365 THEN 'New (< 1 year)'
+                WHEN days_since_start < 1095 THEN 'Established (1-3 years)'
+                ELSE 'Veteran (3+ years)'
+            END as tenure_category,
+            lifetime_revenue / NULLIF(days_since_start / 365.0, 0) as annual_revenue_rate,
+            CASE 
+                WHEN recent_six_month_revenue > 0 AND peak_six_month_revenue > 0 THEN
+                    (recent_six_month_revenue / peak_six_month_revenue) * 100
+                ELSE 0
+            END as performance_relative_to_peak
+        FROM provider_timeline
+        ORDER BY lifetime_revenue DESC
+        """, [cutoffs["as_of"], cutoffs["recent_start"], cutoffs["active_since"], cutoffs["inactive_since"]])
+    
+    def get_provider_status(self) -> pd.DataFrame:
+        """Get each provider's lifetime revenue and activity status
+        
+        Reads the revenue cube when enabled; otherwise this is the full
+        provider lifecycle analysis.
+        """
+        if self.cube is None:
+            return self.get_provider_lifecycle_analysis()
+        
+        return self.cube.query("""
+        SELECT 
+            p.provider_name,
+            MIN(c.min_date) as start_date,
+            MAX(c.max_date) as last_transaction_date,
+            SUM(c.txn_count) as total_transactions,
+            SUM(c.revenue) as lifetime_revenue,
+            CASE 
+                WHEN MAX(c.max_date) >= date('now', '-3 months') THEN 'Active'
+                WHEN MAX(c.max_date) >= date('now', '-12 months') THEN 'Inactive'
+                ELSE 'Departed'
+            END as status
+        FROM revenue_cube c
+        JOIN providers p ON p.provider_id = c.provider_id
+        WHERE c.max_date IS NOT NULL
+        GROUP BY p.provider_id, p.provider_name
+        ORDER BY lifetime_revenue DESC
+        """)
+    
     def generate_executive_summary(self) -> Dict:
         """Generate a comprehensive executive summary of the business"""
         
@@ -476,7 +891,7 @@ class AdvancedAnalytics:
         yearly_trends = self.get_yearly_trends()
         growth_metrics = self.get_business_growth_metrics()
         payer_analysis = self.get_payer_analysis()
-        provider_lifecycle = self.get_provider_lifecycle_analysis()
+        provider_lifecycle = self.get_provider_status()
         seasonal_analysis = self.get_seasonal_analysis()
         
         # Calculate key insights
@@ -598,10 +1013,12 @@ def main():
     parser.add_argument('--summary', action='store_true', help='Generate executive summary')
     parser.add_argument('--full-report', action='store_true', help='Generate full analysis report')
     parser.add_argument('--years', nargs='+', help='Limit analysis to specific years')
+    parser.add_argument('--engine', choices=['sqlite', 'duckdb'],
+                        help='Engine for transaction-level queries (default: analytics.engine)')
     
     args = parser.parse_args()
     
-    analytics = AdvancedAnalytics()
+    analytics = AdvancedAnalytics(engine=args.engine)
     
     try:
         if args.summary:
@@ -0,0 +1,411 @@
+"""
+Query Templates for the HVLC_DB SQL Agent
+
+This module answers common question shapes (revenue by provider/month, payer
+comparison, top N) with parameterized SQL instead of the LangChain ReAct loop,
+and caches the SQL the agent generates for other questions so a repeated
+question skips the LLM entirely.
+"""
+
+import re
+import calendar
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from utils.entity_matcher import name_parts
+from utils.logger import get_logger
+from utils.response_cache import normalize_question
+
+logger = get_logger()
+
+REVENUE_TERMS = ("revenue", "collections", "collected", "income", "cash", "payments", "earned", "billing")
+PAYER_TERMS = ("payer", "payers", "insurance", "insurances", "insurer", "insurers")
+MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+
+_MONTHS = "|".join(MONTH_NAMES)
+_DAY = r"(?P<day>\d{1,2})(?:st|nd|rd|th)?"
+# A month name only counts as a date next to a year or a day, so the verb
+# "may" ("may I see...") is never read as May
+DATE_PATTERNS = (
+    re.compile(rf"\b(?P<month>{_MONTHS})\s+(?:{_DAY},?\s+)?(?:of\s+)?(?P<year>20\d{{2}})\b"),
+    re.compile(rf"\b{_DAY}\s+(?:of\s+)?(?P<month>{_MONTHS}),?\s+(?P<year>20\d{{2}})\b"),
+    re.compile(rf"\b(?P<month>{_MONTHS})\s+{_DAY}\b"),
+    re.compile(rf"\b{_DAY}\s+of\s+(?P<month>{_MONTHS})\b"),
+)
+YEAR_PATTERN = re.compile(r"\b(20\d{2})\b")
+
+# Constraints the templates have no parameter for; a question that has one is
+# left to the agent instead of being answered without it
+CPT_TERM_PATTERN = re.compile(r"\b(?:cpt|hcpcs|procedure codes?)\b")
+CPT_CODE_PATTERN = re.compile(r"\b\d{4}[0-9ft]\b")
+AMOUNT_PATTERN = re.compile(r"\b(?:over|under|above|below|more than|less than|greater than|at least|at most)\s+\$?\d")
+UNBOUND_TERMS = ("patient", "patients", "client", "clients", "claim", "claims", "denied", "denial", "denials",
+                 "copay", "copays", "self-pay", "self pay", "write-off", "write-offs", "adjustment", "adjustments",
+                 "refund", "refunds", "office", "offices", "location", "locations", "specialty", "service date",
+                 "excluding", "except", "other than", "without")
+RELATIVE_DATE_TERMS = ("today", "yesterday", "week", "weeks", "last month", "this month", "last year", "this year",
+                       "ytd", "year to date", "quarter", "q1", "q2", "q3", "q4", "since", "between", "before",
+                       "after", "until")
+# "from Aetna", "at Hendersonville": a capitalized name after a preposition
+NAME_PATTERN = re.compile(r"\b(?:from|for|with|at|in|on|by|to|via|through)\s+([A-Z][\w'&-]*)")
+NAME_STOPWORDS = {"the", "a", "an", "all", "each", "every", "our", "my", "this", "that", "last", "dr",
+                  "provider", "providers", "payer", "payers", "month", "months", "year", "revenue", "cpt"}
+
+# Number of LLM calls a ReAct SQL agent run is assumed to take before any
+# run has been observed (schema lookup, query check, query, answer)
+DEFAULT_LLM_CALLS_PER_RUN = 4
+
+
+@dataclass
+class QueryPlan:
+    """A SQL statement ready to execute for a question"""
+    name: str
+    sql: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    description: str = ""
+
+
+def _has_any(text: str, terms: Sequence[str]) -> bool:
+    return any(re.search(rf"\b{re.escape(term)}\b", text) for term in terms)
+
+
+def _find_date(question: str) -> Optional[re.Match]:
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(question)
+        if match:
+            return match
+    return None
+
+
+def extract_date_range(question: str) -> Optional[Dict[str, str]]:
+    """Extract a half-open [start, end) date range from a question
+
+    A month name next to a year gives that month, a month and day give that
+    day, and a bare year gives the whole year. The range is compared
+    directly against transaction_date so the idx_payment_date /
+    idx_payment_provider_date indexes can be used.
+
+    Args:
+        question: Lowercased question
+
+    Returns:
+        Dictionary with 'start' and 'end' (ISO dates), or None
+    """
+    match = _find_date(question)
+    year_match = YEAR_PATTERN.search(question)
+    year = int(match.group("year") if match and match.groupdict().get("year") else
+               year_match.group(1) if year_match else 0)
+    if not year:
+        return None
+    if not match:
+        return {"start": f"{year}-01-01", "end": f"{year + 1}-01-01"}
+
+    month = MONTH_NAMES[match.group("month")]
+    if match.groupdict().get("day"):
+        try:
+            day = date(year, month, int(match.group("day")))
+        except ValueError:
+            return None
+        return {"start": day.isoformat(), "end": (day + timedelta(days=1)).isoformat()}
+
+    end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return {"start": f"{year}-{month:02d}-01", "end": f"{end_year}-{end_month:02d}-01"}
+
+
+def find_provider(question: str, providers: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """Find a provider mentioned by full or last name
+
+    Args:
+        question: Lowercased question
+        providers: Mapping of provider name to provider_id
+
+    Returns:
+        Dictionary with 'name' and 'provider_id', or None
+    """
+    for name, provider_id in providers.items():
+        words = [w for w in re.findall(r"[a-z]+", name.lower()) if len(w) > 2 and w != "dr"]
+        if words and (name.lower() in question or re.search(rf"\b{re.escape(words[-1])}\b", question)):
+            return {"name": name, "provider_id": provider_id}
+    return None
+
+
+def find_unbound_filters(question: str, providers: Dict[str, int], payers: Sequence[str] = (),
+                         provider: Optional[Dict[str, Any]] = None) -> Set[str]:
+    """Find constraints in a question that the templates cannot bind
+
+    Args:
+        question: Natural language question (original case)
+        providers: Mapping of provider name to provider_id
+        payers: Known payer names
+        provider: Provider the templates bound (from find_provider)
+
+    Returns:
+        Set of constraint kinds: 'payer' and 'cpt' for a payer or CPT
+        dimension (which the payer and CPT templates group by), 'filter' for
+        anything else (a named payer, a CPT code, another provider, a date
+        the range does not cover, ...)
+    """
+    q = question.lower()
+    kinds = set()
+    if _has_any(q, PAYER_TERMS):
+        kinds.add("payer")
+    if CPT_TERM_PATTERN.search(q):
+        kinds.add("cpt")
+
+    bound_words = set(name_parts(provider["name"])) if provider else set()
+    other_names = {part for name in providers if not provider or name != provider["name"]
+                   for part in name_parts(name)} - bound_words
+    date_match = _find_date(q)
+    stray_months = [name for name in MONTH_NAMES if name != "may" and re.search(rf"\b{name}\b", q)
+                    and not (date_match and date_match.group("month") == name)]
+    names = [word for word in NAME_PATTERN.findall(question)
+             if word.lower().rstrip(".") not in NAME_STOPWORDS | bound_words and word.lower() not in MONTH_NAMES]
+
+    if (CPT_CODE_PATTERN.search(q) or AMOUNT_PATTERN.search(q)
+            or _has_any(q, UNBOUND_TERMS) or _has_any(q, RELATIVE_DATE_TERMS)
+            or _has_any(q, [payer.lower() for payer in payers if payer])
+            or _has_any(q, sorted(other_names))
+            or len(set(YEAR_PATTERN.findall(q))) > 1 or stray_months or names):
+        kinds.add("filter")
+    return kinds
+
+
+class QueryTemplateMatcher:
+    """Maps recognized question intents to parameterized SQL"""
+
+    def match(self, question: str, providers: Optional[Dict[str, int]] = None,
+              payers: Optional[Sequence[str]] = None) -> Optional[QueryPlan]:
+        """Match a question against the known templates
+
+        A question with a constraint the matching template cannot bind (a
+        payer, a CPT code, a relative date, ...) returns None, so the agent
+        answers it instead of the template answering without the constraint.
+
+        Args:
+            question: Natural language question
+            providers: Mapping of provider name to provider_id
+            payers: Known payer names
+
+        Returns:
+            QueryPlan for the first matching template, or None
+        """
+        q = question.lower()
+        params: Dict[str, Any] = {}
+        conditions = []
+        scope = []
+
+        date_range = extract_date_range(q)
+        if date_range:
+            params.update(date_range)
+            conditions.append("pt.transaction_date >= :start AND pt.transaction_date < :end")
+            scope.append(f"{date_range['start']} to {date_range['end']}")
+
+        provider = find_provider(q, providers or {})
+        if provider:
+            params["provider_id"] = provider["provider_id"]
+            conditions.append("pt.provider_id = :provider_id")
+            scope.append(provider["name"])
+
+        unbound = find_unbound_filters(question, providers or {}, payers or (), provider)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        suffix = f" ({', '.join(scope)})" if scope else ""
+        mentions_revenue = _has_any(q, REVENUE_TERMS)
+
+        def plan(name: str, sql: str, description: str, binds: Sequence[str] = ()) -> Optional[QueryPlan]:
+            leftover = unbound - set(binds)
+            if leftover:
+                logger.debug(f"Template '{name}' cannot bind {sorted(leftover)}; leaving the question to the agent")
+                return None
+            return QueryPlan(name, sql, params, description)
+
+        top = re.search(r"\btop\s+(?:(\d+)\s+)?(providers?|payers?|insurances?|cpt codes?|procedures?)\b", q)
+        if top:
+            params["limit"] = int(top.group(1) or 5)
+            target = top.group(2)
+            if target.startswith("provider"):
+                return plan("top_providers", f"""
+                    SELECT p.provider_name, COUNT(*) AS transactions, ROUND(SUM(pt.cash_applied), 2) AS revenue
+                    FROM payment_transactions pt JOIN providers p ON p.provider_id = pt.provider_id
+                    {where}
+                    GROUP BY p.provider_name ORDER BY revenue DESC LIMIT :limit""",
+                    f"Top {params['limit']} providers by revenue{suffix}")
+            if target.startswith(("payer", "insurance")):
+                return plan("top_payers", f"""
+                    SELECT COALESCE(pt.payer_name, 'Unknown') AS payer, COUNT(*) AS transactions,
+                           ROUND(SUM(pt.cash_applied), 2) AS revenue
+                    FROM payment_transactions pt
+                    {where}
+                    GROUP BY payer ORDER BY revenue DESC LIMIT :limit""",
+                    f"Top {params['limit']} payers by revenue{suffix}", binds=("payer",))
+            return plan("top_cpt_codes", f"""
+                SELECT pt.cpt_code, COUNT(*) AS transactions, ROUND(SUM(pt.cash_applied), 2) AS revenue
+                FROM payment_transactions pt
+                {where}
+                GROUP BY pt.cpt_code ORDER BY transactions DESC LIMIT :limit""",
+                f"Top {params['limit']} CPT codes by volume{suffix}", binds=("cpt",))
+
+        if _has_any(q, ("payer", "payers", "insurance", "insurances")) and \
+                _has_any(q, ("compare", "comparison", "vs", "versus", "breakdown", "by payer", "per payer", "each payer")):
+            return plan("payer_comparison", f"""
+                SELECT COALESCE(pt.payer_name, 'Unknown') AS payer, COUNT(*) AS transactions,
+                       ROUND(SUM(pt.cash_applied), 2) AS revenue, ROUND(AVG(pt.cash_applied), 2) AS avg_payment
+                FROM payment_transactions pt
+                {where}
+                GROUP BY payer ORDER BY revenue DESC""",
+                f"Payer comparison{suffix}", binds=("payer",))
+
+        if not mentions_revenue:
+            return None
+
+        by_month = _has_any(q, ("by month", "per month", "each month", "monthly", "month by month"))
+        by_provider = _has_any(q, ("by provider", "per provider", "each provider", "providers"))
+
+        if by_month and by_provider:
+            return plan("revenue_by_provider_month", f"""
+                SELECT p.provider_name, strftime('%Y-%m', pt.transaction_date) AS month,
+                       COUNT(*) AS transactions, ROUND(SUM(pt.cash_applied), 2) AS revenue
+                FROM payment_transactions pt JOIN providers p ON p.provider_id = pt.provider_id
+                {where}
+                GROUP BY p.provider_name, month ORDER BY month, p.provider_name""",
+                f"Revenue by provider and month{suffix}")
+
+        if by_month:
+            return plan("revenue_by_month", f"""
+                SELECT strftime('%Y-%m', pt.transaction_date) AS month,
+                       COUNT(*) AS transactions, ROUND(SUM(pt.cash_applied), 2) AS revenue
+                FROM payment_transactions pt
+                {where}
+                GROUP BY month ORDER BY month""",
+                f"Revenue by month{suffix}")
+
+        if by_provider:
+            return plan("revenue_by_provider", f"""
+                SELECT p.provider_name, COUNT(*) AS transactions, ROUND(SUM(pt.cash_applied), 2) AS revenue
+                FROM payment_transactions pt JOIN providers p ON p.provider_id = pt.provider_id
+                {where}
+                GROUP BY p.provider_name ORDER BY revenue DESC""",
+                f"Revenue by provider{suffix}")
+
+        if _has_any(q, ("total", "how much", "overall")):
+            return plan("total_revenue", f"""
+                SELECT COUNT(*) AS transactions, ROUND(SUM(pt.cash_applied), 2) AS revenue
+                FROM payment_transactions pt
+                {where}""",
+                f"Total revenue{suffix}")
+
+        return None
+
+
+class SQLPlanCache:
+    """LRU cache of LLM-generated SQL keyed by normalized question and schema hash"""
+
+    def __init__(self, max_entries: int = 256):
+        """Initialize plan cache
+
+        Args:
+            max_entries: Maximum number of cached statements
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question: str, schema_hash: str) -> Optional[str]:
+        """Get the cached SQL for a question, if any"""
+        key = (normalize_question(question), schema_hash)
+        with self._lock:
+            sql = self._entries.get(key)
+            if sql is not None:
+                self._entries.move_to_end(key)
+            return sql
+
+    def put(self, question: str, schema_hash: str, sql: str):
+        """Cache the SQL the agent used to answer a question"""
+        key = (normalize_question(question), schema_hash)
+        with self._lock:
+            self._entries[key] = sql
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QueryStats:
+    """Counts how questions were answered and how many LLM calls that saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.template_hits = 0
+        self.plan_cache_hits = 0
+        self.agent_runs = 0
+        self.agent_llm_calls = 0
+        self.hit_llm_calls = 0
+
+    def record_hit(self, kind: str, llm_calls: int = 0):
+        """Record a template ('template') or plan cache ('plan_cache') hit
+
+        Args:
+            kind: Which layer answered
+            llm_calls: LLM calls the hit still needed (e.g. to phrase rows)
+        """
+        with self._lock:
+            self.hit_llm_calls += llm_calls
+            if kind == "template":
+                self.template_hits += 1
+            else:
+                self.plan_cache_hits += 1
+
+    def record_agent_run(self, llm_calls: int):
+        """Record an agent run and the LLM calls it made"""
+        with self._lock:
+            self.agent_runs += 1
+            self.agent_llm_calls += llm_calls
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get statistics including hit rate and estimated LLM calls saved"""
+        with self._lock:
+            hits = self.template_hits + self.plan_cache_hits
+            total = hits + self.agent_runs
+            calls_per_run = (self.agent_llm_calls / self.agent_runs
+                             if self.agent_runs and self.agent_llm_calls else DEFAULT_LLM_CALLS_PER_RUN)
+            return {
+                "template_hits": self.template_hits,
+                "plan_cache_hits": self.plan_cache_hits,
+                "agent_runs": self.agent_runs,
+                "hit_rate": hits / total if total else 0.0,
+                "llm_calls_saved": max(round(hits * calls_per_run) - self.hit_llm_calls, 0),
+            }
+
+
+def format_rows(description: str, rows: List[Dict[str, Any]], max_rows: int = 25) -> str:
+    """Format query rows as a short bulleted answer
+
+    Args:
+        description: What the rows show
+        rows: Result rows as dictionaries
+        max_rows: Maximum rows to list
+
+    Returns:
+        Formatted answer text
+    """
+    if not rows:
+        return f"{description}: no matching transactions found."
+
+    lines = [f"{description}:"]
+    for row in rows[:max_rows]:
+        parts = []
+        for column, value in row.items():
+            if isinstance(value, float) and column in ("revenue", "avg_payment"):
+                parts.append(f"{column}: ${value:,.2f}")
+            else:
+                parts.append(f"{column}: {value}")
+        lines.append("• " + " | ".join(parts))
+
+    if len(rows) > max_rows:
+        lines.append(f"... and {len(rows) - max_rows} more rows")
+
+    return "\n".join(lines)
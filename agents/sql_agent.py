@@ -14,13 +14,49 @@ from langchain_community.utilities import SQLDatabase
 from langchain_ollama import Ollama
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+from langchain.callbacks.base import BaseCallbackHandler
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.schema_catalog import get_schema_catalog
+from utils.fact_snapshot import get_fact_snapshot
+from agents.query_templates import QueryTemplateMatcher, SQLPlanCache, QueryStats, format_rows
 
 logger = get_logger()
 config = get_config()
 
+class SQLCaptureHandler(BaseCallbackHandler):
+    """Records the SQL an agent run executed and how many LLM calls it made"""
+    
+    def __init__(self):
+        self.llm_calls = 0
+        self.queries: List[str] = []
+        self._pending_sql = None
+    
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.llm_calls += 1
+    
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.llm_calls += 1
+    
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self._pending_sql = input_str if name == "sql_db_query" else None
+    
+    def on_tool_end(self, output, **kwargs):
+        if self._pending_sql and not str(output).startswith("Error"):
+            self.queries.append(self._pending_sql.strip())
+        self._pending_sql = None
+    
+    def on_tool_error(self, error, **kwargs):
+        self._pending_sql = None
+    
+    @property
+    def plan_sql(self) -> Optional[str]:
+        """The SQL behind the answer, if the run executed exactly one query"""
+        return self.queries[0] if len(self.queries) == 1 else None
+
 class MedicalBillingSQLAgent:
     """SQL Agent for natural language queries to medical billing database"""
     
@@ -39,6 +75,13 @@ class MedicalBillingSQLAgent:
         self.ollama_url = ollama_url or config.get("ollama.homelab_url") or config.get("ollama.laptop_url")
         self.model = model or config.get("ollama.homelab_model") or config.get("ollama.laptop_model")
         self.verbose = verbose
+        self._engine = None
+        
+        # Template layer and plan cache in front of the ReAct agent
+        self.use_templates = config.get("sql_agent.query_templates", True)
+        self.template_matcher = QueryTemplateMatcher()
+        self.plan_cache = SQLPlanCache(config.get("sql_agent.plan_cache_size", 256))
+        self.query_stats = QueryStats()
         
         logger.info(f"Initializing SQL Agent with DB: {self.db_url}")
         logger.info(f"Using Ollama at {self.ollama_url} with model {self.model}")
@@ -82,14 +125,102 @@ class MedicalBillingSQLAgent:
     def get_schema_str(self) -> str:
         """Get the database schema as a string
         
+        Uses the cached schema catalog instead of SQLDatabase.get_table_info(),
+        which samples rows from every table on each call.
+        
+        Returns:
+            A compact one-line-per-table representation of the database schema
+        """
+        return get_schema_catalog(self.db_url).get_schema_str()
+    
+    def get_schema_hash(self) -> str:
+        """Get a hash of the database schema, used to key cached SQL
+        
         Returns:
-            A string representation of the database schema
+            Short hex digest of the cached schema catalog
         """
-        return self.db.get_table_info()
+        return get_schema_catalog(self.db_url).get_hash()
+    
+    def _get_providers(self) -> Dict[str, int]:
+        """Get a mapping of provider name to provider_id"""
+        result = self.execute_direct_sql("SELECT provider_id, provider_name FROM providers")
+        if not result.get("success"):
+            return {}
+        return {row["provider_name"]: row["provider_id"] for row in result["rows"]}
+    
+    def _get_payers(self) -> List[str]:
+        """Get the known payer names (from the fact snapshot, cached per data version)"""
+        url = make_url(self.db_url)
+        if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+            return []
+        return get_fact_snapshot(url.database).payers
+    
+    def _answer_without_agent(self, query: str, schema_hash: str) -> Optional[str]:
+        """Answer from a query template or cached SQL, skipping the LLM
+        
+        Args:
+            query: The natural language query
+            schema_hash: Current schema hash
+            
+        Returns:
+            Formatted answer, or None if the agent has to run
+        """
+        if self.use_templates:
+            plan = self.template_matcher.match(query, self._get_providers(), self._get_payers())
+            if plan:
+                result = self.execute_direct_sql(plan.sql, plan.params)
+                if result.get("success"):
+                    self.query_stats.record_hit("template")
+                    logger.info(f"Answered with query template '{plan.name}'")
+                    return format_rows(plan.description, result["rows"])
+        
+        cached_sql = self.plan_cache.get(query, schema_hash)
+        if cached_sql:
+            result = self.execute_direct_sql(cached_sql)
+            if result.get("success"):
+                answer = self._summarize_rows(query, result["rows"])
+                if answer is not None:
+                    self.query_stats.record_hit("plan_cache", llm_calls=1)
+                    logger.info("Answered with cached SQL plan")
+                    return answer
+        
+        return None
+    
+    def _summarize_rows(self, query: str, rows: List[Dict[str, Any]]) -> Optional[str]:
+        """Phrase replayed query rows as an answer with a single LLM call
+        
+        Args:
+            query: The natural language query
+            rows: Rows returned by the cached SQL
+            
+        Returns:
+            Answer text, or None if the LLM call failed
+        """
+        prompt = f"""
+        You are analyzing medical billing data. The following rows were returned by
+        a SQL query written to answer the question below.
+        
+        Question: {query}
+        
+        {format_rows("Query results", rows)}
+        
+        Format your final answer in a clear, concise way with any relevant numbers.
+        Use bullet points for multiple items and include summary statistics where appropriate.
+        """
+        try:
+            return str(self.llm.invoke(prompt)).strip()
+        except Exception as e:
+            logger.warning(f"Could not summarize cached SQL plan results: {e}")
+            return None
     
     def process_query(self, query: str) -> str:
         """Process a natural language query using the SQL agent
         
+        Recognized question shapes are answered from parameterized SQL
+        templates. Repeated questions replay the single query the agent ran
+        before and have one LLM call phrase the rows; the ReAct agent only
+        runs on a miss.
+        
         Args:
             query: The natural language query to process
             
@@ -99,6 +230,12 @@ class MedicalBillingSQLAgent:
         try:
             logger.info(f"Processing SQL agent query: {query}")
             
+            schema_hash = self.get_schema_hash()
+            answer = self._answer_without_agent(query, schema_hash)
+            if answer is not None:
+                logger.info(f"SQL agent stats: {self.query_stats.as_dict()}")
+                return answer
+            
             # Format the query with medical billing context
             enhanced_query = f"""
             You are analyzing medical billing data. The database contains information about
@@ -111,9 +248,15 @@ class MedicalBillingSQLAgent:
             Use bullet points for multiple items and include summary statistics where appropriate.
             """
             
-            # Execute the query
-            result = self.agent.run(enhanced_query)
+            # Execute the query, recording the SQL it ran for the plan cache
+            capture = SQLCaptureHandler()
+            result = self.agent.run(enhanced_query, callbacks=[capture])
+            self.query_stats.record_agent_run(capture.llm_calls)
+            # Multi-query runs can't be replayed from one statement
+            if capture.plan_sql:
+                self.plan_cache.put(query, schema_hash, capture.plan_sql)
             logger.info(f"SQL agent query completed successfully")
+            logger.info(f"SQL agent stats: {self.query_stats.as_dict()}")
             
             return result
             
@@ -121,24 +264,34 @@ class MedicalBillingSQLAgent:
             logger.error(f"Error processing SQL agent query: {e}")
             return f"I encountered an error while processing your query: {str(e)}"
     
-    def execute_direct_sql(self, sql_query: str) -> Dict[str, Any]:
+    def get_query_stats(self) -> Dict[str, Any]:
+        """Get template/plan cache hit statistics
+        
+        Returns:
+            Dictionary with hits, agent runs, hit rate and LLM calls saved
+        """
+        return {**self.query_stats.as_dict(), "cached_plans": len(self.plan_cache)}
+    
+    def execute_direct_sql(self, sql_query: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Execute a raw SQL query directly
         
         Args:
             sql_query: The SQL query to execute
+            params: Named bind parameters (``:name`` placeholders)
             
         Returns:
             Dictionary with query results
         """
         try:
-            logger.info(f"Executing direct SQL query: {sql_query}")
+            logger.debug(f"Executing direct SQL query: {sql_query}")
             
-            # Create an engine directly for this query
-            engine = create_engine(self.db_url)
+            # Reuse one engine (and its connection pool) across queries
+            if self._engine is None:
+                self._engine = create_engine(self.db_url)
             
             # Execute the query
-            with engine.connect() as conn:
-                result = conn.execute(text(sql_query))
+            with self._engine.connect() as conn:
+                result = conn.execute(text(sql_query), params or {})
                 
                 # Get column names
                 columns = result.keys()
@@ -171,7 +324,7 @@ class MedicalBillingSQLAgent:
         Returns:
             List of table names
         """
-        return self.db.get_usable_table_names()
+        return get_schema_catalog(self.db_url).list_tables()
     
     def get_table_info(self, table_name: str) -> str:
         """Get information about a specific table
@@ -20,6 +20,9 @@ from api.routes.operations import operations_bp
 from api.routes.analytics import analytics_bp
 from api.config import Config
 from api.utils.error_handlers import register_error_handlers
+from utils.config import get_config
+from utils.model_residency import get_model_residency
+from utils.import_jobs import get_import_queue
 
 def create_app(config_class=Config):
     """Create and configure the Flask application.
@@ -57,6 +60,16 @@ def create_app(config_class=Config):
     # Create uploads directory if it doesn't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # Load the chat models in the background so the first question does not
+    # pay for a cold start
+    if not app.config.get('TESTING') and get_config().get('ollama.warm_up', True):
+        get_model_residency().warm_up_async()
+    
+    # Resume import jobs queued before a restart instead of waiting for the
+    # files API to be hit
+    if not app.config.get('TESTING'):
+        get_import_queue(app.config['DATABASE_PATH'])
+    
     # Root endpoint for API health check
     @app.route('/api/health')
     def health_check():
@@ -8,6 +8,7 @@ and custom instructions.
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.exceptions import BadRequest
 from utils.ada_memory import AdaMemory, AdaPersonalityManager
+from utils.db_open import connect_db
 import os
 
 # Create Blueprint
@@ -150,9 +151,7 @@ def delete_instruction(instruction_id):
         # Deactivate instead of delete to preserve history
         conn = memory.conn if hasattr(memory, "conn") else None
         if not conn:
-            import sqlite3
-
-            conn = sqlite3.connect(memory.db_path)
+            conn = connect_db(memory.db_path)
 
         cursor = conn.execute(
             """
@@ -8,6 +8,7 @@ import sqlite3
 import re
 import random
 import os
+import time
 import requests
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.exceptions import BadRequest
@@ -19,10 +20,30 @@ from api.routes.ai_data_info import (
     get_database_summary,
 )
 from utils.ada_memory import AdaMemory
+from utils.context_packer import ContextPacker, ContextSection, log_prompt_metrics
+from utils.data_version import get_data_version
+from utils.entity_matcher import ALIAS, NAME_PART, PROVIDER
+from utils.fact_snapshot import get_fact_snapshot
+from utils.model_residency import get_model_residency
+from utils.response_cache import get_response_cache
+from utils.db_open import connect_db
 
 # Create Blueprint
 ai_bp = Blueprint("ai", __name__)
 
+# Fallback responses returned when Ollama cannot answer (never cached)
+AI_RETRY_RESPONSE = (
+    "I'm having trouble processing that right now. Could you "
+    "rephrase your question? I can help you analyze provider "
+    "performance, revenue trends, payer relationships, or any "
+    "other aspect of your medical billing data using your actual "
+    "data."
+)
+AI_UNAVAILABLE_RESPONSE = (
+    "I'm having trouble connecting to the AI service right now. "
+    "Please try again later."
+)
+
 # Initialize Ada memory system
 ada_memory = None
 
@@ -43,7 +64,7 @@ def get_db_connection():
     """Get database connection."""
     try:
         db_path = current_app.config.get("DATABASE_PATH", "medical_billing.db")
-        conn = sqlite3.connect(db_path)
+        conn = connect_db(db_path)
         conn.row_factory = sqlite3.Row
         return conn
     except Exception as e:
@@ -107,6 +128,7 @@ def ai_status():
             "transaction_count": transaction_count,
             "csv_file_count": csv_file_count,
             "csv_categories": list(csv_categories),
+            "model_residency": get_model_residency().get_stats(),
         }
     )
 
@@ -260,7 +282,45 @@ Use ONLY the numbers provided above. Do not make up any figures.
                 )
 
         # Universal conversational AI for all other questions
-        data_context = build_universal_data_context(message)
+        sections = detect_data_sections(message, provider_names)
+        cache = get_response_cache()
+        use_cache = config.get("response_cache.enabled", True) and not data.get(
+            "bypass_cache", False
+        )
+
+        if use_cache:
+            data_version = get_data_version(current_app.config.get("DATABASE_PATH"))
+            cached = cache.get(message, sections, data_version)
+            if cached:
+                current_app.logger.info(
+                    f"Serving {cached['match']} cached response "
+                    f"(similarity {cached['similarity']:.3f})"
+                )
+                response = cached["response"]
+                return jsonify(
+                    {
+                        "message": message,
+                        "response": response,
+                        "history": history
+                        + [
+                            {"role": "user", "content": message},
+                            {"role": "assistant", "content": response},
+                        ],
+                        "elapsed_time": 0.0,
+                        "ai_mode": "universal_conversational",
+                        "cached": True,
+                        "cache_match": cached["match"],
+                    }
+                )
+
+        # Pick the model first so the data context is packed into its budget
+        ollama_config = get_optimized_chat_config(message)
+        data_context = build_universal_data_context(
+            message,
+            provider_names,
+            sections,
+            model=ollama_config.get("model") if ollama_config else None,
+        )
 
         # Create intelligent conversational prompt
         user_prompt = f"""The user asked: "{message}"
@@ -286,7 +346,7 @@ Response:"""
 
         # Get conversational response with enhanced context
         response = call_ollama_with_enhanced_context(
-            user_prompt, conversation_context, memory
+            user_prompt, conversation_context, memory, ollama_config=ollama_config
         )
 
         # Store this interaction in Ada's memory
@@ -302,6 +362,12 @@ Response:"""
                 tags=["conversation", "universal_ai"],
             )
 
+            if use_cache and response not in (
+                AI_RETRY_RESPONSE,
+                AI_UNAVAILABLE_RESPONSE,
+            ):
+                cache.put(message, sections, data_version, response)
+
         # Create updated history
         updated_history = history + [
             {"role": "user", "content": message},
@@ -315,6 +381,7 @@ Response:"""
                 "history": updated_history,
                 "elapsed_time": 0.5,
                 "ai_mode": "universal_conversational",
+                "cached": False,
             }
         )
 
@@ -362,6 +429,7 @@ def call_ollama(prompt, system_message=None):
     model = config.get("ollama.laptop_model", "llama3.1:8b")
     temperature = config.get("ollama.temperature", 0.7)
     timeout = config.get("ollama.timeout", 60)
+    residency = get_model_residency()
 
     # Create messages array
     messages = []
@@ -385,12 +453,14 @@ def call_ollama(prompt, system_message=None):
 
     try:
         # Make the request to Ollama
+        start_time = time.time()
         response = requests.post(
             f"{ollama_url}/api/chat",
             json={
                 "model": model,
                 "messages": messages,
                 "stream": False,
+                "keep_alive": residency.keep_alive,
                 "options": {"temperature": temperature},
             },
             timeout=timeout,
@@ -398,7 +468,13 @@ def call_ollama(prompt, system_message=None):
 
         # Check if request was successful
         if response.status_code == 200:
-            return response.json()["message"]["content"]
+            result = response.json()
+            elapsed = time.time() - start_time
+            log_prompt_metrics(
+                model, "".join(m["content"] for m in messages), result, elapsed
+            )
+            residency.record_response(model, result, elapsed, url=ollama_url)
+            return result["message"]["content"]
         else:
             current_app.logger.error(
                 f"Ollama API error: {response.status_code} - {response.text}"
@@ -536,42 +612,42 @@ Response:"""
 def extract_provider_names(message):
     """Extract provider names from message"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT provider_name FROM providers")
-        all_providers = cursor.fetchall()
-        conn.close()
-
-        all_providers = sorted(
-            [p["provider_name"] for p in all_providers], key=len, reverse=True
-        )
-        provider_names = []
-
-        message_lower = message.lower()
-
-        # First pass: exact matches
-        for provider in all_providers:
-            if provider.lower() in message_lower:
-                provider_names.append(provider)
-
-        # Second pass: partial matches
-        if len(provider_names) < 2:
-            for provider in all_providers:
-                if provider not in provider_names:
-                    name_parts = provider.lower().split()
-                    for part in name_parts:
-                        if len(part) > 2 and part in message_lower:
-                            provider_names.append(provider)
-                            break
-                if len(provider_names) >= 2:
-                    break
-
-        return provider_names[:2]  # Return max 2 providers
+        return match_provider_names(message, active_only=False)
     except Exception as e:
         current_app.logger.error(f"Error extracting provider names: {e}")
         return []
 
 
+def match_provider_names(message, active_only=True, limit=2):
+    """Find the providers a message refers to with the shared entity matcher
+
+    Full names and aliases come first; if fewer than `limit` are found,
+    providers whose first or last name appears are added. Longer names
+    win ties, as in the old per-name substring checks.
+
+    Args:
+        message: User message
+        active_only: Only consider active providers
+        limit: Maximum number of providers to return
+
+    Returns:
+        List of provider names
+    """
+    facts = get_fact_snapshot(current_app.config.get("DATABASE_PATH", "medical_billing.db"))
+    candidates = facts.providers if active_only else list(facts.provider_stats)
+    all_providers = sorted(candidates, key=len, reverse=True)
+
+    exact, partial = set(), set()
+    for match in facts.matcher.find(message, kinds=[PROVIDER, ALIAS, NAME_PART]):
+        (partial if match.kind == NAME_PART else exact).add(match.value)
+
+    provider_names = [provider for provider in all_providers if provider in exact]
+    if len(provider_names) < limit:
+        provider_names += [provider for provider in all_providers
+                           if provider in partial and provider not in exact]
+    return provider_names[:limit]
+
+
 def extract_user_name(history):
     """Try to extract user's name from conversation history."""
     # Look for introduction patterns in previous messages
@@ -981,100 +1057,163 @@ knowledgeable about:
         )
 
 
-def build_universal_data_context(message):
-    """Build relevant data context for any question about the dataset."""
+EXPENSE_TERMS = [
+    "expense",
+    "cost",
+    "overhead",
+    "spending",
+    "budget",
+    "cvlc_expenses",
+    "hvlc_expenses",
+    "monthly costs",
+    "fixed costs",
+    "variable costs",
+]
+
+BUSINESS_TERMS = [
+    "business",
+    "revenue",
+    "profit",
+    "growth",
+    "performance",
+    "money",
+    "financial",
+    "trends",
+]
+
+PAYER_TERMS = ["payer", "insurance", "bcbs", "aetna", "payment", "claims"]
+
+
+def detect_data_sections(message, provider_names):
+    """Determine which data sections a question's context is built from.
+
+    Args:
+        message (str): The user's question
+        provider_names (list): Provider names mentioned in the question
+
+    Returns:
+        list: Section identifiers, e.g. ["provider:Dustin Nisley", "business"]
+    """
+    message_lower = message.lower()
+    sections = []
+
+    if len(provider_names) == 2:
+        sections.append(f"comparison:{provider_names[0]}|{provider_names[1]}")
+    else:
+        sections.extend(f"provider:{provider}" for provider in provider_names)
+
+    if any(term in message_lower for term in EXPENSE_TERMS):
+        sections.append("expenses")
+
+    if any(term in message_lower for term in BUSINESS_TERMS):
+        sections.append("business")
+
+    if any(term in message_lower for term in PAYER_TERMS):
+        sections.append("payers")
+
+    date_context = extract_date_context(message)
+    if date_context:
+        sections.append(f"period:{date_context}")
+
+    if not sections:
+        sections.append("general")
+
+    return sections
+
+
+def build_universal_data_context(message, provider_names=None, sections=None, model=None):
+    """Build relevant data context for any question about the dataset.
+
+    The matching sections are ranked by relevance to the question and packed
+    into the prompt budget of ``model`` (the laptop model's smaller budget
+    when not given).
+    """
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        message_lower = message.lower()
-        data_context = ""
+        context_sections = []
 
         # Extract any provider names mentioned
-        provider_names = extract_provider_names_universal(message, cursor)
+        if provider_names is None:
+            provider_names = extract_provider_names_universal(message, cursor)
+        if sections is None:
+            sections = detect_data_sections(message, provider_names)
 
-        # Get provider-specific data if providers mentioned
-        if provider_names:
-            if len(provider_names) == 2:
+        for section in sections:
+            kind, _, detail = section.partition(":")
+
+            if kind == "comparison":
                 # Provider comparison
+                p1, p2 = detail.split("|", 1)
                 try:
-                    comparison_data = compare_providers_enhanced(
-                        provider_names[0], provider_names[1]
+                    comparison_data = compare_providers_enhanced(p1, p2)
+                    context_sections.append(
+                        ContextSection(
+                            f"PROVIDER COMPARISON: {p1} vs {p2}",
+                            comparison_data,
+                            priority=2.0,
+                        )
                     )
-                    p1, p2 = provider_names[0], provider_names[1]
-                    data_context += f"\n=== PROVIDER COMPARISON: {p1} vs {p2} ===\n"
-                    data_context += comparison_data
                 except Exception:
-                    data_context += "\n=== PROVIDER DATA ===\n"
-                    for provider in provider_names:
-                        provider_data = get_provider_summary(provider, cursor)
-                        data_context += f"\n{provider}: {provider_data}\n"
-            else:
-                # Single provider analysis
-                for provider in provider_names:
-                    provider_data = get_provider_summary(provider, cursor)
-                    data_context += (
-                        f"\n=== {provider} PERFORMANCE ===\n{provider_data}\n"
+                    provider_data = "\n".join(
+                        f"{provider}: {get_provider_summary(provider, cursor)}"
+                        for provider in (p1, p2)
+                    )
+                    context_sections.append(
+                        ContextSection("PROVIDER DATA", provider_data, priority=2.0)
                     )
 
-        # Add expense context for expense-related questions
-        if any(
-            term in message_lower
-            for term in [
-                "expense",
-                "cost",
-                "overhead",
-                "spending",
-                "budget",
-                "cvlc_expenses",
-                "hvlc_expenses",
-                "monthly costs",
-                "fixed costs",
-                "variable costs",
-            ]
-        ):
-            expense_data = get_expense_summary(cursor)
-            data_context += f"\n=== EXPENSE ANALYSIS ===\n{expense_data}\n"
+            elif kind == "provider":
+                # Single provider analysis
+                provider_data = get_provider_summary(detail, cursor)
+                context_sections.append(
+                    ContextSection(f"{detail} PERFORMANCE", provider_data, priority=2.0)
+                )
 
-        # Add business context for business-related questions
-        if any(
-            term in message_lower
-            for term in [
-                "business",
-                "revenue",
-                "profit",
-                "growth",
-                "performance",
-                "money",
-                "financial",
-                "trends",
-            ]
-        ):
-            business_data = get_business_summary(cursor)
-            data_context += f"\n=== BUSINESS OVERVIEW ===\n{business_data}\n"
-
-        # Add payer context for payer-related questions
-        if any(
-            term in message_lower
-            for term in ["payer", "insurance", "bcbs", "aetna", "payment", "claims"]
-        ):
-            payer_data = get_payer_summary(cursor)
-            data_context += f"\n=== PAYER ANALYSIS ===\n{payer_data}\n"
-
-        # Add date-specific context if dates mentioned
-        date_context = extract_date_context(message)
-        if date_context:
-            period_data = get_period_summary(date_context, cursor)
-            data_context += (
-                f"\n=== PERIOD ANALYSIS ({date_context}) ===\n{period_data}\n"
-            )
+            elif kind == "expenses":
+                # Add expense context for expense-related questions
+                expense_data = get_expense_summary(cursor)
+                context_sections.append(
+                    ContextSection("EXPENSE ANALYSIS", expense_data, priority=1.0)
+                )
+
+            elif kind == "business":
+                # Add business context for business-related questions
+                business_data = get_business_summary(cursor)
+                context_sections.append(
+                    ContextSection("BUSINESS OVERVIEW", business_data, priority=1.0)
+                )
 
-        # Add general context if no specific focus detected
-        if not data_context:
-            general_data = get_general_summary(cursor)
-            data_context += f"\n=== GENERAL DATA OVERVIEW ===\n{general_data}\n"
+            elif kind == "payers":
+                # Add payer context for payer-related questions
+                payer_data = get_payer_summary(cursor)
+                context_sections.append(
+                    ContextSection("PAYER ANALYSIS", payer_data, priority=1.0)
+                )
+
+            elif kind == "period":
+                # Add date-specific context if dates mentioned
+                period_data = get_period_summary(detail, cursor)
+                context_sections.append(
+                    ContextSection(
+                        f"PERIOD ANALYSIS ({detail})", period_data, priority=1.5
+                    )
+                )
+
+            elif kind == "general":
+                # Add general context if no specific focus detected
+                general_data = get_general_summary(cursor)
+                context_sections.append(
+                    ContextSection("GENERAL DATA OVERVIEW", general_data)
+                )
 
         conn.close()
+
+        data_context, report = ContextPacker(model=model).pack(
+            message, context_sections
+        )
+        current_app.logger.debug(f"Context packing report: {report}")
         return data_context
 
     except Exception as e:
@@ -1089,32 +1228,7 @@ def extract_provider_names_universal(message, cursor):
     """Extract provider names from message using universal provider
     detection"""
     try:
-        cursor.execute("SELECT provider_name FROM providers WHERE active = 1")
-        all_providers = cursor.fetchall()
-
-        all_providers = sorted([p[0] for p in all_providers], key=len, reverse=True)
-        provider_names = []
-
-        message_lower = message.lower()
-
-        # Check for exact matches first
-        for provider in all_providers:
-            if provider.lower() in message_lower:
-                provider_names.append(provider)
-
-        # Check for partial matches (first names)
-        if len(provider_names) < 2:
-            for provider in all_providers:
-                if provider not in provider_names:
-                    name_parts = provider.lower().split()
-                    for part in name_parts:
-                        if len(part) > 2 and part in message_lower:
-                            provider_names.append(provider)
-                            break
-                if len(provider_names) >= 2:
-                    break
-
-        return provider_names[:2]  # Return max 2 providers
+        return match_provider_names(message)
     except Exception as e:
         current_app.logger.error(f"Error extracting provider names: {e}")
         return []
@@ -1123,28 +1237,12 @@ def extract_provider_names_universal(message, cursor):
 def get_provider_summary(provider_name, cursor):
     """Get comprehensive provider summary."""
     try:
-        cursor.execute(
-            """
-            SELECT 
-                COUNT(*) as transactions,
-                SUM(cash_applied) as total_revenue,
-                AVG(cash_applied) as avg_payment,
-                MIN(transaction_date) as first_date,
-                MAX(transaction_date) as last_date,
-                COUNT(DISTINCT payer_name) as unique_payers
-            FROM payment_transactions pt
-            JOIN providers p ON pt.provider_id = p.provider_id
-            WHERE p.provider_name = ?
-        """,
-            (provider_name,),
-        )
-
-        summary = cursor.fetchone()
+        summary = get_fact_snapshot(current_app.config.get("DATABASE_PATH", "medical_billing.db")).provider_summary(provider_name)
         if summary:
             return (
-                f"{summary[0]} transactions, ${summary[1]:,.2f} revenue, "
-                f"${summary[2]:.2f} avg payment, {summary[5]} payers, "
-                f"active {summary[3]} to {summary[4]}"
+                f"{summary['transactions']} transactions, ${summary['revenue'] or 0:,.2f} revenue, "
+                f"${summary['avg_payment'] or 0:.2f} avg payment, {summary['unique_payers']} payers, "
+                f"active {summary['first_date']} to {summary['last_date']}"
             )
         return "No data found"
     except Exception as e:
@@ -1409,10 +1507,11 @@ def get_expense_summary(cursor):
 
 def call_ollama_optimized(prompt, system_message, config):
     """Call Ollama API with optimized configuration for better responses"""
-    # Get Ollama config with fallback
-    ollama_url = config.get("homelab_url") or get_config().get(
-        "ollama.laptop_url", "http://localhost:11434"
-    )
+    # Get Ollama config with fallback; each model is sent to the server
+    # that runs it
+    model = config.get("model", "llama3.1:8b")
+    residency = get_model_residency()
+    ollama_url = config.get("homelab_url") or residency.endpoint_for(model)
     timeout = get_config().get("ollama.timeout", 60)
 
     # Create messages array
@@ -1427,12 +1526,14 @@ def call_ollama_optimized(prompt, system_message, config):
 
     try:
         # Make the request to Ollama with optimized config
+        start_time = time.time()
         response = requests.post(
             f"{ollama_url}/api/chat",
             json={
-                "model": config.get("model", "llama3.1:8b"),
+                "model": model,
                 "messages": messages,
                 "stream": False,
+                "keep_alive": residency.keep_alive,
                 "options": {
                     "temperature": config.get("temperature", 0.7),
                     "top_p": config.get("top_p", 0.9),
@@ -1453,7 +1554,13 @@ def call_ollama_optimized(prompt, system_message, config):
 
         # Check if request was successful
         if response.status_code == 200:
-            return response.json()["message"]["content"]
+            result = response.json()
+            elapsed = time.time() - start_time
+            log_prompt_metrics(
+                model, "".join(m["content"] for m in messages), result, elapsed
+            )
+            residency.record_response(model, result, elapsed, url=ollama_url)
+            return result["message"]["content"]
         else:
             current_app.logger.error(
                 f"Ollama API error: {response.status_code} - {response.text}"
@@ -1464,9 +1571,30 @@ def call_ollama_optimized(prompt, system_message, config):
         return None
 
 
-def call_ollama_with_enhanced_context(user_prompt, conversation_context, memory):
+def get_optimized_chat_config(question):
+    """Get the optimized Ollama configuration (and so the model) for a question.
+
+    Returns None when the optimization system is unavailable; the call then
+    falls back to the laptop model, whose budget is also the default one.
+    """
+    try:
+        from utils.ai_optimization_config import get_optimization_manager
+
+        return get_optimization_manager().get_optimized_ollama_config(question)
+    except Exception as e:
+        current_app.logger.warning(f"Could not get optimized Ollama config: {e}")
+        return None
+
+
+def call_ollama_with_enhanced_context(
+    user_prompt, conversation_context, memory, ollama_config=None
+):
     """Enhanced Ollama call with optimized configuration and comprehensive
-    medical billing context."""
+    medical billing context.
+
+    ``ollama_config`` is the configuration the prompt was built for (see
+    get_optimized_chat_config); it is resolved from the prompt if not given.
+    """
     try:
         # Import the optimization manager with error handling
         try:
@@ -1475,7 +1603,8 @@ def call_ollama_with_enhanced_context(user_prompt, conversation_context, memory)
             optimizer = get_optimization_manager()
 
             # Get optimized Ollama configuration
-            ollama_config = optimizer.get_optimized_ollama_config(user_prompt)
+            if ollama_config is None:
+                ollama_config = optimizer.get_optimized_ollama_config(user_prompt)
 
             # Get optimized system prompt with conversation history
             conversation_history = []
@@ -1563,13 +1692,7 @@ or hallucinate any financial figures."""
         if response:
             return response
         else:
-            return (
-                "I'm having trouble processing that right now. Could you "
-                "rephrase your question? I can help you analyze provider "
-                "performance, revenue trends, payer relationships, or any "
-                "other aspect of your medical billing data using your actual "
-                "data."
-            )
+            return AI_RETRY_RESPONSE
 
     except Exception as e:
         current_app.logger.error(f"Error in enhanced Ollama call: {e}")
@@ -1582,7 +1705,4 @@ or hallucinate any financial figures."""
             return call_ollama(user_prompt, basic_prompt)
         except Exception as final_error:
             current_app.logger.error(f"Final fallback also failed: {final_error}")
-            return (
-                "I'm having trouble connecting to the AI service right now. "
-                "Please try again later."
-            )
+            return AI_UNAVAILABLE_RESPONSE
@@ -17,6 +17,7 @@ import logging
 
 from api.utils.db import get_db_connection
 from utils.expense_analyzer import get_expense_analyzer
+from utils.fact_snapshot import get_fact_snapshot
 
 # Create blueprint
 business_bp = Blueprint('business_reasoning', __name__)
@@ -97,11 +98,7 @@ class BusinessReasoningEngine:
         
         # Extract provider names
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT provider_name FROM providers WHERE active = 1")
-            providers = [row['provider_name'] for row in cursor.fetchall()]
-            conn.close()
+            providers = get_fact_snapshot(current_app.config.get('DATABASE_PATH', 'medical_billing.db')).providers
             
             for provider in providers:
                 if provider.lower() in question_lower:
@@ -6,10 +6,10 @@ available data files and database content.
 """
 
 import os
-import sqlite3
 import pandas as pd
 from datetime import datetime
 from flask import current_app
+from utils.db_open import connect_db
 
 def get_available_data_files():
     """Get information about available data files in the system.
@@ -131,7 +131,7 @@ def get_database_summary():
     try:
         # Connect to database
         db_path = current_app.config.get('DATABASE_PATH', 'medical_billing.db')
-        conn = sqlite3.connect(db_path)
+        conn = connect_db(db_path)
         cursor = conn.cursor()
         
         # Get list of tables
@@ -158,7 +158,7 @@ def get_database_summary():
         
         # Add more details for key tables
         if 'providers' in table_counts and table_counts['providers'] > 0:
-            conn = sqlite3.connect(db_path)
+            conn = connect_db(db_path)
             providers_df = pd.read_sql_query("SELECT * FROM providers LIMIT 5", conn)
             conn.close()
             
@@ -168,7 +168,7 @@ def get_database_summary():
             response += f"\nProviders include: {provider_sample}, and others."
         
         if 'payment_transactions' in table_counts and table_counts['payment_transactions'] > 0:
-            conn = sqlite3.connect(db_path)
+            conn = connect_db(db_path)
             try:
                 # Get date range
                 date_query = "SELECT MIN(transaction_date), MAX(transaction_date) FROM payment_transactions"
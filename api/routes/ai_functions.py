@@ -14,6 +14,7 @@ import os
 # Add the utils directory to the path so we can import our compensation calculator
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'utils'))
 from provider_compensation import ProviderCompensationCalculator
+from utils.db_open import connect_db
 
 def get_provider_revenue(provider_name, month_year=None, start_date=None, end_date=None):
     """Get revenue for a specific provider, optionally for a specific month or date range.
@@ -69,7 +70,7 @@ def get_provider_revenue(provider_name, month_year=None, start_date=None, end_da
         elif start_date and end_date:
             # For date ranges, we need to calculate month by month
             # This is a simplified approach - you might want to enhance this
-            conn = sqlite3.connect(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
+            conn = connect_db(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -97,7 +98,7 @@ def get_provider_revenue(provider_name, month_year=None, start_date=None, end_da
                 return f"I couldn't find any revenue data for {provider_name} in the requested period ({start_date} to {end_date})."
         else:
             # Overall revenue - get all available data
-            conn = sqlite3.connect(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
+            conn = connect_db(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -173,7 +174,7 @@ def get_monthly_compensation_report(year, month):
 def get_data_quality_issues():
     """Get data quality issues from the database."""
     try:
-        conn = sqlite3.connect(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
+        conn = connect_db(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -212,7 +213,7 @@ def get_data_quality_issues():
 def compare_payers():
     """Compare different payers by transaction volume and revenue."""
     try:
-        conn = sqlite3.connect(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
+        conn = connect_db(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -263,7 +264,7 @@ def compare_providers(provider1, provider2, start_date=None, end_date=None):
             # Working outside of application context
             db_path = 'medical_billing.db'
             
-        conn = sqlite3.connect(db_path)
+        conn = connect_db(db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -456,7 +457,7 @@ def compare_providers_enhanced(provider1, provider2, start_date=None, end_date=N
             # Working outside of application context
             db_path = 'medical_billing.db'
             
-        conn = sqlite3.connect(db_path)
+        conn = connect_db(db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -705,7 +706,7 @@ def compare_providers_enhanced(provider1, provider2, start_date=None, end_date=N
 def analyze_dustin_overhead_coverage():
     """Analyze whether Dustin's revenue contribution covers monthly overhead expenses."""
     try:
-        conn = sqlite3.connect(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
+        conn = connect_db(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
         cursor = conn.cursor()
         
         # Get monthly overhead from expenses
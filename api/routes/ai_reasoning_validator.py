@@ -7,13 +7,14 @@ Similar to the validation layers in Claude Sonnet and GPT-4o.
 """
 
 import sqlite3
-import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple
 import logging
-import re
 from datetime import datetime
 
-from api.utils.db import get_db_connection
+from flask import current_app
+
+from utils.fact_snapshot import (FactSnapshot, extract_revenue_figures, extract_transaction_counts,
+                                 get_fact_snapshot)
 
 class ReasoningValidator:
     """
@@ -24,9 +25,6 @@ class ReasoningValidator:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self._known_providers = None
-        self._revenue_cache = None
-        self._transaction_cache = None
     
     def validate_response(self, question: str, response: str) -> Dict[str, Any]:
         """
@@ -189,113 +187,33 @@ class ReasoningValidator:
         
         return check_result
     
+    def _facts(self) -> FactSnapshot:
+        """Get the shared fact snapshot for the app's database"""
+        return get_fact_snapshot(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
+    
     def _get_actual_providers(self) -> List[str]:
         """Get actual provider names from database"""
-        if self._known_providers is None:
-            try:
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT provider_name FROM providers WHERE active = 1")
-                self._known_providers = [row['provider_name'] for row in cursor.fetchall()]
-                conn.close()
-            except Exception as e:
-                self.logger.error(f"Error getting actual providers: {e}")
-                self._known_providers = []
-        
-        return self._known_providers
+        return self._facts().providers
     
     def _get_actual_revenue_data(self) -> Dict[str, float]:
         """Get actual revenue data by provider"""
-        if self._revenue_cache is None:
-            try:
-                conn = get_db_connection()
-                query = """
-                SELECT 
-                    p.provider_name,
-                    SUM(pt.cash_applied) as total_revenue
-                FROM providers p
-                LEFT JOIN payment_transactions pt ON p.provider_id = pt.provider_id
-                WHERE p.active = 1
-                GROUP BY p.provider_id, p.provider_name
-                """
-                df = pd.read_sql_query(query, conn)
-                conn.close()
-                
-                self._revenue_cache = {}
-                for _, row in df.iterrows():
-                    if row['total_revenue']:
-                        self._revenue_cache[row['provider_name']] = float(row['total_revenue'])
-            except Exception as e:
-                self.logger.error(f"Error getting actual revenue data: {e}")
-                self._revenue_cache = {}
-        
-        return self._revenue_cache
+        return self._facts().revenue
     
     def _get_actual_transaction_counts(self) -> Dict[str, int]:
         """Get actual transaction counts by provider"""
-        if self._transaction_cache is None:
-            try:
-                conn = get_db_connection()
-                query = """
-                SELECT 
-                    p.provider_name,
-                    COUNT(pt.transaction_id) as total_transactions
-                FROM providers p
-                LEFT JOIN payment_transactions pt ON p.provider_id = pt.provider_id
-                WHERE p.active = 1
-                GROUP BY p.provider_id, p.provider_name
-                """
-                df = pd.read_sql_query(query, conn)
-                conn.close()
-                
-                self._transaction_cache = {}
-                for _, row in df.iterrows():
-                    if row['total_transactions']:
-                        self._transaction_cache[row['provider_name']] = int(row['total_transactions'])
-            except Exception as e:
-                self.logger.error(f"Error getting actual transaction counts: {e}")
-                self._transaction_cache = {}
-        
-        return self._transaction_cache
+        return self._facts().transaction_counts
     
     def _extract_provider_names_from_text(self, text: str) -> List[str]:
         """Extract provider names mentioned in text"""
-        # This is a simplified implementation
-        # In production, you'd use more sophisticated NLP
-        providers = []
-        actual_providers = self._get_actual_providers()
-        
-        text_lower = text.lower()
-        for provider in actual_providers:
-            if provider.lower() in text_lower:
-                providers.append(provider)
-        
-        return providers
+        return self._facts().mentioned_providers(text)
     
     def _extract_revenue_figures(self, text: str) -> List[Dict[str, Any]]:
         """Extract revenue figures from text"""
-        revenue_pattern = r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-        matches = re.findall(revenue_pattern, text)
-        
-        figures = []
-        for match in matches:
-            amount = float(match.replace(',', ''))
-            figures.append({'amount': amount})
-        
-        return figures
+        return extract_revenue_figures(text)
     
     def _extract_transaction_counts(self, text: str) -> List[Dict[str, Any]]:
         """Extract transaction counts from text"""
-        # Look for patterns like "1,470 transactions"
-        transaction_pattern = r'(\d{1,3}(?:,\d{3})*)\s+transactions'
-        matches = re.findall(transaction_pattern, text)
-        
-        counts = []
-        for match in matches:
-            count = int(match.replace(',', ''))
-            counts.append({'count': count})
-        
-        return counts
+        return extract_transaction_counts(text)
     
     def _generate_factual_response(self, question: str) -> str:
         """Generate a factual response based on actual database data"""
@@ -303,29 +221,16 @@ class ReasoningValidator:
             # This is a simplified factual response generator
             # In production, this would be more sophisticated
             
-            conn = get_db_connection()
+            facts = self._facts()
             
             # If asking about providers, return actual provider list
             if 'provider' in question.lower():
-                query = """
-                SELECT 
-                    p.provider_name,
-                    COUNT(pt.transaction_id) as total_transactions,
-                    COALESCE(SUM(pt.cash_applied), 0) as total_revenue
-                FROM providers p
-                LEFT JOIN payment_transactions pt ON p.provider_id = pt.provider_id
-                WHERE p.active = 1
-                GROUP BY p.provider_id, p.provider_name
-                ORDER BY total_revenue DESC
-                """
-                df = pd.read_sql_query(query, conn)
-                conn.close()
+                providers = sorted(facts.providers, key=lambda name: facts.revenue.get(name, 0.0), reverse=True)
                 
                 response = "Here are the actual providers in your database:\n\n"
-                for _, row in df.iterrows():
-                    name = row['provider_name']
-                    transactions = int(row['total_transactions']) if row['total_transactions'] else 0
-                    revenue = float(row['total_revenue']) if row['total_revenue'] else 0.0
+                for name in providers:
+                    transactions = facts.transaction_counts.get(name, 0)
+                    revenue = facts.revenue.get(name, 0.0)
                     
                     response += f"• **{name}** - {transactions:,} transactions, ${revenue:,.2f} revenue\n"
                 
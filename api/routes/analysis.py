@@ -4,16 +4,42 @@ Analysis API Routes.
 This module provides API endpoints for data analysis and visualization.
 """
 
+import os
 import sqlite3
 import pandas as pd
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.exceptions import BadRequest
 
 from api.utils.db import execute_query, get_db_connection
+from utils.revenue_cube import cube_enabled, get_revenue_cube
 
 # Create Blueprint
 analysis_bp = Blueprint('analysis', __name__)
 
+
+def execute_aggregate_query(cube_query, raw_query, params=None):
+    """Execute an aggregate query against the revenue cube.
+    
+    Falls back to the equivalent query over payment_transactions when the
+    revenue cube is disabled.
+    
+    Args:
+        cube_query: SQL over the revenue_cube table.
+        raw_query: Equivalent SQL over payment_transactions.
+        params: Query parameters (shared by both queries).
+        
+    Returns:
+        DataFrame with query results.
+    """
+    if not cube_enabled():
+        return execute_query(raw_query, params=params)
+    
+    db_path = current_app.config.get('DATABASE_PATH', 'medical_billing.db')
+    if not os.path.exists(db_path) and db_path != ':memory:':
+        raise FileNotFoundError(f"Database file not found: {db_path}")
+    return get_revenue_cube(db_path).query(cube_query, params)
+
+
 @analysis_bp.route('/revenue', methods=['GET'])
 def revenue_analysis():
     """Get revenue analysis.
@@ -30,7 +56,14 @@ def revenue_analysis():
             GROUP BY payer_name
             ORDER BY total DESC
             """
-            payer_result = execute_query(payer_query)
+            payer_cube_query = """
+            SELECT NULLIF(payer_name, '') as payer, SUM(revenue) as total, SUM(txn_count) as count,
+                   SUM(revenue) / NULLIF(SUM(cash_count), 0) as average
+            FROM revenue_cube
+            GROUP BY payer_name
+            ORDER BY total DESC
+            """
+            payer_result = execute_aggregate_query(payer_cube_query, payer_query)
             
             # Format response data
             payer_data = []
@@ -54,7 +87,11 @@ def revenue_analysis():
         # Try to get total revenue
         try:
             total_query = "SELECT SUM(cash_applied) as total, AVG(cash_applied) as average FROM payment_transactions"
-            total_result = execute_query(total_query)
+            total_cube_query = """
+            SELECT SUM(revenue) as total, SUM(revenue) / NULLIF(SUM(cash_count), 0) as average
+            FROM revenue_cube
+            """
+            total_result = execute_aggregate_query(total_cube_query, total_query)
             total = float(total_result['total'].iloc[0]) if not total_result.empty else 0
             average = float(total_result['average'].iloc[0]) if not total_result.empty else 0
         except:
@@ -70,7 +107,14 @@ def revenue_analysis():
             GROUP BY month
             ORDER BY month
             """
-            month_result = execute_query(month_query)
+            month_cube_query = """
+            SELECT printf('%04d-%02d', year, month) as month, SUM(revenue) as total
+            FROM revenue_cube
+            WHERE year > 0
+            GROUP BY year, month
+            ORDER BY year, month
+            """
+            month_result = execute_aggregate_query(month_cube_query, month_query)
             
             month_data = []
             for _, row in month_result.iterrows():
@@ -99,7 +143,15 @@ def revenue_analysis():
             ORDER BY total DESC
             LIMIT 5
             """
-            provider_result = execute_query(provider_query)
+            provider_cube_query = """
+            SELECT p.provider_name as provider, SUM(c.revenue) as total
+            FROM revenue_cube c
+            JOIN providers p ON c.provider_id = p.provider_id
+            GROUP BY c.provider_id
+            ORDER BY total DESC
+            LIMIT 5
+            """
+            provider_result = execute_aggregate_query(provider_cube_query, provider_query)
             
             provider_data = []
             for _, row in provider_result.iterrows():
@@ -152,7 +204,20 @@ def get_performance_analysis():
             GROUP BY p.provider_id
             ORDER BY total_revenue DESC
             """
-            result = execute_query(query)
+            cube_query = """
+            SELECT 
+                p.provider_id,
+                p.provider_name as name,
+                p.specialty,
+                COALESCE(SUM(c.txn_count), 0) as transaction_count,
+                SUM(c.revenue) as total_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as avg_payment
+            FROM providers p
+            LEFT JOIN revenue_cube c ON p.provider_id = c.provider_id
+            GROUP BY p.provider_id
+            ORDER BY total_revenue DESC
+            """
+            result = execute_aggregate_query(cube_query, query)
             
             # Format response data
             providers = []
@@ -229,15 +294,27 @@ def get_monthly_trends():
         try:
             revenue_query = """
             SELECT 
-                strftime('%Y-%m', date) as month,
-                SUM(amount) as total_revenue,
+                strftime('%Y-%m', transaction_date) as month,
+                SUM(cash_applied) as total_revenue,
                 COUNT(*) as transaction_count,
-                AVG(amount) as avg_payment
+                AVG(cash_applied) as avg_payment
             FROM payment_transactions
+            WHERE transaction_date IS NOT NULL
             GROUP BY month
             ORDER BY month
             """
-            revenue_result = execute_query(revenue_query)
+            revenue_cube_query = """
+            SELECT 
+                printf('%04d-%02d', year, month) as month,
+                SUM(revenue) as total_revenue,
+                SUM(txn_count) as transaction_count,
+                SUM(revenue) / NULLIF(SUM(cash_count), 0) as avg_payment
+            FROM revenue_cube
+            WHERE year > 0
+            GROUP BY year, month
+            ORDER BY year, month
+            """
+            revenue_result = execute_aggregate_query(revenue_cube_query, revenue_query)
             
             months = []
             for _, row in revenue_result.iterrows():
@@ -442,26 +519,39 @@ def provider_comparison():
             FROM payment_transactions pt
             JOIN providers p ON pt.provider_id = p.provider_id
         """
+        cube_query = """
+            SELECT 
+                p.provider_name,
+                SUM(c.txn_count) as transaction_count,
+                SUM(c.revenue) as total_revenue,
+                SUM(c.revenue) / NULLIF(SUM(c.cash_count), 0) as average_payment
+            FROM revenue_cube c
+            JOIN providers p ON c.provider_id = p.provider_id
+        """
         
         params = []
         
         if year:
-            query += " WHERE strftime('%Y', pt.date) = ?"
+            query += " WHERE strftime('%Y', pt.transaction_date) = ?"
+            cube_query += " WHERE c.year = CAST(? AS INTEGER)"
             params.append(str(year))
         
-        query += " GROUP BY p.name"
+        query += " GROUP BY p.provider_name"
+        cube_query += " GROUP BY p.provider_name"
         
         # Order by selected metric
         if metric == 'transactions':
-            query += " ORDER BY transaction_count DESC"
+            order = " ORDER BY transaction_count DESC"
         elif metric == 'average':
-            query += " ORDER BY average_payment DESC"
+            order = " ORDER BY average_payment DESC"
         else:  # default to revenue
-            query += " ORDER BY total_revenue DESC"
+            order = " ORDER BY total_revenue DESC"
+        query += order
+        cube_query += order
         
         # Execute query
         try:
-            result = execute_query(query, params=params)
+            result = execute_aggregate_query(cube_query, query, params=params)
             
             if not result.empty:
                 return jsonify({
@@ -11,10 +11,17 @@ from werkzeug.exceptions import BadRequest, NotFound
 
 from api.utils.db import get_db_connection, execute_query
 from api.utils.validators import validate_query
+from utils.schema_catalog import get_schema_catalog
 
 # Create Blueprint
 database_bp = Blueprint('database', __name__)
 
+
+def _schema_catalog():
+    """Get the schema catalog for the API database."""
+    return get_schema_catalog(current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
+
+
 @database_bp.route('/tables', methods=['GET'])
 def get_tables():
     """Get all tables in the database.
@@ -24,13 +31,11 @@ def get_tables():
     """
     try:
         # Get tables
-        tables_query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
-        tables_result = execute_query(tables_query)
+        tables = _schema_catalog().list_tables()
         
-        if tables_result.empty:
+        if not tables:
             return jsonify({'tables': []})
         
-        tables = tables_result['name'].tolist()
         counts = {}
         
         # Get row counts for each table
@@ -61,10 +66,7 @@ def get_table_data(table_name):
     """
     try:
         # Check if table exists
-        tables_query = "SELECT name FROM sqlite_master WHERE type='table' AND name=?"
-        tables_result = execute_query(tables_query, params=(table_name,))
-        
-        if tables_result.empty:
+        if table_name not in _schema_catalog().list_tables():
             raise NotFound(f"Table '{table_name}' not found")
         
         # Get pagination parameters
@@ -153,31 +155,15 @@ def get_table_schema(table_name):
         JSON response with table schema.
     """
     try:
-        # Check if table exists
-        tables_query = "SELECT name FROM sqlite_master WHERE type='table' AND name=?"
-        tables_result = execute_query(tables_query, params=(table_name,))
+        # Get table schema (None if the table does not exist)
+        columns = _schema_catalog().get_columns(table_name)
         
-        if tables_result.empty:
+        if columns is None:
             raise NotFound(f"Table '{table_name}' not found")
         
-        # Get table schema
-        schema_query = f"PRAGMA table_info({table_name})"
-        schema_result = execute_query(schema_query)
-        
-        if schema_result.empty:
+        if not columns:
             return jsonify({'columns': []})
         
-        # Format schema information
-        columns = []
-        for _, row in schema_result.iterrows():
-            columns.append({
-                'name': row['name'],
-                'type': row['type'],
-                'notnull': bool(row['notnull']),
-                'default_value': row['dflt_value'],
-                'primary_key': bool(row['pk'])
-            })
-        
         return jsonify({
             'table': table_name,
             'columns': columns
@@ -198,17 +184,16 @@ def get_database_stats():
     """
     try:
         # Get tables
-        tables_query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
-        tables_result = execute_query(tables_query)
+        catalog = _schema_catalog()
+        tables = catalog.list_tables()
         
-        if tables_result.empty:
+        if not tables:
             return jsonify({
                 'table_count': 0,
                 'tables': [],
                 'total_rows': 0
             })
         
-        tables = tables_result['name'].tolist()
         table_stats = []
         total_rows = 0
         
@@ -220,9 +205,7 @@ def get_database_stats():
             total_rows += row_count
             
             # Get column count
-            schema_query = f"PRAGMA table_info({table})"
-            schema_result = execute_query(schema_query)
-            column_count = len(schema_result) if not schema_result.empty else 0
+            column_count = len(catalog.get_columns(table) or [])
             
             table_stats.append({
                 'name': table,
@@ -8,11 +8,14 @@ import os
 import time
 import json
 from pathlib import Path
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
-from werkzeug.exceptions import BadRequest, NotFound
+from flask import Blueprint, Response, request, jsonify, current_app, send_from_directory, stream_with_context
+from werkzeug.exceptions import BadRequest, NotFound, ServiceUnavailable
 from werkzeug.utils import secure_filename
 
 from api.utils.db import get_db_connection
+from utils.config import get_config
+from utils.import_jobs import FINISHED_STATUSES, QueueFullError, get_import_queue
+from utils.stream_ingest import StreamIngest
 
 # Try to import format detection modules
 try:
@@ -26,6 +29,31 @@ except ImportError:
 # Create Blueprint
 files_bp = Blueprint('files', __name__)
 
+def enqueue_import(file_path, kind, format_name=None):
+    """Queue a background import and build the 202 response.
+    
+    Args:
+        file_path: Path to the CSV file.
+        kind: Import job kind ("transform" or "upload").
+        format_name: Optional format name.
+        
+    Returns:
+        Flask response tuple with the job id and status URLs.
+    """
+    try:
+        job_id = get_import_queue(current_app.config['DATABASE_PATH']).enqueue(file_path, kind, format_name)
+    except QueueFullError as e:
+        raise ServiceUnavailable(str(e))
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f"/api/files/jobs/{job_id}",
+        'progress_url': f"/api/files/jobs/{job_id}/progress"
+    }), 202
+
+
 def allowed_file(filename):
     """Check if a file has an allowed extension.
     
@@ -89,6 +117,49 @@ def upload_file():
     raise BadRequest('File type not allowed')
 
 
+@files_bp.route('/ingest', methods=['POST'])
+def ingest_file():
+    """Upload and import a CSV file in a single streaming pass.
+    
+    The CSV file is sent as the raw request body (not multipart). It is
+    saved, hashed, format-detected and inserted while it arrives.
+    
+    Query parameters:
+        filename: Name of the uploaded file.
+        
+    Returns:
+        JSON response with the saved file information and import results.
+    """
+    filename = secure_filename(request.args.get('filename', ''))
+    if not filename or not filename.lower().endswith('.csv'):
+        raise BadRequest("Missing or invalid 'filename' parameter (must be a CSV)")
+    
+    if (request.mimetype or '').startswith('multipart/'):
+        raise BadRequest('Send the CSV file as the raw request body')
+    
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    ingest = StreamIngest(db_path=current_app.config['DATABASE_PATH'])
+    outcome = ingest.ingest(request.stream, file_path)
+    
+    result = outcome['result']
+    return jsonify({
+        'success': outcome['success'],
+        'file': {
+            'filename': filename,
+            'path': file_path,
+            'size': outcome['size'],
+            'sha256': outcome['sha256'],
+            'upload_time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'format_detection': outcome['format_detection'],
+        },
+        'result': {
+            **{key: value for key, value in result.items() if key not in ('issues', 'chunk_results')},
+            'issues_count': len(result.get('issues', []))
+        },
+        'elapsed_time': outcome['elapsed_time']
+    })
+
+
 @files_bp.route('/detect-format', methods=['POST'])
 def detect_format():
     """Detect format of a CSV file.
@@ -129,14 +200,18 @@ def detect_format():
 def import_file():
     """Import a CSV file into the database.
     
+    The import runs as a background job unless "async" is false.
+    
     Request JSON:
         {
             "file_path": "/path/to/file.csv",
-            "format_name": "Blue Cross" (optional)
+            "format_name": "Blue Cross" (optional),
+            "async": true (optional)
         }
         
     Returns:
-        JSON response with import results.
+        JSON response with the job id (202), or with import results if
+        "async" is false.
     """
     data = request.get_json()
     
@@ -152,6 +227,9 @@ def import_file():
     if not file_path.lower().endswith('.csv'):
         raise BadRequest('File must be a CSV')
     
+    if data.get('async', True):
+        return enqueue_import(file_path, 'transform' if FORMAT_DETECTION_AVAILABLE else 'upload', format_name)
+    
     try:
         # Use format detection if available
         if FORMAT_DETECTION_AVAILABLE:
@@ -175,6 +253,85 @@ def import_file():
         raise BadRequest(f"Error importing file: {str(e)}")
 
 
+@files_bp.route('/jobs', methods=['GET'])
+def list_import_jobs():
+    """List recent import jobs.
+    
+    Query parameters:
+        status: Only return jobs with this status (optional).
+        limit: Maximum number of jobs (default 50).
+        
+    Returns:
+        JSON response with the jobs, newest first.
+    """
+    jobs = get_import_queue(current_app.config['DATABASE_PATH']).list_jobs(
+        status=request.args.get('status'),
+        limit=request.args.get('limit', 50, type=int)
+    )
+    return jsonify({'jobs': jobs})
+
+
+@files_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_import_job(job_id):
+    """Get the status and progress of an import job.
+    
+    Args:
+        job_id: Import job id.
+        
+    Returns:
+        JSON response with status, rows_processed, rows_per_second and eta_seconds.
+    """
+    job = get_import_queue(current_app.config['DATABASE_PATH']).get_job(job_id)
+    if job is None:
+        raise NotFound(f"Import job not found: {job_id}")
+    return jsonify(job)
+
+
+@files_bp.route('/jobs/<job_id>/progress', methods=['GET'])
+def stream_import_job(job_id):
+    """Stream an import job's progress as server-sent events.
+    
+    One event is sent per progress interval until the job finishes.
+    
+    Args:
+        job_id: Import job id.
+        
+    Returns:
+        text/event-stream response.
+    """
+    queue = get_import_queue(current_app.config['DATABASE_PATH'])
+    if queue.get_job(job_id) is None:
+        raise NotFound(f"Import job not found: {job_id}")
+    interval = get_config().get("import_jobs.progress_interval", 1.0)
+    
+    def events():
+        while True:
+            job = queue.get_job(job_id)
+            yield f"data: {json.dumps(job, default=str)}\n\n"
+            if job is None or job['status'] in FINISHED_STATUSES:
+                break
+            time.sleep(interval)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+
+@files_bp.route('/jobs/<job_id>/retry', methods=['POST'])
+def retry_import_job(job_id):
+    """Requeue a failed or interrupted import job.
+    
+    Args:
+        job_id: Import job id.
+        
+    Returns:
+        JSON response with the job status.
+    """
+    queue = get_import_queue(current_app.config['DATABASE_PATH'])
+    if not queue.retry(job_id):
+        raise BadRequest(f"Import job {job_id} cannot be retried")
+    return jsonify(queue.get_job(job_id))
+
+
 @files_bp.route('/transform', methods=['POST'])
 def transform_file():
     """Transform a CSV file to canonical format.
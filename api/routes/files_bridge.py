@@ -14,6 +14,7 @@ from werkzeug.exceptions import BadRequest, NotFound
 
 # Import the database module
 from medical_billing_db import MedicalBillingDB
+from api.routes.files import enqueue_import
 
 # Create Blueprint
 files_bridge_bp = Blueprint('files_bridge', __name__)
@@ -66,13 +67,18 @@ def list_csv_folder():
 def import_csv_file():
     """Import a CSV file from the csv_folder directory.
     
+    The import runs as a background job (see /api/files/jobs) unless
+    "async" is false.
+    
     Request JSON:
         {
-            "file_path": "/path/to/file.csv"
+            "file_path": "/path/to/file.csv",
+            "async": true (optional)
         }
         
     Returns:
-        JSON response with import results.
+        JSON response with the job id (202), or with import results if
+        "async" is false.
     """
     data = request.get_json()
     
@@ -87,6 +93,9 @@ def import_csv_file():
     if not file_path.lower().endswith('.csv'):
         raise BadRequest('File must be a CSV')
     
+    if data.get('async', True):
+        return enqueue_import(file_path, 'upload')
+    
     try:
         # Use the MedicalBillingDB to import the file
         db = MedicalBillingDB(db_path=current_app.config.get('DATABASE_PATH', 'medical_billing.db'))
@@ -8,6 +8,7 @@ including automated billing sheet processing, provider analytics, and P&L report
 from flask import Blueprint, request, jsonify
 from utils.multi_office_operations import MultiOfficeOperations, Office, ProviderAssignment
 from utils.logger import get_logger
+from utils.db_open import connect_db
 import json
 from datetime import datetime, timedelta
 
@@ -22,8 +23,7 @@ def get_offices():
         ops = MultiOfficeOperations()
         
         # Get offices from database
-        import sqlite3
-        with sqlite3.connect(ops.db_path) as conn:
+        with connect_db(ops.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT office_id, name, address, phone, capacity_sessions_per_day,
@@ -275,6 +275,7 @@ def get_operations_dashboard():
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
         profitability = ops.generate_office_profitability_report(None, start_date, end_date)
+        weekly_trend = ops.get_revenue_trend('week')
         
         # Get provider caseload for active providers
         provider_analyses = []
@@ -298,6 +299,7 @@ def get_operations_dashboard():
             'sustainability_metrics': sustainability,
             'office_profitability': profitability,
             'provider_analyses': provider_analyses,
+            'weekly_trend': weekly_trend,
             'recommendations': sustainability.get('recommendations', []),
             'generated_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
@@ -340,14 +342,8 @@ def generate_quick_report():
         total_company_cut = 0
         total_provider_payments = 0
         
-        for report_data in data['reports']:
-            result = ops.process_billing_sheet(
-                provider_id=report_data['provider_id'],
-                office_id=report_data['office_id'],
-                service_date=report_data['service_date'],
-                sessions=report_data['sessions']
-            )
-            
+        # All sheets are looked up, split and stored in one transaction
+        for result in ops.process_billing_sheets(data['reports']):
             if result:
                 processed_reports.append(result)
                 total_revenue += result['gross_revenue']
@@ -8,6 +8,7 @@ import os
 import sqlite3
 import pandas as pd
 from flask import current_app
+from utils.db_open import connect_db
 
 def get_db_connection():
     """Get a database connection.
@@ -21,7 +22,7 @@ def get_db_connection():
     if not os.path.exists(db_path) and db_path != ':memory:':
         raise FileNotFoundError(f"Database file not found: {db_path}")
         
-    conn = sqlite3.connect(db_path)
+    conn = connect_db(db_path)
     conn.row_factory = sqlite3.Row
     return conn
 
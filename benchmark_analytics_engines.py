@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SQLite and DuckDB analytics engines
+
+Fills a scratch database with synthetic transactions, exports the Parquet
+snapshot, and times the heavy AdvancedAnalytics queries (payer analysis,
+growth metrics, provider lifecycle) on both engines. The SQLite timings
+bypass the revenue cube, so they measure SQLite's own executor.
+
+Usage:
+    python benchmark_analytics_engines.py --rows 2000000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics_queries import AdvancedAnalytics
+from medical_billing_db import MedicalBillingDB
+from utils.db_open import connect_db
+from utils.transaction_snapshot import get_transaction_snapshot
+
+QUERIES = {
+    "payer_analysis": lambda analytics: analytics.get_payer_analysis(),
+    "growth_metrics": lambda analytics: analytics.get_business_growth_metrics(),
+    "provider_lifecycle": lambda analytics: analytics.get_provider_lifecycle_analysis(),
+}
+
+
+def generate_transactions(db_path: str, rows: int, providers: int = 40, payers: int = 25,
+                          patients: int = 50000, years: int = 5, seed: int = 7,
+                          chunk_rows: int = 250000):
+    """Fill a database with synthetic payment transactions
+
+    Args:
+        db_path: Path to the (new) SQLite database
+        rows: Number of transactions
+        providers: Number of providers
+        payers: Number of payers
+        patients: Number of distinct patients
+        years: Years of history, ending today
+        seed: Random seed
+        chunk_rows: Rows generated and inserted per batch
+    """
+    MedicalBillingDB(db_path).close()
+    rng = np.random.default_rng(seed)
+    payer_names = np.array([f"Payer {i:02d}" for i in range(payers)])
+    first_day = pd.Timestamp.today().normalize() - pd.DateOffset(years=years)
+    days = (pd.Timestamp.today().normalize() - first_day).days
+
+    conn = connect_db(db_path, bulk=True)
+    try:
+        conn.executemany("INSERT INTO providers (provider_name) VALUES (?)",
+                         [(f"Provider {i:03d}",) for i in range(providers)])
+        provider_ids = np.array([row[0] for row in conn.execute("SELECT provider_id FROM providers")])
+
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            dates = (first_day + pd.to_timedelta(rng.integers(0, days, n), unit="D")).strftime("%Y-%m-%d")
+            batch = zip(
+                rng.choice(provider_ids, n).tolist(),
+                dates,
+                [f"P{p:06d}" for p in rng.integers(0, patients, n)],
+                np.round(rng.gamma(2.0, 60.0, n) - 10, 2).tolist(),
+                rng.choice(payer_names, n).tolist(),
+            )
+            conn.executemany("""
+                INSERT INTO payment_transactions
+                (provider_id, transaction_date, patient_id, cash_applied, payer_name, upload_batch)
+                VALUES (?, ?, ?, ?, ?, 'benchmark')
+            """, batch)
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def time_query(analytics: AdvancedAnalytics, name: str, repeat: int) -> float:
+    """Best wall-clock time of a query over `repeat` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        QUERIES[name](analytics)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """Command line interface for the engine benchmark"""
+    parser = argparse.ArgumentParser(description='Compare the SQLite and DuckDB analytics engines')
+    parser.add_argument('--rows', type=int, default=2000000, help='Synthetic transactions to generate')
+    parser.add_argument('--providers', type=int, default=40, help='Number of providers')
+    parser.add_argument('--years', type=int, default=5, help='Years of history')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per query (best time is reported)')
+    parser.add_argument('--queries', nargs='+', choices=sorted(QUERIES), default=list(QUERIES),
+                        help='Queries to time')
+    parser.add_argument('--db', help='Use this database instead of generating one')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated database')
+    args = parser.parse_args()
+
+    work_dir = None
+    db_path = args.db
+    if db_path is None:
+        work_dir = tempfile.mkdtemp(prefix="hvlc_bench_")
+        db_path = os.path.join(work_dir, "benchmark.db")
+        start = time.perf_counter()
+        generate_transactions(db_path, args.rows, providers=args.providers, years=args.years)
+        print(f"Generated {args.rows:,} transactions in {time.perf_counter() - start:.1f}s ({db_path})")
+
+    try:
+        start = time.perf_counter()
+        result = get_transaction_snapshot(db_path).sync()
+        print(f"Parquet snapshot sync: {result['exported']:,} rows exported in {time.perf_counter() - start:.1f}s")
+
+        sqlite_analytics = AdvancedAnalytics(db_path, engine="sqlite")
+        # Time SQLite's executor, not the pre-aggregated cube
+        sqlite_analytics.cube = None
+        duckdb_analytics = AdvancedAnalytics(db_path, engine="duckdb")
+
+        print(f"\n{'query':<20} {'sqlite (s)':>12} {'duckdb (s)':>12} {'speedup':>9}")
+        for name in args.queries:
+            sqlite_time = time_query(sqlite_analytics, name, args.repeat)
+            duckdb_time = time_query(duckdb_analytics, name, args.repeat)
+            print(f"{name:<20} {sqlite_time:>12.3f} {duckdb_time:>12.3f} {sqlite_time / duckdb_time:>8.1f}x")
+
+        sqlite_analytics.close()
+        duckdb_analytics.close()
+    finally:
+        if work_dir and not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,17 +9,19 @@ CSV data while maintaining data quality and performance monitoring.
 import os
 import time
 import json
-import sqlite3
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 import argparse
+from contextlib import contextmanager
 
 # Import project modules
 from medical_billing_db import MedicalBillingDB
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.parallel_import import import_files, read_csv_chunks
+from utils.db_open import backup_database, connect_db, staged_load
 
 # Configure logging
 logger = get_logger()
@@ -28,10 +30,17 @@ config = get_config()
 class BulkUploadManager:
     """Manages bulk upload operations with progress tracking and quality monitoring"""
     
-    def __init__(self, db_path: str = None):
-        """Initialize the bulk upload manager"""
+    def __init__(self, db_path: str = None, max_workers: int = None):
+        """Initialize the bulk upload manager
+        
+        Args:
+            db_path: Path to the SQLite database
+            max_workers: Worker processes that read CSV files ahead of the
+                database writer (default: imports.max_workers, then CPU count)
+        """
         self.db_path = db_path or config.get("database.db_path", "medical_billing.db")
-        self.db = MedicalBillingDB(self.db_path)
+        self.db = MedicalBillingDB(self.db_path, bulk_load=True)
+        self.max_workers = max_workers
         self.upload_log = []
         self.total_stats = {
             'files_processed': 0,
@@ -51,16 +60,58 @@ class BulkUploadManager:
         backup_path = f"backups/{backup_name}"
         os.makedirs("backups", exist_ok=True)
         
-        # Copy database file
-        import shutil
-        shutil.copy2(self.db_path, backup_path)
+        # Copy database file (including changes still in the WAL)
+        backup_database(self.db_path, backup_path)
         
         logger.info(f"Database backup created: {backup_path}")
         print(f"✅ Database backup created: {backup_path}")
         return backup_path
     
-    def upload_folder(self, folder_path: str, file_pattern: str = "*.csv") -> Dict:
-        """Upload all CSV files in a folder"""
+    @contextmanager
+    def staged(self, enabled: bool = None):
+        """Route uploads made inside the block through a shadow database
+        
+        The shadow is published to the live database in one transaction when
+        the block finishes, so readers never see a partially loaded upload.
+        If the block raises, the live database is left unchanged.
+        
+        Args:
+            enabled: Stage the uploads (default: database.staged_loads)
+        """
+        if enabled is None:
+            enabled = config.get("database.staged_loads", False)
+        if not enabled:
+            yield self
+            return
+        
+        live_path = self.db_path
+        self.db.close()
+        try:
+            with staged_load(live_path) as staging_path:
+                self.db_path = staging_path
+                self.db = MedicalBillingDB(staging_path, bulk_load=True)
+                try:
+                    yield self
+                finally:
+                    self.db.close()
+        finally:
+            self.db_path = live_path
+            self.db = MedicalBillingDB(live_path, bulk_load=True)
+    
+    def upload_folder(self, folder_path: str, file_pattern: str = "*.csv", max_workers: int = None) -> Dict:
+        """Upload all CSV files in a folder
+        
+        CSV files are read in parallel worker processes and inserted one at a
+        time, in filename order.
+        
+        Args:
+            folder_path: Folder to upload
+            file_pattern: Glob pattern for the files to upload
+            max_workers: Worker processes (default: the manager's max_workers; 1 reads serially)
+            
+        Returns:
+            Folder statistics with a result entry per file
+        """
         folder_path = Path(folder_path)
         
         if not folder_path.exists():
@@ -88,12 +139,13 @@ class BulkUploadManager:
         print(f"\n📁 Processing folder: {folder_path}")
         print(f"   Found {len(csv_files)} CSV files")
         
-        # Process each file
-        for csv_file in sorted(csv_files):
+        def write_file(file_path: str, prepared: Dict) -> Dict:
+            csv_file = Path(file_path)
             print(f"\n📄 Processing: {csv_file.name}")
             
-            file_start = time.time()
-            result = self.db.upload_csv_file(str(csv_file))
+            # Processing time covers the worker's read of the file too
+            file_start = time.time() - prepared.get('prepare_time', 0)
+            result = self.db.upload_csv_file(file_path, prepared=prepared)
             file_time = time.time() - file_start
             
             # Update folder stats
@@ -118,6 +170,11 @@ class BulkUploadManager:
                 'issues_count': len(result.get('issues', [])),
                 'error': result.get('error')
             })
+            return result
+        
+        # Process each file
+        import_files([str(csv_file) for csv_file in sorted(csv_files)], read_csv_chunks, write_file,
+                     max_workers=max_workers or self.max_workers)
         
         folder_stats['total_time'] = time.time() - folder_stats['start_time']
         
@@ -222,7 +279,7 @@ class BulkUploadManager:
     def check_provider_consistency(self) -> Dict:
         """Check for provider name consistency"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             # Look for potential duplicate providers
@@ -247,7 +304,7 @@ class BulkUploadManager:
     def check_date_ranges(self, year: str) -> Dict:
         """Check for reasonable date ranges"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             # Check for dates outside expected year
@@ -271,7 +328,7 @@ class BulkUploadManager:
     def check_revenue_totals(self) -> Dict:
         """Basic revenue sanity checks"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             # Check for negative revenues
@@ -304,7 +361,7 @@ class BulkUploadManager:
     def check_duplicates(self) -> Dict:
         """Check for potential duplicate transactions"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             # Look for transactions with same provider, date, and amount
@@ -380,21 +437,26 @@ def main():
                        help='Create backup before upload')
     parser.add_argument('--single-folder', 
                        help='Upload single folder instead of full historical structure')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for reading CSV files (1 reads serially)')
+    parser.add_argument('--staged', action='store_true', default=None,
+                       help='Load into a shadow database and publish it when the upload finishes')
     
     args = parser.parse_args()
     
     # Initialize upload manager
-    manager = BulkUploadManager()
+    manager = BulkUploadManager(max_workers=args.workers)
     
     try:
-        if args.single_folder:
-            # Upload single folder
-            print(f"📁 Uploading single folder: {args.single_folder}")
-            result = manager.upload_folder(args.single_folder)
-        else:
-            # Upload full historical structure
-            print(f"🚀 Starting historical data upload from: {args.path}")
-            result = manager.upload_historical_data(args.path)
+        with manager.staged(args.staged):
+            if args.single_folder:
+                # Upload single folder
+                print(f"📁 Uploading single folder: {args.single_folder}")
+                result = manager.upload_folder(args.single_folder)
+            else:
+                # Upload full historical structure
+                print(f"🚀 Starting historical data upload from: {args.path}")
+                result = manager.upload_historical_data(args.path)
         
         if result['success']:
             print("\n✅ Upload completed successfully!")
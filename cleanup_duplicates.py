@@ -5,14 +5,14 @@ Cleanup Duplicate Transactions
 This script removes duplicate transactions from the database.
 """
 
-import sqlite3
 from datetime import datetime
+from utils.db_open import connect_db
 
 def cleanup_duplicates(db_path: str = 'medical_billing.db'):
     """Remove duplicate transactions from the database."""
     print("🧹 Cleaning up duplicate transactions...")
     
-    conn = sqlite3.connect(db_path)
+    conn = connect_db(db_path)
     cursor = conn.cursor()
     
     # First, let's see how many duplicates we have
@@ -8,7 +8,6 @@ before inserting into the database.
 
 import os
 import pandas as pd
-import sqlite3
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict
@@ -17,6 +16,7 @@ import re
 from medical_billing_db import MedicalBillingDB
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.db_open import connect_db
 
 # Configure logging
 logger = get_logger()
@@ -221,7 +221,7 @@ class DebugCSVProcessor:
         
         try:
             # Connect to database
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             for transaction in processed_data:
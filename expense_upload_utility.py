@@ -7,7 +7,6 @@ Handles variable and fixed costs with budget variance tracking.
 """
 
 import pandas as pd
-import sqlite3
 import argparse
 import os
 import sys
@@ -16,6 +15,7 @@ from typing import Dict, List, Optional
 from utils.logger import get_logger
 from utils.config import get_config
 from utils.expense_analyzer import ExpenseAnalyzer
+from utils.db_open import connect_db
 
 logger = get_logger()
 config = get_config()
@@ -121,13 +121,17 @@ class ExpenseUploader:
                 }
             
             # Upload to database
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             try:
                 # Insert expense transactions
                 df_clean.to_sql('expense_transactions', conn, if_exists='append', index=False)
                 
-                # Update monthly summaries
-                self.analyzer.update_monthly_summaries()
+                # Update only the monthly summaries this batch touched
+                touched = {
+                    (expense_date.year, expense_date.month, category)
+                    for expense_date, category in zip(df_clean['expense_date'], df_clean['category'])
+                }
+                self.analyzer.update_monthly_summaries(keys=touched)
                 
                 conn.commit()
                 
@@ -170,7 +174,7 @@ class ExpenseUploader:
     
     def analyze_uploaded_data(self, upload_batch: str) -> Dict:
         """Analyze recently uploaded expense data"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         try:
             query = """
                 SELECT 
@@ -1,6 +1,7 @@
 import os
 import re
 import time
+_IMPORT_START = time.perf_counter()
 import requests
 import pandas as pd
 import json
@@ -8,12 +9,9 @@ import logging
 logging.getLogger("httpx").setLevel(logging.WARNING)
 from pathlib import Path
 from datetime import datetime
-from llama_index.core import VectorStoreIndex, Document
-from llama_index.llms.ollama import Ollama
-from llama_index.experimental.query_engine import PandasQueryEngine
-from llama_index.core.schema import TextNode
 import argparse
-import sqlite3
+import threading
+import importlib.util
 
 # Import improved AI if available
 try:
@@ -22,16 +20,23 @@ try:
 except ImportError:
     IMPROVED_AI_AVAILABLE = False
 
-# Import SQL agent if available
-try:
-    from agents.sql_agent import MedicalBillingSQLAgent
-    SQL_AGENT_AVAILABLE = True
-except ImportError:
-    SQL_AGENT_AVAILABLE = False
+# SQL agent availability is checked without importing LangChain; the agent
+# itself is imported and built lazily by get_sql_agent()
+SQL_AGENT_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("langchain_community", "langchain_ollama")
+)
 
 # Import configuration
 from utils.config import get_config
 from utils.logger import get_logger
+from utils.context_packer import (
+    ContextPacker, ContextSection, compress_dataframe, get_context_budget, log_prompt_metrics
+)
+from utils.csv_manifest import CSVManifest
+from utils.db_open import connect_db
+from utils.entity_matcher import ALIAS, PROVIDER
+from utils.fact_snapshot import get_fact_snapshot
 
 # Get configuration and logger
 config = get_config()
@@ -59,6 +64,28 @@ parser.add_argument("--improved", action="store_true", help="Use improved AI eng
 parser.add_argument("--timeout", type=int, default=60, help="Set query timeout in seconds (default: 60)")
 parser.add_argument("--web", action="store_true", help="Launch the web UI")
 parser.add_argument("--web-port", type=int, default=5000, help="Port for the web UI (default: 5000)")
+parser.add_argument("--profile-startup", action="store_true", help="Print import and engine initialization timings")
+
+# === Startup Timings ===
+# Seconds spent in each startup phase, reported by --profile-startup
+STARTUP_TIMINGS = {}
+
+def print_startup_profile(title="Startup profile"):
+    """Print the recorded startup timings"""
+    print(f"\n⏱️ {title}:")
+    for phase, seconds in STARTUP_TIMINGS.items():
+        print(f"   {phase:<22} {seconds * 1000:8.1f} ms")
+
+# Set per thread: the background warm-up logs its startup messages instead of
+# printing them over the menu prompt (see start_background_init)
+_startup_output = threading.local()
+
+def announce(message):
+    """Print a startup message, or log it on a thread that must stay quiet"""
+    if getattr(_startup_output, "quiet", False):
+        logger.info(message)
+    else:
+        print(message)
 
 # === Enhanced Ollama Server and Model Selection ===
 def get_ollama_url_and_model():
@@ -80,14 +107,14 @@ def get_ollama_url_and_model():
                 # Check if configured model is available
                 if HOMELAB_MODEL in available_models:
                     logger.info(f"Using homelab Ollama at {HOMELAB_OLLAMA_URL} with model {HOMELAB_MODEL}")
-                    print(f"✅ Using Homelab Ollama server with {HOMELAB_MODEL}")
+                    announce(f"✅ Using Homelab Ollama server with {HOMELAB_MODEL}")
                     return HOMELAB_OLLAMA_URL, HOMELAB_MODEL
                 
                 # Use first available model as fallback
                 elif available_models:
                     logger.info(f"Model {HOMELAB_MODEL} not found on homelab. Using {available_models[0]}")
-                    print(f"⚠️ Model {HOMELAB_MODEL} not found on homelab.")
-                    print(f"✅ Using alternate model: {available_models[0]}")
+                    announce(f"⚠️ Model {HOMELAB_MODEL} not found on homelab.")
+                    announce(f"✅ Using alternate model: {available_models[0]}")
                     return HOMELAB_OLLAMA_URL, available_models[0]
         except Exception as e:
             logger.warning(f"Homelab Ollama not available: {e}")
@@ -105,59 +132,64 @@ def get_ollama_url_and_model():
                 # Check if configured model is available
                 if LAPTOP_MODEL in available_models:
                     logger.info(f"Using laptop Ollama at {LAPTOP_OLLAMA_URL} with model {LAPTOP_MODEL}")
-                    print(f"✅ Using Laptop Ollama server with {LAPTOP_MODEL}")
+                    announce(f"✅ Using Laptop Ollama server with {LAPTOP_MODEL}")
                     return LAPTOP_OLLAMA_URL, LAPTOP_MODEL
                 
                 # Use first available model as fallback
                 elif available_models:
                     logger.info(f"Model {LAPTOP_MODEL} not found on laptop. Using {available_models[0]}")
-                    print(f"⚠️ Model {LAPTOP_MODEL} not found on laptop.")
-                    print(f"✅ Using alternate model: {available_models[0]}")
+                    announce(f"⚠️ Model {LAPTOP_MODEL} not found on laptop.")
+                    announce(f"✅ Using alternate model: {available_models[0]}")
                     return LAPTOP_OLLAMA_URL, available_models[0]
         except Exception as e:
             logger.warning(f"Laptop Ollama not available: {e}")
     
     # If we get here, use default values as last resort
     logger.error("No Ollama servers available, using laptop URL and default model as last resort")
-    print("⚠️ No Ollama servers available.")
-    print(f"ℹ️ Using default settings: {LAPTOP_OLLAMA_URL} with model llama3.1:8b")
-    print("ℹ️ You can override these with the --model parameter.")
+    announce("⚠️ No Ollama servers available.")
+    announce(f"ℹ️ Using default settings: {LAPTOP_OLLAMA_URL} with model llama3.1:8b")
+    announce("ℹ️ You can override these with the --model parameter.")
     return LAPTOP_OLLAMA_URL or "http://localhost:11434", "llama3.1:8b"
 
-# Parse command line arguments
-args = parser.parse_args()
+def resolve_ollama_settings(model_override=None):
+    """Pick the Ollama server and model, honouring a --model override
 
-# Get best available Ollama URL and model
-try:
-    OLLAMA_URL, MODEL_NAME = get_ollama_url_and_model()
-    
-    # Override with command line arguments if provided and verify it exists
-    if args.model:
-        try:
-            logger.debug(f"Verifying model from command line: {args.model}")
-            res = requests.get(f"{OLLAMA_URL}/api/tags", timeout=3)
-            
-            if res.status_code == 200:
-                available_models = [m["name"] for m in res.json().get("models", [])]
+    Args:
+        model_override: Model requested on the command line
+
+    Returns:
+        Tuple of (ollama_url, model_name)
+    """
+    try:
+        ollama_url, model_name = get_ollama_url_and_model()
+        
+        # Override with command line arguments if provided and verify it exists
+        if model_override:
+            try:
+                logger.debug(f"Verifying model from command line: {model_override}")
+                res = requests.get(f"{ollama_url}/api/tags", timeout=3)
                 
-                if args.model in available_models:
-                    MODEL_NAME = args.model
-                    logger.info(f"Using model from command line: {MODEL_NAME}")
-                    print(f"ℹ️ Using model from command line: {MODEL_NAME}")
-                else:
-                    logger.warning(f"Model {args.model} not found. Available models: {', '.join(available_models[:5])}")
-                    print(f"⚠️ Model {args.model} not found. Using {MODEL_NAME} instead.")
-                    print(f"Available models: {', '.join(available_models[:5])}")
-        except Exception as e:
-            logger.warning(f"Could not verify model availability: {e}")
-            print(f"⚠️ Could not verify model {args.model} availability: {e}")
-            print(f"ℹ️ Using {MODEL_NAME} instead")
-except Exception as e:
-    logger.error(f"Error setting up Ollama: {e}")
-    print(f"⚠️ Error setting up Ollama: {e}")
-    # Use default values
-    OLLAMA_URL = LAPTOP_OLLAMA_URL or "http://localhost:11434"
-    MODEL_NAME = "llama3.1:8b"  # Default to a common model
+                if res.status_code == 200:
+                    available_models = [m["name"] for m in res.json().get("models", [])]
+                    
+                    if model_override in available_models:
+                        model_name = model_override
+                        logger.info(f"Using model from command line: {model_name}")
+                        announce(f"ℹ️ Using model from command line: {model_name}")
+                    else:
+                        logger.warning(f"Model {model_override} not found. Available models: {', '.join(available_models[:5])}")
+                        announce(f"⚠️ Model {model_override} not found. Using {model_name} instead.")
+                        announce(f"Available models: {', '.join(available_models[:5])}")
+            except Exception as e:
+                logger.warning(f"Could not verify model availability: {e}")
+                announce(f"⚠️ Could not verify model {model_override} availability: {e}")
+                announce(f"ℹ️ Using {model_name} instead")
+        return ollama_url, model_name
+    except Exception as e:
+        logger.error(f"Error setting up Ollama: {e}")
+        announce(f"⚠️ Error setting up Ollama: {e}")
+        # Use default values
+        return LAPTOP_OLLAMA_URL or "http://localhost:11434", "llama3.1:8b"
 
 # === Helper: Parse Dates from Filenames ===
 def parse_date_from_filename(filename):
@@ -231,10 +263,7 @@ def clarify(term, candidates, clarifications, log_path, friendly_name=None):
 def get_db_connection():
     """Get a direct database connection for optimized queries"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        # Enable foreign keys if configured
-        if config.get("database.enable_foreign_keys", True):
-            conn.execute("PRAGMA foreign_keys = ON")
+        conn = connect_db(DB_PATH)
         logger.debug(f"Database connection established to {DB_PATH}")
         return conn
     except Exception as e:
@@ -243,21 +272,32 @@ def get_db_connection():
         return None
 
 # Smart query execution with size limiting
-def execute_query(query, params=None, max_rows=100):
-    """Execute SQL query with size limiting for LLM context management"""
+def execute_query(query, params=None, max_rows=None):
+    """Execute SQL query with size limiting for LLM context management
+    
+    Rows are capped at fetch time rather than by rewriting the SQL. The
+    default cap is sized so the compressed result fits the current model's
+    context budget (see utils.context_packer).
+    """
     conn = get_db_connection()
     if not conn:
         return pd.DataFrame()
     
+    if max_rows is None:
+        # Allow ~20 tokens per compressed row
+        max_rows = max(10, get_context_budget(get_model_name()) // 20)
+    
     try:
-        # Check if query might return large results (simple heuristic)
-        if "LIMIT" not in query.upper():
-            # Add limit to prevent excessive data
-            query = f"{query} LIMIT {max_rows}"
-            print(f"⚠️ Adding limit of {max_rows} rows to query for LLM processing")
+        # Execute query and fetch one extra row to detect truncation
+        cursor = conn.execute(query, params or ())
+        columns = [description[0] for description in cursor.description]
+        rows = cursor.fetchmany(max_rows + 1)
         
-        # Execute query
-        df = pd.read_sql_query(query, conn, params=params)
+        if len(rows) > max_rows:
+            rows = rows[:max_rows]
+            print(f"⚠️ Result capped at {max_rows} rows for LLM processing")
+        
+        df = pd.DataFrame(rows, columns=columns)
         
         # Close connection
         conn.close()
@@ -270,39 +310,29 @@ def execute_query(query, params=None, max_rows=100):
 
 # === Load Minimal Data for CSV-based Queries ===
 def load_csv_metadata(csv_root, descriptions):
-    """Load just metadata about available CSVs without loading all content"""
+    """Load just metadata about available CSVs without loading all content
+    
+    Row counts and headers come from the persisted CSV manifest, so only
+    files whose mtime or size changed since the last run are re-read.
+    """
+    manifest = CSVManifest(csv_root)
+    entries = manifest.refresh(date_parser=parse_date_from_filename)
+    
     csv_metadata = []
-    total_files = 0
     total_rows = 0
+    for entry in entries:
+        total_rows += entry["row_count"]
+        csv_metadata.append({
+            "file_path": entry["file_path"],
+            "category": entry["category"],
+            "description": descriptions.get(entry["category"], ""),
+            "date": entry["date"],
+            "row_count": entry["row_count"],
+            "columns": entry["columns"]
+        })
     
-    for dirpath, _, filenames in os.walk(csv_root):
-        if "meta" in dirpath:
-            continue
-        for filename in filenames:
-            if filename.endswith(".csv"):
-                file_path = Path(dirpath) / filename
-                category = Path(dirpath).name
-                context = descriptions.get(category, "")
-                date = parse_date_from_filename(filename)
-                
-                # Get row count without loading entire file
-                try:
-                    row_count = sum(1 for _ in open(file_path)) - 1  # subtract header
-                    total_rows += row_count
-                    total_files += 1
-                    
-                    # Store metadata
-                    csv_metadata.append({
-                        "file_path": str(file_path),
-                        "category": category,
-                        "description": context,
-                        "date": date,
-                        "row_count": row_count
-                    })
-                except Exception as e:
-                    print(f"⚠️ Could not read {file_path}: {e}")
-    
-    print(f"📊 Found {total_files} CSV files with approximately {total_rows} total rows")
+    logger.debug(f"CSV manifest: {manifest.stats['scanned']} scanned, {manifest.stats['reused']} reused")
+    announce(f"📊 Found {len(csv_metadata)} CSV files with approximately {total_rows} total rows")
     return csv_metadata
 
 # === Function to get column names from CSVs without loading all data ===
@@ -311,13 +341,15 @@ def get_csv_columns(csv_metadata):
     all_columns = set()
     
     for metadata in csv_metadata:
-        try:
-            # Read just the header row
-            df_header = pd.read_csv(metadata["file_path"], nrows=0)
-            columns = [col.strip().replace(' ', '_').lower() for col in df_header.columns]
-            all_columns.update(columns)
-        except Exception as e:
-            print(f"⚠️ Could not get columns from {metadata['file_path']}: {e}")
+        columns = metadata.get("columns")
+        if columns is None:
+            try:
+                # Read just the header row
+                columns = list(pd.read_csv(metadata["file_path"], nrows=0).columns)
+            except Exception as e:
+                announce(f"⚠️ Could not get columns from {metadata['file_path']}: {e}")
+                continue
+        all_columns.update(col.strip().replace(' ', '_').lower() for col in columns)
     
     return sorted(list(all_columns))
 
@@ -338,7 +370,7 @@ def load_sample_data(csv_metadata, sample_rows=10):
             
             sample_dfs.append(df)
         except Exception as e:
-            print(f"⚠️ Could not sample {metadata['file_path']}: {e}")
+            announce(f"⚠️ Could not sample {metadata['file_path']}: {e}")
     
     if not sample_dfs:
         return pd.DataFrame()
@@ -356,83 +388,184 @@ def load_sample_data(csv_metadata, sample_rows=10):
     
     return combined_df
 
-# === Load Data Descriptions ===
-descriptions = load_md_descriptions(META_DIR)
+# === Lazy Engine Initialization ===
+# Nothing below runs at import time. Each resource is built on first use (or
+# by the background warm-up thread) so the menu appears without waiting for
+# Ollama, LlamaIndex or LangChain.
+_model_override = None
+_resources = {}
+_resource_locks = {}
+_resource_locks_guard = threading.Lock()
 
-# === Load CSV Metadata and Sample Data (instead of all data) ===
-print("⚙️ Loading CSV metadata efficiently...")
-csv_metadata = load_csv_metadata(CSV_ROOT, descriptions)
-all_columns = get_csv_columns(csv_metadata)
-sample_data = load_sample_data(csv_metadata)
+def _get_resource(name, builder):
+    """Build a named resource once, timing how long it took"""
+    if name in _resources:
+        return _resources[name]
+    
+    with _resource_locks_guard:
+        lock = _resource_locks.setdefault(name, threading.Lock())
+    
+    with lock:
+        if name not in _resources:
+            start = time.perf_counter()
+            _resources[name] = builder()
+            STARTUP_TIMINGS[name] = time.perf_counter() - start
+    return _resources[name]
 
-# === LlamaIndex Engines (with smaller context) ===
-# Configure timeout and other settings
-timeout = config.get("ollama.timeout", 180)
-print(f"ℹ️ Setting model timeout to {timeout} seconds")
+def get_ollama_settings():
+    """Get the (ollama_url, model_name) pair, probing the servers on first use"""
+    return _get_resource("ollama", lambda: resolve_ollama_settings(_model_override))
 
-# For LlamaIndex, we need a try-except to handle cases where Ollama can't get context window info
-try:
-    # For LlamaIndex, we still use its own Ollama implementation
-    # Use a known model that definitely exists on the server
-    print("🔄 Initializing LlamaIndex engine...")
-    llm = Ollama(model=MODEL_NAME, base_url=OLLAMA_URL)
-    # Test model access - this will fail early if there's an issue
-    _ = llm.metadata
-    print("✅ LlamaIndex engine initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing LlamaIndex engine: {e}")
-    print(f"⚠️ Error initializing LlamaIndex engine: {e}")
-    print("ℹ️ Using OpenAI-compatible API mode instead")
+def get_ollama_url():
+    """Get the selected Ollama server URL"""
+    return get_ollama_settings()[0]
+
+def get_model_name():
+    """Get the selected Ollama model name"""
+    return get_ollama_settings()[1]
+
+def get_csv_metadata():
+    """Get metadata for all CSV files (from the persisted manifest)"""
+    def build():
+        descriptions = load_md_descriptions(META_DIR)
+        return load_csv_metadata(CSV_ROOT, descriptions)
+    return _get_resource("csv_manifest", build)
+
+def get_all_columns():
+    """Get the normalized column names across all CSV files"""
+    return _get_resource("columns", lambda: get_csv_columns(get_csv_metadata()))
+
+def get_sample_data():
+    """Get a small sample of CSV rows for the pandas engine"""
+    return _get_resource("sample_data", lambda: load_sample_data(get_csv_metadata()))
+
+def _build_llm():
+    """Create the LlamaIndex Ollama LLM"""
+    from llama_index.llms.ollama import Ollama
     
-    # Import the generic LLM that doesn't require context window information
-    from llama_index.llms.ollama import Ollama as LlamaIndexOllama
+    ollama_url, model_name = get_ollama_settings()
+    timeout = config.get("ollama.timeout", 180)
+    logger.info(f"Setting model timeout to {timeout} seconds")
     
-    # Create a simpler LLM with hardcoded parameters
-    llm = LlamaIndexOllama(
-        model=MODEL_NAME,
-        base_url=OLLAMA_URL,
-        request_timeout=timeout,
-        context_window=4096,  # Reasonable default
-        additional_kwargs={}
-    )
-
-# Initialize SQL agent if available
-sql_agent = None
-if SQL_AGENT_AVAILABLE:
+    # For LlamaIndex, we need a try-except to handle cases where Ollama can't get context window info
     try:
-        print("🔄 Initializing SQL Agent...")
-        sql_agent = MedicalBillingSQLAgent(
-            ollama_url=OLLAMA_URL,
-            model=MODEL_NAME,
+        llm = Ollama(model=model_name, base_url=ollama_url)
+        # Test model access - this will fail early if there's an issue
+        _ = llm.metadata
+        logger.info("LlamaIndex engine initialized successfully")
+        return llm
+    except Exception as e:
+        logger.error(f"Error initializing LlamaIndex engine: {e}")
+        
+        # Create a simpler LLM with hardcoded parameters
+        return Ollama(
+            model=model_name,
+            base_url=ollama_url,
+            request_timeout=timeout,
+            context_window=4096,  # Reasonable default
+            additional_kwargs={}
+        )
+
+def get_llm():
+    """Get the LlamaIndex LLM"""
+    return _get_resource("llm", _build_llm)
+
+def _build_sql_agent():
+    """Create the SQL agent, or None if it is unavailable"""
+    global SQL_AGENT_AVAILABLE
+    if not SQL_AGENT_AVAILABLE:
+        return None
+    
+    try:
+        from agents.sql_agent import MedicalBillingSQLAgent
+        ollama_url, model_name = get_ollama_settings()
+        agent = MedicalBillingSQLAgent(
+            ollama_url=ollama_url,
+            model=model_name,
             verbose=False
         )
-        print("✅ SQL Agent initialized successfully")
+        logger.info("SQL Agent initialized successfully")
+        return agent
     except Exception as e:
         logger.error(f"SQL Agent initialization failed: {e}")
-        print(f"⚠️ SQL Agent initialization failed: {e}")
         SQL_AGENT_AVAILABLE = False
+        return None
+
+def get_sql_agent():
+    """Get the SQL agent, or None if it is unavailable"""
+    return _get_resource("sql_agent", _build_sql_agent)
+
+def _build_query_engine():
+    """Create a vector index over a small sample of CSV descriptions"""
+    from llama_index.core import VectorStoreIndex, Document
+    
+    sample_docs = []
+    for metadata in get_csv_metadata()[:5]:  # Limit to first 5 files
+        doc_metadata = {k: v for k, v in metadata.items() if k != "columns"}
+        doc = Document(
+            text=f"CSV file: {metadata['file_path']}\nCategory: {metadata['category']}\nDescription: {metadata['description']}\nDate: {metadata['date']}\nRow count: {metadata['row_count']}",
+            metadata=doc_metadata
+        )
+        sample_docs.append(doc)
+    
+    index = VectorStoreIndex.from_documents(sample_docs)
+    return index.as_query_engine(llm=get_llm())
+
+def get_query_engine():
+    """Get the LlamaIndex vector query engine"""
+    return _get_resource("query_engine", _build_query_engine)
 
-# Create a smaller document set for vector indexing
-sample_docs = []
-for metadata in csv_metadata[:5]:  # Limit to first 5 files
-    doc = Document(
-        text=f"CSV file: {metadata['file_path']}\nCategory: {metadata['category']}\nDescription: {metadata['description']}\nDate: {metadata['date']}\nRow count: {metadata['row_count']}",
-        metadata=metadata
-    )
-    sample_docs.append(doc)
-
-# Create vector index from sample docs
-index = VectorStoreIndex.from_documents(sample_docs)
-query_engine = index.as_query_engine(llm=llm)
-
-# === Pandas Engine with Sample Data ===
-column_context = f"""
+def _build_pandas_engine():
+    """Create the pandas query engine over the sample data"""
+    from llama_index.experimental.query_engine import PandasQueryEngine
+    
+    column_context = f"""
 This table contains a SAMPLE of financial records from multiple CSV files.
 The complete dataset is stored in a SQLite database for efficiency.
-Available columns in the full dataset: {', '.join(all_columns)}
+Available columns in the full dataset: {', '.join(get_all_columns())}
 For large-scale queries, use the database_engine instead of this sample data.
 """
-pandas_engine = PandasQueryEngine(df=sample_data, llm=llm, context_str=column_context)
+    return PandasQueryEngine(df=get_sample_data(), llm=get_llm(), context_str=column_context)
+
+def get_pandas_engine():
+    """Get the LlamaIndex pandas query engine"""
+    return _get_resource("pandas_engine", _build_pandas_engine)
+
+def refresh_csv_metadata():
+    """Re-read the CSV manifest after files were added or changed
+    
+    The resources built from the manifest (columns, sample rows and the
+    engines over them) are dropped too and rebuilt on next use.
+    """
+    for name in ("csv_manifest", "columns", "sample_data", "query_engine", "pandas_engine"):
+        _resources.pop(name, None)
+    return get_csv_metadata()
+
+def start_background_init(profile=False):
+    """Warm up Ollama and the query engines on a daemon thread
+    
+    Args:
+        profile: Print the startup profile once warm-up finishes, and print
+            the startup messages (otherwise they are only logged)
+        
+    Returns:
+        The started thread
+    """
+    def warm_up():
+        _startup_output.quiet = not profile
+        for getter in (get_csv_metadata, get_all_columns, get_ollama_settings, get_llm,
+                       get_sql_agent, get_sample_data, get_query_engine, get_pandas_engine):
+            try:
+                getter()
+            except Exception as e:
+                logger.warning(f"Background initialization of {getter.__name__} failed: {e}")
+        logger.info(f"Background initialization finished: {STARTUP_TIMINGS}")
+        if profile:
+            print_startup_profile("Background initialization finished")
+    
+    thread = threading.Thread(target=warm_up, name="engine-warmup", daemon=True)
+    thread.start()
+    return thread
 
 # === Load Clarifications for Session ===
 try:
@@ -459,15 +592,10 @@ def initialize_medical_billing_ai(use_improved=False):
         
         # Use improved AI if requested and available
         if use_improved and IMPROVED_AI_AVAILABLE:
-            from improved_medical_billing_ai import ImprovedMedicalBillingAI
-            
-            # Get timeout values from config
-            timeout_value = config.get("ollama.timeout", 60)
-            
             ai = ImprovedMedicalBillingAI(
                 db_path=db_path,
-                ollama_url=OLLAMA_URL,
-                model=MODEL_NAME
+                ollama_url=get_ollama_url(),
+                model=get_model_name()
             )
             print("✅ Using Improved Medical Billing AI with enhanced timeout handling")
             print(f"⚙️ Using progressive timeouts: {config.get('ollama.timeout', 60)}s → {config.get('ollama.retry_timeout', 30)}s → {config.get('ollama.final_timeout', 15)}s")
@@ -475,8 +603,8 @@ def initialize_medical_billing_ai(use_improved=False):
             # Use the standard AI
             ai = MedicalBillingAI(
                 db_instance=db, 
-                ollama_url=OLLAMA_URL, 
-                model=MODEL_NAME
+                ollama_url=get_ollama_url(), 
+                model=get_model_name()
             )
         
         print("✅ Medical Billing AI Assistant ready!")
@@ -574,6 +702,9 @@ def database_query(question, conn=None):
         return "Database connection failed."
     
     question_lower = question.lower()
+    packer = ContextPacker(model=get_model_name())
+    # Cut tables by rows up front; leave room for the title and summary lines
+    table_tokens = packer.max_tokens - 64
     
     try:
         result = ""
@@ -627,7 +758,7 @@ def database_query(question, conn=None):
                 if month:
                     title += f"-{month}"
             
-            result = f"{title}:\n\n{df.to_string(index=False)}"
+            result = f"{title}:\n\n{compress_dataframe(df, table_tokens)}"
             
             # Add summary
             total_revenue = df['total_revenue'].sum() if not df.empty else 0
@@ -650,7 +781,7 @@ def database_query(question, conn=None):
             """
             
             df = pd.read_sql_query(query, conn)
-            result = f"Provider Analysis:\n\n{df.to_string(index=False)}"
+            result = f"Provider Analysis:\n\n{compress_dataframe(df, table_tokens)}"
             
         # Time analysis
         elif any(word in question_lower for word in ['month', 'year', 'trend', 'time']):
@@ -669,7 +800,7 @@ def database_query(question, conn=None):
             """
             
             df = pd.read_sql_query(query, conn)
-            result = f"Monthly Trends (Last 12 Months):\n\n{df.to_string(index=False)}"
+            result = f"Monthly Trends (Last 12 Months):\n\n{compress_dataframe(df, table_tokens)}"
             
         # Payer analysis
         elif any(word in question_lower for word in ['payer', 'insurance']):
@@ -687,7 +818,7 @@ def database_query(question, conn=None):
             """
             
             df = pd.read_sql_query(query, conn)
-            result = f"Payer Analysis (Top 10):\n\n{df.to_string(index=False)}"
+            result = f"Payer Analysis (Top 10):\n\n{compress_dataframe(df, table_tokens)}"
             
         # General statistics
         else:
@@ -704,23 +835,29 @@ def database_query(question, conn=None):
             """
             
             df = pd.read_sql_query(query, conn)
-            result = f"Database Overview:\n\n{df.to_string(index=False)}"
+            result = f"Database Overview:\n\n{compress_dataframe(df, table_tokens)}"
         
         if close_conn:
             conn.close()
             
+        # Fit the data to the model's prompt budget
+        data_result, _ = packer.pack(
+            question, [ContextSection("DATA RESULT", result)]
+        )
+        
         # Send the data to LLM for explanation
         prompt = f"""
         QUESTION: {question}
-        
-        DATA RESULT:
-        {result}
-        
+        {data_result}
         Please analyze this data and answer the question in a clear, concise way. 
         Focus on the key insights from the data that address the specific question.
         """
         
-        llm_response = llm.complete(prompt)
+        start_time = time.time()
+        llm_response = get_llm().complete(prompt)
+        raw = getattr(llm_response, "raw", None)
+        log_prompt_metrics(get_model_name(), prompt, raw if isinstance(raw, dict) else None,
+                           time.time() - start_time)
         return llm_response
         
     except Exception as e:
@@ -729,33 +866,19 @@ def database_query(question, conn=None):
         return f"Error executing database query: {e}"
 
 def extract_provider_name(question, conn=None):
-    """Extract provider name from question"""
-    close_conn = False
-    if conn is None:
-        conn = get_db_connection()
-        close_conn = True
-    
-    if not conn:
-        return None
+    """Extract provider name from question
     
+    Uses the shared entity matcher; conn is kept for existing callers.
+    """
     try:
-        # Get list of provider names from database
-        query = "SELECT DISTINCT p.provider_name FROM payment_transactions pt JOIN providers p ON pt.provider_id = p.provider_id"
-        providers_df = pd.read_sql_query(query, conn)
-        
-        # Check if any provider name appears in the question
-        for provider in providers_df['provider_name']:
-            if provider.lower() in question.lower():
-                if close_conn:
-                    conn.close()
+        facts = get_fact_snapshot(DB_PATH)
+        mentioned = set(facts.matcher.values(question, kinds=[PROVIDER, ALIAS]))
+        # Only providers with transactions, in provider order
+        for provider, stats in facts.provider_stats.items():
+            if provider in mentioned and stats["transactions"]:
                 return provider
-        
-        if close_conn:
-            conn.close()
         return None
     except Exception:
-        if close_conn:
-            conn.close()
         return None
 
 def extract_date_params(question):
@@ -836,10 +959,10 @@ def conversational_router(question, clarifications, log_path):
         short_timeout = 30  # 30 seconds maximum for complex queries
         
         # Check if this is an explicit SQL agent query
-        if q.startswith("sql:") and SQL_AGENT_AVAILABLE and sql_agent:
+        if q.startswith("sql:") and SQL_AGENT_AVAILABLE and get_sql_agent():
             print("🤖 Using SQL Agent for explicit SQL query...")
             try:
-                result = sql_agent.process_query(q.replace("sql:", "").strip())
+                result = get_sql_agent().process_query(q.replace("sql:", "").strip())
                 return result
             except Exception as e:
                 logger.error(f"SQL Agent error: {e}")
@@ -853,12 +976,10 @@ def conversational_router(question, clarifications, log_path):
             'sql analysis', 'data mining', 'pattern in data'
         ]
         
-        if SQL_AGENT_AVAILABLE and sql_agent and any(indicator in q for indicator in sql_query_indicators):
+        if SQL_AGENT_AVAILABLE and get_sql_agent() and any(indicator in q for indicator in sql_query_indicators):
             print("📊 Query appears complex - trying SQL Agent...")
             try:
                 # Create a thread for SQL agent with timeout
-                import threading
-                import time
                 
                 # Create a result container
                 result_container = {'result': None, 'timeout': False}
@@ -866,7 +987,7 @@ def conversational_router(question, clarifications, log_path):
                 # Function to run SQL agent query
                 def run_query():
                     try:
-                        result_container['result'] = sql_agent.process_query(question)
+                        result_container['result'] = get_sql_agent().process_query(question)
                     except Exception as e:
                         logger.error(f"SQL agent thread error: {e}")
                         result_container['result'] = f"SQL agent error: {e}"
@@ -902,8 +1023,6 @@ def conversational_router(question, clarifications, log_path):
         if any(indicator in q for indicator in db_query_indicators):
             print("📊 Using direct database query for efficiency...")
             try:
-                import threading
-                import time
                 
                 # Create a result container
                 result_container = {'result': None, 'timeout': False}
@@ -946,7 +1065,7 @@ def conversational_router(question, clarifications, log_path):
         if any(indicator in q for indicator in doc_query_indicators):
             print("🔍 Using vector search for document retrieval...")
             try:
-                response = query_engine.query(question)
+                response = get_query_engine().query(question)
                 return response
             except Exception as e:
                 logger.error(f"Vector search error: {e}")
@@ -964,7 +1083,7 @@ def conversational_router(question, clarifications, log_path):
         
         for term, keywords in ambiguous_terms.items():
             if term in q or any(word in q for word in keywords):
-                candidates = get_column_candidates(sample_data, keywords)
+                candidates = get_column_candidates(get_sample_data(), keywords)
                 if len(candidates) > 1:
                     chosen = clarify(term, candidates, clarifications, log_path, friendly_name=term)
                     clarifications[term] = chosen
@@ -979,8 +1098,6 @@ def conversational_router(question, clarifications, log_path):
         if any(kw in q for kw in ["who", "total", "sum", "highest", "revenue", "earned", "top", "most"]):
             print("📈 Using pandas engine for structured query...")
             try:
-                import threading
-                import time
                 
                 # Create a result container
                 result_container = {'result': None, 'timeout': False}
@@ -988,7 +1105,7 @@ def conversational_router(question, clarifications, log_path):
                 # Function to run query with timeout
                 def run_query():
                     try:
-                        result_container['result'] = pandas_engine.query(f"{question}\n{context}")
+                        result_container['result'] = get_pandas_engine().query(f"{question}\n{context}")
                     except Exception as e:
                         logger.error(f"Pandas engine thread error: {e}")
                         result_container['result'] = f"Pandas engine error: {e}"
@@ -1022,8 +1139,6 @@ def conversational_router(question, clarifications, log_path):
         else:
             print("💬 Using general query engine...")
             try:
-                import threading
-                import time
                 
                 # Create a result container
                 result_container = {'result': None, 'timeout': False}
@@ -1031,7 +1146,7 @@ def conversational_router(question, clarifications, log_path):
                 # Function to run query with timeout
                 def run_query():
                     try:
-                        result_container['result'] = query_engine.query(question)
+                        result_container['result'] = get_query_engine().query(question)
                     except Exception as e:
                         logger.error(f"General query engine thread error: {e}")
                         result_container['result'] = f"General query engine error: {e}"
@@ -1115,7 +1230,7 @@ def show_data_overview(csv_metadata):
     print(f"\nTotal rows across all files: ~{total_rows}")
     
     # Show available columns
-    print(f"Available columns: {len(all_columns)}")
+    print(f"Available columns: {len(get_all_columns())}")
     
     # Get high-level database stats
     conn = get_db_connection()
@@ -1315,7 +1430,9 @@ IMPROVED AI FEATURES:
 
 # === Main CLI Loop ===
 if __name__ == "__main__":
+    STARTUP_TIMINGS["import"] = time.perf_counter() - _IMPORT_START
     args = parser.parse_args()
+    _model_override = args.model
     
     # Launch web UI if requested
     if args.web:
@@ -1380,6 +1497,12 @@ if __name__ == "__main__":
     print("This version can efficiently handle 100+ CSV files using database-first queries")
     print("The agent will clarify ambiguous terms and learn your preferences.\n")
     
+    # Ollama, LlamaIndex and the SQL agent warm up while the menu is shown
+    start_background_init(profile=args.profile_startup)
+    if args.profile_startup:
+        STARTUP_TIMINGS["time_to_prompt"] = time.perf_counter() - _IMPORT_START
+        print_startup_profile()
+    
     while True:
         print_menu()
         
@@ -1411,13 +1534,13 @@ if __name__ == "__main__":
                 print(f"❌ Error: {e}")
                 
         elif choice == '2':
-            show_data_overview(csv_metadata)
+            show_data_overview(get_csv_metadata())
             
         elif choice == '3':
-            show_suggested_questions(csv_metadata)
+            show_suggested_questions(get_csv_metadata())
             
         elif choice == '4':
-            show_columns(all_columns)
+            show_columns(get_all_columns())
             
         elif choice == '5':
             show_clarifications(session_clarifications)
@@ -1460,7 +1583,7 @@ if __name__ == "__main__":
                 
                 # Reload metadata to reflect the new data
                 print("\n🔄 Refreshing data overview...")
-                show_data_overview(csv_metadata)
+                show_data_overview(refresh_csv_metadata())
                 
             except Exception as e:
                 print(f"\n❌ Error processing CSV file: {e}")
@@ -1,7 +1,7 @@
 import sqlite3
 import pandas as pd
 from datetime import datetime
-from typing import Optional, List, Dict, Tuple, Any
+from typing import Optional, List, Dict, Tuple, Any, Callable
 import json
 import os
 import traceback
@@ -10,6 +10,10 @@ from utils.logger import get_logger, get_quality_logger
 from utils.config import get_config
 from utils.privacy import anonymize_dataframe, mask_patient_id, generate_privacy_report
 from utils.csv_processor import process_csv_in_chunks, count_csv_rows, get_optimal_chunksize
+from utils.data_version import bump_data_version
+from utils.revenue_cube import cube_enabled, get_revenue_cube
+from utils.transaction_snapshot import get_transaction_snapshot, snapshot_enabled
+from utils.db_open import connect_db, is_shadow_path
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import Column, Integer, String, Float, Date
@@ -49,7 +53,8 @@ class Provider(Base):
     created_date = Column(Date)
 
 class MedicalBillingDB:
-    def __init__(self, db_path: str = None, use_sqlalchemy: bool = False, db_url: str = None):
+    def __init__(self, db_path: str = None, use_sqlalchemy: bool = False, db_url: str = None,
+                 bulk_load: bool = False):
         # Use configured database path if not provided
         if db_path is None:
             db_path = config.get_db_path()
@@ -60,16 +65,16 @@ class MedicalBillingDB:
         if self.use_sqlalchemy:
             if db_url is None:
                 db_url = f"sqlite:///{db_path or config.get_db_path()}"
-            self.engine = create_engine(db_url)
+                # Pooled connections follow the same open policy as the legacy connection
+                self.engine = create_engine(db_url, creator=lambda: connect_db(db_path, bulk=bulk_load,
+                                                                                check_same_thread=False))
+            else:
+                self.engine = create_engine(db_url)
             logger.info(f"SQLAlchemy engine created for {db_url}")
         else:
             try:
                 logger.info(f"Connecting to database at {db_path}")
-                self.conn = sqlite3.connect(db_path)
-                
-                # Enable foreign keys if configured
-                if config.get("database.enable_foreign_keys", True):
-                    self.conn.execute("PRAGMA foreign_keys = ON")
+                self.conn = connect_db(db_path, bulk=bulk_load)
                     
                 self.create_tables()
                 logger.info("Database connection established and tables verified")
@@ -205,26 +210,41 @@ class MedicalBillingDB:
             logger.error(f"Error inserting provider {name}: {e}")
             raise
     
-    def upload_csv_file(self, file_path: str, chunk_size: Optional[int] = None) -> Dict:
+    def upload_csv_file(self, file_path: str, chunk_size: Optional[int] = None,
+                        prepared: Optional[Dict] = None,
+                        progress: Optional[Callable[[int, float], None]] = None) -> Dict:
         """Upload a CSV file using chunked processing for memory efficiency
         
         Args:
             file_path: Path to the CSV file
             chunk_size: Number of rows to process in each chunk (auto-calculated if None)
+            prepared: Chunks already read by utils.parallel_import.read_csv_chunks;
+                the file is read here if None, if reading it failed or if it
+                carries no chunks (large files). The chunks may be an iterator
+                and total_rows None when the file is still arriving
+                (utils.stream_ingest)
+            progress: Called after each chunk with (rows processed so far, elapsed seconds)
             
         Returns:
             Dictionary with upload results
         """
         logger.info(f"Starting chunked upload of CSV file: {file_path}")
         
+        if prepared and 'error' in prepared:
+            prepared = None
+        
         # Check if file exists
-        if not os.path.exists(file_path):
+        if not prepared and not os.path.exists(file_path):
             error_msg = f"File not found: {file_path}"
             logger.error(error_msg)
             return {'success': False, 'error': error_msg}
         
         # Count rows for progress tracking
-        total_rows = count_csv_rows(file_path) - 1  # Subtract header
+        if prepared:
+            total_rows = prepared['total_rows']
+            chunk_size = prepared['chunk_size']
+        else:
+            total_rows = count_csv_rows(file_path) - 1  # Subtract header
         
         # Create upload record
         try:
@@ -273,19 +293,28 @@ class MedicalBillingDB:
                 }
         
         # Process the CSV file in chunks
-        result = process_csv_in_chunks(file_path, process_chunk, chunk_size=chunk_size)
+        result = process_csv_in_chunks(file_path, process_chunk, chunk_size=chunk_size,
+                                       chunks=prepared.get('chunks') if prepared else None,
+                                       progress=progress)
         
         # Update upload status with final counts
         try:
+            if total_rows is None:
+                self.conn.execute(
+                    "UPDATE data_uploads SET records_processed = ? WHERE upload_id = ?",
+                    (result.get('total_rows_processed', 0), upload_id)
+                )
             self.conn.execute(
                 "UPDATE data_uploads SET records_successful = ?, records_failed = ?, status = ? WHERE upload_id = ?",
-                (result['successful_rows'], result['failed_rows'], 
+                (result.get('successful_rows', 0), result.get('failed_rows', 0), 
                  'completed' if result['success'] else 'failed', upload_id)
             )
             self.conn.commit()
         except Exception as e:
             logger.error(f"Error updating upload status: {e}")
         
+        self._finish_upload(os.path.basename(file_path))
+        
         # Add upload ID to result
         result['upload_id'] = upload_id
         result['filename'] = os.path.basename(file_path)
@@ -308,7 +337,9 @@ class MedicalBillingDB:
             logger.debug(f"Created upload record with ID {upload_id}")
             
             # Process the dataframe
-            return self._process_dataframe(df, filename, upload_id)
+            result = self._process_dataframe(df, filename, upload_id)
+            self._finish_upload(filename)
+            return result
             
         except Exception as e:
             error_details = traceback.format_exc()
@@ -432,6 +463,18 @@ class MedicalBillingDB:
             'failed': failed_records,
             'issues': issues
         }
+    
+    def _finish_upload(self, filename: str):
+        """Refresh the data derived from payment_transactions once per upload
+        
+        Called after the last chunk of an upload is committed, so a chunked
+        upload syncs the cube and snapshot and invalidates the data-versioned
+        caches once rather than once per chunk.
+        """
+        self.update_revenue_cube()
+        bump_data_version(f"upload of {filename}")
+        self.update_transaction_snapshot()
+    
     def update_monthly_summaries(self):
         """Update the monthly summary tables for faster reporting"""
         try:
@@ -457,6 +500,31 @@ class MedicalBillingDB:
             logger.error(f"Error updating monthly summaries: {e}")
             self.conn.rollback()
             raise
+    
+    def update_revenue_cube(self):
+        """Fold newly inserted transactions into the revenue cube"""
+        if not cube_enabled():
+            return
+        try:
+            result = get_revenue_cube(self.db_path).sync(self.conn)
+            logger.debug(f"Revenue cube updated: {result}")
+        except Exception as e:
+            # The next analytics read retries the sync
+            logger.warning(f"Error updating revenue cube: {e}")
+    
+    def update_transaction_snapshot(self):
+        """Export newly inserted transactions to the Parquet snapshot"""
+        # A staged load's shadow database is published into the live one,
+        # whose snapshot catches up on its next read
+        if not snapshot_enabled() or is_shadow_path(self.db_path):
+            return
+        try:
+            result = get_transaction_snapshot(self.db_path).sync(self.conn)
+            logger.debug(f"Transaction snapshot updated: {result}")
+        except Exception as e:
+            # The next snapshot read retries the sync
+            logger.warning(f"Error updating transaction snapshot: {e}")
+    
     def get_provider_revenue(self, year: int = None, provider_name: str = None) -> pd.DataFrame:
         """Get provider revenue data, optionally filtered by year and/or provider name"""
         try:
@@ -6,13 +6,13 @@ This script adds month-to-month expense tracking capabilities to the existing
 HVLC_DB medical billing database.
 """
 
-import sqlite3
 import os
 import sys
 from datetime import datetime
 from utils.logger import get_logger
 from utils.config import get_config
 from utils.expense_analyzer import ExpenseAnalyzer
+from utils.db_open import connect_db
 
 logger = get_logger()
 config = get_config()
@@ -24,8 +24,8 @@ def backup_database(db_path: str) -> str:
     
     try:
         # Use SQLite backup API for safe backup
-        source = sqlite3.connect(db_path)
-        backup = sqlite3.connect(backup_path)
+        source = connect_db(db_path)
+        backup = connect_db(backup_path)
         source.backup(backup)
         source.close()
         backup.close()
@@ -40,7 +40,7 @@ def verify_existing_tables(db_path: str) -> bool:
     """Verify that core tables exist before migration"""
     required_tables = ['providers', 'payment_transactions']
     
-    conn = sqlite3.connect(db_path)
+    conn = connect_db(db_path)
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -63,7 +63,7 @@ def add_expense_tables(db_path: str) -> bool:
         analyzer.create_expense_tables()
         
         # Add expense categories table (not created by analyzer)
-        conn = sqlite3.connect(db_path)
+        conn = connect_db(db_path)
         try:
             # Create expense categories table
             conn.execute("""
@@ -116,7 +116,7 @@ def validate_migration(db_path: str) -> bool:
         'expense_categories'
     ]
     
-    conn = sqlite3.connect(db_path)
+    conn = connect_db(db_path)
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -4,9 +4,9 @@ Provider Analytics Database Migration
 Creates tables for tracking provider monthly/annual performance with session date vs payment date mapping
 """
 
-import sqlite3
 import os
 from datetime import datetime
+from utils.db_open import connect_db
 
 def create_provider_analytics_tables():
     """Create provider analytics tracking tables"""
@@ -22,7 +22,7 @@ def create_provider_analytics_tables():
     os.system(f"cp {db_path} {backup_path}")
     print(f"✅ Database backed up to: {backup_path}")
     
-    conn = sqlite3.connect(db_path)
+    conn = connect_db(db_path)
     cursor = conn.cursor()
     
     try:
@@ -9,13 +9,136 @@ import os
 import csv
 import sqlite3
 import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date
 from collections import defaultdict
+from functools import lru_cache
+
+import pandas as pd
+from utils.db_open import connect_db
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Columns of payment_session_mapping, in insert order
+MAPPING_COLUMNS = ['payment_date', 'session_date', 'provider_name', 'cash_applied',
+                   'payment_source', 'session_reference', 'check_number', 'payment_from']
+
+BILLING_COLUMNS = ['Check Date', 'Date Posted', 'Check Number', 'Payment From',
+                   'Reference', 'Cash Applied', 'Provider']
+
+# Session reference dates, tried in order as in ProviderBillingProcessor.session_patterns
+SESSION_DATE_PATTERNS = [
+    re.compile(r'Sess:(\d{2}-\d{2}-\d{4})'),  # Sess:MM-DD-YYYY
+    re.compile(r'Sess:(\d{4}-\d{2}-\d{2})'),  # Sess:YYYY-MM-DD
+]
+SESSION_DATE_FORMATS = ('%m-%d-%Y', '%Y-%m-%d')
+POSTED_DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y')
+
+
+@lru_cache(maxsize=None)
+def _parse_date(date_str, formats):
+    """Parse a date string with the first matching format, or return None
+    
+    Billing exports repeat the same few dates on every row, so results are
+    cached and strptime runs once per distinct string.
+    """
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _session_date(reference):
+    for pattern in SESSION_DATE_PATTERNS:
+        match = pattern.search(reference)
+        if match:
+            session_date = _parse_date(match.group(1), SESSION_DATE_FORMATS)
+            if session_date:
+                return session_date
+    return None
+
+
+def read_billing_mappings(csv_file_path):
+    """Read payment-session mappings from a billing CSV
+    
+    Produces the same mappings as ProviderBillingProcessor.process_csv_file,
+    as tuples in MAPPING_COLUMNS order with ISO date strings. The file is
+    parsed by pandas' C reader and only the needed columns are walked once.
+    
+    Args:
+        csv_file_path: Path to the billing CSV
+        
+    Returns:
+        List of mapping tuples, in file order
+    """
+    with warnings.catch_warnings():
+        # Some exports append a stray total cell to header rows; drop it like csv.DictReader did
+        warnings.simplefilter('ignore', pd.errors.ParserWarning)
+        df = pd.read_csv(csv_file_path, dtype=object, keep_default_na=False, index_col=False,
+                         encoding='utf-8', usecols=lambda column: column in BILLING_COLUMNS)
+    columns = [df[column].tolist() if column in df else [''] * len(df) for column in BILLING_COLUMNS]
+    
+    mappings = []
+    date_posted_info = check_number_info = payment_from_info = provider_info = ''
+    for check_date, date_posted, check_number, payment_from, reference, cash_applied, provider in zip(*columns):
+        # Payment header rows carry the check details for the session rows after them
+        payment_from = payment_from.strip()
+        if check_date.strip() and payment_from:
+            date_posted_info = date_posted.strip()
+            check_number_info = check_number.strip()
+            payment_from_info = payment_from
+            provider_info = provider.strip()
+        
+        cash_applied = cash_applied.strip()
+        reference = reference.strip()
+        if not (cash_applied and reference and 'Sess:' in reference):
+            continue
+        
+        session_date = _session_date(reference)
+        if not session_date:
+            print(f"⚠️ Could not extract session date from: {reference}")
+            continue
+        
+        try:
+            cash_amount = float(cash_applied.replace(',', '').replace('$', ''))
+        except ValueError as e:
+            print(f"⚠️ Error parsing cash amount '{cash_applied}': {e}")
+            continue
+        
+        date_posted = date_posted_info or date_posted.strip()
+        mappings.append((
+            _parse_date(date_posted, POSTED_DATE_FORMATS) if date_posted else None,
+            session_date,
+            provider.strip() or provider_info,
+            cash_amount,
+            payment_from_info,
+            reference,
+            check_number_info,
+            payment_from_info
+        ))
+    
+    return mappings
+
+
+def _read_billing_file(csv_file_path):
+    """Worker entry point for read_billing_mappings"""
+    print(f"📄 Processing: {csv_file_path}")
+    
+    try:
+        return read_billing_mappings(csv_file_path)
+    except Exception as e:
+        print(f"❌ Error processing {csv_file_path}: {e}")
+        return []
+
 
 class ProviderBillingProcessor:
     def __init__(self, db_path='medical_billing.db'):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        self.conn = connect_db(db_path)
         self.conn.row_factory = sqlite3.Row
         
         # Session reference patterns
@@ -43,8 +166,8 @@ class ProviderBillingProcessor:
                 contracts[provider] = []
             contracts[provider].append({
                 'percentage': row['split_percentage'],
-                'effective_date': row['effective_date'],
-                'end_date': row['end_date']
+                'effective_date': datetime.strptime(row['effective_date'], '%Y-%m-%d').date(),
+                'end_date': datetime.strptime(row['end_date'], '%Y-%m-%d').date() if row['end_date'] else None
             })
         
         return contracts
@@ -78,10 +201,8 @@ class ProviderBillingProcessor:
         
         contracts = self.provider_contracts[provider_name]
         for contract in contracts:
-            effective_date = datetime.strptime(contract['effective_date'], '%Y-%m-%d').date()
-            end_date = None
-            if contract['end_date']:
-                end_date = datetime.strptime(contract['end_date'], '%Y-%m-%d').date()
+            effective_date = contract['effective_date']
+            end_date = contract['end_date']
             
             if session_date >= effective_date:
                 if end_date is None or session_date <= end_date:
@@ -167,28 +288,39 @@ class ProviderBillingProcessor:
         
         return mappings
     
-    def insert_payment_mappings(self, mappings):
-        """Insert payment-session mappings into database"""
-        cursor = self.conn.cursor()
+    def insert_payment_mappings(self, mappings, source=None):
+        """Insert payment-session mappings into database
+        
+        Mappings may be dicts or tuples in MAPPING_COLUMNS order. They are
+        inserted with one executemany in a single transaction; if that fails,
+        each mapping is retried on its own so one bad row does not drop the rest.
+        
+        Args:
+            mappings: Payment-session mappings
+            source: File the mappings came from, for the log
+        """
+        rows = [
+            mapping if isinstance(mapping, tuple) else tuple(mapping[column] for column in MAPPING_COLUMNS)
+            for mapping in mappings
+        ]
+        sql = f'''
+            INSERT OR IGNORE INTO payment_session_mapping
+            ({', '.join(MAPPING_COLUMNS)})
+            VALUES ({', '.join('?' for _ in MAPPING_COLUMNS)})
+        '''
+        
+        try:
+            with self.conn:
+                return self.conn.executemany(sql, rows).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Bulk insert of {len(rows)} mappings failed for {source or 'batch'}, "
+                           f"retrying row by row: {e}")
         
+        cursor = self.conn.cursor()
         inserted = 0
-        for mapping in mappings:
+        for row in rows:
             try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO payment_session_mapping
-                    (payment_date, session_date, provider_name, cash_applied, 
-                     payment_source, session_reference, check_number, payment_from)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    mapping['payment_date'],
-                    mapping['session_date'],
-                    mapping['provider_name'],
-                    mapping['cash_applied'],
-                    mapping['payment_source'],
-                    mapping['session_reference'],
-                    mapping['check_number'],
-                    mapping['payment_from']
-                ))
+                cursor.execute(sql, row)
                 
                 if cursor.rowcount > 0:
                     inserted += 1
@@ -223,21 +355,21 @@ class ProviderBillingProcessor:
         # Clear existing monthly summaries
         cursor.execute('DELETE FROM provider_monthly_summary')
         
+        summaries = []
         for row in monthly_data:
             provider = row['provider_name']
             year_month = row['year_month']
-            total_cash = row['total_cash_applied']
-            session_count = row['session_count']
             
             # Get session date for percentage lookup
             session_date = datetime.strptime(year_month + '-01', '%Y-%m-%d').date()
             percentage = self._get_provider_percentage(provider, session_date)
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO provider_monthly_summary
-                (provider_name, year_month, total_cash_applied, session_count, provider_cut_percentage)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (provider, year_month, total_cash, session_count, percentage))
+            summaries.append((provider, year_month, row['total_cash_applied'], row['session_count'], percentage))
+        
+        cursor.executemany('''
+            INSERT OR REPLACE INTO provider_monthly_summary
+            (provider_name, year_month, total_cash_applied, session_count, provider_cut_percentage)
+            VALUES (?, ?, ?, ?, ?)
+        ''', summaries)
         
         self.conn.commit()
         print(f"✅ Generated {len(monthly_data)} monthly summaries")
@@ -267,45 +399,70 @@ class ProviderBillingProcessor:
         # Clear existing annual summaries
         cursor.execute('DELETE FROM provider_annual_summary')
         
-        for row in annual_data:
-            cursor.execute('''
-                INSERT OR REPLACE INTO provider_annual_summary
-                (provider_name, year, total_revenue, total_provider_income, 
-                 total_company_income, months_active)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
+        cursor.executemany('''
+            INSERT OR REPLACE INTO provider_annual_summary
+            (provider_name, year, total_revenue, total_provider_income, 
+             total_company_income, months_active)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (
                 row['provider_name'],
                 int(row['year']),
                 row['total_revenue'],
                 row['total_provider_income'],
                 row['total_company_income'],
                 row['months_active']
-            ))
+            )
+            for row in annual_data
+        ])
         
         self.conn.commit()
         print(f"✅ Generated {len(annual_data)} annual summaries")
     
-    def process_all_billing_csvs(self, csv_directory='csv_folder/billing'):
-        """Process all CSV files in the billing directory"""
+    def process_csv_file_fast(self, csv_file_path):
+        """Process a single CSV file with the vectorized reader
+        
+        Returns the same mappings as process_csv_file, as tuples in
+        MAPPING_COLUMNS order.
+        """
+        return _read_billing_file(csv_file_path)
+    
+    def process_all_billing_csvs(self, csv_directory='csv_folder/billing', fast=True, max_workers=None):
+        """Process all CSV files in the billing directory
+        
+        Args:
+            csv_directory: Folder of billing CSVs
+            fast: Parse files with the vectorized reader in worker processes
+            max_workers: Worker processes for the fast path (default: CPU count)
+        """
         print(f"🚀 Processing all CSV files in {csv_directory}")
         
         if not os.path.exists(csv_directory):
             print(f"❌ Directory not found: {csv_directory}")
             return
         
+        filenames = [filename for filename in sorted(os.listdir(csv_directory)) if filename.endswith('.csv')]
+        file_paths = [os.path.join(csv_directory, filename) for filename in filenames]
         total_mappings = 0
         
-        for filename in sorted(os.listdir(csv_directory)):
-            if filename.endswith('.csv'):
-                file_path = os.path.join(csv_directory, filename)
-                mappings = self.process_csv_file(file_path)
-                inserted = self.insert_payment_mappings(mappings)
+        if fast and len(file_paths) > 1:
+            # Parse in parallel; insert in filename order so duplicates resolve as before
+            with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+                parsed = pool.map(_read_billing_file, file_paths)
+                for filename, mappings in zip(filenames, parsed):
+                    inserted = self.insert_payment_mappings(mappings, filename)
+                    total_mappings += inserted
+                    print(f"   ✅ {filename}: {inserted} mappings inserted")
+        else:
+            process = self.process_csv_file_fast if fast else self.process_csv_file
+            for filename, file_path in zip(filenames, file_paths):
+                inserted = self.insert_payment_mappings(process(file_path), filename)
                 total_mappings += inserted
                 print(f"   ✅ {filename}: {inserted} mappings inserted")
         
         print(f"\n📊 Total mappings processed: {total_mappings}")
         
-        # Generate summaries
+        # Generate summaries once, after every file is in
         self.generate_monthly_summaries()
         self.generate_annual_summaries()
         
@@ -0,0 +1,75 @@
+"""
+Tests for the DuckDB analytics engine
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advanced_analytics_queries import AdvancedAnalytics
+from benchmark_analytics_engines import generate_transactions
+from utils.analytics_engine import DUCKDB_AVAILABLE
+from utils.transaction_snapshot import PYARROW_AVAILABLE
+
+
+@unittest.skipUnless(DUCKDB_AVAILABLE and PYARROW_AVAILABLE, "duckdb or pyarrow is not installed")
+class TestAnalyticsEngine(unittest.TestCase):
+    """Test cases for routing AdvancedAnalytics to DuckDB"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.tmp_dir, "billing.db")
+        generate_transactions(cls.db_path, 3000, providers=5, payers=4, patients=200, years=3)
+
+        cls.sqlite = AdvancedAnalytics(cls.db_path, engine="sqlite")
+        # Compare against SQLite's own results, not the cube's estimates
+        cls.sqlite.cube = None
+        cls.duckdb = AdvancedAnalytics(cls.db_path, engine="duckdb")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite.close()
+        cls.duckdb.close()
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_engine_toggle(self):
+        """Only the duckdb engine setting routes queries to DuckDB"""
+        self.assertIsNone(self.sqlite.engine)
+        self.assertIsNotNone(self.duckdb.engine)
+
+    def test_payer_analysis_matches(self):
+        """Payer overview and trends are the same on both engines"""
+        expected, actual = self.sqlite.get_payer_analysis(), self.duckdb.get_payer_analysis()
+        for key in ("overview", "trends"):
+            pd.testing.assert_frame_equal(actual[key], expected[key], check_dtype=False)
+
+    def test_growth_metrics_match(self):
+        """Growth and efficiency metrics are the same on both engines"""
+        expected, actual = self.sqlite.get_business_growth_metrics(), self.duckdb.get_business_growth_metrics()
+        for key in ("growth_trajectory", "efficiency_metrics"):
+            pd.testing.assert_frame_equal(actual[key], expected[key], check_dtype=False)
+        self.assertTrue(actual["growth_trajectory"]["revenue_growth_rate"].iloc[1:].notna().all())
+
+    def test_provider_lifecycle_matches(self):
+        """Lifecycle, including the rolling six-month peak, is the same on both engines"""
+        cutoffs = self.sqlite._lifecycle_cutoffs()
+        with patch.object(AdvancedAnalytics, "_lifecycle_cutoffs", return_value=cutoffs):
+            expected = self.sqlite.get_provider_lifecycle_analysis()
+            actual = self.duckdb.get_provider_lifecycle_analysis()
+
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        # The peak covers six months, so it is at least the recent six months
+        self.assertTrue((expected["peak_six_month_revenue"] >= expected["recent_six_month_revenue"] - 1e-6).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
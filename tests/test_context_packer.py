@@ -0,0 +1,111 @@
+"""
+Tests for the LLM context packer
+"""
+
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.context_packer import (
+    ContextPacker,
+    ContextSection,
+    compress_dataframe,
+    compress_table,
+    estimate_tokens,
+    get_context_budget,
+    log_prompt_metrics,
+    rank_sections,
+)
+
+
+def test_estimate_tokens():
+    """Token estimate is roughly a quarter of the characters"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+
+
+def test_budget_depends_on_model():
+    """The 70B homelab model gets a larger budget than the laptop model"""
+    from utils.config import get_config
+    homelab = get_config().get("ollama.homelab_model")
+    assert get_context_budget(homelab) > get_context_budget("llama3.1:8b")
+    assert get_context_budget(None) == get_context_budget("unknown-model")
+
+
+def test_rank_sections_prefers_title_match():
+    """Sections whose title matches the question rank first"""
+    sections = [
+        ContextSection("BUSINESS OVERVIEW", "12 months of revenue"),
+        ContextSection("PAYER ANALYSIS", "Aetna: 10 transactions"),
+    ]
+    ranked = rank_sections("who is our top payer", sections)
+    assert ranked[0].title == "PAYER ANALYSIS"
+
+
+def test_compress_table_columnar():
+    """Tables are rendered one column per line with repeated values collapsed"""
+    text = compress_table(["provider", "payer", "revenue"],
+                          [("Dustin", "Aetna", 100.0), ("Tammy", "Aetna", 55.5)])
+    assert text.splitlines() == [
+        "rows=2",
+        "provider: Dustin|Tammy",
+        "payer: Aetna (all)",
+        "revenue: 100|55.50",
+    ]
+
+
+def test_compress_dataframe_handles_nulls():
+    """Missing values become empty cells"""
+    df = pd.DataFrame({"a": [1.0, None], "b": ["x", "y"]})
+    assert "a: 1|" in compress_dataframe(df)
+
+
+def test_pack_fits_budget_and_keeps_order():
+    """Packed context never exceeds the budget and keeps logical order"""
+    sections = [
+        ContextSection("GENERAL DATA OVERVIEW", "overview line\n" * 200),
+        ContextSection("PAYER ANALYSIS", "Aetna: 10 transactions", priority=1.0),
+        ContextSection("EXPENSE ANALYSIS", "rent: $2,000"),
+    ]
+    text, report = ContextPacker(max_tokens=120).pack("top payer expenses", sections)
+
+    assert report["used_tokens"] <= 120
+    assert "PAYER ANALYSIS" in report["included"]
+    assert "GENERAL DATA OVERVIEW" in report["truncated"]
+    assert text.index("GENERAL DATA OVERVIEW") < text.index("PAYER ANALYSIS")
+    assert "more lines truncated" in text
+
+
+def test_log_prompt_metrics_reads_ollama_timings():
+    """Prefill time is taken from Ollama's prompt_eval_duration"""
+    metrics = log_prompt_metrics(
+        "llama3.3:70b", "x" * 400,
+        {"prompt_eval_count": 98, "prompt_eval_duration": 2_500_000_000},
+        elapsed_seconds=3.0,
+    )
+    assert metrics["estimated_tokens"] == 100
+    assert metrics["prompt_tokens"] == 98
+    assert metrics["prefill_ms"] == 2500.0
+    assert metrics["total_ms"] == 3000.0
+
+
+def test_compress_table_truncates_by_rows():
+    """An oversized table drops rows, never columns, and says how many it kept"""
+    df = pd.DataFrame({
+        "provider": [f"Provider {i}" for i in range(300)],
+        "payer": [f"Payer {i % 7}" for i in range(300)],
+        "revenue": [i * 10.5 for i in range(300)],
+        "transactions": list(range(300)),
+    })
+    text = compress_dataframe(df, max_tokens=400)
+    lines = text.splitlines()
+
+    assert estimate_tokens(text) <= 400
+    assert [line.split(":")[0] for line in lines[1:]] == list(df.columns)
+    kept, total = lines[0][len("rows="):].split("/")
+    assert total == "300" and 0 < int(kept) < 300
+    assert lines[1].count("|") == int(kept) - 1
+    assert compress_dataframe(df.head(2), max_tokens=400).splitlines()[0] == "rows=2"
@@ -0,0 +1,87 @@
+"""
+Tests for the incremental conversation analytics
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ada_memory import AdaMemory
+from utils.ai_model_tuner import AIModelTuner
+from utils.conversation_stats import ConversationStats, classify_conversation
+
+
+class TestConversationStats(unittest.TestCase):
+    """Test cases for ConversationStats"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.memory = AdaMemory(self.db_path)
+        self.stats = ConversationStats(self.db_path)
+        messages = [
+            ("How is Dustin doing on revenue?", 7, ["conversation", "provider"]),
+            ("Compare overhead vs last month", 9, ["conversation", "expenses"]),
+            ("hello there", 3, ["conversation"]),
+            ("payment trends", 6, ["conversation", "universal_ai"]),
+        ]
+        for content, importance, tags in messages * 8:
+            self.memory.store_memory("conversation", content, importance=importance, tags=tags)
+        self.memory.store_memory("insight", "revenue insight", importance=10, tags=["insight"])
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_classify_conversation(self):
+        """Every question type whose terms appear is returned"""
+        self.assertEqual(classify_conversation("Compare Tammy's payment vs cost"),
+                         ["provider_analysis", "financial_analysis", "comparison", "expense_analysis"])
+        self.assertEqual(classify_conversation("hello"), [])
+
+    def test_window_counts_conversations(self):
+        """Counters are updated as conversations are stored"""
+        window = self.stats.window(7)
+
+        self.assertEqual(window["conversations"], 32)
+        self.assertAlmostEqual(window["avg_importance"], (7 + 9 + 3 + 6) / 4)
+        self.assertEqual(window["question_types"],
+                         {"provider_analysis": 8, "financial_analysis": 16, "comparison": 8, "expense_analysis": 8})
+        self.assertEqual(window["tags"]["conversation"], 32)
+
+    def test_preference_importance_matches_memories(self):
+        """The preference sample is the top conversations by importance"""
+        memories = self.memory.retrieve_memories(memory_type="conversation", limit=20, min_importance=5)
+        expected = sum(memory["importance"] for memory in memories) / len(memories)
+        self.assertAlmostEqual(self.stats.preference_importance(), expected)
+
+    def test_existing_memories_backfilled(self):
+        """A database with conversations but no counters is backfilled on open"""
+        before = self.stats.window(30)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM conversation_stats")
+            conn.execute("DELETE FROM conversation_top_importance")
+
+        AdaMemory(self.db_path)
+        self.assertEqual(self.stats.window(30), before)
+        self.assertIsNotNone(self.stats.preference_importance())
+
+    def test_tuner_profile(self):
+        """AIModelTuner builds its profile and performance data from the counters"""
+        tuner = AIModelTuner(self.db_path)
+
+        profile = tuner.analyze_conversation_patterns()
+        self.assertEqual(profile.preferred_response_length, "detailed")
+        self.assertEqual(profile.domain_focus_areas[0], "conversation")
+        self.assertEqual(len(profile.satisfaction_scores), 32)
+        self.assertEqual(tuner._analyze_recent_performance()["conversation_count"], 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
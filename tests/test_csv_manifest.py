@@ -0,0 +1,56 @@
+"""
+Tests for the persisted CSV manifest
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_manifest import CSVManifest, count_lines, read_header
+
+
+def _write_csv(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(rows) + "\n")
+
+
+def test_count_lines_without_trailing_newline(tmp_path):
+    """A final line without a newline is still counted"""
+    path = tmp_path / "a.csv"
+    path.write_text("h\n1\n2")
+    assert count_lines(str(path), block_size=2) == 3
+
+
+def test_read_header_fills_blank_names(tmp_path):
+    """Blank header cells are named like pandas does"""
+    path = tmp_path / "a.csv"
+    path.write_text("Date,,Amount\n")
+    assert read_header(str(path)) == ["Date", "Unnamed: 1", "Amount"]
+
+
+def test_refresh_only_rescans_changed_files(tmp_path):
+    """Unchanged files are served from the manifest on the next run"""
+    root = tmp_path / "csv"
+    manifest_path = str(tmp_path / "manifest.json")
+    _write_csv(root / "billing" / "jan.csv", ["Date,Amount", "1,2", "3,4"])
+    _write_csv(root / "billing" / "feb.csv", ["Date,Amount", "5,6"])
+
+    first = CSVManifest(str(root), manifest_path)
+    entries = {os.path.basename(e["file_path"]): e for e in first.refresh()}
+    assert first.stats["scanned"] == 2
+    assert entries["jan.csv"]["row_count"] == 2
+    assert entries["jan.csv"]["category"] == "billing"
+
+    _write_csv(root / "billing" / "feb.csv", ["Date,Amount", "5,6", "7,8", "9,10"])
+    os.remove(root / "billing" / "jan.csv")
+
+    second = CSVManifest(str(root), manifest_path)
+    entries = second.refresh()
+    assert second.stats == {"reused": 0, "scanned": 1, "removed": 1}
+    assert entries[0]["row_count"] == 3
+
+    third = CSVManifest(str(root), manifest_path)
+    third.refresh()
+    assert third.stats == {"reused": 1, "scanned": 0, "removed": 0}
@@ -0,0 +1,76 @@
+"""
+Tests for the SQLite open policy and staged loads
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_open import backup_database, connect_db, shadow_path, staged_load
+
+
+class TestDBOpen(unittest.TestCase):
+    """Test cases for utils.db_open"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.db_path = os.path.join(self.root, "billing.db")
+        with connect_db(self.db_path) as conn:
+            conn.execute("CREATE TABLE payments (amount REAL)")
+            conn.execute("INSERT INTO payments VALUES (100.0)")
+        self.reader = connect_db(self.db_path)
+        self.addCleanup(self.reader.close)
+
+    def count(self):
+        return self.reader.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+
+    def test_open_policy(self):
+        """Connections use WAL, a busy timeout and bulk synchronous settings"""
+        self.assertEqual(self.reader.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertGreater(self.reader.execute("PRAGMA busy_timeout").fetchone()[0], 0)
+        self.assertEqual(self.reader.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+
+        bulk = connect_db(self.db_path, bulk=True)
+        self.addCleanup(bulk.close)
+        self.assertEqual(bulk.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+
+    def test_staged_load_publishes_at_end(self):
+        """Readers see the old data until the staged load is published"""
+        with staged_load(self.db_path) as path:
+            self.assertEqual(path, shadow_path(self.db_path))
+            with connect_db(path, bulk=True) as conn:
+                conn.executemany("INSERT INTO payments VALUES (?)", [(1.0,), (2.0,)])
+            self.assertEqual(self.count(), 1)
+
+        self.assertEqual(self.count(), 3)
+        self.assertFalse(os.path.exists(shadow_path(self.db_path)))
+
+    def test_failed_staged_load_is_discarded(self):
+        """A failing load leaves the live database unchanged"""
+        with self.assertRaises(RuntimeError):
+            with staged_load(self.db_path) as path:
+                with connect_db(path) as conn:
+                    conn.execute("DELETE FROM payments")
+                raise RuntimeError("import failed")
+
+        self.assertEqual(self.count(), 1)
+        self.assertFalse(os.path.exists(shadow_path(self.db_path)))
+
+    def test_backup_includes_wal(self):
+        """Backups contain committed rows that are still in the WAL"""
+        with connect_db(self.db_path) as conn:
+            conn.execute("INSERT INTO payments VALUES (5.0)")
+        backup_path = backup_database(self.db_path, os.path.join(self.root, "backup.db"))
+
+        with connect_db(backup_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
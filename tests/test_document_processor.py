@@ -107,6 +107,53 @@ class TestDocumentProcessor(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0]["filename"], "test_document.md")
 
+    def test_incremental_reprocessing(self):
+        """Test that only modified documents are reprocessed"""
+        test_doc_path = os.path.join(self.test_dir, "test_document.md")
+        self.processor.process_all_documents()
+        
+        with patch.object(self.processor, '_process_markdown', wraps=self.processor._process_markdown) as spy:
+            # Touched but unchanged content is not reprocessed
+            os.utime(test_doc_path, (1, 1))
+            self.processor.process_all_documents()
+            self.assertEqual(spy.call_count, 0)
+            
+            with open(test_doc_path, 'a') as f:
+                f.write("\nNew payer policy section.\n")
+            self.processor.process_all_documents()
+            self.assertEqual(spy.call_count, 1)
+        
+        # Tracking records stay small; the text lives in the per-document JSON
+        record = self.processor.processed_docs[0]
+        self.assertNotIn("full_text", record)
+        self.assertIn("content_hash", record)
+
+    def test_parallel_pdf_matches_sequential(self):
+        """Test that page-parallel PDF extraction gives the same result"""
+        import fitz
+        pdf_path = os.path.join(self.test_dir, "claims.pdf")
+        doc = fitz.open()
+        for i in range(6):
+            doc.new_page().insert_text((72, 72), f"Claim page {i}")
+        doc.save(pdf_path)
+        doc.close()
+        
+        sequential = DocumentProcessor(docs_dir=self.test_dir, output_dir=os.path.join(self.test_dir, "seq"),
+                                       supported_extensions=['.pdf'])
+        parallel = DocumentProcessor(docs_dir=self.test_dir, output_dir=os.path.join(self.test_dir, "par"),
+                                     supported_extensions=['.pdf'])
+        
+        with patch('utils.document_processor.config') as mock_config:
+            mock_config.get.side_effect = lambda key, default=None: {
+                "document_processing.parallel_page_threshold": 4,
+                "document_processing.pages_per_task": 2
+            }.get(key, default)
+            parallel_result = parallel.process_all_documents(parallel=True, max_workers=2)
+        
+        sequential_result = sequential.process_all_documents()
+        self.assertEqual(parallel_result[0]["pages"], sequential_result[0]["pages"])
+        self.assertEqual(parallel_result[0]["full_text"], sequential_result[0]["full_text"])
+
     def test_get_document_processor(self):
         """Test get_document_processor factory function"""
         with patch('utils.document_processor.config') as mock_config:
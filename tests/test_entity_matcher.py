@@ -0,0 +1,64 @@
+"""
+Tests for the Aho-Corasick entity matcher
+"""
+
+import os
+import sys
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.entity_matcher import ALIAS, NAME_PART, PAYER, PROVIDER, EntityMatcher, build_entity_matcher
+
+
+class TestEntityMatcher(unittest.TestCase):
+    """Test cases for EntityMatcher"""
+
+    def setUp(self):
+        self.matcher = build_entity_matcher(
+            ["Dr. Ann Lee", "Dr. Ann Leeds", "Dr. Bo Kim", "Sarah Connor"],
+            ["Aetna", "Blue Cross"],
+            {"Annie": "Dr. Ann Lee"},
+        )
+
+    def test_spans_and_kinds(self):
+        """Matches carry their kind, canonical value and span"""
+        text = "Did Sarah Connor beat AETNA's numbers?"
+        matches = self.matcher.find(text)
+
+        provider = [m for m in matches if m.kind == PROVIDER][0]
+        self.assertEqual(provider.value, "Sarah Connor")
+        self.assertEqual(text[provider.start:provider.end], "Sarah Connor")
+        payer = [m for m in matches if m.kind == PAYER][0]
+        self.assertEqual(text[payer.start:payer.end], "AETNA")
+
+    def test_overlapping_names(self):
+        """Names contained in longer names are found in the same pass"""
+        values = self.matcher.values("how is dr. ann leeds doing", kinds=[PROVIDER])
+        self.assertEqual(values, ["Dr. Ann Leeds", "Dr. Ann Lee"])
+
+    def test_whole_word_terms(self):
+        """Name parts, payers and aliases only match whole words"""
+        self.assertEqual(self.matcher.values("annual kimchi report at blue crossing"), [])
+        self.assertEqual(self.matcher.values("Ask annie about Kim", kinds=[ALIAS, NAME_PART]),
+                         ["Dr. Ann Lee", "Dr. Bo Kim"])
+        # Honorifics are not name parts
+        self.assertEqual(self.matcher.values("dr. who?"), [])
+
+    def test_matches_naive_search(self):
+        """The automaton finds the same terms as one substring search per term"""
+        words = ["he", "she", "his", "hers", "ushers", "s"]
+        matcher = EntityMatcher()
+        for word in words:
+            matcher.add(word, PROVIDER, word)
+        text = "ushers and his sheep shelters"
+
+        found = sorted((m.start, m.term) for m in matcher.find(text))
+        expected = sorted((i, word) for word in words for i in range(len(text))
+                          if text.startswith(word, i))
+        self.assertEqual(found, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests for incremental expense summaries and month range filters
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.expense_analyzer import ExpenseAnalyzer, month_bounds
+
+
+def make_expenses(rows):
+    return pd.DataFrame(rows, columns=["category", "expense_date", "amount", "budgeted_amount", "is_variable"])
+
+
+class TestExpenseAnalyzer(unittest.TestCase):
+    """Test cases for ExpenseAnalyzer summaries"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.analyzer = ExpenseAnalyzer(self.db_path)
+        self.analyzer.create_expense_tables()
+        self.insert(make_expenses([
+            ("rent", "2024-01-01", 3000.0, 3000.0, 0),
+            ("rent", "2024-02-01", 3000.0, 3000.0, 0),
+            ("supplies", "2024-01-15", 120.0, 100.0, 1),
+            ("supplies", "2024-01-31", 80.0, 100.0, 1),
+            ("supplies", "2023-12-31", 50.0, None, 1),
+        ]))
+        self.analyzer.update_monthly_summaries()
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def insert(self, df: pd.DataFrame):
+        with sqlite3.connect(self.db_path) as conn:
+            df.to_sql("expense_transactions", conn, if_exists="append", index=False)
+
+    def summaries(self) -> pd.DataFrame:
+        with sqlite3.connect(self.db_path) as conn:
+            return pd.read_sql_query(
+                "SELECT * FROM monthly_expense_summary ORDER BY year, month, category", conn
+            )
+
+    def test_month_bounds(self):
+        """Month ranges are half-open and roll over the year"""
+        self.assertEqual(month_bounds(2024, 1), ("2024-01-01", "2024-02-01"))
+        self.assertEqual(month_bounds(2023, 12), ("2023-12-01", "2024-01-01"))
+
+    def test_incremental_matches_full_rebuild(self):
+        """Recomputing touched keys gives the same summaries as a rebuild"""
+        self.insert(make_expenses([
+            ("supplies", "2024-02-10", 60.0, 100.0, 1),
+            ("rent", "2024-01-31", 25.0, None, 0),
+        ]))
+        self.analyzer.update_monthly_summaries(keys={(2024, 2, "supplies"), (2024, 1, "rent")})
+        incremental = self.summaries()
+
+        self.analyzer.update_monthly_summaries()
+        rebuilt = self.summaries()
+
+        columns = [c for c in rebuilt.columns if c not in ("summary_id", "last_updated")]
+        pd.testing.assert_frame_equal(incremental[columns], rebuilt[columns])
+
+    def test_untouched_keys_are_kept(self):
+        """Summaries outside the touched keys are not rewritten"""
+        before = self.summaries().set_index(["year", "month", "category"])["summary_id"]
+
+        self.insert(make_expenses([("rent", "2024-02-15", 10.0, None, 0)]))
+        self.analyzer.update_monthly_summaries(keys=[(2024, 2, "rent")])
+        after = self.summaries().set_index(["year", "month", "category"])
+
+        self.assertEqual(after.loc[(2024, 2, "rent"), "total_amount"], 3010.0)
+        untouched = before.drop((2024, 2, "rent"))
+        self.assertTrue((after.loc[untouched.index, "summary_id"] == untouched).all())
+
+    def test_monthly_variance_uses_date_index(self):
+        """Variance filters by an expense_date range that can use the index"""
+        variance = self.analyzer.calculate_monthly_variance(2024, 1)
+        self.assertEqual(variance["total_actual"], 3200.0)
+
+        with sqlite3.connect(self.db_path) as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT SUM(amount) FROM expense_transactions "
+                "WHERE expense_date >= ? AND expense_date < ?", month_bounds(2024, 1)
+            ))
+        self.assertIn("idx_expense_date", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
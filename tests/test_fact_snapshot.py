@@ -0,0 +1,102 @@
+"""
+Tests for the shared fact snapshot used by the AI routes
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from medical_billing_db import MedicalBillingDB
+from api.routes.ai_reasoning_validator import ReasoningValidator
+from utils.data_version import bump_data_version
+from utils.fact_snapshot import extract_revenue_figures, extract_transaction_counts, get_fact_snapshot
+
+
+def make_transactions() -> pd.DataFrame:
+    return pd.DataFrame({
+        "provider_name": ["Dr. Ann Lee", "Dr. Ann Lee", "Dr. Ann Leeds", "Dr. Bo Kim"],
+        "transaction_date": ["2024-01-02", "2024-02-03", "2024-01-05", "2024-03-04"],
+        "patient_id": ["P1", "P2", "P3", "P4"],
+        "cash_applied": [100.0, 50.0, 75.0, 20.0],
+        "payer_name": ["Aetna", "BCBS", "Aetna", "Medicare"],
+    })
+
+
+class TestFactSnapshot(unittest.TestCase):
+    """Test cases for the fact snapshot"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.db = MedicalBillingDB(self.db_path)
+        self.db.upload_csv_data(make_transactions(), "first.csv")
+
+    def tearDown(self):
+        self.db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_snapshot_facts(self):
+        """The snapshot holds the same figures as the per-provider queries"""
+        facts = get_fact_snapshot(self.db_path)
+
+        self.assertEqual(facts.revenue["Dr. Ann Lee"], 150.0)
+        self.assertEqual(facts.transaction_counts["Dr. Bo Kim"], 1)
+        summary = facts.provider_summary("Dr. Ann Lee")
+        self.assertEqual(summary["unique_payers"], 2)
+        self.assertEqual((summary["first_date"], summary["last_date"]), ("2024-01-02", "2024-02-03"))
+        self.assertIsNone(facts.provider_summary("Dr. Nobody"))
+
+    def test_snapshot_shared_until_data_changes(self):
+        """The snapshot is reused until an upload or a version bump"""
+        facts = get_fact_snapshot(self.db_path)
+        self.assertIs(get_fact_snapshot(self.db_path), facts)
+
+        self.db.upload_csv_data(make_transactions().iloc[:1], "second.csv")
+        updated = get_fact_snapshot(self.db_path)
+        self.assertIsNot(updated, facts)
+        self.assertEqual(updated.transaction_counts["Dr. Ann Lee"], 3)
+
+        bump_data_version("test")
+        self.assertIsNot(get_fact_snapshot(self.db_path), updated)
+
+    def test_mentioned_providers(self):
+        """Overlapping provider names are all found, in provider order"""
+        facts = get_fact_snapshot(self.db_path)
+
+        self.assertEqual(facts.mentioned_providers("How is DR. ANN LEEDS doing?"),
+                         ["Dr. Ann Lee", "Dr. Ann Leeds"])
+        self.assertEqual(facts.mentioned_providers("Compare dr. bo kim and Dr. Ann Lee"),
+                         ["Dr. Ann Lee", "Dr. Bo Kim"])
+        self.assertEqual(facts.mentioned_providers("No names here"), [])
+
+    def test_extract_figures(self):
+        """Dollar figures and transaction counts are parsed from text"""
+        text = "Revenue was $12,345.67 from 1,470 transactions and $80 in fees"
+        self.assertEqual(extract_revenue_figures(text), [{"amount": 12345.67}, {"amount": 80.0}])
+        self.assertEqual(extract_transaction_counts(text), [{"count": 1470}])
+
+    def test_validator_uses_snapshot(self):
+        """ReasoningValidator checks responses against the snapshot"""
+        app = Flask(__name__)
+        app.config["DATABASE_PATH"] = self.db_path
+        with app.app_context():
+            validator = ReasoningValidator()
+            result = validator.validate_response("Which provider earns most?", "Dr. Smith had $1,000.00")
+
+        self.assertFalse(result["is_valid"])
+        self.assertIn("Dr. Ann Lee", result["corrected_response"])
+        self.assertIn("$150.00", result["corrected_response"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Tests for background import jobs
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import subprocess
+import time
+import unittest
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.import_jobs import ImportJobQueue, QueueFullError
+
+
+class TestImportJobs(unittest.TestCase):
+    """Test cases for ImportJobQueue"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.db_path = os.path.join(self.root, "billing.db")
+        self.csv_path = os.path.join(self.root, "payments.csv")
+        pd.DataFrame({
+            "Provider": ["Dr. Ames", "Dr. Baker"] * 150,
+            "Date": ["2024-01-05", "2024-02-10"] * 150,
+            "Cash Applied": [100.0, 25.5] * 150,
+        }).to_csv(self.csv_path, index=False)
+
+    def make_queue(self, **kwargs):
+        queue = ImportJobQueue(self.db_path, **kwargs)
+        self.addCleanup(queue.stop, 10)
+        return queue
+
+    def transactions(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM payment_transactions").fetchone()[0]
+
+    def test_upload_job_completes(self):
+        """Upload jobs run in the background and record their progress"""
+        for max_workers in (1, 2):
+            queue = self.make_queue(max_workers=max_workers)
+            job_id = queue.enqueue(self.csv_path, kind="upload")
+            job = queue.wait(job_id, timeout=60)
+            queue.stop(10)
+
+            self.assertEqual(job["status"], "completed", job.get("error"))
+            self.assertEqual(job["total_rows"], 300)
+            self.assertEqual(job["rows_processed"], 300)
+            self.assertEqual(job["eta_seconds"], 0)
+            self.assertEqual(job["result"]["successful_rows"], 300)
+        self.assertEqual(self.transactions(), 600)
+
+    def test_transform_job_completes(self):
+        """Transform jobs detect the file's format and import it"""
+        claims_path = os.path.join(self.root, "claims.csv")
+        pd.DataFrame({
+            "RowId": [4393, 4394],
+            "Check Date": ["2025-06-10", "2025-06-11"],
+            "Date Posted": ["2025-06-10", "2025-06-11"],
+            "Check Number": ["825156000193521", "825156000193522"],
+            "Payment From": ["Aetna", "BCBS"],
+            "Reference": ["ERA", "ERA"],
+            "Check Amount": [138.61, 50.0],
+            "Cash Applied": [138.61, 50.0],
+            "Provider": ["Sidney Snipes", "Sidney Snipes"],
+        }).to_csv(claims_path, index=False)
+
+        for max_workers in (1, 2):
+            queue = self.make_queue(max_workers=max_workers)
+            job = queue.wait(queue.enqueue(claims_path), timeout=60)
+            queue.stop(10)
+
+            self.assertEqual(job["status"], "completed", job.get("error"))
+            self.assertEqual(job["result"]["format"], "insurance_claims")
+        self.assertEqual(self.transactions(), 4)
+
+    def test_missing_file_fails(self):
+        """A job whose file disappeared is marked failed"""
+        queue = self.make_queue(max_workers=1)
+        job = queue.wait(queue.enqueue(os.path.join(self.root, "missing.csv"), kind="upload"), timeout=60)
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("not found", job["error"])
+
+    def test_jobs_survive_restart(self):
+        """Queued jobs resume after a restart; running jobs are marked interrupted"""
+        self.make_queue(max_workers=1).stop()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO import_jobs (job_id, kind, file_path, status, created_at) VALUES (?, 'upload', ?, ?, ?)",
+                [("queued-job", self.csv_path, "queued", "2024-01-01T00:00:00"),
+                 ("running-job", self.csv_path, "running", "2024-01-01T00:00:01")],
+            )
+
+        queue = self.make_queue(max_workers=1)
+        self.assertEqual(queue.get_job("running-job")["status"], "interrupted")
+        queue.start()
+        self.assertEqual(queue.wait("queued-job", timeout=60)["status"], "completed")
+
+        self.assertTrue(queue.retry("running-job"))
+        self.assertEqual(queue.wait("running-job", timeout=60)["status"], "completed")
+        self.assertEqual(self.transactions(), 600)
+
+    def test_restart_keeps_jobs_of_live_owners(self):
+        """Only running jobs whose owner process is gone are interrupted"""
+        self.make_queue(max_workers=1).stop()
+        owner = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        self.addCleanup(owner.wait)
+        self.addCleanup(owner.kill)
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO import_jobs (job_id, kind, file_path, status, created_at, owner_pid, heartbeat_at) "
+                "VALUES (?, 'upload', ?, 'running', '2024-01-01T00:00:00', ?, ?)",
+                [("live-job", self.csv_path, owner.pid, now),
+                 ("dead-job", self.csv_path, finished.pid, now),
+                 ("stale-job", self.csv_path, owner.pid, now - 3600)],
+            )
+
+        queue = self.make_queue(max_workers=1)
+        self.assertEqual(queue.get_job("live-job")["status"], "running")
+        self.assertEqual(queue.get_job("dead-job")["status"], "interrupted")
+        self.assertEqual(queue.get_job("stale-job")["status"], "interrupted")
+
+    def test_owner_columns_added_to_old_tables(self):
+        """Job tables created before owners were recorded are migrated"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE import_jobs (job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, "
+                         "file_path TEXT NOT NULL, format_name TEXT, status TEXT NOT NULL DEFAULT 'queued', "
+                         "total_rows INTEGER, rows_processed INTEGER DEFAULT 0, rows_per_second REAL, "
+                         "result TEXT, error TEXT, created_at TIMESTAMP, started_at TIMESTAMP, "
+                         "finished_at TIMESTAMP)")
+
+        queue = self.make_queue(max_workers=1)
+        job = queue.wait(queue.enqueue(self.csv_path, kind="upload"), timeout=60)
+        self.assertEqual(job["status"], "completed", job.get("error"))
+        self.assertEqual(job["owner_pid"], os.getpid())
+
+    def test_queue_is_bounded(self):
+        """Enqueueing beyond max_queued is rejected"""
+        queue = self.make_queue(max_workers=1, max_queued=1)
+        queue.start = lambda: None  # Keep the job queued
+        queue.enqueue(self.csv_path, kind="upload")
+        with self.assertRaises(QueueFullError):
+            queue.enqueue(self.csv_path, kind="upload")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for the Ollama model residency tracker
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_residency import ModelResidency, parse_keep_alive
+
+LAPTOP = "http://laptop:11434"
+HOMELAB = "http://homelab:11434"
+
+
+def ollama_response(load_ms):
+    return {"message": {"content": "ok"}, "load_duration": int(load_ms * 1e6)}
+
+
+class TestModelResidency(unittest.TestCase):
+    """Test cases for ModelResidency"""
+
+    def setUp(self):
+        self.residency = ModelResidency(
+            {"llama3.3:70b": HOMELAB, "llama3.1:8b": LAPTOP, "mistral:7b": LAPTOP},
+            default_url=LAPTOP,
+            keep_alive="30m",
+        )
+
+    def test_parse_keep_alive(self):
+        """Durations are converted to seconds, negative means forever"""
+        self.assertEqual(parse_keep_alive("30m"), 1800)
+        self.assertEqual(parse_keep_alive("1h"), 3600)
+        self.assertEqual(parse_keep_alive(90), 90)
+        self.assertIsNone(parse_keep_alive(-1))
+        with self.assertRaises(ValueError):
+            parse_keep_alive("soon")
+
+    def test_load_events_recorded(self):
+        """Slow loads count as cold starts, fast ones as warm requests"""
+        cold = self.residency.record_response("llama3.1:8b", ollama_response(4200), 6.0)
+        warm = self.residency.record_response("llama3.1:8b", ollama_response(3), 1.0)
+
+        self.assertTrue(cold["cold_start"])
+        self.assertFalse(warm["cold_start"])
+        stats = self.residency.get_stats()
+        self.assertEqual((stats["load_events"], stats["warm_requests"]), (1, 1))
+        self.assertEqual(stats["cold_start_ms"], 4200.0)
+        self.assertEqual(stats["models"]["llama3.1:8b"]["last_load_ms"], 4200.0)
+        self.assertEqual(stats["resident"][LAPTOP], ["llama3.1:8b"])
+
+    def test_loading_evicts_other_model_on_endpoint(self):
+        """With one model per endpoint, loading another replaces it"""
+        self.residency.record_response("llama3.1:8b", ollama_response(4000))
+        self.residency.record_response("mistral:7b", ollama_response(4000))
+        self.residency.record_response("llama3.3:70b", ollama_response(30000))
+
+        self.assertFalse(self.residency.is_resident("llama3.1:8b"))
+        self.assertEqual(self.residency.resident_models(LAPTOP), ["mistral:7b"])
+        self.assertTrue(self.residency.is_resident("llama3.3:70b"))
+
+    def test_residency_expires(self):
+        """A model is no longer resident after its keep-alive time"""
+        residency = ModelResidency({"llama3.1:8b": LAPTOP}, keep_alive=0)
+        residency.record_response("llama3.1:8b", ollama_response(4000))
+        self.assertFalse(residency.is_resident("llama3.1:8b"))
+
+    def test_choose_model_prefers_resident(self):
+        """A cold preferred model gives way to a loaded alternative"""
+        self.assertEqual(self.residency.choose_model("llama3.1:8b", "llama3.3:70b"), "llama3.1:8b")
+
+        self.residency.record_response("llama3.3:70b", ollama_response(30000))
+        self.assertEqual(self.residency.choose_model("llama3.1:8b", "llama3.3:70b"), "llama3.3:70b")
+
+        self.residency.record_response("llama3.1:8b", ollama_response(4000))
+        self.assertEqual(self.residency.choose_model("llama3.1:8b", "llama3.3:70b"), "llama3.1:8b")
+        self.assertEqual(self.residency.get_stats()["residency_picks"], 1)
+
+    @patch("utils.model_residency.requests")
+    def test_warm_up(self, mock_requests):
+        """Warm-up loads each model on its endpoint with the keep_alive hint"""
+        mock_requests.get.return_value = MagicMock(json=lambda: {"models": [{"name": "llama3.1:8b"}]})
+        mock_requests.post.return_value = MagicMock(json=lambda: {"done": True, "done_reason": "load"})
+
+        results = self.residency.warm_up(["llama3.3:70b", "llama3.1:8b"])
+
+        self.assertEqual(results, {"llama3.3:70b": True, "llama3.1:8b": True})
+        urls = [call.args[0] for call in mock_requests.post.call_args_list]
+        self.assertEqual(urls, [f"{HOMELAB}/api/generate", f"{LAPTOP}/api/generate"])
+        self.assertEqual(mock_requests.post.call_args.kwargs["json"]["keep_alive"], "30m")
+        # The laptop model was already loaded, so only the homelab model was a load event
+        stats = self.residency.get_stats()
+        self.assertEqual((stats["warm_ups"], stats["load_events"]), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for billing-sheet processing and the revenue rollup in MultiOfficeOperations
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.multi_office_operations import MultiOfficeOperations, Office, ProviderAssignment
+
+
+class TestProcessBillingSheets(unittest.TestCase):
+    """Test cases for MultiOfficeOperations.process_billing_sheets"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.ops = MultiOfficeOperations(self.db_path)
+        self.ops.add_office(Office("main", "Main Office", "", "", 40, 8000, 3500))
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def sheets(self):
+        return [
+            {"provider_id": "dustin", "office_id": "main", "service_date": "2025-07-16",
+             "sessions": [{"amount": 100.0}, {"amount": 60.0}]},
+            {"provider_id": "nobody", "office_id": "main", "service_date": "2025-07-16",
+             "sessions": [{"amount": 10.0}]},
+            {"provider_id": "sidney", "office_id": "north", "service_date": "2025-07-16",
+             "sessions": [{"amount": 50.0}]},
+            {"provider_id": "sidney", "office_id": "main", "service_date": "2025-07-16",
+             "sessions": [{"amount": 50.0}]},
+        ]
+
+    def test_batch_matches_single_sheets(self):
+        """A batch gives the same breakdowns as one call per sheet"""
+        batch = self.ops.process_billing_sheets(self.sheets())
+        single = [self.ops.process_billing_sheet(**sheet) for sheet in self.sheets()]
+
+        self.assertEqual(batch, single)
+        self.assertEqual(batch[0]["provider_cut"], 104.0)
+        self.assertEqual(batch[0]["office_name"], "Main Office")
+        self.assertEqual(batch[1], {})
+        self.assertEqual(batch[2], {})
+        self.assertEqual(batch[3]["provider_name"], "Sidney")
+
+    def test_batch_inserts_in_one_transaction(self):
+        """Every processed sheet is stored; sheets without a contract or office are skipped"""
+        self.ops.process_billing_sheets(self.sheets())
+
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT provider_id, session_count, gross_revenue FROM office_provider_revenue ORDER BY id"
+            ).fetchall()
+        self.assertEqual(rows, [("dustin", 2, 160.0), ("sidney", 1, 50.0)])
+        self.assertEqual(self.ops.process_billing_sheets([]), [])
+
+
+
+class TestRevenueRollup(unittest.TestCase):
+    """Test cases for the office revenue rollup and the reports that read it"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.ops = MultiOfficeOperations(self.db_path)
+        self.ops.add_office(Office("main", "Main Office", "", "", 40, 8000, 3500))
+        self.ops.add_office(Office("north", "North Office", "", "", 20, 3000, 1500))
+        self.ops.assign_provider_to_office(ProviderAssignment("dustin", "main", 5, 8, 8, "2024-01-01"))
+        self.ops.assign_provider_to_office(ProviderAssignment("dustin", "north", 1, 8, 6, "2024-01-01"))
+
+        sheets = []
+        for day in range(1, 29):
+            for month in ("2024-12", "2025-01", "2025-02"):
+                sheets.append({"provider_id": "dustin", "office_id": "main" if day % 3 else "north",
+                               "service_date": f"{month}-{day:02d}",
+                               "sessions": [{"amount": 100.0 + day}] * (day % 4 + 1)})
+                sheets.append({"provider_id": "sidney", "office_id": "main",
+                               "service_date": f"{month}-{day:02d}", "sessions": [{"amount": 50.0}]})
+        self.ops.process_billing_sheets(sheets)
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def raw_totals(self, start_date, end_date):
+        with sqlite3.connect(self.db_path) as conn:
+            return dict((row[0], row[1:]) for row in conn.execute(
+                "SELECT office_id, SUM(session_count), ROUND(SUM(gross_revenue), 2), COUNT(DISTINCT provider_id) "
+                "FROM office_provider_revenue WHERE service_date BETWEEN ? AND ? GROUP BY office_id",
+                (start_date, end_date)))
+
+    def test_rollup_ranges(self):
+        """Whole months come from month rows, the edges from day rows"""
+        self.assertEqual(MultiOfficeOperations._rollup_ranges("2024-12-10", "2025-02-03"), [
+            ("day", "2024-12-10", "2024-12-31"),
+            ("month", "2025-01-01", "2025-01-01"),
+            ("day", "2025-02-01", "2025-02-03"),
+        ])
+        self.assertEqual(MultiOfficeOperations._rollup_ranges("2025-01-05", "2025-01-20"),
+                         [("day", "2025-01-05", "2025-01-20")])
+
+    def test_profitability_matches_raw_rows(self):
+        """Office totals from the rollup equal totals over the billing rows"""
+        for start_date, end_date in [("2024-12-10", "2025-02-03"), ("2025-01-01", "2025-01-31"),
+                                     ("2025-02-02", "2025-02-12")]:
+            report = self.ops.generate_office_profitability_report(None, start_date, end_date)
+            expected = self.raw_totals(start_date, end_date)
+            for office in report["offices"]:
+                sessions, revenue, providers = expected[office["office_id"]]
+                self.assertEqual(office["total_sessions"], sessions)
+                self.assertAlmostEqual(office["total_revenue"], revenue, places=2)
+                self.assertEqual(office["provider_count"], providers)
+
+    def test_caseload_and_trend(self):
+        """Caseload reads day rows; weekly and monthly totals add up"""
+        analysis = self.ops.get_provider_caseload_analysis("dustin", "2025-01-01", "2025-01-31")
+        self.assertEqual(analysis["working_days"], 28)
+        self.assertEqual(analysis["total_capacity"], 20 * 8 + 4 * 6)
+
+        monthly = self.ops.get_revenue_trend("month", "2024-12-01", "2025-02-01", provider_id="sidney")
+        self.assertEqual([row["total_revenue"] for row in monthly], [1400.0] * 3)
+        weekly = self.ops.get_revenue_trend("week", "2024-11-25", "2025-03-01")
+        self.assertEqual(sum(row["sheet_count"] for row in weekly), 28 * 3 * 2)
+
+    def test_rollup_backfilled_for_existing_rows(self):
+        """Opening a database whose rollup is empty rebuilds it from the billing rows"""
+        before = self.ops.get_revenue_trend("month", "2024-12-01", "2025-02-01")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM office_provider_revenue_rollup")
+
+        reopened = MultiOfficeOperations(self.db_path)
+        self.assertEqual(reopened.get_revenue_trend("month", "2024-12-01", "2025-02-01"), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
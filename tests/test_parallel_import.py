@@ -0,0 +1,135 @@
+"""
+Tests for parallel folder imports
+"""
+
+import os
+import sys
+import random
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import contextlib
+import io
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_upload_utility import BulkUploadManager
+from utils.import_helper import ImportHelper
+from utils.parallel_import import import_files, import_worker_count, read_csv_chunks
+
+
+class TestParallelImport(unittest.TestCase):
+    """Test cases for utils.parallel_import"""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        rng = random.Random(7)
+        for index in range(5):
+            rows = 50 + index * 20
+            pd.DataFrame({
+                "Provider": [rng.choice(["Dr. Ames", "Dr. Baker", f"Dr. New{index}"]) for _ in range(rows)],
+                "Date": [f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(rows)],
+                "Cash Applied": [rng.choice([round(rng.uniform(-20, 300), 2), None]) for _ in range(rows)],
+                "Payer": [rng.choice(["Aetna", "BCBS"]) for _ in range(rows)],
+            }).to_csv(os.path.join(self.folder, f"file_{index}.csv"), index=False)
+
+    def upload(self, max_workers):
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, db_path)
+        manager = BulkUploadManager(db_path, max_workers=max_workers)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = manager.upload_folder(self.folder)
+        finally:
+            manager.close()
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                "SELECT t.transaction_id, p.provider_name, t.transaction_date, t.cash_applied, t.payer_name, "
+                "t.upload_batch FROM payment_transactions t JOIN providers p USING (provider_id) ORDER BY 1"
+            ).fetchall()
+        return stats, rows
+
+    def test_worker_count(self):
+        """Worker count honours the request and never exceeds the file count"""
+        self.assertEqual(import_worker_count(4, 2), 2)
+        self.assertEqual(import_worker_count(1, 10), 1)
+        self.assertGreaterEqual(import_worker_count(None, 10), 1)
+
+    def test_results_in_file_order(self):
+        """Prepared files reach the writer in file order"""
+        paths = sorted(os.path.join(self.folder, name) for name in os.listdir(self.folder))
+        paths.append(os.path.join(self.folder, "missing.csv"))
+        written = []
+        results = import_files(paths, read_csv_chunks,
+                               lambda path, prepared: written.append(path) or {"path": path, **prepared},
+                               max_workers=3)
+
+        self.assertEqual(written, paths)
+        self.assertEqual([result["total_rows"] for result in results[:2]], [50, 70])
+        self.assertIn("error", results[-1])
+
+    def test_large_files_streamed_by_writer(self):
+        """Files over the pre-read limit are counted but not read into chunks"""
+        path = sorted(os.path.join(self.folder, name) for name in os.listdir(self.folder))[0]
+        small = read_csv_chunks(path)
+        large = read_csv_chunks(path, max_bytes=1)
+
+        self.assertIn("chunks", small)
+        self.assertNotIn("chunks", large)
+        self.assertEqual(large["total_rows"], 50)
+
+        _, read_rows = self.upload(max_workers=1)
+        with patch("utils.parallel_import.config") as import_config:
+            import_config.get.return_value = 0  # imports.preread_max_mb
+            stats, streamed_rows = self.upload(max_workers=1)
+        self.assertEqual(streamed_rows, read_rows)
+        self.assertEqual(stats["successful_rows"], len(streamed_rows))
+
+    def test_parallel_upload_matches_serial(self):
+        """Parallel folder uploads store the same rows and results as serial ones"""
+        parallel_stats, parallel_rows = self.upload(max_workers=3)
+        serial_stats, serial_rows = self.upload(max_workers=1)
+
+        self.assertEqual(len(parallel_rows), 50 + 70 + 90 + 110 + 130)
+        self.assertEqual(parallel_rows, serial_rows)
+        for key in ("files_found", "files_processed", "total_rows", "successful_rows", "failed_rows"):
+            self.assertEqual(parallel_stats[key], serial_stats[key], key)
+        strip = lambda results: [{k: v for k, v in r.items() if k != "processing_time"} for r in results]
+        self.assertEqual(strip(parallel_stats["file_results"]), strip(serial_stats["file_results"]))
+
+    def test_import_directory_detects_formats(self):
+        """ImportHelper detects each file's format in the workers and imports it"""
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        pd.DataFrame({
+            "RowId": [4393, 4394, 4395],
+            "Check Date": ["2025-06-10", "2025-06-11", "2025-06-12"],
+            "Date Posted": ["2025-06-10", "2025-06-11", "2025-06-12"],
+            "Check Number": ["825156000193521", "825156000193522", "825156000193523"],
+            "Payment From": ["Aetna", "BCBS", "Aetna"],
+            "Reference": ["ERA", "ERA", "ERA"],
+            "Check Amount": [138.61, 50.0, 75.0],
+            "Cash Applied": [138.61, 50.0, 75.0],
+            "Provider": ["Sidney Snipes"] * 3,
+        }).to_csv(os.path.join(folder, "claims.csv"), index=False)
+
+        helper = ImportHelper(os.path.join(folder, "billing.db"), max_workers=2)
+        try:
+            result = helper.import_directory(folder)
+        finally:
+            helper.close()
+
+        self.assertEqual(result["files_imported"], 1, result["results"])
+        self.assertEqual(result["results"][0]["format"], "insurance_claims")
+        self.assertEqual(result["results"][0]["total_records"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests for the fast billing CSV path in ProviderBillingProcessor
+"""
+
+import os
+import sys
+import contextlib
+import io
+import sqlite3
+import tempfile
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_provider_billing_csvs import ProviderBillingProcessor
+
+BILLING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "csv_folder", "billing")
+
+SCHEMA = """
+    CREATE TABLE payment_session_mapping (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        payment_date DATE NOT NULL,
+        session_date DATE NOT NULL,
+        provider_name TEXT NOT NULL,
+        cash_applied DECIMAL(10,2) NOT NULL,
+        payment_source TEXT,
+        session_reference TEXT,
+        check_number TEXT,
+        payment_from TEXT,
+        UNIQUE(session_reference, payment_date, cash_applied)
+    );
+    CREATE TABLE provider_monthly_summary (
+        provider_name TEXT NOT NULL,
+        year_month TEXT NOT NULL,
+        total_cash_applied DECIMAL(10,2) DEFAULT 0,
+        provider_cut_percentage DECIMAL(5,2) NOT NULL,
+        provider_income DECIMAL(10,2) GENERATED ALWAYS AS (total_cash_applied * provider_cut_percentage / 100) STORED,
+        company_income DECIMAL(10,2) GENERATED ALWAYS AS (total_cash_applied * (100 - provider_cut_percentage) / 100) STORED,
+        session_count INTEGER DEFAULT 0,
+        UNIQUE(provider_name, year_month)
+    );
+    CREATE TABLE provider_annual_summary (
+        provider_name TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        total_revenue DECIMAL(10,2) DEFAULT 0,
+        total_provider_income DECIMAL(10,2) DEFAULT 0,
+        total_company_income DECIMAL(10,2) DEFAULT 0,
+        months_active INTEGER DEFAULT 0,
+        UNIQUE(provider_name, year)
+    );
+    CREATE TABLE provider_contracts (
+        provider_name TEXT NOT NULL,
+        effective_date DATE NOT NULL,
+        end_date DATE,
+        split_percentage DECIMAL(5,2) NOT NULL
+    );
+    INSERT INTO provider_contracts VALUES
+        ('Dustin Nisley', '2023-01-01', NULL, 65.0),
+        ('Ardelle Bland', '2024-01-01', NULL, 60.0),
+        ('Ardelle Bland', '2023-01-01', '2023-12-31', 55.0);
+"""
+
+
+@unittest.skipUnless(os.path.isdir(BILLING_DIR), "billing CSVs not available")
+class TestProviderBillingProcessor(unittest.TestCase):
+    """Test cases for ProviderBillingProcessor"""
+
+    def import_billing(self, fast):
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.executescript(SCHEMA)
+
+        processor = ProviderBillingProcessor(db_path)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                processor.process_all_billing_csvs(BILLING_DIR, fast=fast, max_workers=2)
+        finally:
+            processor.close()
+
+        with sqlite3.connect(db_path) as conn:
+            return {
+                table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3, 4").fetchall()
+                for table in ("payment_session_mapping", "provider_monthly_summary", "provider_annual_summary")
+            }
+
+    def test_fast_path_matches_row_reader(self):
+        """The vectorized, parallel import stores the same rows as the csv.DictReader path"""
+        fast, slow = self.import_billing(fast=True), self.import_billing(fast=False)
+        self.assertGreater(len(fast["payment_session_mapping"]), 0)
+        self.assertGreater(len(fast["provider_annual_summary"]), 0)
+        for table in fast:
+            self.assertEqual(fast[table], slow[table], table)
+
+
+if __name__ == "__main__":
+    unittest.main()
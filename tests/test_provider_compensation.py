@@ -0,0 +1,113 @@
+"""
+Tests for batch provider compensation and the billing CSV index
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.provider_compensation import ProviderCompensationCalculator, iter_months
+
+
+class TestProviderCompensation(unittest.TestCase):
+    """Test cases for ProviderCompensationCalculator batch mode"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.root, "billing.db")
+        self.billing = os.path.join(self.root, "csv_folder", "billing")
+        os.makedirs(self.billing)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE providers (
+                    provider_id INTEGER PRIMARY KEY, provider_name TEXT, contract_type TEXT,
+                    compensation_type TEXT, base_percentage REAL, owner_fees REAL, active INTEGER
+                );
+                CREATE TABLE payment_transactions (
+                    transaction_id INTEGER PRIMARY KEY, provider_id INTEGER, transaction_date TEXT,
+                    cash_applied REAL, payer_name TEXT, claim_number TEXT, notes TEXT
+                );
+            """)
+            conn.executemany(
+                "INSERT INTO providers VALUES (?, ?, ?, NULL, NULL, NULL, 1)",
+                [(1, "Alice Smith", "Owner"), (2, "Bob Jones", "Independent Contractor"),
+                 (3, "Unknown", "Independent Contractor")],
+            )
+            conn.executemany(
+                "INSERT INTO payment_transactions (provider_id, transaction_date, cash_applied, payer_name, claim_number, notes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (1, "2024-01-05", 4000.0, "Aetna", "C1", "paid at session"),
+                    (1, "2024-01-05", 4000.0, "Aetna", "C1", "paid at session"),
+                    (1, "2024-02-10", 500.0, "BCBS", None, None),
+                    (2, "2024-01-20", 7000.0, "Aetna", "C2", None),
+                    (2, "2024-03-31", 9000.0, None, None, None),
+                    (2, "2024-04-01", 1000.0, None, None, None),
+                ],
+            )
+        self.calculator = ProviderCompensationCalculator(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write_csv(self, name, amounts):
+        path = os.path.join(self.billing, name)
+        pd.DataFrame({"Cash Applied": amounts}).to_csv(path, index=False)
+        return path
+
+    def test_iter_months(self):
+        """Month ranges are inclusive and cross year boundaries"""
+        self.assertEqual(list(iter_months((2023, 11), (2024, 2))),
+                         [(2023, 11), (2023, 12), (2024, 1), (2024, 2)])
+
+    def test_batch_matches_per_provider(self):
+        """Batch compensation equals the per-provider calculation"""
+        self.write_csv("2-31-24 Payments Bob.csv", [1200.0, 300.0])
+        batch = self.calculator.get_compensation_range((2024, 1), (2024, 4))
+        self.assertEqual(sorted(batch), [(2024, 1), (2024, 2), (2024, 3), (2024, 4)])
+
+        for (year, month), results in batch.items():
+            self.assertEqual([r["provider_name"] for r in results], ["Alice Smith", "Bob Jones"])
+            for result in results:
+                expected = self.calculator.calculate_provider_compensation(result["provider_name"], year, month)
+                self.assertEqual(result, expected)
+
+        january = {r["provider_name"]: r for r in batch[(2024, 1)]}
+        self.assertEqual(january["Alice Smith"]["monthly_revenue"], 4000.0)
+        self.assertAlmostEqual(january["Alice Smith"]["credit_card_fees"], 8000.0 * 0.029)
+        self.assertEqual(january["Bob Jones"]["percentage"], 65.0)
+        february = {r["provider_name"]: r for r in batch[(2024, 2)]}
+        self.assertEqual(february["Bob Jones"]["monthly_revenue"], 1500.0)
+
+        self.assertEqual(self.calculator.get_all_provider_compensation(2024, 3), batch[(2024, 3)])
+
+    def test_csv_files_read_once(self):
+        """Each CSV export is read once until it changes"""
+        path = self.write_csv("01-31-24 Alice.csv", [100.0])
+        index = self.calculator.csv_index
+        self.assertEqual(index.find("Alice Smith", 2024, 1), path)
+        self.assertIsNone(index.find("Alice Smith", 2024, 5))
+
+        with mock.patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+            for _ in range(3):
+                self.calculator.get_compensation_range((2024, 1), (2024, 2))
+            self.assertEqual(read_csv.call_count, 1)
+
+            self.write_csv("01-31-24 Alice.csv", [100.0, 50.0])
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+            self.assertEqual(self.calculator.calculate_monthly_revenue_from_csv("Alice Smith", 2024, 1), 150.0)
+            self.assertEqual(read_csv.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Tests for the SQL agent query templates and plan cache
+"""
+
+import os
+import sys
+import sqlite3
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.query_templates import (
+    QueryTemplateMatcher,
+    QueryStats,
+    SQLPlanCache,
+    extract_date_range,
+    format_rows,
+)
+
+PROVIDERS = {"Dr. Smith": 1, "Dr. Jones": 2}
+
+
+@pytest.fixture
+def conn():
+    """In-memory database with the payment_transactions schema"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE providers (provider_id INTEGER PRIMARY KEY, provider_name TEXT);
+        CREATE TABLE payment_transactions (
+            transaction_id INTEGER PRIMARY KEY, provider_id INTEGER, transaction_date DATE,
+            cash_applied DECIMAL(10,2), payer_name TEXT, cpt_code TEXT);
+        INSERT INTO providers VALUES (1, 'Dr. Smith'), (2, 'Dr. Jones');
+        INSERT INTO payment_transactions (provider_id, transaction_date, cash_applied, payer_name, cpt_code) VALUES
+            (1, '2024-01-15', 100.0, 'Aetna', '90837'),
+            (1, '2024-02-20', 150.0, 'BCBS', '90837'),
+            (2, '2024-01-05', 120.0, 'Aetna', '90834'),
+            (2, '2023-12-30', 999.0, 'Aetna', '90834');
+    """)
+    yield conn
+    conn.close()
+
+
+def run(conn, plan):
+    return [dict(row) for row in conn.execute(plan.sql, plan.params)]
+
+
+def test_extract_date_range_is_half_open():
+    """Months and years become [start, end) ranges"""
+    assert extract_date_range("revenue in december 2024") == {"start": "2024-12-01", "end": "2025-01-01"}
+    assert extract_date_range("revenue in 2024") == {"start": "2024-01-01", "end": "2025-01-01"}
+    assert extract_date_range("revenue last month") is None
+    assert extract_date_range("revenue on march 5th, 2024") == {"start": "2024-03-05", "end": "2024-03-06"}
+
+
+def test_may_is_only_a_month_next_to_a_year_or_day():
+    """The verb "may" does not narrow the range to May"""
+    assert extract_date_range("may i see total revenue for 2023") == {"start": "2023-01-01", "end": "2024-01-01"}
+    assert extract_date_range("may we see revenue for may 2023") == {"start": "2023-05-01", "end": "2023-06-01"}
+    plan = QueryTemplateMatcher().match("May I see total revenue for 2023?", PROVIDERS)
+    assert plan.name == "total_revenue"
+    assert plan.params["start"] == "2023-01-01"
+
+
+def test_revenue_by_provider_month(conn):
+    """Revenue by provider and month is grouped on both and filtered by year"""
+    plan = QueryTemplateMatcher().match("Show revenue by provider by month for 2024", PROVIDERS)
+    assert plan.name == "revenue_by_provider_month"
+    assert "strftime" not in plan.sql.split("WHERE")[1].split("GROUP BY")[0]
+
+    rows = run(conn, plan)
+    assert {"provider_name": "Dr. Smith", "month": "2024-01", "transactions": 1, "revenue": 100.0} in rows
+    assert all(row["month"].startswith("2024") for row in rows)
+
+
+def test_provider_filter_and_total(conn):
+    """A mentioned provider is filtered by provider_id"""
+    plan = QueryTemplateMatcher().match("What is the total revenue for Smith in 2024?", PROVIDERS)
+    assert plan.name == "total_revenue"
+    assert plan.params["provider_id"] == 1
+    assert run(conn, plan) == [{"transactions": 2, "revenue": 250.0}]
+
+
+def test_top_n_and_payer_comparison(conn):
+    """Top N uses a LIMIT parameter and payers can be compared"""
+    matcher = QueryTemplateMatcher()
+
+    plan = matcher.match("top 1 payers", PROVIDERS)
+    assert plan.name == "top_payers"
+    assert run(conn, plan) == [{"payer": "Aetna", "transactions": 3, "revenue": 1219.0}]
+
+    plan = matcher.match("compare payers in January 2024", PROVIDERS)
+    assert plan.name == "payer_comparison"
+    assert [row["payer"] for row in run(conn, plan)] == ["Aetna"]
+
+
+def test_unrecognized_question_goes_to_agent():
+    """Questions outside the templates are left to the agent"""
+    assert QueryTemplateMatcher().match("which patients have denied claims", PROVIDERS) is None
+
+
+@pytest.mark.parametrize("question", [
+    "how much cash did Dustin collect from Aetna in March 2024",
+    "how much cash did dustin collect from aetna in march 2024",
+    "total revenue for CPT 90837 in 2024",
+    "total revenue for Smith from Medicare in 2024",
+    "total revenue for Smith and Jones in 2024",
+    "total revenue in march",
+    "total revenue from 2022 to 2024",
+    "total revenue this year",
+    "total insurance revenue in 2024",
+    "revenue by month for payments over $100",
+    "top 5 providers for Aetna",
+])
+def test_unbound_constraints_go_to_agent(question):
+    """A constraint the template cannot bind is not silently dropped"""
+    providers = {**PROVIDERS, "Dustin Nisley": 3}
+    assert QueryTemplateMatcher().match(question, providers, payers=["Aetna", "BCBS"]) is None
+
+
+def test_grouping_dimension_is_not_a_filter():
+    """Payer and CPT templates still match questions about their own dimension"""
+    matcher = QueryTemplateMatcher()
+    assert matcher.match("top 5 CPT codes in 2024", PROVIDERS).name == "top_cpt_codes"
+    assert matcher.match("top 3 insurance payers", PROVIDERS, payers=["Aetna"]).name == "top_payers"
+
+
+def test_plan_cache_keyed_by_schema():
+    """Cached SQL is reused for the same question but not after a schema change"""
+    cache = SQLPlanCache(max_entries=2)
+    cache.put("Which CPT codes were denied?", "schema-a", "SELECT 1")
+
+    assert cache.get("which cpt codes were denied", "schema-a") == "SELECT 1"
+    assert cache.get("which cpt codes were denied", "schema-b") is None
+
+
+def test_query_stats_reports_saved_calls():
+    """Saved LLM calls use the observed calls per agent run"""
+    stats = QueryStats()
+    stats.record_agent_run(llm_calls=6)
+    stats.record_hit("template")
+    stats.record_hit("plan_cache")
+
+    result = stats.as_dict()
+    assert result["hit_rate"] == pytest.approx(2 / 3)
+    assert result["llm_calls_saved"] == 12
+
+
+def test_query_stats_subtracts_hit_llm_calls():
+    """Plan cache hits that still phrase rows with the LLM save one call less"""
+    stats = QueryStats()
+    stats.record_agent_run(llm_calls=6)
+    stats.record_hit("plan_cache", llm_calls=1)
+
+    assert stats.as_dict()["llm_calls_saved"] == 5
+
+
+def test_format_rows():
+    """Money columns are formatted as dollars"""
+    text = format_rows("Top payers", [{"payer": "Aetna", "revenue": 1219.0}])
+    assert text == "Top payers:\n• payer: Aetna | revenue: $1,219.00"
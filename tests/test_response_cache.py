@@ -0,0 +1,113 @@
+"""
+Tests for the chat response cache
+"""
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.response_cache import ResponseCache, normalize_question, cosine_similarity
+from utils import data_version
+
+
+def fake_embedding(text):
+    """Bag-of-letters embedding good enough to tell near-duplicates apart"""
+    return [text.count(c) for c in "abcdefghijklmnopqrstuvwxyz"]
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for ResponseCache"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.cache = ResponseCache(max_entries=3, ttl_seconds=60,
+                                   similarity_threshold=0.95,
+                                   embed_fn=fake_embedding)
+
+    def test_normalize_question(self):
+        """Test that punctuation, case and filler words are ignored"""
+        self.assertEqual(normalize_question("Hey Ada, who is the TOP payer?"),
+                         normalize_question("who top payer"))
+
+    def test_exact_hit(self):
+        """Test an exact hit on the normalized question"""
+        self.cache.put("Who is the top payer?", ["payers"], "v1", "Aetna")
+        hit = self.cache.get("who is the top payer", ["payers"], "v1")
+
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit["response"], "Aetna")
+        self.assertEqual(hit["match"], "exact")
+
+    def test_miss_on_sections_or_version(self):
+        """Test that different sections or data versions do not match"""
+        self.cache.put("top payer", ["payers"], "v1", "Aetna")
+
+        self.assertIsNone(self.cache.get("top payer", ["business"], "v1"))
+        self.assertIsNone(self.cache.get("top payer", ["payers"], "v2"))
+
+    def test_semantic_hit(self):
+        """Test that a near-duplicate question matches by embedding"""
+        self.cache.put("how is dustin doing this month", ["provider:Dustin Nisley"], "v1", "Great")
+        hit = self.cache.get("how is dustin doing this month?!", ["provider:Dustin Nisley"], "v1")
+        self.assertEqual(hit["match"], "exact")
+
+        hit = self.cache.get("hows dustin doing this month", ["provider:Dustin Nisley"], "v1")
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit["match"], "semantic")
+        self.assertGreaterEqual(hit["similarity"], 0.95)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        for i, question in enumerate(["alpha", "bravo", "charlie"]):
+            self.cache.put(question, ["general"], "v1", str(i))
+
+        self.cache.get("alpha", ["general"], "v1")
+        self.cache.put("delta", ["general"], "v1", "3")
+
+        self.assertIsNotNone(self.cache.get("alpha", ["general"], "v1"))
+        self.assertIsNone(self.cache.get("bravo", ["general"], "v1"))
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are not served"""
+        cache = ResponseCache(ttl_seconds=1, semantic_matching=False)
+        cache.put("top payer", ["payers"], "v1", "Aetna")
+        cache._entries[next(iter(cache._entries))]["created_at"] -= 5
+
+        self.assertIsNone(cache.get("top payer", ["payers"], "v1"))
+
+    def test_invalidated_on_data_version_bump(self):
+        """Test that an upload drops cached responses"""
+        data_version.register_invalidation_listener(self.cache.invalidate)
+        self.cache.put("top payer", ["payers"], "v1", "Aetna")
+
+        data_version.bump_data_version("test upload")
+
+        self.assertIsNone(self.cache.get("top payer", ["payers"], "v1"))
+
+    def test_data_version_changes_with_file(self):
+        """Test that writing to the database changes the data version"""
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            before = data_version.get_data_version(path)
+            time.sleep(0.01)
+            with open(path, 'w') as f:
+                f.write("changed")
+            self.assertNotEqual(before, data_version.get_data_version(path))
+        finally:
+            os.unlink(path)
+
+    def test_cosine_similarity(self):
+        """Test cosine similarity edge cases"""
+        self.assertAlmostEqual(cosine_similarity([1, 0], [1, 0]), 1.0)
+        self.assertEqual(cosine_similarity([], [1]), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
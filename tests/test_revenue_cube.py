@@ -0,0 +1,166 @@
+"""
+Tests for the revenue cube and the analytics that read from it
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from medical_billing_db import MedicalBillingDB
+from advanced_analytics_queries import AdvancedAnalytics
+from utils.data_version import get_data_version
+from utils.revenue_cube import RevenueCube, build_sketch, estimate_cardinality, get_revenue_cube
+
+
+def make_transactions(count: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "provider_name": [rng.choice(["Dr. Ames", "Dr. Baker", "Dr. Cole"]) for _ in range(count)],
+        "transaction_date": [f"20{rng.randint(21, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                             for _ in range(count)],
+        "patient_id": [f"P{rng.randint(1, 150)}" for _ in range(count)],
+        "cash_applied": [round(rng.uniform(-10, 250), 2) for _ in range(count)],
+        "payer_name": [rng.choice(["Aetna", "BCBS", "Medicare"]) for _ in range(count)],
+    })
+
+
+class TestRevenueCube(unittest.TestCase):
+    """Test cases for RevenueCube"""
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.db = MedicalBillingDB(self.db_path)
+        self.db.upload_csv_data(make_transactions(300, seed=1), "first.csv")
+
+    def tearDown(self):
+        self.db.close()
+        os.remove(self.db_path)
+
+    def analytics(self, use_cube: bool) -> AdvancedAnalytics:
+        analytics = AdvancedAnalytics(self.db_path)
+        if not use_cube:
+            analytics.cube = None
+        self.addCleanup(analytics.close)
+        return analytics
+
+    def test_sketch_estimate(self):
+        """Distinct counts from sketches are close to exact"""
+        values = pd.Series([f"P{i % 900}" for i in range(5000)])
+        self.assertAlmostEqual(estimate_cardinality(build_sketch(values)), 900, delta=15)
+        self.assertEqual(estimate_cardinality(build_sketch(pd.Series([], dtype=object))), 0)
+
+    def test_upload_folds_incrementally(self):
+        """A second upload is folded in without rebuilding the cube"""
+        cube = get_revenue_cube(self.db_path)
+        rebuilds = cube.stats["rebuilds"]
+
+        self.db.upload_csv_data(make_transactions(200, seed=2), "second.csv")
+
+        self.assertEqual(cube.stats["rebuilds"], rebuilds)
+        total = cube.query("SELECT SUM(txn_count) AS n FROM revenue_cube")["n"].iloc[0]
+        self.assertEqual(total, 500)
+
+    def test_chunked_upload_syncs_once(self):
+        """A chunked file upload syncs the cube and bumps the data version once"""
+        cube = get_revenue_cube(self.db_path)
+        syncs = cube.stats["syncs"]
+        csv_path = self.db_path + ".csv"
+        self.addCleanup(os.remove, csv_path)
+        make_transactions(200, seed=3).to_csv(csv_path, index=False)
+
+        with patch("medical_billing_db.bump_data_version") as bump:
+            result = self.db.upload_csv_file(csv_path, chunk_size=50)
+
+        self.assertEqual(result["successful_rows"], 200)
+        self.assertEqual(cube.stats["syncs"], syncs + 1)
+        bump.assert_called_once()
+        total = cube.query("SELECT SUM(txn_count) AS n FROM revenue_cube")["n"].iloc[0]
+        self.assertEqual(total, 500)
+
+    def test_idle_cubes_leave_data_version_alone(self):
+        """Two cubes on one database stop resyncing once they are caught up"""
+        first, second = RevenueCube(self.db_path), RevenueCube(self.db_path)
+        sql = "SELECT SUM(txn_count) AS n FROM revenue_cube"
+        first.query(sql)
+        second.query(sql)
+        version = get_data_version(self.db_path)
+        syncs = (first.stats["syncs"], second.stats["syncs"])
+
+        for _ in range(3):
+            first.query(sql)
+            second.query(sql)
+
+        self.assertEqual(get_data_version(self.db_path), version)
+        self.assertEqual((first.stats["syncs"], second.stats["syncs"]), syncs)
+
+    def test_deleted_rows_trigger_rebuild(self):
+        """Deleting transactions rebuilds the cube on the next read"""
+        cube = get_revenue_cube(self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM payment_transactions WHERE transaction_id <= 50")
+
+        total = cube.query("SELECT SUM(txn_count) AS n FROM revenue_cube")["n"].iloc[0]
+        self.assertEqual(total, 250)
+
+    def test_analytics_match_raw_queries(self):
+        """Cube-backed analytics agree with the payment_transactions queries"""
+        cube, raw = self.analytics(use_cube=True), self.analytics(use_cube=False)
+
+        cube_summary = cube.get_overall_business_summary()
+        raw_summary = raw.get_overall_business_summary()
+        for key in ("years_covered", "unique_providers", "unique_payers", "total_transactions",
+                    "earliest_date", "latest_date", "positive_transactions", "zero_negative_transactions"):
+            self.assertEqual(cube_summary[key], raw_summary[key], key)
+        self.assertAlmostEqual(cube_summary["total_revenue"], raw_summary["total_revenue"], places=6)
+
+        self.assertEqual(
+            cube.get_overall_business_summary(["2022"])["total_transactions"],
+            raw.get_overall_business_summary(["2022"])["total_transactions"],
+        )
+
+        cube_yearly, raw_yearly = cube.get_yearly_trends(), raw.get_yearly_trends()
+        pd.testing.assert_frame_equal(
+            cube_yearly.drop(columns=["unique_patients"]), raw_yearly.drop(columns=["unique_patients"]),
+            check_dtype=False,
+        )
+        for estimate, exact in zip(cube_yearly["unique_patients"], raw_yearly["unique_patients"]):
+            self.assertAlmostEqual(estimate, exact, delta=max(2, exact * 0.02))
+
+        pd.testing.assert_frame_equal(
+            cube.get_monthly_trends(["2023"]).drop(columns=["unique_patients"]),
+            raw.get_monthly_trends(["2023"]).drop(columns=["unique_patients"]),
+            check_dtype=False,
+        )
+
+        for key in ("seasonal_summary", "monthly_averages"):
+            pd.testing.assert_frame_equal(
+                cube.get_seasonal_analysis()[key], raw.get_seasonal_analysis()[key], check_dtype=False
+            )
+
+        pd.testing.assert_frame_equal(
+            cube.get_payer_analysis()["overview"], raw.get_payer_analysis()["overview"], check_dtype=False
+        )
+
+        pd.testing.assert_frame_equal(
+            cube.get_business_growth_metrics()["growth_trajectory"].drop(columns=["annual_patients"]),
+            raw.get_business_growth_metrics()["growth_trajectory"].drop(columns=["annual_patients"]),
+            check_dtype=False,
+        )
+
+        summary = cube.generate_executive_summary()
+        self.assertEqual(summary["key_metrics"]["total_transactions"], 300)
+        self.assertEqual(summary["provider_insights"]["total_providers"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
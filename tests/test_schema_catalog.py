@@ -0,0 +1,83 @@
+"""
+Tests for the schema catalog cache
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.schema_catalog import SchemaCatalog, get_schema_catalog
+
+
+class TestSchemaCatalog(unittest.TestCase):
+    """Test cases for SchemaCatalog"""
+
+    def setUp(self):
+        """Create a temporary database"""
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._execute("""
+            CREATE TABLE providers (
+                provider_id INTEGER PRIMARY KEY,
+                provider_name VARCHAR(100) NOT NULL
+            );
+        """)
+        self.catalog = SchemaCatalog(self.db_path)
+
+    def tearDown(self):
+        """Remove the temporary database"""
+        os.unlink(self.db_path)
+
+    def _execute(self, script):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(script)
+        conn.commit()
+        conn.close()
+
+    def test_columns_and_missing_table(self):
+        """Test column details and lookup of an unknown table"""
+        columns = self.catalog.get_columns("providers")
+
+        self.assertEqual([c["name"] for c in columns], ["provider_id", "provider_name"])
+        self.assertTrue(columns[0]["primary_key"])
+        self.assertTrue(columns[1]["notnull"])
+        self.assertIsNone(self.catalog.get_columns("missing"))
+
+    def test_schema_str_is_compact(self):
+        """Test the one-line-per-table prompt rendering"""
+        self.assertEqual(self.catalog.get_schema_str(),
+                         "providers(provider_id INTEGER PK, provider_name VARCHAR(100) NOT NULL)")
+
+    def test_reloads_only_on_ddl(self):
+        """Test that data changes reuse the catalog and DDL changes reload it"""
+        self.catalog.list_tables()
+        self._execute("INSERT INTO providers (provider_name) VALUES ('Dr. Smith');")
+        self.catalog.list_tables()
+        self.assertEqual(self.catalog.stats["reloads"], 1)
+
+        hash_before = self.catalog.get_hash()
+        self._execute("CREATE TABLE payers (payer_id INTEGER PRIMARY KEY);")
+
+        self.assertEqual(self.catalog.list_tables(), ["payers", "providers"])
+        self.assertEqual(self.catalog.stats["reloads"], 2)
+        self.assertNotEqual(hash_before, self.catalog.get_hash())
+
+    def test_shared_instance_per_database(self):
+        """Test that the same database shares one catalog"""
+        self.assertIs(get_schema_catalog(self.db_path), get_schema_catalog(self.db_path))
+
+    def test_missing_database_is_not_created(self):
+        """Test that the catalog never creates a database file"""
+        path = self.db_path + ".missing"
+        with self.assertRaises(sqlite3.OperationalError):
+            SchemaCatalog(path).list_tables()
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Tests for the keyword search index
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.search_index import DocumentSearchIndex, build_match_query, reciprocal_rank_fusion
+from utils.document_processor import DocumentProcessor
+
+
+class TestDocumentSearchIndex(unittest.TestCase):
+    """Test cases for DocumentSearchIndex"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.mkdtemp()
+        self.index = DocumentSearchIndex(os.path.join(self.test_dir, "search_index.db"))
+
+    def tearDown(self):
+        """Clean up after tests"""
+        shutil.rmtree(self.test_dir)
+
+    def test_build_match_query_quotes_words(self):
+        """Test that user input cannot inject FTS5 syntax"""
+        self.assertEqual(build_match_query('denial AND "codes"*'), '"denial" OR "and" OR "codes"')
+        self.assertIsNone(build_match_query("?!"))
+
+    def test_title_boost(self):
+        """Test that a title match outranks an equal body match"""
+        self.index.add_document("a.md", "a.md", "markdown", "Office Hours", "Claims mention denial codes once.")
+        self.index.add_document("b.md", "b.md", "markdown", "Denial Codes", "Claims mention codes once.")
+
+        results = self.index.search("denial codes")
+
+        self.assertEqual([r["file_path"] for r in results], ["b.md", "a.md"])
+        self.assertGreater(results[0]["relevance"], results[1]["relevance"])
+
+    def test_reindex_replaces_document(self):
+        """Test that re-adding a document replaces its old text"""
+        self.index.add_document("a.md", "a.md", "markdown", "Guide", "old superbill text")
+        self.index.add_document("a.md", "a.md", "markdown", "Guide", "new remittance text")
+
+        self.assertEqual(self.index.search("superbill"), [])
+        self.assertEqual(len(self.index.search("remittance")), 1)
+        self.assertEqual(self.index.indexed_paths(), {"a.md"})
+
+    def test_processor_indexes_on_process(self):
+        """Test that process_document updates the index incrementally"""
+        doc_path = os.path.join(self.test_dir, "payers.md")
+        with open(doc_path, "w") as f:
+            f.write("# Payer Guide\n\nAetna requires prior authorization.\n")
+
+        processor = DocumentProcessor(docs_dir=self.test_dir,
+                                      output_dir=os.path.join(self.test_dir, "processed"))
+        processor.process_document(doc_path)
+
+        self.assertEqual(processor.search_index.indexed_paths(), {doc_path})
+        self.assertEqual(processor.search_documents("authorization")[0]["filename"], "payers.md")
+
+    def test_reciprocal_rank_fusion(self):
+        """Test that items ranked by both lists come first"""
+        vector = [{"file_path": "a", "chunk_id": "a_0"}, {"file_path": "b", "chunk_id": "b_3"}]
+        keyword = [{"file_path": "b"}, {"file_path": "c"}]
+
+        merged = reciprocal_rank_fusion([vector, keyword], limit=3)
+
+        self.assertEqual([r["file_path"] for r in merged], ["b", "a", "c"])
+        self.assertEqual(merged[0]["chunk_id"], "b_3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -182,4 +182,38 @@ def test_error_handling(sql_agent, mock_ollama):
     
     # Check that the error was handled
     assert "error" in result.lower()
-    assert "Test error" in result
\ No newline at end of file
+    assert "Test error" in result
+def fake_agent_run(*queries):
+    """Build an agent.run stand-in that reports the given SQL to its callbacks."""
+    def run(prompt, callbacks=()):
+        for handler in callbacks:
+            handler.on_llm_start({}, [prompt])
+            for sql in queries:
+                handler.on_tool_start({"name": "sql_db_query"}, sql)
+                handler.on_tool_end("[('Dr. Smith',)]")
+        return "We have three providers."
+    return run
+
+def test_plan_cache_hit_summarizes_replayed_rows(db, sql_agent, mock_ollama):
+    """A repeated question replays the cached SQL and has the LLM phrase the rows."""
+    sql_agent.use_templates = False
+    sql_agent.agent = MagicMock()
+    sql_agent.agent.run.side_effect = fake_agent_run("SELECT provider_name FROM providers")
+    mock_ollama.invoke.return_value = "Dr. Smith, Dr. Jones and Dr. Brown."
+    
+    sql_agent.process_query("Which providers do we have?")
+    answer = sql_agent.process_query("which providers do we have")
+    
+    sql_agent.agent.run.assert_called_once()
+    assert answer == "Dr. Smith, Dr. Jones and Dr. Brown."
+    assert "Dr. Brown" in mock_ollama.invoke.call_args[0][0]
+
+def test_plan_cache_skips_multi_query_runs(sql_agent):
+    """Runs that needed several queries are not cached."""
+    sql_agent.use_templates = False
+    sql_agent.agent = MagicMock()
+    sql_agent.agent.run.side_effect = fake_agent_run("SELECT 1", "SELECT 2")
+    
+    sql_agent.process_query("Compare this year with last year")
+    
+    assert len(sql_agent.plan_cache) == 0
@@ -0,0 +1,115 @@
+"""
+Tests for streaming CSV ingest
+"""
+
+import os
+import io
+import sys
+import time
+import shutil
+import hashlib
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from medical_billing_db import MedicalBillingDB
+from utils.stream_ingest import StreamIngest
+
+TRANSACTION_QUERY = (
+    "SELECT p.provider_name, t.transaction_date, t.cash_applied, t.payer_name "
+    "FROM payment_transactions t JOIN providers p USING (provider_id) ORDER BY t.transaction_id"
+)
+
+
+class SlowStream(io.BytesIO):
+    """Request body that waits for the first insert before sending its last block"""
+
+    def __init__(self, data, db_path, block_size):
+        super().__init__(data)
+        self.db_path = db_path
+        self.last_block_at = len(data) - block_size
+        self.rows_before_end = None
+
+    def read(self, size=-1):
+        if self.rows_before_end is None and self.tell() >= self.last_block_at:
+            deadline = time.time() + 10
+            while time.time() < deadline:
+                self.rows_before_end = count_rows(self.db_path)
+                if self.rows_before_end:
+                    break
+                time.sleep(0.05)
+        return super().read(size)
+
+
+def count_rows(db_path):
+    try:
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM payment_transactions").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+
+
+class TestStreamIngest(unittest.TestCase):
+    """Test cases for StreamIngest"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        rows = 2000
+        self.data = pd.DataFrame({
+            "Provider": ["Dr. Ames", "Dr. Baker", "Dr. Cole"] * (rows // 3) + ["Dr. Ames"] * (rows % 3),
+            "Date": [f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}" for i in range(rows)],
+            "Cash Applied": [round(i * 1.25, 2) if i % 7 else None for i in range(rows)],
+            "Payer": ["Aetna", "BCBS"] * (rows // 2),
+        }).to_csv(index=False).encode("utf-8")
+
+    def test_matches_file_upload(self):
+        """Streaming ingest stores the same rows as a chunked file upload"""
+        db_path = os.path.join(self.root, "stream.db")
+        file_path = os.path.join(self.root, "saved.csv")
+        block_size = 4096
+        stream = SlowStream(self.data, db_path, block_size)
+        ingest = StreamIngest(db_path, chunk_size=250, block_size=block_size, queue_blocks=2, detect_bytes=8192)
+        outcome = ingest.ingest(stream, file_path)
+
+        self.assertTrue(outcome["success"], outcome)
+        self.assertEqual(outcome["size"], len(self.data))
+        self.assertEqual(outcome["sha256"], hashlib.sha256(self.data).hexdigest())
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(outcome["result"]["total_rows_processed"], 2000)
+        self.assertGreater(stream.rows_before_end, 0)
+
+        reference_path = os.path.join(self.root, "reference.db")
+        db = MedicalBillingDB(reference_path)
+        try:
+            db.upload_csv_file(file_path, chunk_size=250)
+        finally:
+            db.close()
+
+        with sqlite3.connect(db_path) as streamed, sqlite3.connect(reference_path) as reference:
+            self.assertEqual(streamed.execute(TRANSACTION_QUERY).fetchall(),
+                             reference.execute(TRANSACTION_QUERY).fetchall())
+            self.assertEqual(streamed.execute("SELECT records_processed, status FROM data_uploads").fetchall(),
+                             [(2000, "completed")])
+
+    def test_malformed_upload_is_still_saved(self):
+        """A body that is not CSV fails the import but is saved in full"""
+        db_path = os.path.join(self.root, "stream.db")
+        file_path = os.path.join(self.root, "saved.csv")
+        data = b"\x00\x01" * 50000
+        outcome = StreamIngest(db_path, block_size=1024, queue_blocks=1, detect_bytes=2048).ingest(
+            io.BytesIO(data), file_path)
+
+        self.assertEqual(outcome["size"], len(data))
+        self.assertEqual(os.path.getsize(file_path), len(data))
+        self.assertEqual(count_rows(db_path), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
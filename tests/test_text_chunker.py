@@ -0,0 +1,78 @@
+"""
+Tests for the text chunker
+"""
+
+import os
+import sys
+import types
+import unittest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_chunker import count_tokens, iter_text_chunks, iter_units
+
+
+def sample_text(paragraphs: int = 40) -> str:
+    return "\n\n".join(
+        " ".join(f"Claim {p}-{i} for CPT 9921{i} was paid by payer {i % 7} on 2024-0{i + 1}-15." for i in range(8))
+        for p in range(paragraphs)
+    )
+
+
+class TestTextChunker(unittest.TestCase):
+    """Test cases for iter_text_chunks"""
+
+    def test_short_text_is_one_chunk(self):
+        """Text within the budget comes back unchanged"""
+        self.assertEqual(list(iter_text_chunks("One short sentence.", 50, 10)), ["One short sentence."])
+        self.assertEqual(list(iter_text_chunks("", 50, 10)), [])
+
+    def test_units_cover_text(self):
+        """Units cover the text without gaps or overlaps"""
+        text = sample_text(5)
+        units = list(iter_units(text, 20))
+        self.assertEqual(units[0].start, 0)
+        self.assertEqual(units[-1].end, len(text))
+        for previous, unit in zip(units, units[1:]):
+            self.assertEqual(previous.end, unit.start)
+
+    def test_chunks_respect_token_budget(self):
+        """Every chunk fits the budget and chunks end at sentence boundaries"""
+        chunks = list(iter_text_chunks(sample_text(), 120, 20))
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(count_tokens(chunk), 120)
+        for chunk in chunks[:-1]:
+            self.assertRegex(chunk.rstrip(), r"\.$")
+
+    def test_forward_progress_and_coverage(self):
+        """Chunks start strictly later each time and together cover the text"""
+        text = sample_text()
+        chunks = list(iter_text_chunks(text, 100, 50))
+        self.assertEqual(len(chunks), len(set(chunks)))
+
+        position = -1
+        covered_to = 0
+        for chunk in chunks:
+            start = text.index(chunk, position + 1)
+            self.assertGreater(start, position)
+            self.assertLessEqual(start, covered_to)
+            position, covered_to = start, start + len(chunk)
+        self.assertEqual(covered_to, len(text))
+
+    def test_unbroken_text_is_split(self):
+        """Text without whitespace is still cut within the budget"""
+        chunks = list(iter_text_chunks("-" * 1000, 64, 16))
+        self.assertEqual("".join(chunks), "-" * 1000)
+        self.assertTrue(all(count_tokens(chunk) <= 64 for chunk in chunks))
+
+    def test_chunks_are_lazy(self):
+        """Chunks are yielded from a generator"""
+        chunks = iter_text_chunks(sample_text(), 100, 20)
+        self.assertIsInstance(chunks, types.GeneratorType)
+        self.assertTrue(next(chunks))
+
+
+if __name__ == "__main__":
+    unittest.main()
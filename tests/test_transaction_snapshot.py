@@ -0,0 +1,124 @@
+"""
+Tests for the Parquet transaction snapshot
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from medical_billing_db import MedicalBillingDB
+from utils.transaction_snapshot import PYARROW_AVAILABLE, get_transaction_snapshot
+
+
+def make_transactions(dates, provider="Dr. Ann Lee") -> pd.DataFrame:
+    return pd.DataFrame({
+        "provider_name": [provider] * len(dates),
+        "transaction_date": dates,
+        "patient_id": [f"P{i}" for i in range(len(dates))],
+        "cash_applied": [10.0 * (i + 1) for i in range(len(dates))],
+        "payer_name": ["Aetna"] * len(dates),
+    })
+
+
+@unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+class TestTransactionSnapshot(unittest.TestCase):
+    """Test cases for TransactionSnapshot"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "billing.db")
+        self.db = MedicalBillingDB(self.db_path)
+        self.db.upload_csv_data(make_transactions(["2023-11-05", "2023-12-01", "2024-01-15"]), "first.csv")
+        self.snapshot = get_transaction_snapshot(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def sqlite_transactions(self) -> pd.DataFrame:
+        return pd.read_sql_query("SELECT * FROM payment_transactions ORDER BY transaction_id", self.db.conn)
+
+    def test_snapshot_matches_sqlite(self):
+        """The snapshot holds the same rows as payment_transactions"""
+        loaded = self.snapshot.load().sort_values("transaction_id").reset_index(drop=True)
+        expected = self.sqlite_transactions()
+
+        self.assertEqual(list(loaded.columns), list(expected.columns))
+        self.assertEqual(loaded["transaction_id"].tolist(), expected["transaction_id"].tolist())
+        self.assertEqual(loaded["cash_applied"].tolist(), expected["cash_applied"].tolist())
+        self.assertEqual(loaded["transaction_date"].tolist(), expected["transaction_date"].tolist())
+
+    def test_upload_exports_incrementally(self):
+        """An upload adds part files for its months without rewriting the others"""
+        before = set(self.snapshot.files())
+        self.db.upload_csv_data(make_transactions(["2024-01-20", "2024-02-02"], "Dr. Bo Kim"), "second.csv")
+
+        after = set(self.snapshot.files())
+        self.assertTrue(before < after)
+        self.assertEqual(len(after - before), 2)
+        self.assertEqual(self.snapshot.get_stats()["rebuilds"], 0)
+        self.assertEqual(len(self.snapshot.load()), 5)
+
+    def test_chunked_upload_exports_once(self):
+        """A chunked file upload writes one part per month, not one per chunk"""
+        before = set(self.snapshot.files())
+        csv_path = os.path.join(self.tmp_dir, "march.csv")
+        make_transactions(["2024-03-01", "2024-03-02", "2024-03-03", "2024-04-01"]).to_csv(csv_path, index=False)
+        self.db.upload_csv_file(csv_path, chunk_size=1)
+
+        self.assertEqual(len(set(self.snapshot.files()) - before), 2)
+        self.assertEqual(self.snapshot.get_stats()["compactions"], 0)
+        self.assertEqual(len(self.snapshot.load()), 7)
+
+    def test_partition_pruning(self):
+        """A date range only reads the files of its months"""
+        self.assertEqual(len(self.snapshot.files(start="2023-12-01", end="2023-12-31")), 1)
+        self.assertEqual(len(self.snapshot.files(years=[2023])), 2)
+
+        loaded = self.snapshot.load(columns=["provider_name", "cash_applied", "month"],
+                                    start="2023-12-01", end="2024-12-31")
+        self.assertEqual(list(loaded.columns), ["provider_name", "cash_applied", "month"])
+        self.assertEqual(sorted(loaded["cash_applied"].tolist()), [20.0, 30.0])
+        self.assertEqual(set(loaded["provider_name"]), {"Dr. Ann Lee"})
+
+    def test_iter_batches(self):
+        """A batched scan yields every matching row"""
+        batches = list(self.snapshot.iter_batches(columns=["transaction_id"], batch_size=1))
+        self.assertEqual(sum(len(batch) for batch in batches), 3)
+
+    def test_rebuild_after_delete(self):
+        """Deleted rows make the next sync rebuild the snapshot"""
+        self.db.conn.execute("DELETE FROM payment_transactions WHERE transaction_date = '2023-12-01'")
+        self.db.conn.commit()
+
+        result = self.snapshot.sync()
+        self.assertTrue(result["rebuilt"])
+        self.assertEqual(sorted(self.snapshot.load()["transaction_date"]), ["2023-11-05", "2024-01-15"])
+
+    def test_compaction(self):
+        """Months with too many parts are merged into one file"""
+        self.snapshot.max_parts = 2
+        for i in range(3):
+            self.db.upload_csv_data(make_transactions([f"2024-01-{20 + i}"]), f"extra{i}.csv")
+
+        files = self.snapshot.files(start="2024-01-01", end="2024-01-31")
+        self.assertLessEqual(len(files), 2)
+        self.assertGreater(self.snapshot.get_stats()["compactions"], 0)
+        self.assertEqual(len(self.snapshot.load(start="2024-01-01", end="2024-01-31")), 4)
+
+        # Replaced parts are removed on the next sync
+        self.db.upload_csv_data(make_transactions(["2025-03-01"]), "later.csv")
+        on_disk = [os.path.join(dirpath, f) for dirpath, _, names in os.walk(self.snapshot.path)
+                   for f in names if f.endswith(".parquet")]
+        self.assertEqual(sorted(on_disk), sorted(self.snapshot.files()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests for vectorized continuation-row folding in WorkingCSVProcessor
+"""
+
+import os
+import sys
+import contextlib
+import io
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from working_csv_processor import WorkingCSVProcessor
+
+ROOT = Path(__file__).resolve().parent.parent
+TEST_DATA = ROOT / "tests" / "test_data"
+
+
+def billing_csvs():
+    files = sorted(TEST_DATA.glob("*.csv"))
+    billing = ROOT / "csv_folder" / "billing"
+    if billing.is_dir():
+        files += sorted(billing.glob("*.csv"))
+    return files
+
+
+class TestWorkingCSVProcessor(unittest.TestCase):
+    """Test cases for WorkingCSVProcessor"""
+
+    def make_processor(self, vectorized: bool, provider_columns: bool = True) -> WorkingCSVProcessor:
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, db_path)
+        processor = WorkingCSVProcessor(db_path, vectorized=vectorized)
+        self.addCleanup(processor.db.close)
+        if provider_columns:
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("ALTER TABLE providers ADD COLUMN contract_type TEXT")
+                conn.execute("ALTER TABLE providers ADD COLUMN base_percentage REAL")
+        return processor
+
+    @staticmethod
+    def read(file_path) -> pd.DataFrame:
+        df = pd.read_csv(file_path, dtype=str)
+        df.columns = df.columns.str.strip()
+        return df.dropna(how="all")
+
+    @staticmethod
+    def stored_rows(processor):
+        with sqlite3.connect(processor.db_path) as conn:
+            return {
+                "providers": conn.execute("SELECT provider_id, provider_name FROM providers ORDER BY 1").fetchall(),
+                "transactions": conn.execute(
+                    "SELECT transaction_id, provider_id, transaction_date, service_date, cash_applied, "
+                    "patient_payment, payer_name, notes FROM payment_transactions ORDER BY 1"
+                ).fetchall(),
+            }
+
+    def test_fixture_transactions(self):
+        """Continuation rows fold into the transaction above them"""
+        processor = self.make_processor(vectorized=True)
+        transactions = processor._combine_continuation_rows_vectorized(self.read(TEST_DATA / "billing_continuation.csv"))
+
+        self.assertEqual(len(transactions), 7)
+        bcbs = transactions.iloc[1]
+        self.assertEqual(bcbs["check_date"], "2024-01-30")
+        self.assertEqual(bcbs["check_amount"], 1108.44)
+        self.assertEqual(bcbs["cash_applied"], 108.44)
+        self.assertEqual(bcbs["session_info"], "Sess:01-22-2024(Pat Two)")
+        self.assertIsNone(transactions.iloc[3]["check_date"])
+        self.assertEqual(transactions.iloc[2]["provider_name"], "")
+
+    def test_parity_with_row_path(self):
+        """The vectorized path combines and stores exactly what the row path does"""
+        files = billing_csvs()
+        self.assertTrue(files)
+        # Without the provider columns every insert fails and the bulk path falls back to rows
+        for provider_columns, paths in ((True, files), (False, files[:1])):
+            fast = self.make_processor(vectorized=True, provider_columns=provider_columns)
+            slow = self.make_processor(vectorized=False, provider_columns=provider_columns)
+
+            for file_path in paths:
+                df = self.read(file_path)
+                self.assertEqual(
+                    fast._combine_continuation_rows_vectorized(df).to_dict("records"),
+                    slow._combine_continuation_rows(df),
+                    file_path.name,
+                )
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fast_result = fast.process_csv_file(str(file_path))
+                    slow_result = slow.process_csv_file(str(file_path))
+                for key in ("success", "successful_rows", "failed_rows", "total_rows_processed", "issues"):
+                    self.assertEqual(fast_result.get(key), slow_result.get(key), f"{file_path.name}: {key}")
+
+            self.assertEqual(self.stored_rows(fast), self.stored_rows(slow))
+
+
+if __name__ == "__main__":
+    unittest.main()
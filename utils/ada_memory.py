@@ -11,6 +11,8 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from utils.logger import get_logger
+from utils.db_open import connect_db
+from utils.conversation_stats import init_stats_tables, record_conversation, refresh_top_importance
 
 logger = get_logger(__name__)
 
@@ -23,7 +25,7 @@ class AdaMemory:
     
     def init_database(self):
         """Initialize the memory database with required tables."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.row_factory = sqlite3.Row
         
         try:
@@ -95,6 +97,9 @@ class AdaMemory:
                 CREATE INDEX IF NOT EXISTS idx_memories_tags ON memories(tags);
             """)
             
+            # Aggregates for conversation analytics (see utils.conversation_stats)
+            init_stats_tables(conn)
+            
             # Insert default personality settings
             self._insert_default_personality(conn)
             self._insert_default_instructions(conn)
@@ -148,7 +153,7 @@ class AdaMemory:
     def store_memory(self, memory_type: str, content: str, context: Dict = None, 
                     importance: int = 5, tags: List[str] = None, expires_in_days: int = None) -> int:
         """Store a new memory."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.row_factory = sqlite3.Row
         
         try:
@@ -165,6 +170,8 @@ class AdaMemory:
             """, (memory_type, content, context_json, importance, tags_str, expires_at))
             
             memory_id = cursor.lastrowid
+            if memory_type == 'conversation':
+                record_conversation(conn, memory_id, content, importance, tags_str)
             conn.commit()
             logger.debug(f"Stored memory {memory_id}: {memory_type}")
             return memory_id
@@ -178,7 +185,7 @@ class AdaMemory:
     def retrieve_memories(self, memory_type: str = None, tags: List[str] = None, 
                          limit: int = 10, min_importance: int = 1) -> List[Dict]:
         """Retrieve relevant memories."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.row_factory = sqlite3.Row
         
         try:
@@ -222,7 +229,7 @@ class AdaMemory:
     
     def get_personality(self) -> Dict[str, Dict[str, str]]:
         """Get current personality settings."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.row_factory = sqlite3.Row
         
         try:
@@ -248,7 +255,7 @@ class AdaMemory:
     
     def update_personality(self, category: str, setting_name: str, value: str) -> bool:
         """Update a personality setting."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         
         try:
             conn.execute("""
@@ -269,7 +276,7 @@ class AdaMemory:
     
     def get_custom_instructions(self, category: str = None, active_only: bool = True) -> List[Dict]:
         """Get custom instructions."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.row_factory = sqlite3.Row
         
         try:
@@ -299,7 +306,7 @@ class AdaMemory:
     
     def add_custom_instruction(self, category: str, instruction: str, priority: int = 5) -> int:
         """Add a new custom instruction."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         
         try:
             cursor = conn.execute("""
@@ -320,7 +327,7 @@ class AdaMemory:
     
     def get_user_context(self) -> Dict:
         """Get user context information."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.row_factory = sqlite3.Row
         
         try:
@@ -343,7 +350,7 @@ class AdaMemory:
     
     def update_user_context(self, **kwargs) -> bool:
         """Update user context information."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         
         try:
             # Check if context exists
@@ -433,7 +440,7 @@ class AdaMemory:
     
     def clean_expired_memories(self) -> int:
         """Clean up expired memories."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         
         try:
             cursor = conn.execute("""
@@ -442,6 +449,8 @@ class AdaMemory:
             """)
             
             deleted_count = cursor.rowcount
+            if deleted_count:
+                refresh_top_importance(conn)
             conn.commit()
             logger.info(f"Cleaned up {deleted_count} expired memories")
             return deleted_count
@@ -7,16 +7,16 @@ Based on user memory preferences for conversational AI responses vs. repetitive
 """
 
 import json
-import sqlite3
 import requests
 import time
-from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 import logging
 from utils.config import get_config
 from utils.logger import get_logger
 from utils.ada_memory import AdaMemory
+from utils.conversation_stats import ConversationStats
+from utils.db_open import connect_db
 
 logger = get_logger(__name__)
 config = get_config()
@@ -59,6 +59,7 @@ class AIModelTuner:
     def __init__(self, db_path: str = "ada_memory.db"):
         self.db_path = db_path
         self.memory = AdaMemory(db_path)
+        self.stats = ConversationStats(db_path)
         self.config = get_config()
         self.init_tuning_database()
         
@@ -82,7 +83,7 @@ class AIModelTuner:
     
     def init_tuning_database(self):
         """Initialize database tables for fine-tuning data"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.executescript("""
             -- Model performance tracking
             CREATE TABLE IF NOT EXISTS model_performance (
@@ -347,24 +348,10 @@ Your goal is to transform insights into practical actions that deliver measurabl
         Returns:
             ConversationProfile with pattern analysis
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Get recent conversations
-        cursor.execute("""
-            SELECT content, context, importance, tags, created_at
-            FROM memories 
-            WHERE memory_type = 'conversation' 
-            AND created_at > ?
-            ORDER BY created_at DESC
-        """, (cutoff_date.isoformat(),))
-        
-        conversations = cursor.fetchall()
-        conn.close()
+        # Counters kept up to date by AdaMemory.store_memory
+        window = self.stats.window(days)
         
-        if not conversations:
+        if not window['conversations']:
             return ConversationProfile(
                 user_question_types={},
                 preferred_response_length='detailed',
@@ -374,21 +361,8 @@ Your goal is to transform insights into practical actions that deliver measurabl
                 common_follow_ups=[]
             )
         
-        # Analyze question types
-        question_types = {}
-        for conv in conversations:
-            content = conv[0].lower()
-            if 'provider' in content or 'dustin' in content or 'tammy' in content:
-                question_types['provider_analysis'] = question_types.get('provider_analysis', 0) + 1
-            if 'revenue' in content or 'money' in content or 'payment' in content:
-                question_types['financial_analysis'] = question_types.get('financial_analysis', 0) + 1
-            if 'compare' in content or 'vs' in content:
-                question_types['comparison'] = question_types.get('comparison', 0) + 1
-            if 'overhead' in content or 'expense' in content or 'cost' in content:
-                question_types['expense_analysis'] = question_types.get('expense_analysis', 0) + 1
-        
         # Determine preferred response length based on importance scores
-        avg_importance = sum(conv[2] for conv in conversations) / len(conversations)
+        avg_importance = window['avg_importance']
         if avg_importance >= 8:
             preferred_length = 'comprehensive'
         elif avg_importance >= 6:
@@ -396,27 +370,17 @@ Your goal is to transform insights into practical actions that deliver measurabl
         else:
             preferred_length = 'brief'
         
-        # Extract domain focus areas from tags
-        all_tags = []
-        for conv in conversations:
-            if conv[3]:  # tags field
-                all_tags.extend(conv[3].split(','))
-        
-        domain_focus = [tag.strip() for tag in all_tags if tag.strip()]
-        domain_counts = {}
-        for tag in domain_focus:
-            domain_counts[tag] = domain_counts.get(tag, 0) + 1
-        
-        # Get top 5 focus areas
-        top_focus_areas = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        # Get top 5 focus areas from tags
+        top_focus_areas = sorted(window['tags'].items(), key=lambda x: x[1], reverse=True)[:5]
         domain_focus_areas = [area[0] for area in top_focus_areas]
         
         return ConversationProfile(
-            user_question_types=question_types,
+            user_question_types=window['question_types'],
             preferred_response_length=preferred_length,
             interaction_patterns={'avg_importance': avg_importance},
             domain_focus_areas=domain_focus_areas,
-            satisfaction_scores=[float(conv[2]) for conv in conversations],
+            satisfaction_scores=[float(score) for score, count in sorted(window['importance'].items(), reverse=True)
+                                 for _ in range(count)],
             common_follow_ups=[]
         )
     
@@ -484,49 +448,31 @@ Your goal is to transform insights into practical actions that deliver measurabl
     
     def _analyze_recent_performance(self) -> Dict[str, float]:
         """Analyze recent AI performance metrics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get recent conversation quality data
-        cursor.execute("""
-            SELECT importance, tags, created_at
-            FROM memories 
-            WHERE memory_type = 'conversation'
-            AND created_at > datetime('now', '-7 days')
-        """)
+        window = self.stats.window(7)
         
-        recent_conversations = cursor.fetchall()
-        conn.close()
-        
-        if not recent_conversations:
+        if not window['conversations']:
             return {'avg_quality': 7.0, 'coherence': 8.0, 'variety': 6.0}
         
         # Calculate performance metrics
-        quality_scores = [conv[0] for conv in recent_conversations]
-        avg_quality = sum(quality_scores) / len(quality_scores)
+        avg_quality = window['avg_importance']
         
         # Estimate coherence based on conversation frequency
-        coherence = min(10.0, 6.0 + len(recent_conversations) * 0.2)
+        coherence = min(10.0, 6.0 + window['conversations'] * 0.2)
         
         # Estimate variety based on tag diversity
-        all_tags = []
-        for conv in recent_conversations:
-            if conv[1]:
-                all_tags.extend(conv[1].split(','))
-        
-        unique_tags = len(set(all_tags))
+        unique_tags = len(window['tags'])
         variety = min(10.0, 4.0 + unique_tags * 0.3)
         
         return {
             'avg_quality': avg_quality,
             'coherence': coherence,
             'variety': variety,
-            'conversation_count': len(recent_conversations)
+            'conversation_count': window['conversations']
         }
     
     def _get_user_preferences(self) -> Dict[str, Any]:
         """Get learned user preferences"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -622,7 +568,7 @@ Your goal is to transform insights into practical actions that deliver measurabl
     
     def _save_optimization_results(self, config: Dict[str, Any], results: Dict[str, float]):
         """Save optimization results to database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -11,6 +11,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from utils.config import get_config
 from utils.ada_memory import AdaMemory
+from utils.conversation_stats import ConversationStats
+from utils.model_residency import get_model_residency
 
 @dataclass
 class OptimizedConfig:
@@ -32,6 +34,7 @@ class AIOptimizationManager:
     def __init__(self):
         self.config = get_config()
         self.memory = AdaMemory()
+        self.stats = ConversationStats(self.memory.db_path)
         self.current_optimization = None
         self.optimization_history = []
     
@@ -212,12 +215,9 @@ Remember to build on this context naturally in your response."""
     
     def _get_user_conversation_preferences(self) -> Dict[str, Any]:
         """Get learned user conversation preferences"""
-        # Analyze conversation patterns from memory
-        recent_memories = self.memory.retrieve_memories(
-            memory_type='conversation',
-            limit=20,
-            min_importance=5
-        )
+        # Average importance of the top conversations, kept up to date by
+        # AdaMemory.store_memory
+        avg_importance = self.stats.preference_importance()
         
         preferences = {
             'prefers_conversational': True,  # Based on user memory preference
@@ -227,11 +227,7 @@ Remember to build on this context naturally in your response."""
             'follow_up_frequency': 'moderate'
         }
         
-        if recent_memories:
-            # Analyze patterns in recent conversations
-            total_importance = sum(mem['importance'] for mem in recent_memories)
-            avg_importance = total_importance / len(recent_memories)
-            
+        if avg_importance is not None:
             # High importance suggests user values detailed responses
             if avg_importance >= 8:
                 preferences['prefers_detailed_analysis'] = True
@@ -243,14 +239,17 @@ Remember to build on this context naturally in your response."""
     
     def _select_optimal_model(self, question_type: str, user_prefs: Dict[str, Any]) -> str:
         """Select optimal model based on question type and preferences"""
+        homelab_model = self.config.get('ollama.homelab_model')
+        residency = get_model_residency()
+
         # For complex analysis, prefer larger model if available
         if question_type in ['financial_analysis', 'strategic_planning'] and user_prefs.get('prefers_detailed_analysis'):
-            homelab_model = self.config.get('ollama.homelab_model')
-            if homelab_model and self._test_model_availability(homelab_model):
+            if homelab_model and (residency.is_resident(homelab_model) or self._test_model_availability(homelab_model)):
                 return homelab_model
         
-        # Default to laptop model
-        return self.config.get('ollama.laptop_model', 'llama3.1:8b')
+        # Default to laptop model, but stay on the larger model while it is
+        # loaded rather than paying for a reload of the laptop model
+        return residency.choose_model(self.config.get('ollama.laptop_model', 'llama3.1:8b'), homelab_model)
     
     def _optimize_temperature(self, question_type: str, user_prefs: Dict[str, Any]) -> float:
         """Optimize temperature based on question type and user preferences"""
@@ -0,0 +1,166 @@
+"""
+DuckDB Analytics Engine for HVLC_DB
+
+Runs analytical SQL in an embedded DuckDB over the Parquet transaction
+snapshot (see utils.transaction_snapshot) instead of SQLite. DuckDB's
+executor is vectorized and uses every core for scans, GROUP BYs and window
+functions, and spills to disk when an aggregation does not fit in memory,
+which SQLite's single-threaded row-at-a-time executor cannot.
+
+Queries see two tables:
+
+- payment_transactions: the snapshot, with the columns of the SQLite
+  table; transaction_date and service_date are DATE (NULL where SQLite's
+  date functions would also give NULL)
+- providers: read from SQLite at query time
+
+AdvancedAnalytics routes its heavy queries here when analytics.engine is
+"duckdb"; duckdb is an optional dependency.
+"""
+
+import os
+import tempfile
+import threading
+from contextlib import closing
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+
+from utils.config import get_config
+from utils.logger import get_logger
+from utils.db_open import connect_db
+from utils.transaction_snapshot import get_transaction_snapshot, snapshot_enabled
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+logger = get_logger()
+config = get_config()
+
+TRANSACTIONS_VIEW_SQL = """
+CREATE VIEW payment_transactions AS
+SELECT * EXCLUDE (year, month) REPLACE (
+    TRY_CAST(transaction_date AS DATE) AS transaction_date,
+    TRY_CAST(service_date AS DATE) AS service_date
+)
+FROM transactions_source
+"""
+
+
+class AnalyticsEngine:
+    """DuckDB query engine over the Parquet transaction snapshot"""
+
+    def __init__(self, db_path: str, threads: int = None, memory_limit: str = None,
+                 temp_directory: str = None):
+        """Initialize analytics engine
+
+        Args:
+            db_path: Path to the SQLite database the snapshot is taken from
+            threads: DuckDB worker threads (default: all cores)
+            memory_limit: DuckDB memory limit, e.g. "4GB" (default: DuckDB's)
+            temp_directory: Where DuckDB spills large aggregations
+        """
+        if not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb is required for the DuckDB analytics engine (pip install duckdb)")
+        if not snapshot_enabled():
+            raise RuntimeError("The DuckDB analytics engine reads the Parquet transaction snapshot, "
+                               "which is disabled (analytics.parquet_snapshot or pyarrow missing)")
+        self.db_path = db_path
+        self.snapshot = get_transaction_snapshot(db_path)
+        self.threads = threads or config.get("analytics.duckdb_threads")
+        self.memory_limit = memory_limit or config.get("analytics.duckdb_memory_limit")
+        self.temp_directory = (temp_directory or config.get("analytics.duckdb_temp_dir")
+                               or os.path.join(tempfile.gettempdir(), "hvlc_duckdb"))
+        self.stats = {"queries": 0}
+        self._lock = threading.Lock()
+
+    def connect(self) -> "duckdb.DuckDBPyConnection":
+        """Open an in-memory DuckDB connection with the tables registered
+
+        The snapshot is synced first, so the connection sees every
+        committed upload.
+        """
+        files = self.snapshot.files()
+        conn = duckdb.connect(":memory:")
+        try:
+            if self.threads:
+                conn.execute(f"SET threads = {int(self.threads)}")
+            if self.memory_limit:
+                conn.execute(f"SET memory_limit = '{self.memory_limit}'")
+            conn.execute(f"SET temp_directory = '{_quote(self.temp_directory)}'")
+
+            if files:
+                file_list = ", ".join(f"'{_quote(path)}'" for path in files)
+                conn.execute(f"""
+                    CREATE VIEW transactions_source AS
+                    SELECT * FROM read_parquet([{file_list}], hive_partitioning = true)
+                """)
+            else:
+                # An empty snapshot still has the snapshot's columns
+                conn.register("transactions_source", self.snapshot.dataset().to_table())
+            conn.execute(TRANSACTIONS_VIEW_SQL)
+
+            with closing(connect_db(self.db_path)) as sqlite_conn:
+                providers = pd.read_sql_query("SELECT * FROM providers", sqlite_conn)
+            conn.register("providers", providers)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def query(self, sql: str, params: Sequence[Any] = None) -> pd.DataFrame:
+        """Run a query in DuckDB
+
+        Args:
+            sql: DuckDB SQL over payment_transactions and providers
+            params: Query parameters (? placeholders)
+
+        Returns:
+            DataFrame with query results
+        """
+        with closing(self.connect()) as conn:
+            result = conn.execute(sql, list(params or [])).df()
+        with self._lock:
+            self.stats["queries"] += 1
+        return result
+
+
+def _quote(value: str) -> str:
+    return str(value).replace("'", "''")
+
+
+_engines: Dict[str, AnalyticsEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def duckdb_engine_enabled(engine: str = None) -> bool:
+    """Whether analytics should run on the DuckDB engine
+
+    Args:
+        engine: "sqlite" or "duckdb" (default: analytics.engine)
+    """
+    if str(engine or config.get("analytics.engine", "sqlite")).lower() != "duckdb":
+        return False
+    if not DUCKDB_AVAILABLE or not snapshot_enabled():
+        logger.warning("analytics.engine is duckdb but duckdb or the Parquet snapshot is unavailable; using SQLite")
+        return False
+    return True
+
+
+def get_analytics_engine(db_path: Optional[str] = None) -> AnalyticsEngine:
+    """Get the shared DuckDB analytics engine for a database
+
+    Args:
+        db_path: Path to the SQLite database (default: database.db_path)
+
+    Returns:
+        AnalyticsEngine instance
+    """
+    db_path = db_path or config.get_db_path()
+    with _engines_lock:
+        if db_path not in _engines:
+            _engines[db_path] = AnalyticsEngine(db_path)
+        return _engines[db_path]
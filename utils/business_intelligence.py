@@ -9,6 +9,7 @@ import json
 from datetime import datetime, date
 from dataclasses import dataclass, asdict
 from typing import Dict, List, Optional, Tuple
+from utils.db_open import connect_db
 
 @dataclass
 class ProviderContract:
@@ -100,7 +101,7 @@ class BusinessIntelligence:
     
     def _get_db_connection(self):
         """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
     
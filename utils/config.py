@@ -19,7 +19,11 @@ DEFAULT_CONFIG = {
         "homelab_model": "llama3.3:70b",
         "laptop_url": "http://localhost:11434",
         "laptop_model": "llama3.1:8b",
-        "timeout": 180
+        "timeout": 180,
+        "keep_alive": "30m",
+        "warm_up": True,
+        "cold_start_ms": 1000,
+        "max_loaded_models": 1
     },
     "database": {
         "type": "sqlite",  # sqlite or postgresql
@@ -35,7 +39,12 @@ DEFAULT_CONFIG = {
         "connection_pool_size": 5,
         "connection_timeout": 30,
         "enable_foreign_keys": True,
-        "echo_sql": False
+        "echo_sql": False,
+        "journal_mode": "WAL",  # Readers are not blocked by bulk loads
+        "synchronous": None,  # SQLite default for regular connections
+        "bulk_synchronous": "NORMAL",
+        "mmap_size": 268435456,  # 256 MB of memory-mapped reads
+        "staged_loads": False  # Load into a shadow database and publish atomically
     },
     "paths": {
         "csv_root": "csv_folder",
@@ -52,6 +61,62 @@ DEFAULT_CONFIG = {
         "sql_agent_enabled": True,
         "vector_search_enabled": True,
         "improved_ai_enabled": True
+    },
+    "response_cache": {
+        "enabled": True,
+        "max_entries": 256,
+        "ttl_seconds": 3600,
+        "similarity_threshold": 0.92,
+        "semantic_matching": True,
+        "embedding_timeout": 5
+    },
+    "context_packer": {
+        "data_share": 0.6
+    },
+    "sql_agent": {
+        "query_templates": True,
+        "plan_cache_size": 256
+    },
+    "document_search": {
+        "title_weight": 5.0
+    },
+    "document_processing": {
+        "max_workers": None,
+        "parallel_page_threshold": 50,
+        "pages_per_task": 25,
+        "chunk_tokens": 250,
+        "chunk_overlap_tokens": 50
+    },
+    "analytics": {
+        "revenue_cube": True,
+        "cube_batch_rows": 200000,
+        "parquet_snapshot": True,
+        "snapshot_dir": None,  # default: <db_path>.parquet
+        "snapshot_batch_rows": 200000,
+        "snapshot_max_parts": 8,
+        "engine": "sqlite",  # sqlite or duckdb (needs duckdb and the Parquet snapshot)
+        "duckdb_threads": None,  # default: all cores
+        "duckdb_memory_limit": None,  # e.g. "4GB"
+        "duckdb_temp_dir": None  # default: <tmp>/hvlc_duckdb
+    },
+    "imports": {
+        "max_workers": None,
+        "preread_max_mb": 32  # Larger CSVs are streamed by the writer, not read by a worker
+    },
+    "import_jobs": {
+        "max_workers": 2,  # Files prepared ahead of the single database writer
+        "max_queued": 100,
+        "progress_interval": 1.0,  # Seconds between progress stream events
+        "heartbeat_interval": 10.0  # Seconds between running-job heartbeats
+    },
+    "stream_ingest": {
+        "chunk_size": 10000,  # Rows per insert chunk
+        "block_size": 65536,  # Bytes read from the request body at a time
+        "queue_blocks": 16,  # Blocks buffered ahead of the parser
+        "detect_bytes": 65536  # Bytes used for format detection
+    },
+    "entity_matcher": {
+        "aliases": {}  # Alias -> provider name, e.g. {"Dr. Sam": "Dr. Samuel Ortiz"}
     }
 }
 
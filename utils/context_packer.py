@@ -0,0 +1,323 @@
+"""
+Context Packer for LLM prompts
+
+This module fits the data context sent to Ollama into the selected model's
+prompt budget. Sections are ranked by relevance to the question, tabular
+data is compressed into compact columnar text, and the packed result is
+logged together with prompt size and prefill time.
+"""
+
+import re
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.config import get_config
+from utils.logger import get_logger
+
+logger = get_logger()
+config = get_config()
+
+# Rough characters-per-token ratio for Llama tokenizers on English/number text
+CHARS_PER_TOKEN = 4
+
+# Words ignored when scoring relevance
+STOP_WORDS = {
+    "the", "and", "for", "are", "was", "were", "what", "how", "who", "which",
+    "this", "that", "with", "from", "our", "their", "about", "does", "did",
+    "show", "tell", "give", "much", "many", "can", "you", "please",
+}
+
+
+@dataclass
+class ContextSection:
+    """A titled block of data context"""
+    title: str
+    text: str
+    priority: float = 0.0
+    score: float = field(default=0.0, compare=False)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.render())
+
+    def render(self) -> str:
+        return f"\n=== {self.title} ===\n{self.text}\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate number of tokens
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_context_budget(model: Optional[str] = None) -> int:
+    """Get the data-context token budget for a model
+
+    The budget is derived from ``homelab_max_chars``/``laptop_max_chars`` in
+    config.json, minus the share reserved for the system prompt, conversation
+    history and instructions. Unknown models get the smaller laptop budget.
+
+    Args:
+        model: Ollama model name (default: the laptop model)
+
+    Returns:
+        Token budget for the packed data context
+    """
+    if model and model == config.get("ollama.homelab_model"):
+        max_chars = config.get("ollama.homelab_max_chars", 32000)
+    else:
+        max_chars = config.get("ollama.laptop_max_chars", 16000)
+
+    data_share = config.get("context_packer.data_share", 0.6)
+    return int(max_chars * data_share / CHARS_PER_TOKEN)
+
+
+def _question_terms(question: str) -> List[str]:
+    """Extract scoring terms from a question"""
+    words = re.findall(r"[a-z0-9]+", question.lower())
+    return [w for w in words if len(w) > 2 and w not in STOP_WORDS]
+
+
+def rank_sections(question: str, sections: Sequence[ContextSection]) -> List[ContextSection]:
+    """Rank sections by relevance to the question
+
+    Title matches count three times as much as body matches, body matches are
+    capped so a long section cannot win on size alone, and each section's
+    explicit priority is added on top.
+
+    Args:
+        question: User question
+        sections: Candidate sections
+
+    Returns:
+        Sections sorted by descending relevance (stable for ties)
+    """
+    terms = _question_terms(question)
+
+    for section in sections:
+        title = section.title.lower()
+        body = section.text.lower()
+        score = section.priority
+        for term in terms:
+            if term in title:
+                score += 3.0
+            score += min(body.count(term), 3) * 0.5
+        section.score = score
+
+    return sorted(sections, key=lambda s: s.score, reverse=True)
+
+
+def _format_value(value: Any) -> str:
+    """Format a single cell compactly"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            return str(int(value))
+        return f"{value:.2f}"
+    return str(value).strip()
+
+
+def _render_table(columns: Sequence[str], rows: Sequence[Sequence[Any]], total: int) -> str:
+    """Render rows in columnar form under a ``rows=`` header"""
+    lines = [f"rows={len(rows)}" if len(rows) == total else f"rows={len(rows)}/{total}"]
+    for i, column in enumerate(columns):
+        values = [_format_value(row[i]) for row in rows]
+        if len(values) > 1 and all(v == values[0] for v in values):
+            lines.append(f"{column}: {values[0]} (all)")
+        else:
+            lines.append(f"{column}: " + "|".join(values))
+    return "\n".join(lines)
+
+
+def compress_table(columns: Sequence[str], rows: Sequence[Sequence[Any]],
+                   max_tokens: Optional[int] = None) -> str:
+    """Render tabular data as compact columnar text
+
+    Each column becomes one line of ``name: v1|v2|...``. Columns holding a
+    single repeated value are collapsed to ``name: value (all)``.
+
+    When the table does not fit ``max_tokens`` it is cut by rows rather than
+    by lines, so every column survives and the header reads ``rows=kept/total``.
+
+    Args:
+        columns: Column names
+        rows: Row tuples in column order
+        max_tokens: Optional token budget for the rendered table
+
+    Returns:
+        Columnar text representation
+    """
+    rows = list(rows)
+    text = _render_table(columns, rows, len(rows))
+    if max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Largest row prefix that fits; the empty table is the fallback
+    best = _render_table(columns, [], len(rows))
+    low, high = 1, len(rows) - 1
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = _render_table(columns, rows[:mid], len(rows))
+        if estimate_tokens(candidate) <= max_tokens:
+            best, low = candidate, mid + 1
+        else:
+            high = mid - 1
+    return best
+
+
+def compress_dataframe(df, max_tokens: Optional[int] = None) -> str:
+    """Render a pandas DataFrame as compact columnar text
+
+    Args:
+        df: DataFrame to compress
+        max_tokens: Optional token budget, see :func:`compress_table`
+
+    Returns:
+        Columnar text representation
+    """
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+    return compress_table([str(c) for c in df.columns], rows, max_tokens)
+
+
+def _truncate_to_tokens(section: ContextSection, max_tokens: int) -> Optional[ContextSection]:
+    """Cut a section down to whole lines that fit the token budget"""
+    header_tokens = estimate_tokens(f"\n=== {section.title} ===\n\n")
+    kept, used = [], header_tokens
+    lines = section.text.splitlines()
+
+    for line in lines:
+        line_tokens = estimate_tokens(line + "\n")
+        if used + line_tokens > max_tokens:
+            break
+        kept.append(line)
+        used += line_tokens
+
+    if not kept:
+        return None
+
+    dropped = len(lines) - len(kept)
+    if dropped:
+        kept.append(f"... ({dropped} more lines truncated)")
+
+    return ContextSection(section.title, "\n".join(kept), section.priority, section.score)
+
+
+class ContextPacker:
+    """Packs ranked context sections into a token budget"""
+
+    def __init__(self, max_tokens: int = None, model: str = None, min_section_tokens: int = 40):
+        """Initialize context packer
+
+        Args:
+            max_tokens: Token budget (default: derived from the model)
+            model: Ollama model the prompt is for
+            min_section_tokens: Smallest remainder worth filling with a truncated section
+        """
+        self.model = model
+        self.max_tokens = max_tokens or get_context_budget(model)
+        self.min_section_tokens = min_section_tokens
+
+    def pack(self, question: str, sections: Sequence[ContextSection]) -> Tuple[str, Dict[str, Any]]:
+        """Fit the most relevant sections into the budget
+
+        Args:
+            question: User question used for ranking
+            sections: Candidate sections
+
+        Returns:
+            Tuple of (packed context text, packing report)
+        """
+        sections = list(sections)
+        position = {id(s): i for i, s in enumerate(sections)}
+        ranked = rank_sections(question, sections)
+        remaining = self.max_tokens
+        packed, report = [], {
+            "budget_tokens": self.max_tokens,
+            "included": [],
+            "truncated": [],
+            "dropped": [],
+        }
+
+        for section in ranked:
+            tokens = section.tokens
+            if tokens <= remaining:
+                packed.append((position[id(section)], section))
+                remaining -= tokens
+                report["included"].append(section.title)
+            elif remaining >= self.min_section_tokens:
+                truncated = _truncate_to_tokens(section, remaining)
+                if truncated:
+                    packed.append((position[id(section)], truncated))
+                    remaining -= truncated.tokens
+                    report["truncated"].append(section.title)
+                else:
+                    report["dropped"].append(section.title)
+            else:
+                report["dropped"].append(section.title)
+
+        # Keep the original (logical) section order for readability
+        packed.sort(key=lambda item: item[0])
+
+        text = "".join(section.render() for _, section in packed)
+        report["used_tokens"] = estimate_tokens(text)
+
+        if report["truncated"] or report["dropped"]:
+            logger.info(
+                f"Context packed to {report['used_tokens']}/{self.max_tokens} tokens; "
+                f"truncated={report['truncated']} dropped={report['dropped']}"
+            )
+
+        return text, report
+
+
+def log_prompt_metrics(model: str, prompt: str, response_json: Dict[str, Any] = None,
+                       elapsed_seconds: float = None) -> Dict[str, Any]:
+    """Log prompt size and prefill time for an LLM request
+
+    Ollama reports ``prompt_eval_count`` and ``prompt_eval_duration`` (in
+    nanoseconds) on non-streaming responses; when they are missing the
+    estimated token count and wall-clock time are logged instead.
+
+    Args:
+        model: Model the prompt was sent to
+        prompt: Full prompt text (system + user)
+        response_json: Raw Ollama response body, if available
+        elapsed_seconds: Wall-clock request time
+
+    Returns:
+        Dictionary with the logged metrics
+    """
+    response_json = response_json or {}
+    metrics = {
+        "model": model,
+        "prompt_chars": len(prompt),
+        "estimated_tokens": estimate_tokens(prompt),
+        "prompt_tokens": response_json.get("prompt_eval_count"),
+        "prefill_ms": None,
+        "load_ms": None,
+        "total_ms": round(elapsed_seconds * 1000, 1) if elapsed_seconds is not None else None,
+    }
+
+    if response_json.get("prompt_eval_duration"):
+        metrics["prefill_ms"] = round(response_json["prompt_eval_duration"] / 1e6, 1)
+    if response_json.get("load_duration"):
+        metrics["load_ms"] = round(response_json["load_duration"] / 1e6, 1)
+
+    logger.info(
+        f"LLM prompt: model={model} chars={metrics['prompt_chars']} "
+        f"est_tokens={metrics['estimated_tokens']} prompt_tokens={metrics['prompt_tokens']} "
+        f"prefill_ms={metrics['prefill_ms']} total_ms={metrics['total_ms']}"
+    )
+    return metrics
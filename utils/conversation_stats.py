@@ -0,0 +1,215 @@
+"""
+Incremental conversation analytics for Ada.
+
+AdaMemory.store_memory folds every conversation memory into two small
+tables in ada_memory.db, in the same transaction as the memory itself:
+
+- conversation_stats: per-day counters (importance histogram, which also
+  gives the conversation count, question types and tags), so a "last N days" profile reads at
+  most N days of counters instead of every conversation in the window.
+- conversation_top_importance: the highest-importance conversations
+  (importance >= 5), the sample the chat preferences are derived from,
+  capped at PREFERENCE_SAMPLE rows.
+
+AIModelTuner and AIOptimizationManager read these instead of scanning the
+memories table on each request.
+"""
+
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from utils.db_open import connect_db
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Conversations the chat preferences are averaged over (top by importance)
+PREFERENCE_SAMPLE = 20
+PREFERENCE_MIN_IMPORTANCE = 5
+
+# Question type -> terms that mark it (substring match, case-insensitive)
+QUESTION_TYPE_TERMS = {
+    'provider_analysis': ['provider', 'dustin', 'tammy'],
+    'financial_analysis': ['revenue', 'money', 'payment'],
+    'comparison': ['compare', 'vs'],
+    'expense_analysis': ['overhead', 'expense', 'cost'],
+}
+
+_TERM_TYPES = {term: question_type for question_type, terms in QUESTION_TYPE_TERMS.items() for term in terms}
+# One pass over the text finds the terms of every question type
+_QUESTION_TERM_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(term) for term in sorted(_TERM_TYPES, key=len, reverse=True)) + "))"
+)
+
+STATS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS conversation_stats (
+        day TEXT NOT NULL,  -- YYYY-MM-DD of created_at
+        stat TEXT NOT NULL,  -- 'importance', 'question_type' or 'tag'
+        key TEXT NOT NULL,
+        value INTEGER DEFAULT 0,
+        PRIMARY KEY (day, stat, key)
+    );
+
+    CREATE TABLE IF NOT EXISTS conversation_top_importance (
+        memory_id INTEGER PRIMARY KEY,
+        importance INTEGER NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_conversation_top_importance
+        ON conversation_top_importance (importance DESC, memory_id DESC);
+"""
+
+
+def classify_conversation(content: str) -> List[str]:
+    """Get the question types of a conversation
+
+    Args:
+        content: Conversation text
+
+    Returns:
+        Question types (see QUESTION_TYPE_TERMS), in definition order
+    """
+    found = {_TERM_TYPES[match.group(1)] for match in _QUESTION_TERM_PATTERN.finditer((content or "").lower())}
+    return [question_type for question_type in QUESTION_TYPE_TERMS if question_type in found]
+
+
+def split_tags(tags: Optional[str]) -> List[str]:
+    """Split a memory's comma-separated tags"""
+    return [tag.strip() for tag in (tags or "").split(',') if tag.strip()]
+
+
+def init_stats_tables(conn: sqlite3.Connection):
+    """Create the aggregate tables and fill them from existing conversations
+
+    Args:
+        conn: Connection to the memory database (committed by the caller)
+    """
+    conn.executescript(STATS_SCHEMA)
+    has_stats = conn.execute("SELECT 1 FROM conversation_stats LIMIT 1").fetchone()
+    if not has_stats:
+        rebuild_stats(conn)
+
+
+def rebuild_stats(conn: sqlite3.Connection) -> int:
+    """Rebuild the aggregate tables from the memories table
+
+    Args:
+        conn: Connection to the memory database (committed by the caller)
+
+    Returns:
+        Number of conversations folded in
+    """
+    conn.execute("DELETE FROM conversation_stats")
+    conn.execute("DELETE FROM conversation_top_importance")
+    rows = conn.execute("""
+        SELECT memory_id, content, importance, tags, created_at
+        FROM memories WHERE memory_type = 'conversation'
+    """).fetchall()
+    for memory_id, content, importance, tags, created_at in rows:
+        record_conversation(conn, memory_id, content, importance, tags, created_at)
+    if rows:
+        logger.info(f"Built conversation stats from {len(rows)} conversations")
+    return len(rows)
+
+
+def refresh_top_importance(conn: sqlite3.Connection):
+    """Refill the preference sample from the memories table, e.g. after memories were deleted"""
+    conn.execute("DELETE FROM conversation_top_importance")
+    conn.execute("""
+        INSERT INTO conversation_top_importance (memory_id, importance)
+        SELECT memory_id, importance FROM memories
+        WHERE memory_type = 'conversation' AND importance >= ?
+        ORDER BY importance DESC, memory_id DESC LIMIT ?
+    """, (PREFERENCE_MIN_IMPORTANCE, PREFERENCE_SAMPLE))
+
+
+def record_conversation(conn: sqlite3.Connection, memory_id: int, content: str, importance: int,
+                        tags: Optional[str], created_at: Optional[str] = None):
+    """Fold one conversation memory into the aggregate tables
+
+    Args:
+        conn: Connection inside the transaction that stored the memory
+        memory_id: ID of the stored memory
+        content: Conversation text
+        importance: Importance (1-10)
+        tags: Comma-separated tags
+        created_at: Creation timestamp (default: now, UTC like CURRENT_TIMESTAMP)
+    """
+    day = str(created_at)[:10] if created_at else datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    importance = int(importance or 0)
+
+    counters = [('importance', str(importance))]
+    counters += [('question_type', question_type) for question_type in classify_conversation(content)]
+    counters += [('tag', tag) for tag in split_tags(tags)]
+    conn.executemany("""
+        INSERT INTO conversation_stats (day, stat, key, value) VALUES (?, ?, ?, 1)
+        ON CONFLICT (day, stat, key) DO UPDATE SET value = value + 1
+    """, [(day, stat, key) for stat, key in counters])
+
+    if importance >= PREFERENCE_MIN_IMPORTANCE:
+        conn.execute("INSERT OR REPLACE INTO conversation_top_importance (memory_id, importance) VALUES (?, ?)",
+                     (memory_id, importance))
+        conn.execute("""
+            DELETE FROM conversation_top_importance WHERE memory_id NOT IN (
+                SELECT memory_id FROM conversation_top_importance
+                ORDER BY importance DESC, memory_id DESC LIMIT ?
+            )
+        """, (PREFERENCE_SAMPLE,))
+
+
+class ConversationStats:
+    """Read side of the conversation aggregate tables"""
+
+    def __init__(self, db_path: str = "ada_memory.db"):
+        self.db_path = db_path
+
+    def window(self, days: int) -> Dict:
+        """Get the conversation counters of the last `days` days
+
+        Days are calendar days (UTC), so the window includes all of its
+        first day.
+
+        Args:
+            days: Number of days
+
+        Returns:
+            Dictionary with conversations, avg_importance, importance
+            (score -> count), question_types and tags (key -> count)
+        """
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+        counters = {'importance': Counter(), 'question_type': Counter(), 'tag': Counter()}
+        conn = connect_db(self.db_path)
+        try:
+            for stat, key, value in conn.execute(
+                "SELECT stat, key, SUM(value) FROM conversation_stats WHERE day >= ? GROUP BY stat, key",
+                (since,)
+            ):
+                counters[stat][key] = value
+        finally:
+            conn.close()
+
+        importance = {int(score): count for score, count in counters['importance'].items()}
+        conversations = sum(importance.values())
+        return {
+            'conversations': conversations,
+            'avg_importance': (sum(score * count for score, count in importance.items()) / conversations
+                               if conversations else None),
+            'importance': importance,
+            'question_types': dict(counters['question_type']),
+            'tags': dict(counters['tag']),
+        }
+
+    def preference_importance(self) -> Optional[float]:
+        """Get the average importance of the top conversations used for chat preferences
+
+        Returns:
+            Average importance, or None if there are no such conversations
+        """
+        conn = connect_db(self.db_path)
+        try:
+            return conn.execute("SELECT AVG(importance) FROM conversation_top_importance").fetchone()[0]
+        finally:
+            conn.close()
@@ -0,0 +1,167 @@
+"""
+CSV Manifest for HVLC_DB
+
+Keeps a persisted manifest of the CSV files under csv_folder (row counts,
+header columns and parsed dates) so startup does not re-read every file.
+An entry is only rescanned when the file's mtime or size changes.
+"""
+
+import os
+import csv
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.config import get_config
+from utils.logger import get_logger
+
+logger = get_logger()
+config = get_config()
+
+MANIFEST_VERSION = 1
+
+
+def count_lines(file_path: str, block_size: int = 1024 * 1024) -> int:
+    """Count lines in a file by scanning it in binary blocks
+
+    Args:
+        file_path: Path to the file
+        block_size: Bytes read per block
+
+    Returns:
+        Number of lines (a final line without a newline still counts)
+    """
+    lines = 0
+    last_byte = b"\n"
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last_byte = block[-1:]
+    if last_byte != b"\n":
+        lines += 1
+    return lines
+
+
+def read_header(file_path: str) -> List[str]:
+    """Read the header row of a CSV file
+
+    Args:
+        file_path: Path to the CSV file
+
+    Returns:
+        List of column names (empty for an empty file), with blank names
+        filled in the way pandas does ("Unnamed: <index>")
+    """
+    with open(file_path, "r", newline="", encoding="utf-8-sig", errors="replace") as f:
+        header = next(csv.reader(f), [])
+    return [name or f"Unnamed: {i}" for i, name in enumerate(header)]
+
+
+class CSVManifest:
+    """Persisted metadata for the CSV files under a folder"""
+
+    def __init__(self, csv_root: str = None, manifest_path: str = None):
+        """Initialize the manifest
+
+        Args:
+            csv_root: Root folder to scan (default: paths.csv_root)
+            manifest_path: Where the manifest is stored (default: <csv_root>/meta/csv_manifest.json)
+        """
+        self.csv_root = csv_root or config.get("paths.csv_root", "csv_folder")
+        self.manifest_path = manifest_path or config.get("paths.csv_manifest") or \
+            os.path.join(self.csv_root, "meta", "csv_manifest.json")
+        self.entries: Dict[str, Dict] = {}
+        self.stats = {"reused": 0, "scanned": 0, "removed": 0}
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk, ignoring a missing or stale file"""
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("files", {})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable CSV manifest {self.manifest_path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Write the manifest to disk"""
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": MANIFEST_VERSION, "files": self.entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            logger.warning(f"Could not save CSV manifest {self.manifest_path}: {e}")
+
+    def refresh(self, date_parser: Optional[Callable[[str], Optional[str]]] = None) -> List[Dict]:
+        """Bring the manifest up to date with the files on disk
+
+        Args:
+            date_parser: Function that parses a date from a file name
+
+        Returns:
+            List of entries, one per CSV file, in walk order
+        """
+        self.stats = {"reused": 0, "scanned": 0, "removed": 0}
+        seen = set()
+        ordered = []
+        dirty = False
+
+        for dirpath, _, filenames in os.walk(self.csv_root):
+            if "meta" in dirpath:
+                continue
+            for filename in filenames:
+                if not filename.endswith(".csv"):
+                    continue
+
+                file_path = str(Path(dirpath) / filename)
+                seen.add(file_path)
+
+                try:
+                    stat = os.stat(file_path)
+                except OSError as e:
+                    logger.warning(f"Could not stat {file_path}: {e}")
+                    continue
+
+                entry = self.entries.get(file_path)
+                if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                    self.stats["reused"] += 1
+                else:
+                    try:
+                        entry = {
+                            "file_path": file_path,
+                            "category": Path(dirpath).name,
+                            "date": date_parser(filename) if date_parser else None,
+                            "row_count": count_lines(file_path) - 1,  # subtract header
+                            "columns": read_header(file_path),
+                            "mtime_ns": stat.st_mtime_ns,
+                            "size": stat.st_size,
+                        }
+                    except Exception as e:
+                        print(f"⚠️ Could not read {file_path}: {e}")
+                        continue
+                    self.entries[file_path] = entry
+                    self.stats["scanned"] += 1
+                    dirty = True
+
+                ordered.append(entry)
+
+        for stale in [p for p in self.entries if p not in seen]:
+            del self.entries[stale]
+            self.stats["removed"] += 1
+            dirty = True
+
+        if dirty:
+            self.save()
+
+        logger.debug(f"CSV manifest refreshed: {self.stats}")
+        return ordered
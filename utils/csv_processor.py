@@ -8,7 +8,7 @@ import pandas as pd
 import numpy as np
 import time
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union, Callable, Iterator, Tuple
+from typing import Dict, List, Any, Optional, Union, Callable, Iterable, Iterator, Tuple
 import logging
 
 from utils.logger import get_logger
@@ -119,7 +119,9 @@ def process_csv_in_chunks(
     file_path: Union[str, Path], 
     process_chunk: Callable[[pd.DataFrame, int], Dict],
     chunk_size: Optional[int] = None,
-    max_chunks: Optional[int] = None
+    max_chunks: Optional[int] = None,
+    chunks: Optional[Iterable[pd.DataFrame]] = None,
+    progress: Optional[Callable[[int, float], None]] = None
 ) -> Dict:
     """
     Process a large CSV file in chunks to minimize memory usage.
@@ -129,6 +131,8 @@ def process_csv_in_chunks(
         process_chunk: Function that processes each chunk and returns a dictionary of results
         chunk_size: Number of rows in each chunk (calculated automatically if not provided)
         max_chunks: Maximum number of chunks to process (None for all)
+        chunks: Chunks already read from file_path (e.g. by an import worker); the file is not re-read
+        progress: Called after each chunk with (rows processed so far, elapsed seconds)
         
     Returns:
         Dictionary with processing results
@@ -161,7 +165,7 @@ def process_csv_in_chunks(
         logger.info(f"Processing {file_path} in chunks of {chunk_size} rows")
         
         # Create a chunked reader
-        reader = pd.read_csv(file_path, chunksize=chunk_size)
+        reader = chunks if chunks is not None else pd.read_csv(file_path, chunksize=chunk_size)
         
         # Process each chunk
         for i, chunk in enumerate(reader):
@@ -195,6 +199,8 @@ def process_csv_in_chunks(
             
             # Log progress
             logger.debug(f"Completed chunk {i+1} in {time.time() - chunk_start:.2f} seconds")
+            if progress:
+                progress(results["total_rows_processed"], time.time() - start_time)
         
         # Calculate overall metrics
         results["total_time_seconds"] = time.time() - start_time
@@ -9,7 +9,6 @@ import os
 import sys
 import json
 import time
-import sqlite3
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -23,6 +22,8 @@ matplotlib.use('Agg')  # Use non-interactive backend
 
 from utils.config import get_config
 from utils.logger import get_logger, log_data_quality_issue
+from utils.db_open import connect_db
+from utils.transaction_snapshot import get_transaction_snapshot, snapshot_enabled
 
 # Configure logging
 logger = get_logger()
@@ -937,12 +938,21 @@ class DataQualityMonitor:
     def connect_db(self):
         """Connect to database"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = connect_db(self.db_path)
             logger.info(f"Connected to database: {self.db_path}")
         except Exception as e:
             logger.error(f"Error connecting to database: {e}")
             self.conn = None
             
+    def _read_table(self, table: str) -> pd.DataFrame:
+        """Read a whole table, from the Parquet snapshot for payment_transactions"""
+        if table == "payment_transactions" and snapshot_enabled():
+            try:
+                return get_transaction_snapshot(self.db_path).load()
+            except Exception as e:
+                logger.warning(f"Transaction snapshot unavailable, reading {table} from SQLite: {e}")
+        return pd.read_sql(f"SELECT * FROM {table}", self.conn)
+            
     def load_baseline(self):
         """Load baseline statistics"""
         baseline_path = os.path.join(self.history_dir, "baseline_stats.json")
@@ -999,8 +1009,7 @@ class DataQualityMonitor:
             
         try:
             # Get table data
-            query = f"SELECT * FROM {table}"
-            df = pd.read_sql(query, self.conn)
+            df = self._read_table(table)
             
             if len(df) == 0:
                 logger.warning(f"No data in table {table}")
@@ -1164,8 +1173,7 @@ class DataQualityMonitor:
             
         try:
             # Get table data
-            query = f"SELECT * FROM {table}"
-            df = pd.read_sql(query, self.conn)
+            df = self._read_table(table)
             
             if len(df) == 0:
                 logger.warning(f"No data in table {table}")
@@ -0,0 +1,90 @@
+"""
+Data version tracking for HVLC_DB.
+
+Provides a cheap fingerprint of the billing database so caches can tell
+when an upload has changed the underlying data.
+"""
+
+import os
+import hashlib
+import threading
+from typing import Callable, List, Optional
+
+from utils.config import get_config
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# In-process generation counter, bumped by every upload path
+_generation = 0
+_lock = threading.Lock()
+_listeners: List[Callable[[], None]] = []
+
+
+def _file_signature(path: str) -> str:
+    """Return an mtime/size signature for a file, or '-' if it is missing"""
+    try:
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+    except OSError:
+        return "-"
+
+
+def get_data_version(db_path: Optional[str] = None) -> str:
+    """Get the current data version of the billing database
+
+    The version combines the in-process upload generation with the
+    modification time and size of the database file (and its WAL file),
+    so writes made by other processes are also picked up.
+
+    Args:
+        db_path: Path to the SQLite database (default: from config)
+
+    Returns:
+        Short hex string identifying the current data version
+    """
+    db_path = db_path or get_config().get_db_path()
+    parts = [
+        str(_generation),
+        _file_signature(db_path),
+        _file_signature(f"{db_path}-wal"),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def bump_data_version(reason: str = None) -> int:
+    """Mark the billing data as changed and notify registered listeners
+
+    Args:
+        reason: Optional description of the change for the log
+
+    Returns:
+        The new generation number
+    """
+    global _generation
+
+    with _lock:
+        _generation += 1
+        generation = _generation
+        listeners = list(_listeners)
+
+    logger.debug(f"Data version bumped to generation {generation}: {reason or 'unspecified'}")
+
+    for listener in listeners:
+        try:
+            listener()
+        except Exception as e:
+            logger.warning(f"Data version listener failed: {e}")
+
+    return generation
+
+
+def register_invalidation_listener(listener: Callable[[], None]):
+    """Register a callback that runs whenever the data version is bumped
+
+    Args:
+        listener: Zero-argument callable, typically a cache's clear method
+    """
+    with _lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
@@ -11,6 +11,7 @@ from typing import Optional, Dict, Any, List, Tuple
 import pandas as pd
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.schema_catalog import get_schema_catalog
 
 logger = get_logger()
 config = get_config()
@@ -123,6 +124,9 @@ class DBConnector:
     def get_table_schema(self, table_name: str) -> List[Tuple[str, str]]:
         """Get schema information for a table
         
+        Served from the schema catalog, which only re-reads PRAGMA
+        table_info/information_schema when the schema version changes.
+        
         Args:
             table_name: Name of the table
             
@@ -131,32 +135,8 @@ class DBConnector:
         """
         try:
             logger.debug(f"Getting schema for table: {table_name}")
-            
-            # For SQLite, use pragma table_info
-            if self.db_url.startswith("sqlite"):
-                query = f"PRAGMA table_info({table_name})"
-                result = self.execute_query(query)
-                
-                if result["success"]:
-                    # Extract column names and types
-                    schema = [(row["name"], row["type"]) for row in result["rows"]]
-                    return schema
-            
-            # For other databases, use information_schema
-            else:
-                query = f"""
-                SELECT column_name, data_type
-                FROM information_schema.columns
-                WHERE table_name = '{table_name}'
-                """
-                result = self.execute_query(query)
-                
-                if result["success"]:
-                    # Extract column names and types
-                    schema = [(row["column_name"], row["data_type"]) for row in result["rows"]]
-                    return schema
-            
-            return []
+            columns = get_schema_catalog(self.db_url, engine=self.engine).get_columns(table_name)
+            return [(col["name"], col["type"]) for col in columns or []]
             
         except Exception as e:
             logger.error(f"Error getting table schema: {e}")
@@ -170,28 +150,7 @@ class DBConnector:
         """
         try:
             logger.debug("Listing tables in database")
-            
-            # For SQLite, use sqlite_master
-            if self.db_url.startswith("sqlite"):
-                query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
-                result = self.execute_query(query)
-                
-                if result["success"]:
-                    return [row["name"] for row in result["rows"]]
-            
-            # For other databases, use information_schema
-            else:
-                query = """
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                """
-                result = self.execute_query(query)
-                
-                if result["success"]:
-                    return [row["table_name"] for row in result["rows"]]
-            
-            return []
+            return get_schema_catalog(self.db_url, engine=self.engine).list_tables()
             
         except Exception as e:
             logger.error(f"Error listing tables: {e}")
@@ -0,0 +1,193 @@
+"""
+SQLite open policy for HVLC_DB.
+
+Every connection to the billing database goes through connect_db so they
+all share the same settings: WAL journal mode (readers are not blocked by
+a writer), a busy timeout instead of immediate "database is locked"
+errors, memory-mapped reads, and relaxed fsyncs for bulk loads.
+
+staged_load lets a long import write into a shadow copy of the database
+and publish it in one transaction at the end, so API readers keep seeing
+the previous, consistent data until the import has finished.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from utils.config import get_config
+from utils.logger import get_logger
+
+logger = get_logger()
+config = get_config()
+
+# Database files already switched to the configured journal mode (persistent per file)
+_journal_checked = set()
+_journal_lock = threading.Lock()
+
+
+def _is_file_database(db_path: str, uri: bool) -> bool:
+    return db_path not in ("", ":memory:") and not uri
+
+
+def apply_open_policy(conn: sqlite3.Connection, bulk: bool = False) -> sqlite3.Connection:
+    """Apply the per-connection pragmas of the open policy
+
+    Args:
+        conn: Open SQLite connection
+        bulk: Use the bulk-load synchronous setting
+
+    Returns:
+        The same connection
+    """
+    timeout_ms = int(config.get("database.connection_timeout", 30) * 1000)
+    conn.execute(f"PRAGMA busy_timeout = {timeout_ms}")
+
+    synchronous = config.get("database.bulk_synchronous" if bulk else "database.synchronous")
+    if synchronous:
+        conn.execute(f"PRAGMA synchronous = {synchronous}")
+
+    mmap_size = config.get("database.mmap_size")
+    if mmap_size:
+        conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+
+    if config.get("database.enable_foreign_keys", True):
+        conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def connect_db(db_path: Optional[str] = None, bulk: bool = False, **kwargs) -> sqlite3.Connection:
+    """Open a SQLite connection using the database open policy
+
+    Args:
+        db_path: Path to the database (default: from config)
+        bulk: Connection is used for a bulk load (synchronous=NORMAL by default)
+        **kwargs: Passed through to sqlite3.connect
+
+    Returns:
+        SQLite connection
+    """
+    db_path = db_path or config.get_db_path()
+    kwargs.setdefault("timeout", config.get("database.connection_timeout", 30))
+    conn = sqlite3.connect(db_path, **kwargs)
+
+    journal_mode = config.get("database.journal_mode")
+    if journal_mode and _is_file_database(str(db_path), kwargs.get("uri", False)):
+        key = os.path.abspath(db_path)
+        if key not in _journal_checked:
+            try:
+                mode = conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0]
+                if mode.lower() != journal_mode.lower():
+                    logger.warning(f"Could not set journal_mode={journal_mode} on {db_path} (using {mode})")
+                with _journal_lock:
+                    _journal_checked.add(key)
+            except sqlite3.Error as e:
+                # Another connection holds a lock; retry on the next open
+                logger.debug(f"Deferred journal_mode change on {db_path}: {e}")
+
+    return apply_open_policy(conn, bulk=bulk)
+
+
+def backup_database(db_path: str, backup_path: str) -> str:
+    """Copy a database with the SQLite backup API
+
+    Unlike a file copy this includes changes still held in the WAL file and
+    gives a consistent snapshot while other connections are writing.
+
+    Args:
+        db_path: Path to the database to back up
+        backup_path: Path of the backup file (replaced if it exists)
+
+    Returns:
+        The backup path
+    """
+    _remove_database(backup_path)
+    source = connect_db(db_path)
+    try:
+        target = sqlite3.connect(backup_path)
+        try:
+            source.backup(target)
+            # Keep the backup a single self-contained file
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+    finally:
+        source.close()
+    return backup_path
+
+
+def shadow_path(db_path: str) -> str:
+    """Get the path of the shadow database used by staged_load"""
+    return f"{db_path}.staging"
+
+
+def is_shadow_path(db_path: str) -> bool:
+    """Whether a path is a staged_load shadow database"""
+    return str(db_path).endswith(".staging")
+
+
+@contextmanager
+def staged_load(db_path: Optional[str] = None, enabled: bool = True) -> Iterator[str]:
+    """Run a bulk load against a shadow copy and publish it atomically
+
+    The live database is copied to a shadow file, the caller writes to the
+    yielded path, and on success the shadow is copied back into the live
+    database in a single transaction. Readers see either the old or the new
+    data, never a half-finished import. On error the shadow is discarded
+    and the live database is left untouched.
+
+    Writes made to the live database by other processes while the load is
+    staged are replaced by the published copy, so only one loader should
+    stage at a time.
+
+    Args:
+        db_path: Path to the live database (default: from config)
+        enabled: If False, yield the live path and write to it directly
+
+    Yields:
+        Path of the database the load should write to
+    """
+    db_path = db_path or config.get_db_path()
+    if not enabled:
+        yield db_path
+        return
+
+    staging = shadow_path(db_path)
+    start_time = time.time()
+    backup_database(db_path, staging)
+    logger.info(f"Staged {db_path} into {staging} in {time.time() - start_time:.2f}s")
+
+    try:
+        yield staging
+    except BaseException:
+        logger.warning(f"Staged load failed; discarding {staging}")
+        _remove_database(staging)
+        raise
+
+    publish_start = time.time()
+    shadow = connect_db(staging)
+    try:
+        live = connect_db(db_path)
+        try:
+            # A single-step backup copies every page inside one write transaction
+            shadow.backup(live)
+        finally:
+            live.close()
+    finally:
+        shadow.close()
+    _remove_database(staging)
+
+    from utils.data_version import bump_data_version
+    bump_data_version(f"staged load published to {db_path}")
+    logger.info(f"Published staged load to {db_path} in {time.time() - publish_start:.2f}s")
+
+
+def _remove_database(path: str) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
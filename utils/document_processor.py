@@ -6,22 +6,88 @@ and extracting their content for inclusion in the vector database for RAG capabi
 """
 
 import os
-import re
 import json
+import hashlib
 import fitz  # PyMuPDF
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Union, Any
 from datetime import datetime
-from PIL import Image
-import io
 
 from utils.config import get_config
 from utils.logger import get_logger
+from utils.search_index import DocumentSearchIndex
+from utils.text_chunker import iter_text_chunks
+from utils.context_packer import CHARS_PER_TOKEN
 
 logger = get_logger()
 config = get_config()
 
+# Image format by PDF stream filter; other filters are extracted as PNG
+PDF_IMAGE_FORMATS = {
+    "DCTDecode": "jpeg",
+    "JPXDecode": "jpeg2000",
+    "JBIG2Decode": "jbig2",
+    "CCITTFaxDecode": "tiff",
+}
+
+# Fields kept only in the per-document JSON, not in processed_docs.json
+HEAVY_FIELDS = ("full_text", "pages", "images")
+
+
+def file_content_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Get the SHA-256 hash of a file's content
+
+    Args:
+        file_path: Path to the file
+        block_size: Bytes read per block
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pdf_pages(file_path: str, start: int, end: int) -> Tuple[List[str], List[Dict]]:
+    """Extract text and image metadata for pages [start, end) of a PDF
+
+    Image dimensions and format are read from each image's xref entry, so no
+    image is decoded. Runs in worker processes for parallel ingestion.
+
+    Args:
+        file_path: Path to the PDF file
+        start: First page index
+        end: Page index to stop before
+
+    Returns:
+        Tuple of (page texts, image metadata dictionaries)
+    """
+    page_texts = []
+    images = []
+
+    with fitz.open(file_path) as doc:
+        for i in range(start, min(end, len(doc))):
+            page = doc[i]
+            page_texts.append(page.get_text())
+
+            # (xref, smask, width, height, bpc, colorspace, alt colorspace, name, filter, ...)
+            for img_index, img_info in enumerate(page.get_images(full=True)):
+                images.append({
+                    "page": i,
+                    "index": img_index,
+                    "width": img_info[2],
+                    "height": img_info[3],
+                    "format": PDF_IMAGE_FORMATS.get(img_info[8], "png")
+                })
+
+    return page_texts, images
+
+
 class DocumentProcessor:
     """Processes various document types and extracts content for RAG"""
     
@@ -45,7 +111,12 @@ class DocumentProcessor:
         
         # Initialize document tracking
         self.processed_docs = []
+        self._tracking_dirty = False
         self._load_processed_docs()
+        
+        # Keyword index, updated as documents are processed
+        self.search_index = DocumentSearchIndex(os.path.join(self.output_dir, "search_index.db"))
+        self._search_index_backfilled = False
     
     def _load_processed_docs(self):
         """Load list of already processed documents"""
@@ -65,15 +136,24 @@ class DocumentProcessor:
         try:
             with open(tracking_file, 'w') as f:
                 json.dump(self.processed_docs, f, indent=2)
+            self._tracking_dirty = False
             logger.info(f"Saved {len(self.processed_docs)} processed document records")
         except Exception as e:
             logger.error(f"Error saving processed documents: {e}")
     
-    def process_all_documents(self, force_reprocess: bool = False) -> List[Dict]:
+    def process_all_documents(self, force_reprocess: bool = False, parallel: bool = False,
+                              max_workers: int = None) -> List[Dict]:
         """Process all documents in the docs directory
         
+        Only new or modified documents are processed: a document is skipped
+        when its mtime and size match the tracking record, or when its content
+        hash is unchanged.
+        
         Args:
             force_reprocess: If True, reprocess documents even if already processed
+            parallel: If True, extract PDFs in a process pool, splitting large
+                PDFs into page ranges
+            max_workers: Worker processes for parallel mode (default: CPU count)
             
         Returns:
             List of document metadata dictionaries
@@ -81,6 +161,7 @@ class DocumentProcessor:
         logger.info(f"Processing documents in {self.docs_dir}")
         
         processed_docs = []
+        to_process = []
         for root, _, files in os.walk(self.docs_dir):
             for file in files:
                 file_path = os.path.join(root, file)
@@ -92,33 +173,108 @@ class DocumentProcessor:
                 # Check if already processed and not forcing reprocess
                 if not force_reprocess and self._is_processed(file_path):
                     logger.info(f"Skipping already processed document: {file_path}")
-                    # Get the existing metadata
-                    for doc in self.processed_docs:
-                        if doc["file_path"] == file_path:
-                            processed_docs.append(doc)
-                            break
+                    processed_docs.append(self._find_processed(file_path))
                     continue
                 
+                to_process.append(file_path)
+        
+        pdf_pages = {}
+        pdf_paths = [p for p in to_process if p.lower().endswith('.pdf')]
+        if parallel and pdf_paths:
+            pdf_pages = self._extract_pdfs_parallel(pdf_paths, max_workers)
+        
+        for file_path in to_process:
+            try:
+                logger.info(f"Processing document: {file_path}")
+                doc_metadata = self._process_file(file_path, pdf_pages.get(file_path), save_tracking=False)
+                if doc_metadata:
+                    processed_docs.append(doc_metadata)
+            except Exception as e:
+                logger.error(f"Error processing document {file_path}: {e}")
+        
+        # Write the tracking file once instead of after every document
+        if to_process or self._tracking_dirty:
+            self._save_processed_docs()
+        
+        return processed_docs
+    
+    def _extract_pdfs_parallel(self, pdf_paths: List[str], max_workers: int = None) -> Dict[str, Tuple[List[str], List[Dict]]]:
+        """Extract PDF pages in a process pool
+        
+        Small PDFs are one task each; PDFs with at least
+        ``document_processing.parallel_page_threshold`` pages are split into
+        page ranges of ``document_processing.pages_per_task``.
+        
+        Args:
+            pdf_paths: PDF files to extract
+            max_workers: Worker processes (default: CPU count)
+            
+        Returns:
+            Mapping of file path to (page texts, image metadata); PDFs that
+            failed are left out and processed sequentially
+        """
+        threshold = config.get("document_processing.parallel_page_threshold", 50)
+        pages_per_task = config.get("document_processing.pages_per_task", 25)
+        max_workers = max_workers or config.get("document_processing.max_workers") or os.cpu_count()
+        
+        extracted = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {}
+            for file_path in pdf_paths:
+                try:
+                    with fitz.open(file_path) as doc:
+                        page_count = len(doc)
+                except Exception as e:
+                    logger.error(f"Error opening PDF {file_path}: {e}")
+                    continue
+                
+                step = pages_per_task if page_count >= threshold else max(page_count, 1)
+                futures[file_path] = [
+                    pool.submit(extract_pdf_pages, file_path, first, first + step)
+                    for first in range(0, max(page_count, 1), step)
+                ]
+            
+            for file_path, parts in futures.items():
                 try:
-                    logger.info(f"Processing document: {file_path}")
-                    doc_metadata = self.process_document(file_path)
-                    if doc_metadata:
-                        processed_docs.append(doc_metadata)
+                    page_texts, images = [], []
+                    for future in parts:
+                        texts, part_images = future.result()
+                        page_texts.extend(texts)
+                        images.extend(part_images)
+                    extracted[file_path] = (page_texts, images)
                 except Exception as e:
-                    logger.error(f"Error processing document {file_path}: {e}")
+                    logger.error(f"Parallel extraction failed for {file_path}: {e}")
         
-        return processed_docs
+        logger.info(f"Extracted {len(extracted)} PDFs with {max_workers} worker processes")
+        return extracted
     
-    def _is_processed(self, file_path: str) -> bool:
-        """Check if document has already been processed"""
+    def _find_processed(self, file_path: str) -> Optional[Dict]:
+        """Get the tracking record of a processed document"""
         for doc in self.processed_docs:
             if doc["file_path"] == file_path:
-                # Check if the file has been modified since processing
-                last_modified = os.path.getmtime(file_path)
-                processed_time = doc.get("processed_time", 0)
-                if last_modified > processed_time:
-                    return False  # File has been modified, reprocess
-                return True
+                return doc
+        return None
+    
+    def _is_processed(self, file_path: str) -> bool:
+        """Check if document has already been processed and is unchanged"""
+        doc = self._find_processed(file_path)
+        if doc is None:
+            return False
+        
+        stat = os.stat(file_path)
+        if doc.get("mtime") == stat.st_mtime and doc.get("size") == stat.st_size:
+            return True
+        
+        # Records written before change tracking only have processed_time
+        if "content_hash" not in doc:
+            return stat.st_mtime <= doc.get("processed_time", 0)
+        
+        # Touched but not modified: refresh the record instead of reprocessing
+        if doc.get("size") == stat.st_size and doc["content_hash"] == file_content_hash(file_path):
+            doc["mtime"] = stat.st_mtime
+            self._tracking_dirty = True
+            return True
+        
         return False
     
     def process_document(self, file_path: str) -> Optional[Dict]:
@@ -127,6 +283,20 @@ class DocumentProcessor:
         Args:
             file_path: Path to the document file
             
+        Returns:
+            Dictionary with document metadata and extracted content
+        """
+        return self._process_file(file_path)
+    
+    def _process_file(self, file_path: str, pdf_pages: Tuple[List[str], List[Dict]] = None,
+                      save_tracking: bool = True) -> Optional[Dict]:
+        """Process a document, record it and add it to the keyword index
+        
+        Args:
+            file_path: Path to the document file
+            pdf_pages: Pre-extracted (page texts, image metadata) for a PDF
+            save_tracking: Whether to write processed_docs.json right away
+            
         Returns:
             Dictionary with document metadata and extracted content
         """
@@ -138,7 +308,7 @@ class DocumentProcessor:
         ext = ext.lower()
         
         if ext == '.pdf':
-            doc_metadata = self._process_pdf(file_path)
+            doc_metadata = self._process_pdf(file_path, pdf_pages)
         elif ext == '.txt':
             doc_metadata = self._process_text(file_path)
         elif ext == '.md':
@@ -149,23 +319,75 @@ class DocumentProcessor:
             
         # Add to processed documents list
         if doc_metadata:
+            stat = os.stat(file_path)
+            record = {k: v for k, v in doc_metadata.items() if k not in HEAVY_FIELDS}
+            record.update({
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "content_hash": file_content_hash(file_path)
+            })
+            
             # Check if already in processed_docs
             for i, doc in enumerate(self.processed_docs):
                 if doc["file_path"] == file_path:
-                    self.processed_docs[i] = doc_metadata
+                    self.processed_docs[i] = record
                     break
             else:
-                self.processed_docs.append(doc_metadata)
+                self.processed_docs.append(record)
             
-            self._save_processed_docs()
+            if save_tracking:
+                self._save_processed_docs()
+            self._index_document(doc_metadata)
             
         return doc_metadata
     
-    def _process_pdf(self, file_path: str) -> Dict:
+    def _write_output(self, file_path: str, result: Dict):
+        """Write a processed document as compact JSON to the output directory"""
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_path = os.path.join(self.output_dir, f"{base_name}.json")
+        
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, separators=(",", ":"))
+    
+    def _index_document(self, doc_content: Dict):
+        """Add a processed document to the keyword index (or drop it on error)"""
+        try:
+            if "error" in doc_content:
+                self.search_index.remove_document(doc_content["file_path"])
+                return
+            
+            self.search_index.add_document(
+                file_path=doc_content["file_path"],
+                filename=doc_content.get("filename", ""),
+                file_type=doc_content.get("file_type", ""),
+                title=doc_content.get("metadata", {}).get("title", ""),
+                body=doc_content.get("full_text", ""),
+            )
+        except Exception as e:
+            logger.error(f"Error indexing document {doc_content.get('file_path')}: {e}")
+    
+    def _backfill_search_index(self):
+        """Index documents that were processed before the keyword index existed"""
+        if self._search_index_backfilled:
+            return
+        
+        indexed = self.search_index.indexed_paths()
+        for doc_meta in list(self.processed_docs):
+            if "error" in doc_meta or doc_meta["file_path"] in indexed:
+                continue
+            doc_content = self.get_document_content(doc_meta["file_path"])
+            if doc_content:
+                self._index_document(doc_content)
+        
+        self._search_index_backfilled = True
+    
+    def _process_pdf(self, file_path: str, pdf_pages: Tuple[List[str], List[Dict]] = None) -> Dict:
         """Process a PDF document
         
         Args:
             file_path: Path to the PDF file
+            pdf_pages: Pre-extracted (page texts, image metadata), e.g. from
+                parallel ingestion
             
         Returns:
             Dictionary with document metadata and extracted content
@@ -174,41 +396,11 @@ class DocumentProcessor:
             # Open PDF with PyMuPDF
             doc = fitz.open(file_path)
             
-            # Extract text from all pages
-            full_text = ""
-            page_texts = []
-            images = []
-            
-            for i, page in enumerate(doc):
-                # Extract text
-                page_text = page.get_text()
-                page_texts.append(page_text)
-                full_text += page_text + "\n\n"
-                
-                # Extract images
-                image_list = page.get_images(full=True)
-                for img_index, img_info in enumerate(image_list):
-                    xref = img_info[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    
-                    # Save image to memory and get dimensions
-                    try:
-                        image = Image.open(io.BytesIO(image_bytes))
-                        width, height = image.size
-                        image_format = image.format.lower() if image.format else "unknown"
-                        
-                        # Save image metadata
-                        image_meta = {
-                            "page": i,
-                            "index": img_index,
-                            "width": width,
-                            "height": height,
-                            "format": image_format
-                        }
-                        images.append(image_meta)
-                    except Exception as e:
-                        logger.warning(f"Error processing image in PDF: {e}")
+            # Extract text and image metadata from all pages
+            if pdf_pages is None:
+                pdf_pages = extract_pdf_pages(file_path, 0, len(doc))
+            page_texts, images = pdf_pages
+            full_text = "".join(text + "\n\n" for text in page_texts)
             
             # Extract document metadata
             metadata = {
@@ -237,14 +429,12 @@ class DocumentProcessor:
                 "pages": [{"page_num": i, "text": text} for i, text in enumerate(page_texts)]
             }
             
-            # Save processed text to output directory
-            base_name = os.path.basename(file_path).replace('.pdf', '')
-            output_path = os.path.join(self.output_dir, f"{base_name}.json")
+            doc.close()
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2)
+            # Save processed text to output directory
+            self._write_output(file_path, result)
             
-            logger.info(f"Processed PDF: {file_path} ({len(doc)} pages, {len(images)} images)")
+            logger.info(f"Processed PDF: {file_path} ({result['page_count']} pages, {len(images)} images)")
             return result
             
         except Exception as e:
@@ -290,11 +480,7 @@ class DocumentProcessor:
             }
             
             # Save processed text to output directory
-            base_name = os.path.basename(file_path).replace('.txt', '')
-            output_path = os.path.join(self.output_dir, f"{base_name}.json")
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2)
+            self._write_output(file_path, result)
             
             logger.info(f"Processed text file: {file_path} ({len(lines)} lines)")
             return result
@@ -347,11 +533,7 @@ class DocumentProcessor:
             }
             
             # Save processed markdown to output directory
-            base_name = os.path.basename(file_path).replace('.md', '')
-            output_path = os.path.join(self.output_dir, f"{base_name}.json")
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2)
+            self._write_output(file_path, result)
             
             logger.info(f"Processed markdown file: {file_path} ({len(headers)} headers)")
             return result
@@ -402,7 +584,11 @@ class DocumentProcessor:
         return self.process_document(file_path)
     
     def search_documents(self, query: str, limit: int = 5) -> List[Dict]:
-        """Simple text-based search across processed documents
+        """Keyword search across processed documents
+        
+        Uses the BM25-ranked keyword index, with title matches boosted. Falls
+        back to a linear scan of the processed documents when SQLite has no
+        FTS5 support.
         
         Args:
             query: Search query string
@@ -411,6 +597,14 @@ class DocumentProcessor:
         Returns:
             List of matching document metadata
         """
+        if self.search_index.available:
+            self._backfill_search_index()
+            return self.search_index.search(query, limit)
+        
+        return self._scan_documents(query, limit)
+    
+    def _scan_documents(self, query: str, limit: int) -> List[Dict]:
+        """Substring search over every processed document's full text"""
         query = query.lower()
         results = []
         
@@ -446,143 +640,95 @@ class DocumentProcessor:
         results.sort(key=lambda x: x["relevance"], reverse=True)
         return results[:limit]
     
-    def extract_chunks(self, file_path: str, chunk_size: int = 1000, overlap: int = 200) -> List[Dict]:
+    def extract_chunks(self, file_path: str, chunk_tokens: int = None, overlap_tokens: int = None,
+                       chunk_size: int = None, overlap: int = None) -> List[Dict]:
         """Extract text chunks from a document for vector embedding
         
         Args:
             file_path: Path to the document file
-            chunk_size: Maximum chunk size in characters
-            overlap: Overlap between chunks in characters
+            chunk_tokens: Maximum chunk size in approximate tokens
+            overlap_tokens: Overlap between chunks in approximate tokens
+            chunk_size: Maximum chunk size in characters (converted to tokens)
+            overlap: Overlap between chunks in characters (converted to tokens)
             
         Returns:
             List of chunk dictionaries with text and metadata
         """
-        doc_content = self.get_document_content(file_path)
-        if not doc_content:
-            return []
-            
-        full_text = doc_content.get("full_text", "")
-        if not full_text:
-            return []
+        return list(self.iter_chunks(file_path, chunk_tokens, overlap_tokens, chunk_size, overlap))
+    
+    def iter_chunks(self, file_path: str, chunk_tokens: int = None, overlap_tokens: int = None,
+                    chunk_size: int = None, overlap: int = None) -> Iterator[Dict]:
+        """Yield text chunks from a document one at a time
+        
+        Same chunks as extract_chunks, but produced lazily so large documents
+        can be embedded without holding every chunk in memory.
+        
+        Args:
+            file_path: Path to the document file
+            chunk_tokens: Maximum chunk size in approximate tokens
+            overlap_tokens: Overlap between chunks in approximate tokens
+            chunk_size: Maximum chunk size in characters (converted to tokens)
+            overlap: Overlap between chunks in characters (converted to tokens)
             
+        Yields:
+            Chunk dictionaries with text and metadata
+        """
+        if chunk_tokens is None:
+            chunk_tokens = (chunk_size // CHARS_PER_TOKEN if chunk_size
+                            else config.get("document_processing.chunk_tokens", 250))
+        if overlap_tokens is None:
+            overlap_tokens = (overlap // CHARS_PER_TOKEN if overlap is not None
+                              else config.get("document_processing.chunk_overlap_tokens", 50))
+        
+        doc_content = self.get_document_content(file_path)
+        if not doc_content or not doc_content.get("full_text", ""):
+            return
+        
+        base_metadata = {
+            "file_path": file_path,
+            "file_type": doc_content.get("file_type"),
+            "title": doc_content.get("metadata", {}).get("title", "")
+        }
+        
         # For PDFs, split by pages first
         if doc_content.get("file_type") == "pdf":
-            chunks = []
             for page in doc_content.get("pages", []):
-                page_num = page.get("page_num", 0)
                 page_text = page.get("text", "")
                 
                 # Skip empty pages
                 if not page_text.strip():
                     continue
-                    
-                # Split page into chunks
-                page_chunks = self._split_text(page_text, chunk_size, overlap)
                 
-                # Add page metadata to each chunk
-                for i, chunk_text in enumerate(page_chunks):
-                    chunks.append({
+                for i, chunk_text in enumerate(self._split_text(page_text, chunk_tokens, overlap_tokens)):
+                    yield {
                         "text": chunk_text,
-                        "metadata": {
-                            "file_path": file_path,
-                            "file_type": doc_content.get("file_type"),
-                            "title": doc_content.get("metadata", {}).get("title", ""),
-                            "page": page_num,
-                            "chunk": i
-                        }
-                    })
-            
-            return chunks
-            
-        # For other document types, split the full text
-        text_chunks = self._split_text(full_text, chunk_size, overlap)
+                        "metadata": {**base_metadata, "page": page.get("page_num", 0), "chunk": i}
+                    }
+            return
         
-        # Create chunk dictionaries
-        chunks = []
-        for i, chunk_text in enumerate(text_chunks):
-            chunks.append({
+        # For other document types, split the full text
+        for i, chunk_text in enumerate(self._split_text(doc_content["full_text"], chunk_tokens, overlap_tokens)):
+            yield {
                 "text": chunk_text,
-                "metadata": {
-                    "file_path": file_path,
-                    "file_type": doc_content.get("file_type"),
-                    "title": doc_content.get("metadata", {}).get("title", ""),
-                    "chunk": i
-                }
-            })
-        
-        return chunks
+                "metadata": {**base_metadata, "chunk": i}
+            }
     
-    def _split_text(self, text: str, chunk_size: int, overlap: int) -> List[str]:
-        """Split text into chunks with overlap
-        
-        Args:
-            text: Text to split
-            chunk_size: Maximum chunk size in characters
-            overlap: Overlap between chunks in characters
-            
-        Returns:
-            List of text chunks
-        """
-        # If text is smaller than chunk size, return as is
-        if len(text) <= chunk_size:
-            return [text]
-            
-        chunks = []
-        start = 0
+    def _split_text(self, text: str, chunk_tokens: int, overlap_tokens: int) -> Iterator[str]:
+        """Split text into overlapping chunks
         
-        while start < len(text):
-            # Get chunk with potential overlap into next chunk
-            end = start + chunk_size
-            
-            # If we're at the end of the text, just use the rest
-            if end >= len(text):
-                chunks.append(text[start:])
-                break
-                
-            # Try to find a good splitting point (end of sentence, paragraph, etc.)
-            split_point = self._find_split_point(text, end)
-            
-            chunks.append(text[start:split_point])
-            
-            # Start next chunk with overlap
-            start = split_point - overlap
-            if start < 0:
-                start = 0
-        
-        return chunks
-    
-    def _find_split_point(self, text: str, position: int) -> int:
-        """Find a good point to split text (end of sentence, paragraph)
+        Single pass over the text: split boundaries are found once and chunks
+        are cut at the strongest boundary (paragraph, sentence, line, word)
+        that keeps them within the token budget. See utils.text_chunker.
         
         Args:
             text: Text to split
-            position: Target position to split near
+            chunk_tokens: Maximum chunk size in approximate tokens
+            overlap_tokens: Overlap between chunks in approximate tokens
             
         Returns:
-            Position to split at
+            Iterator over chunk texts
         """
-        # Search window
-        window_size = 100  # characters to look forward
-        end = min(position + window_size, len(text))
-        search_text = text[position:end]
-        
-        # Look for paragraph break
-        match = re.search(r'\n\s*\n', search_text)
-        if match:
-            return position + match.start() + 1
-            
-        # Look for end of sentence
-        match = re.search(r'[.!?]\s+', search_text)
-        if match:
-            return position + match.end()
-            
-        # Look for end of line
-        match = re.search(r'\n', search_text)
-        if match:
-            return position + match.end()
-            
-        # If no good split found, split at target position
-        return position
+        return iter_text_chunks(text, chunk_tokens, overlap_tokens)
 
 def get_document_processor() -> DocumentProcessor:
     """Get document processor instance with default configuration"""
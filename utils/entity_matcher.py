@@ -0,0 +1,191 @@
+"""
+Entity matcher for HVLC_DB.
+
+Finds provider names, provider name parts (first/last names), payer names
+and configured aliases in a chat message. All terms are compiled into one
+Aho-Corasick automaton, so a message is scanned once, left to right,
+however many providers and payers there are, instead of one substring
+check per name and name part.
+
+The matcher for the current data is built together with the fact
+snapshot (see utils.fact_snapshot) and rebuilt only after an upload.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Term kinds
+PROVIDER = "provider"
+NAME_PART = "name_part"
+PAYER = "payer"
+ALIAS = "alias"
+
+# Name parts that identify nobody
+HONORIFICS = {"dr", "dr.", "md", "m.d.", "do", "d.o.", "np", "pa", "pa-c", "mr.", "mrs.", "ms."}
+
+
+@dataclass(frozen=True)
+class EntityMatch:
+    """One term found in a text"""
+    kind: str
+    # Canonical value: the provider or payer name the term refers to
+    value: str
+    term: str
+    start: int
+    end: int
+
+
+class EntityMatcher:
+    """Aho-Corasick automaton over entity terms (case-insensitive)"""
+
+    def __init__(self):
+        # Trie: per state, the next state for each character
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state, the terms that end there; _out adds those reached via fail links
+        self._own: List[List[int]] = [[]]
+        self._out: List[List[int]] = [[]]
+        # Term id -> (term, kind, value, whole_word)
+        self._terms: List[Tuple[str, str, str, bool]] = []
+        self._seen: Set[Tuple[str, str, str]] = set()
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, term: str, kind: str, value: str, whole_word: bool = False):
+        """Add a term to the matcher
+
+        Args:
+            term: Text to look for (matched case-insensitively)
+            kind: Term kind (provider, name_part, payer or alias)
+            value: Canonical name the term refers to
+            whole_word: Only match where the term is not part of a longer word
+        """
+        term = (term or "").strip().lower()
+        if not term or (term, kind, value) in self._seen:
+            return
+        self._seen.add((term, kind, value))
+
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            state = next_state
+        self._own[state].append(len(self._terms))
+        self._terms.append((term, kind, value, whole_word))
+        self._built = False
+
+    def build(self) -> "EntityMatcher":
+        """Compute the failure links; called automatically on the first search"""
+        self._out = [list(terms) for terms in self._own]
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        # Breadth-first, so a state's fail target is finished before the state
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+        self._built = True
+        return self
+
+    def find(self, text: str, kinds: Optional[Iterable[str]] = None) -> List[EntityMatch]:
+        """Find every term in a text in one pass
+
+        Overlapping matches are all returned (e.g. both "Dr. Ann Lee" and
+        "Dr. Ann Leeds" in "dr. ann leeds").
+
+        Args:
+            text: Text to search
+            kinds: Only return these term kinds (default: all)
+
+        Returns:
+            Matches ordered by position; start/end are offsets into the text
+        """
+        if not self._built:
+            self.build()
+        if not text or not self._terms:
+            return []
+        kinds = set(kinds) if kinds else None
+        # lower() keeps offsets for everything but a few non-ASCII letters
+        lowered = text.lower()
+
+        matches = []
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for term_id in out[state]:
+                term, kind, value, whole_word = self._terms[term_id]
+                if kinds and kind not in kinds:
+                    continue
+                start, end = index + 1 - len(term), index + 1
+                if whole_word and not _on_word_boundary(lowered, start, end):
+                    continue
+                matches.append(EntityMatch(kind, value, term, start, end))
+
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+    def values(self, text: str, kinds: Optional[Iterable[str]] = None) -> List[str]:
+        """Get the distinct canonical values found in a text, in order of first mention"""
+        return list(dict.fromkeys(match.value for match in self.find(text, kinds)))
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def name_parts(name: str) -> List[str]:
+    """Get the parts of a provider name usable on their own (first and last names)
+
+    Args:
+        name: Provider name
+
+    Returns:
+        Lower-cased parts longer than two characters, without honorifics
+    """
+    parts = [part.strip(",") for part in name.lower().split()]
+    return [part for part in parts if len(part) > 2 and part not in HONORIFICS]
+
+
+def build_entity_matcher(providers: Iterable[str], payers: Iterable[str] = (),
+                         aliases: Optional[Dict[str, str]] = None) -> EntityMatcher:
+    """Build the matcher for a set of providers and payers
+
+    Args:
+        providers: Provider names
+        payers: Payer names
+        aliases: Alias -> provider name (e.g. nicknames or old names)
+
+    Returns:
+        Built EntityMatcher
+    """
+    matcher = EntityMatcher()
+    for provider in providers:
+        if not provider:
+            continue
+        # Full names keep the substring semantics of the old checks
+        matcher.add(provider, PROVIDER, provider)
+        for part in name_parts(provider):
+            matcher.add(part, NAME_PART, provider, whole_word=True)
+    for payer in payers:
+        if payer:
+            matcher.add(payer, PAYER, payer, whole_word=True)
+    for alias, provider in (aliases or {}).items():
+        matcher.add(alias, ALIAS, provider, whole_word=True)
+    return matcher.build()
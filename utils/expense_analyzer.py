@@ -8,13 +8,42 @@ to support comprehensive profitability analysis.
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterable, List, Optional, Tuple, Any
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.revenue_cube import cube_enabled, get_revenue_cube
+from utils.db_open import connect_db
 
 logger = get_logger()
 config = get_config()
 
+SUMMARY_COLUMNS_SQL = """
+    SUM(amount) as total_amount,
+    SUM(budgeted_amount) as budgeted_amount,
+    SUM(amount - COALESCE(budgeted_amount, amount)) as variance,
+    COUNT(*) as transaction_count,
+    SUM(CASE WHEN is_variable = 1 THEN amount ELSE 0 END) as variable_portion,
+    SUM(CASE WHEN is_variable = 0 THEN amount ELSE 0 END) as fixed_portion
+"""
+
+
+def month_bounds(year: int, month: int) -> Tuple[str, str]:
+    """Get the half-open [start, end) ISO date range of a month
+    
+    Comparing expense_date against this range (instead of strftime() on the
+    column) lets SQLite use idx_expense_date.
+    
+    Args:
+        year: Year
+        month: Month (1-12)
+        
+    Returns:
+        Tuple of (first day of the month, first day of the next month)
+    """
+    end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01", f"{end_year:04d}-{end_month:02d}-01"
+
+
 class ExpenseAnalyzer:
     """Handles month-to-month expense analysis and profitability calculations"""
     
@@ -23,7 +52,7 @@ class ExpenseAnalyzer:
     
     def create_expense_tables(self):
         """Create expense-related tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         try:
             conn.executescript("""
                 -- Enhanced expense transactions table
@@ -93,7 +122,7 @@ class ExpenseAnalyzer:
     
     def calculate_monthly_variance(self, year: int, month: int) -> Dict[str, Any]:
         """Calculate expense variance for a specific month"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         try:
             query = """
                 SELECT 
@@ -108,12 +137,12 @@ class ExpenseAnalyzer:
                         ELSE 0 
                     END as variance_percentage
                 FROM expense_transactions
-                WHERE strftime('%Y', expense_date) = ? AND strftime('%m', expense_date) = ?
+                WHERE expense_date >= ? AND expense_date < ?
                 GROUP BY category, subcategory
                 ORDER BY variance_percentage DESC
             """
             
-            df = pd.read_sql_query(query, conn, params=(str(year), f"{month:02d}"))
+            df = pd.read_sql_query(query, conn, params=month_bounds(year, month))
             
             total_actual = df['actual_amount'].sum()
             total_budgeted = df['budgeted_amount'].sum()
@@ -133,7 +162,7 @@ class ExpenseAnalyzer:
     
     def analyze_variable_cost_efficiency(self, provider_id: int = None) -> Dict[str, Any]:
         """Analyze variable cost efficiency by provider"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         try:
             provider_filter = "AND pt.provider_id = ?" if provider_id else ""
             params = [provider_id] if provider_id else []
@@ -174,10 +203,10 @@ class ExpenseAnalyzer:
     
     def calculate_break_even_analysis(self, target_month: str = None) -> Dict[str, Any]:
         """Calculate break-even analysis including variable costs"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         try:
-            month_filter = "AND strftime('%Y-%m', expense_date) = ?" if target_month else ""
-            params = [target_month] if target_month else []
+            month_filter = "AND expense_date >= ? AND expense_date < ?" if target_month else ""
+            params = list(month_bounds(*map(int, target_month.split('-')))) if target_month else []
             
             query = f"""
                 SELECT 
@@ -195,17 +224,28 @@ class ExpenseAnalyzer:
             expense_df = pd.read_sql_query(query, conn, params=params)
             
             # Get average revenue per transaction
-            revenue_query = """
-                SELECT 
-                    strftime('%Y-%m', transaction_date) as month,
-                    AVG(cash_applied) as avg_revenue_per_transaction,
-                    COUNT(*) as transaction_count
-                FROM payment_transactions
-                GROUP BY month
-                ORDER BY month DESC
-            """
-            
-            revenue_df = pd.read_sql_query(revenue_query, conn)
+            if cube_enabled():
+                revenue_df = get_revenue_cube(self.db_path).query("""
+                    SELECT 
+                        printf('%04d-%02d', year, month) as month,
+                        SUM(revenue) / NULLIF(SUM(cash_count), 0) as avg_revenue_per_transaction,
+                        SUM(txn_count) as transaction_count
+                    FROM revenue_cube
+                    WHERE year > 0
+                    GROUP BY year, month
+                    ORDER BY year DESC, month DESC
+                """)
+            else:
+                revenue_query = """
+                    SELECT 
+                        strftime('%Y-%m', transaction_date) as month,
+                        AVG(cash_applied) as avg_revenue_per_transaction,
+                        COUNT(*) as transaction_count
+                    FROM payment_transactions
+                    GROUP BY month
+                    ORDER BY month DESC
+                """
+                revenue_df = pd.read_sql_query(revenue_query, conn)
             
             # Combine data
             combined = expense_df.merge(revenue_df, on='month', how='inner')
@@ -227,7 +267,7 @@ class ExpenseAnalyzer:
     
     def get_expense_trends(self, months_back: int = 12) -> Dict[str, Any]:
         """Get expense trends over time"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         try:
             query = """
                 SELECT 
@@ -258,35 +298,64 @@ class ExpenseAnalyzer:
         finally:
             conn.close()
     
-    def update_monthly_summaries(self):
-        """Update monthly expense summary table"""
-        conn = sqlite3.connect(self.db_path)
+    def update_monthly_summaries(self, keys: Iterable[Tuple[int, int, str]] = None):
+        """Update monthly expense summary table
+        
+        Args:
+            keys: (year, month, category) summaries to recompute, e.g. the
+                months and categories of an uploaded batch. If None, all
+                summaries are rebuilt.
+        """
+        conn = connect_db(self.db_path)
         try:
-            # Clear existing summaries
-            conn.execute("DELETE FROM monthly_expense_summary")
-            
-            # Rebuild summaries
-            query = """
-                INSERT INTO monthly_expense_summary 
-                (year, month, category, total_amount, budgeted_amount, variance, 
-                 transaction_count, variable_portion, fixed_portion)
-                SELECT 
-                    CAST(strftime('%Y', expense_date) AS INTEGER) as year,
-                    CAST(strftime('%m', expense_date) AS INTEGER) as month,
-                    category,
-                    SUM(amount) as total_amount,
-                    SUM(budgeted_amount) as budgeted_amount,
-                    SUM(amount - COALESCE(budgeted_amount, amount)) as variance,
-                    COUNT(*) as transaction_count,
-                    SUM(CASE WHEN is_variable = 1 THEN amount ELSE 0 END) as variable_portion,
-                    SUM(CASE WHEN is_variable = 0 THEN amount ELSE 0 END) as fixed_portion
-                FROM expense_transactions
-                GROUP BY year, month, category
-            """
+            if keys is None:
+                # Clear existing summaries
+                conn.execute("DELETE FROM monthly_expense_summary")
+                
+                # Rebuild summaries
+                query = f"""
+                    INSERT INTO monthly_expense_summary 
+                    (year, month, category, total_amount, budgeted_amount, variance, 
+                     transaction_count, variable_portion, fixed_portion)
+                    SELECT 
+                        CAST(strftime('%Y', expense_date) AS INTEGER) as year,
+                        CAST(strftime('%m', expense_date) AS INTEGER) as month,
+                        category,
+                        {SUMMARY_COLUMNS_SQL}
+                    FROM expense_transactions
+                    GROUP BY year, month, category
+                """
+                conn.execute(query)
+                updated = "all"
+            else:
+                keys = sorted(set(keys))
+                conn.executemany(
+                    "DELETE FROM monthly_expense_summary WHERE year = ? AND month = ? AND category = ?",
+                    keys
+                )
+                
+                # Recompute each touched month/category from an index range scan
+                query = f"""
+                    INSERT INTO monthly_expense_summary 
+                    (year, month, category, total_amount, budgeted_amount, variance, 
+                     transaction_count, variable_portion, fixed_portion)
+                    SELECT 
+                        ? as year,
+                        ? as month,
+                        category,
+                        {SUMMARY_COLUMNS_SQL}
+                    FROM expense_transactions
+                    WHERE expense_date >= ? AND expense_date < ? AND category = ?
+                    GROUP BY category
+                """
+                conn.executemany(query, [
+                    (year, month, *month_bounds(year, month), category)
+                    for year, month, category in keys
+                ])
+                updated = len(keys)
             
-            conn.execute(query)
             conn.commit()
-            logger.info("Monthly expense summaries updated successfully")
+            logger.info(f"Monthly expense summaries updated successfully ({updated} month/category keys)")
         except sqlite3.Error as e:
             logger.error(f"Error updating monthly summaries: {e}")
             raise
@@ -0,0 +1,192 @@
+"""
+Fact snapshot for HVLC_DB.
+
+A process-wide, read-only snapshot of the provider facts the AI routes
+check answers against: active providers, per-provider revenue and
+transaction counts, and summary statistics. It is built with one
+GROUP BY over payment_transactions and shared by ReasoningValidator,
+BusinessReasoningEngine and the chat context builder, so a new validator
+or request costs nothing until an upload changes the data version.
+
+The snapshot also carries the entity matcher used to find provider and
+payer names in text (see utils.entity_matcher), built once per snapshot
+instead of on every message. The dollar-figure and transaction-count
+patterns are compiled once at import.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from utils.config import get_config
+from utils.data_version import get_data_version, register_invalidation_listener
+from utils.db_open import connect_db
+from utils.entity_matcher import PROVIDER, EntityMatcher, build_entity_matcher
+from utils.logger import get_logger
+
+logger = get_logger()
+config = get_config()
+
+# "$12,345.67" -> "12,345.67"
+CURRENCY_PATTERN = re.compile(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)')
+# "1,470 transactions" -> "1,470"
+TRANSACTION_COUNT_PATTERN = re.compile(r'(\d{1,3}(?:,\d{3})*)\s+transactions')
+
+PROVIDER_FACTS_SQL = """
+SELECT
+    p.provider_name,
+    p.active,
+    COUNT(pt.transaction_id) AS transactions,
+    SUM(pt.cash_applied) AS revenue,
+    AVG(pt.cash_applied) AS avg_payment,
+    MIN(pt.transaction_date) AS first_date,
+    MAX(pt.transaction_date) AS last_date,
+    COUNT(DISTINCT pt.payer_name) AS unique_payers
+FROM providers p
+LEFT JOIN payment_transactions pt ON p.provider_id = pt.provider_id
+GROUP BY p.provider_id, p.provider_name
+ORDER BY p.provider_id
+"""
+
+PAYERS_SQL = """
+SELECT DISTINCT payer_name FROM payment_transactions
+WHERE payer_name IS NOT NULL AND payer_name != ''
+ORDER BY payer_name
+"""
+
+
+@dataclass
+class FactSnapshot:
+    """Provider facts for one data version"""
+    version: str
+    # Active provider names, in provider_id order
+    providers: List[str] = field(default_factory=list)
+    # Active providers with non-zero revenue / transactions
+    revenue: Dict[str, float] = field(default_factory=dict)
+    transaction_counts: Dict[str, int] = field(default_factory=dict)
+    # Statistics for every provider (active or not), keyed by name
+    provider_stats: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    payers: List[str] = field(default_factory=list)
+    # Provider, name-part, payer and alias terms for every provider
+    matcher: EntityMatcher = field(default_factory=EntityMatcher)
+
+    @classmethod
+    def load(cls, db_path: str, version: str) -> "FactSnapshot":
+        """Build a snapshot from the database
+
+        Args:
+            db_path: Path to the billing database
+            version: Data version the snapshot is valid for
+
+        Returns:
+            FactSnapshot
+        """
+        snapshot = cls(version=version)
+        conn = connect_db(db_path)
+        try:
+            rows = conn.execute(PROVIDER_FACTS_SQL).fetchall()
+            snapshot.payers = [row[0] for row in conn.execute(PAYERS_SQL)]
+        finally:
+            conn.close()
+
+        for name, active, transactions, revenue, avg_payment, first_date, last_date, unique_payers in rows:
+            snapshot.provider_stats[name] = {
+                "transactions": transactions,
+                "revenue": revenue,
+                "avg_payment": avg_payment,
+                "first_date": first_date,
+                "last_date": last_date,
+                "unique_payers": unique_payers,
+                "active": bool(active),
+            }
+            if active == 1:
+                snapshot.providers.append(name)
+                if revenue:
+                    snapshot.revenue[name] = float(revenue)
+                if transactions:
+                    snapshot.transaction_counts[name] = int(transactions)
+
+        snapshot.matcher = build_entity_matcher(snapshot.provider_stats, snapshot.payers,
+                                                config.get("entity_matcher.aliases") or {})
+        logger.debug(f"Loaded fact snapshot {version}: {len(snapshot.provider_stats)} providers")
+        return snapshot
+
+    def mentioned_providers(self, text: str) -> List[str]:
+        """Get the active providers whose full name appears in a text
+
+        Args:
+            text: Text to search (case-insensitive)
+
+        Returns:
+            Provider names, in provider order
+        """
+        found = set(self.matcher.values(text, kinds=[PROVIDER]))
+        return [provider for provider in self.providers if provider in found]
+
+    def provider_summary(self, provider_name: str) -> Optional[Dict[str, Any]]:
+        """Get the statistics of a provider, or None if it has no transactions"""
+        stats = self.provider_stats.get(provider_name)
+        return stats if stats and stats["transactions"] else None
+
+
+def extract_revenue_figures(text: str) -> List[Dict[str, Any]]:
+    """Extract dollar figures from text
+
+    Args:
+        text: Text to search
+
+    Returns:
+        List of {'amount': float}
+    """
+    return [{'amount': float(match.replace(',', ''))} for match in CURRENCY_PATTERN.findall(text)]
+
+
+def extract_transaction_counts(text: str) -> List[Dict[str, Any]]:
+    """Extract "N transactions" counts from text
+
+    Args:
+        text: Text to search
+
+    Returns:
+        List of {'count': int}
+    """
+    return [{'count': int(match.replace(',', ''))} for match in TRANSACTION_COUNT_PATTERN.findall(text)]
+
+
+_snapshots: Dict[str, FactSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def _clear_snapshots():
+    with _snapshots_lock:
+        _snapshots.clear()
+
+
+register_invalidation_listener(_clear_snapshots)
+
+
+def get_fact_snapshot(db_path: Optional[str] = None) -> FactSnapshot:
+    """Get the fact snapshot for the current data version
+
+    The snapshot is rebuilt once after each upload (in this process or
+    another one); otherwise this costs a file stat.
+
+    Args:
+        db_path: Path to the billing database (default: from config)
+
+    Returns:
+        FactSnapshot (empty if the database could not be read)
+    """
+    db_path = db_path or config.get_db_path()
+    version = get_data_version(db_path)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(db_path)
+        if snapshot is None or snapshot.version != version:
+            try:
+                snapshot = FactSnapshot.load(db_path, version)
+            except Exception as e:
+                logger.error(f"Error loading fact snapshot: {e}")
+                return FactSnapshot(version=version)
+            _snapshots[db_path] = snapshot
+        return snapshot
@@ -5,6 +5,7 @@ This module provides tools for automatically detecting and classifying
 different CSV report formats commonly used in medical billing.
 """
 
+import io
 import os
 import re
 import json
@@ -352,51 +353,86 @@ class ReportFormatDetector:
             # Read header and sample rows
             df = pd.read_csv(file_path, nrows=sample_rows, dialect=dialect)
             
-            if not has_header:
-                logger.warning(f"File {file_path} does not appear to have a header row")
-                return FormatDetectionResult(
-                    format_name=None,
-                    confidence=0.0,
-                    metadata={"error": "No header detected"}
-                )
-                
-            headers = df.columns.tolist()
+            return self._detect_from_sample_frame(df, has_header, file_path)
             
-            # Match against known profiles
-            results = []
-            for profile_name, profile in self.registry.profiles.items():
-                result = self._match_profile(headers, df, profile)
-                results.append((profile_name, result))
-                
-            # Find best match
-            results.sort(key=lambda x: x[1]["confidence"], reverse=True)
-            best_match = results[0]
-            
-            if best_match[1]["confidence"] < 0.5:
-                logger.warning(f"Low confidence format detection for {file_path}")
-                return FormatDetectionResult(
-                    format_name=None,
-                    confidence=best_match[1]["confidence"],
-                    metadata={"candidates": [r[0] for r in results[:3]]}
-                )
-                
-            # Create result
+        except Exception as e:
+            logger.error(f"Error detecting format for {file_path}: {e}")
             return FormatDetectionResult(
-                format_name=best_match[0],
-                confidence=best_match[1]["confidence"],
-                column_map=best_match[1]["column_map"],
-                confidence_scores=best_match[1]["confidence_scores"],
-                metadata={"full_results": {r[0]: r[1] for r in results[:3]}}
+                format_name=None,
+                confidence=0.0,
+                metadata={"error": str(e)}
             )
             
+    def detect_format_from_text(self, text: str, sample_rows: int = 10,
+                                source: str = "<stream>") -> FormatDetectionResult:
+        """Detect format from the first bytes of a CSV file, e.g. while it is uploading
+        
+        Args:
+            text: Beginning of the CSV file, decoded (should end on a line break)
+            sample_rows: Number of rows to sample for detection
+            source: Name of the file for log messages
+            
+        Returns:
+            FormatDetectionResult with detection details
+        """
+        logger.info(f"Detecting format for {source}")
+        
+        try:
+            sample = text[:4096]
+            dialect = csv.Sniffer().sniff(sample)
+            has_header = csv.Sniffer().has_header(sample)
+            df = pd.read_csv(io.StringIO(text), nrows=sample_rows, dialect=dialect)
+            
+            return self._detect_from_sample_frame(df, has_header, source)
+            
         except Exception as e:
-            logger.error(f"Error detecting format for {file_path}: {e}")
+            logger.error(f"Error detecting format for {source}: {e}")
             return FormatDetectionResult(
                 format_name=None,
                 confidence=0.0,
                 metadata={"error": str(e)}
             )
             
+    def _detect_from_sample_frame(self, df: pd.DataFrame, has_header: bool,
+                                  source: str) -> FormatDetectionResult:
+        """Match the header and sample rows of a file against the known profiles"""
+        if not has_header:
+            logger.warning(f"File {source} does not appear to have a header row")
+            return FormatDetectionResult(
+                format_name=None,
+                confidence=0.0,
+                metadata={"error": "No header detected"}
+            )
+            
+        headers = df.columns.tolist()
+        
+        # Match against known profiles
+        results = []
+        for profile_name, profile in self.registry.profiles.items():
+            result = self._match_profile(headers, df, profile)
+            results.append((profile_name, result))
+            
+        # Find best match
+        results.sort(key=lambda x: x[1]["confidence"], reverse=True)
+        best_match = results[0]
+        
+        if best_match[1]["confidence"] < 0.5:
+            logger.warning(f"Low confidence format detection for {source}")
+            return FormatDetectionResult(
+                format_name=None,
+                confidence=best_match[1]["confidence"],
+                metadata={"candidates": [r[0] for r in results[:3]]}
+            )
+            
+        # Create result
+        return FormatDetectionResult(
+            format_name=best_match[0],
+            confidence=best_match[1]["confidence"],
+            column_map=best_match[1]["column_map"],
+            confidence_scores=best_match[1]["confidence_scores"],
+            metadata={"full_results": {r[0]: r[1] for r in results[:3]}}
+        )
+            
     def _match_profile(self, headers: List[str], df: pd.DataFrame, 
                       profile: FormatProfile) -> Dict[str, Any]:
         """Match headers against a profile
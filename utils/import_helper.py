@@ -19,6 +19,7 @@ from utils.config import get_config
 from utils.logger import get_logger
 from utils.format_detector import ReportFormatDetector, FormatDetectionResult
 from utils.report_transformer import ReportTransformer
+from utils.parallel_import import import_files, prepare_transformed_file
 from medical_billing_db import MedicalBillingDB
 
 # Configure logging
@@ -29,15 +30,18 @@ config = get_config()
 class ImportHelper:
     """Helper for importing CSV files into the database"""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, max_workers: int = None):
         """Initialize import helper
         
         Args:
             db_path: Path to database file
+            max_workers: Worker processes for directory imports
+                (default: imports.max_workers, then CPU count)
         """
         self.detector = ReportFormatDetector()
         self.transformer = ReportTransformer(self.detector)
         self.db = MedicalBillingDB(db_path)
+        self.max_workers = max_workers
         
     def import_file(self, file_path: str, format_name: str = None, 
                    chunk_size: int = None) -> Dict:
@@ -61,20 +65,42 @@ class ImportHelper:
             format_name = detection_result.format_name
             
             if not format_name:
-                error_msg = f"Could not detect format for {file_path}"
-                logger.error(error_msg)
-                return {
-                    "success": False,
-                    "error": error_msg,
-                    "file_path": file_path,
-                    "elapsed_time": time.time() - start_time
-                }
+                return self._import_failed(f"Could not detect format for {file_path}", file_path, start_time)
                 
             logger.info(f"Detected format: {format_name} (confidence: {detection_result.confidence:.2f})")
             
         # Transform the file
         df, transform_metadata = self.transformer.transform(file_path, format_name)
         
+        return self._write_transformed(file_path, format_name, df, transform_metadata, start_time)
+    
+    def _import_failed(self, error_msg: str, file_path: str, start_time: float) -> Dict:
+        logger.error(error_msg)
+        return {
+            "success": False,
+            "error": error_msg,
+            "file_path": file_path,
+            "elapsed_time": time.time() - start_time
+        }
+    
+    def _write_prepared(self, file_path: str, prepared: Dict) -> Dict:
+        """Write a file prepared by prepare_transformed_file in a worker"""
+        logger.info(f"Importing file {file_path}")
+        
+        # Elapsed time covers the worker's detection and transformation too
+        start_time = time.time() - prepared.get("prepare_time", 0)
+        if "df" not in prepared:
+            return self._import_failed(prepared["error"], file_path, start_time)
+        
+        if prepared.get("confidence") is not None:
+            logger.info(f"Detected format: {prepared['format_name']} (confidence: {prepared['confidence']:.2f})")
+        
+        return self._write_transformed(file_path, prepared["format_name"], prepared["df"],
+                                       prepared["transform_metadata"], start_time)
+    
+    def _write_transformed(self, file_path: str, format_name: str, df: pd.DataFrame,
+                           transform_metadata: Dict, start_time: float) -> Dict:
+        """Insert a transformed file and build its import result"""
         if df.empty:
             error_msg = f"Transformation failed: {transform_metadata.get('error', 'Unknown error')}"
             logger.error(error_msg)
@@ -118,13 +144,18 @@ class ImportHelper:
             
     def import_directory(self, directory_path: str, 
                         recursive: bool = False,
-                        extensions: List[str] = None) -> Dict:
+                        extensions: List[str] = None,
+                        max_workers: int = None) -> Dict:
         """Import all CSV files in a directory
         
+        Format detection and transformation run in parallel worker processes;
+        files are inserted one at a time, in directory order.
+        
         Args:
             directory_path: Path to directory
             recursive: Whether to search subdirectories
             extensions: List of file extensions to import (default: ['.csv'])
+            max_workers: Worker processes (default: the helper's max_workers; 1 imports serially)
             
         Returns:
             Dictionary with import results
@@ -160,15 +191,11 @@ class ImportHelper:
         logger.info(f"Found {len(files)} files to import")
         
         # Import each file
-        results = []
-        successful = 0
-        
-        for file_path in files:
-            result = self.import_file(file_path)
-            results.append(result)
-            
-            if result.get("success", False):
-                successful += 1
+        results = import_files(files, prepare_transformed_file, self._write_prepared,
+                               max_workers=max_workers or self.max_workers, rows_key="total_records")
+        successful = sum(1 for result in results if result.get("success", False))
+        total_records = sum(result.get("total_records", 0) for result in results)
+        elapsed_time = time.time() - start_time
                 
         # Compile summary
         summary = {
@@ -177,7 +204,8 @@ class ImportHelper:
             "files_imported": successful,
             "failed_imports": len(files) - successful,
             "results": results,
-            "elapsed_time": time.time() - start_time
+            "elapsed_time": elapsed_time,
+            "records_per_second": total_records / elapsed_time if elapsed_time > 0 else 0
         }
         
         logger.info(f"Import complete: {successful}/{len(files)} files successfully imported")
@@ -206,17 +234,18 @@ def import_file(file_path: str, format_name: str = None) -> Dict:
         helper.close()
 
 
-def import_directory(directory_path: str, recursive: bool = False) -> Dict:
+def import_directory(directory_path: str, recursive: bool = False, max_workers: int = None) -> Dict:
     """Utility function to import a directory
     
     Args:
         directory_path: Path to directory
         recursive: Whether to search subdirectories
+        max_workers: Worker processes for detection and transformation
         
     Returns:
         Import results dictionary
     """
-    helper = ImportHelper()
+    helper = ImportHelper(max_workers=max_workers)
     try:
         return helper.import_directory(directory_path, recursive)
     finally:
@@ -239,6 +268,7 @@ def main():
     dir_parser = subparsers.add_parser("directory", help="Import all CSV files in a directory")
     dir_parser.add_argument("directory_path", help="Path to directory")
     dir_parser.add_argument("-r", "--recursive", action="store_true", help="Search subdirectories")
+    dir_parser.add_argument("-w", "--workers", type=int, help="Worker processes (1 imports serially)")
     
     args = parser.parse_args()
     
@@ -261,7 +291,7 @@ def main():
             print(f"Error: {result.get('error', 'Unknown error')}")
             
     elif args.command == "directory":
-        result = import_directory(args.directory_path, args.recursive)
+        result = import_directory(args.directory_path, args.recursive, args.workers)
         
         if result.get("success", False):
             print(f"Import summary for {args.directory_path}:")
@@ -269,6 +299,7 @@ def main():
             print(f"Files imported: {result.get('files_imported', 0)}")
             print(f"Failed imports: {result.get('failed_imports', 0)}")
             print(f"Elapsed time: {result.get('elapsed_time', 0):.2f} seconds")
+            print(f"Throughput: {result.get('records_per_second', 0):,.0f} records/second")
             
             if result.get("failed_imports", 0) > 0:
                 print("\nFailed imports:")
@@ -0,0 +1,441 @@
+"""
+Background import jobs for HVLC_DB.
+
+The files API enqueues imports here instead of running them inside the
+HTTP request. Jobs are persisted in the import_jobs table of the billing
+database, so queued jobs survive a server restart. A single writer thread
+inserts one file at a time; up to import_jobs.max_workers upcoming files
+are read or transformed ahead of it in worker processes.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.config import get_config
+from utils.logger import get_logger
+from utils.db_open import connect_db
+from utils.parallel_import import prepare_transformed_file, read_csv_chunks
+
+logger = get_logger()
+config = get_config()
+
+# Job kinds: "transform" detects and transforms the file (ImportHelper),
+# "upload" loads it as-is in chunks (MedicalBillingDB.upload_csv_file)
+JOB_KINDS = ("transform", "upload")
+FINISHED_STATUSES = ("completed", "failed", "interrupted")
+
+# Result keys kept in the job table (issue lists and chunk details are dropped)
+RESULT_KEYS = ("success", "error", "filename", "format", "upload_id", "total_rows_processed",
+               "successful_rows", "failed_rows", "total_records", "successful", "failed")
+
+
+class QueueFullError(Exception):
+    """Raised when the import queue already holds import_jobs.max_queued jobs"""
+
+
+class ImportJobQueue:
+    """Persisted import job queue with a single database writer"""
+
+    def __init__(self, db_path: str = None, max_workers: int = None, max_queued: int = None):
+        """Initialize the job queue
+
+        Args:
+            db_path: Path to the billing database (default: from config)
+            max_workers: Files prepared ahead of the writer (default: import_jobs.max_workers;
+                1 prepares on the writer thread)
+            max_queued: Maximum queued jobs (default: import_jobs.max_queued)
+        """
+        self.db_path = db_path or config.get_db_path()
+        self.max_workers = max_workers or config.get("import_jobs.max_workers", 2)
+        self.max_queued = max_queued or config.get("import_jobs.max_queued", 100)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        # Live progress of the running job; persisted when the job finishes
+        self._progress: Dict[str, Dict] = {}
+
+        self._create_table()
+        self._recover()
+
+    def _create_table(self):
+        with connect_db(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS import_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    format_name TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    total_rows INTEGER,
+                    rows_processed INTEGER DEFAULT 0,
+                    rows_per_second REAL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    owner_pid INTEGER,
+                    heartbeat_at REAL
+                )
+            """)
+            # Tables created before jobs recorded their owner
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(import_jobs)")}
+            for column, column_type in (("owner_pid", "INTEGER"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE import_jobs ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs(status, created_at)")
+
+    def _recover(self):
+        """Mark jobs cut off by a restart as interrupted
+
+        Only running jobs whose owner process is gone (or has stopped sending
+        heartbeats) are interrupted; another live process may share the
+        database. A running job may have committed part of its rows, so it is
+        not re-run automatically (that would duplicate them); retry() requeues
+        it. Queued jobs are picked up again when the writer starts.
+        """
+        stale_before = time.time() - 3 * config.get("import_jobs.heartbeat_interval", 10.0)
+        with connect_db(self.db_path) as conn:
+            running = conn.execute(
+                "SELECT job_id, owner_pid, heartbeat_at FROM import_jobs WHERE status = 'running'"
+            ).fetchall()
+            orphaned = [job_id for job_id, owner_pid, heartbeat_at in running
+                        if not _owner_alive(owner_pid, heartbeat_at, stale_before)]
+            conn.executemany(
+                "UPDATE import_jobs SET status = 'interrupted', error = ?, finished_at = ? "
+                "WHERE job_id = ? AND status = 'running'",
+                [("Interrupted by a server restart", datetime.now().isoformat(timespec="seconds"), job_id)
+                 for job_id in orphaned]
+            )
+        if orphaned:
+            logger.warning(f"Marked {len(orphaned)} interrupted import jobs")
+
+    def start(self):
+        """Start the writer thread if it is not running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="import-job-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the writer thread after the current job
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def enqueue(self, file_path: str, kind: str = "transform", format_name: str = None) -> str:
+        """Add an import job
+
+        Args:
+            file_path: Path to the CSV file
+            kind: "transform" or "upload" (see JOB_KINDS)
+            format_name: Optional format name for transform jobs (detected if not provided)
+
+        Returns:
+            Job id
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown import job kind: {kind}")
+
+        job_id = uuid.uuid4().hex
+        with connect_db(self.db_path) as conn:
+            queued = conn.execute("SELECT COUNT(*) FROM import_jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFullError(f"Import queue is full ({queued} jobs queued)")
+            conn.execute(
+                "INSERT INTO import_jobs (job_id, kind, file_path, format_name, status, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, os.path.abspath(file_path), format_name,
+                 datetime.now().isoformat(timespec="microseconds"))
+            )
+
+        logger.info(f"Queued {kind} import job {job_id} for {file_path}")
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def retry(self, job_id: str) -> bool:
+        """Requeue a failed or interrupted job
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            True if the job was requeued
+        """
+        with connect_db(self.db_path) as conn:
+            cursor = conn.execute(
+                "UPDATE import_jobs SET status = 'queued', error = NULL, result = NULL, rows_processed = 0, "
+                "started_at = NULL, finished_at = NULL WHERE job_id = ? AND status IN ('failed', 'interrupted')",
+                (job_id,)
+            )
+        if cursor.rowcount:
+            self.start()
+            self._wakeup.set()
+        return bool(cursor.rowcount)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get a job's status and progress
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            Job dictionary with rows_processed, rows_per_second and eta_seconds,
+            or None if the job does not exist
+        """
+        with connect_db(self.db_path) as conn:
+            conn.row_factory = _dict_factory
+            job = conn.execute("SELECT * FROM import_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._with_progress(job) if job else None
+
+    def list_jobs(self, status: str = None, limit: int = 50) -> List[Dict]:
+        """List the most recent jobs
+
+        Args:
+            status: Only return jobs with this status
+            limit: Maximum number of jobs
+
+        Returns:
+            Job dictionaries, newest first
+        """
+        query = "SELECT * FROM import_jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+
+        with connect_db(self.db_path) as conn:
+            conn.row_factory = _dict_factory
+            jobs = conn.execute(query, params).fetchall()
+        return [self._with_progress(job) for job in jobs]
+
+    def wait(self, job_id: str, timeout: float = None) -> Optional[Dict]:
+        """Wait for a job to finish
+
+        Args:
+            job_id: Job id
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The job dictionary (finished unless the timeout expired)
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            job = self.get_job(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return job
+            if deadline is not None and time.time() >= deadline:
+                return job
+            time.sleep(0.05)
+
+    def _with_progress(self, job: Dict) -> Dict:
+        with self._lock:
+            live = self._progress.get(job["job_id"])
+        if live and job["status"] == "running":
+            job.update(live)
+
+        job["result"] = json.loads(job["result"]) if job.get("result") else None
+        rate = job.get("rows_per_second") or 0
+        remaining = (job.get("total_rows") or 0) - (job.get("rows_processed") or 0)
+        job["eta_seconds"] = (
+            0 if job["status"] in FINISHED_STATUSES
+            else remaining / rate if rate > 0 and remaining > 0 else None
+        )
+        return job
+
+    def _queued_jobs(self, limit: int) -> List[Dict]:
+        with connect_db(self.db_path) as conn:
+            conn.row_factory = _dict_factory
+            return conn.execute(
+                "SELECT job_id, kind, file_path, format_name FROM import_jobs "
+                "WHERE status = 'queued' ORDER BY created_at LIMIT ?", (limit,)
+            ).fetchall()
+
+    def _claim(self, job_id: str) -> bool:
+        with connect_db(self.db_path) as conn:
+            cursor = conn.execute(
+                "UPDATE import_jobs SET status = 'running', started_at = ?, owner_pid = ?, heartbeat_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (datetime.now().isoformat(timespec="seconds"), os.getpid(), time.time(), job_id)
+            )
+        return cursor.rowcount == 1
+
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        """Refresh a running job's heartbeat until it finishes"""
+        interval = config.get("import_jobs.heartbeat_interval", 10.0)
+        while not done.wait(interval):
+            try:
+                self._update(job_id, heartbeat_at=time.time())
+            except Exception as e:
+                logger.warning(f"Could not refresh heartbeat of import job {job_id}: {e}")
+
+    def _update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with connect_db(self.db_path) as conn:
+            conn.execute(f"UPDATE import_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def _run(self):
+        """Writer loop: prepare upcoming jobs ahead and write them one at a time"""
+        from medical_billing_db import MedicalBillingDB
+
+        pool = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        prepared: Dict[str, Future] = {}
+        db = None
+        helper = None
+
+        try:
+            while not self._stopping:
+                jobs = self._queued_jobs(self.max_workers)
+                if not jobs:
+                    self._wakeup.wait(1.0)
+                    self._wakeup.clear()
+                    continue
+
+                if pool:
+                    for job in jobs:
+                        if job["job_id"] not in prepared:
+                            prepared[job["job_id"]] = pool.submit(_prepare, job["kind"], job["file_path"],
+                                                                  job["format_name"])
+
+                job = jobs[0]
+                job_id = job["job_id"]
+                if not self._claim(job_id):
+                    # Another process picked the job up first
+                    prepared.pop(job_id, None)
+                    continue
+                start_time = time.time()
+                done = threading.Event()
+                threading.Thread(target=self._heartbeat, args=(job_id, done),
+                                 name="import-job-heartbeat", daemon=True).start()
+                try:
+                    prepared_file = (prepared.pop(job_id).result() if job_id in prepared
+                                     else _prepare(job["kind"], job["file_path"], job["format_name"]))
+
+                    if job["kind"] == "upload":
+                        db = db or MedicalBillingDB(self.db_path, bulk_load=True)
+                        result = self._write_upload(job_id, db, prepared_file, start_time)
+                    else:
+                        if helper is None:
+                            from utils.import_helper import ImportHelper
+                            helper = ImportHelper(self.db_path)
+                        total_rows = len(prepared_file["df"]) if "df" in prepared_file else None
+                        self._update(job_id, total_rows=total_rows)
+                        result = helper._write_prepared(job["file_path"], prepared_file)
+                    self._finish(job_id, result, start_time)
+                except Exception as e:
+                    logger.error(f"Import job {job_id} failed: {e}")
+                    self._finish(job_id, {"success": False, "error": str(e)}, start_time)
+                finally:
+                    done.set()
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+            if db:
+                db.close()
+            if helper:
+                helper.close()
+
+    def _write_upload(self, job_id: str, db, prepared_file: Dict, start_time: float) -> Dict:
+        if "error" not in prepared_file:
+            self._update(job_id, total_rows=prepared_file["total_rows"])
+
+        def progress(rows_processed: int, elapsed: float):
+            with self._lock:
+                self._progress[job_id] = {
+                    "rows_processed": rows_processed,
+                    "rows_per_second": rows_processed / elapsed if elapsed > 0 else 0,
+                }
+
+        return db.upload_csv_file(prepared_file.get("file_path"), prepared=prepared_file, progress=progress)
+
+    def _finish(self, job_id: str, result: Dict, start_time: float):
+        elapsed = time.time() - start_time
+        rows = result.get("total_rows_processed", result.get("total_records")) or 0
+        with self._lock:
+            self._progress.pop(job_id, None)
+        self._update(
+            job_id,
+            status="completed" if result.get("success", False) else "failed",
+            rows_processed=rows,
+            rows_per_second=rows / elapsed if elapsed > 0 else 0,
+            result=json.dumps({key: result[key] for key in RESULT_KEYS if key in result}, default=str),
+            error=result.get("error"),
+            finished_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        logger.info(f"Import job {job_id} {'completed' if result.get('success') else 'failed'}: "
+                    f"{rows:,} rows in {elapsed:.2f}s")
+
+
+def _prepare(kind: str, file_path: str, format_name: str = None) -> Dict:
+    """Read or transform a job's file (runs in a worker process)"""
+    try:
+        if kind == "upload":
+            prepared = read_csv_chunks(file_path)
+        else:
+            prepared = prepare_transformed_file(file_path, format_name)
+    except Exception as e:
+        prepared = {"error": str(e)}
+    prepared["file_path"] = file_path
+    return prepared
+
+
+def _owner_alive(owner_pid: Optional[int], heartbeat_at: Optional[float], stale_before: float) -> bool:
+    """Check whether the process that claimed a job is still working on it"""
+    if not owner_pid or heartbeat_at is None or heartbeat_at < stale_before:
+        return False
+    if owner_pid == os.getpid() or sys.platform == "win32":
+        # os.kill(pid, 0) would terminate the process on Windows; rely on the heartbeat
+        return True
+    try:
+        os.kill(owner_pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+def _dict_factory(cursor, row) -> Dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+_queues: Dict[str, ImportJobQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_import_queue(db_path: str = None) -> ImportJobQueue:
+    """Get the shared import job queue for a database
+
+    Queued jobs left over from a previous run are resumed on first use.
+
+    Args:
+        db_path: Path to the billing database (default: from config)
+
+    Returns:
+        ImportJobQueue with its writer thread started
+    """
+    db_path = os.path.abspath(db_path or config.get_db_path())
+    with _queues_lock:
+        if db_path not in _queues:
+            _queues[db_path] = ImportJobQueue(db_path)
+            _queues[db_path].start()
+        return _queues[db_path]
@@ -0,0 +1,299 @@
+"""
+Model residency for Ada chat
+
+Ollama unloads a model after it has been idle for its keep-alive time, and
+the next request then pays for loading it again (tens of seconds for
+llama3.3:70b). This module keeps track of which model is loaded on each
+Ollama endpoint so that:
+
+- chat requests send a keep_alive hint, keeping the model loaded between
+  questions,
+- the models are warmed up when the API server starts,
+- model selection can stay on the resident model instead of flipping to a
+  cold one for questions that do not need it,
+- load events and cold-start times are counted (see get_stats).
+"""
+
+import re
+import time
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+import requests
+
+from utils.config import get_config
+from utils.logger import get_logger
+
+logger = get_logger()
+config = get_config()
+
+_KEEP_ALIVE_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_keep_alive(value: Union[str, int, float, None]) -> Optional[float]:
+    """Convert an Ollama keep_alive value to seconds
+
+    Args:
+        value: Number of seconds or a duration like "30m", "1h" or "90s";
+            a negative value keeps the model loaded indefinitely
+
+    Returns:
+        Seconds, or None for indefinitely
+    """
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*", str(value).lower())
+        if not match:
+            raise ValueError(f"Invalid keep_alive value: {value!r}")
+        seconds = float(match.group(1)) * _KEEP_ALIVE_UNITS[match.group(2)]
+    return None if seconds < 0 else seconds
+
+
+class ModelResidency:
+    """Tracks the models loaded on each Ollama endpoint"""
+
+    def __init__(self,
+                 endpoints: Dict[str, str],
+                 default_url: str = "http://localhost:11434",
+                 keep_alive: Union[str, int] = "30m",
+                 cold_start_ms: float = 1000,
+                 max_loaded_models: int = 1,
+                 timeout: int = 180):
+        """Initialize residency tracking
+
+        Args:
+            endpoints: Model name -> URL of the Ollama server that runs it
+            default_url: Server for models not in endpoints
+            keep_alive: keep_alive hint sent with every request
+            cold_start_ms: A response whose load time exceeds this counts as a
+                load event
+            max_loaded_models: Models an endpoint keeps loaded at once; loading
+                one more evicts the least recently used
+            timeout: Timeout for warm-up requests in seconds
+        """
+        self.endpoints = dict(endpoints)
+        self.default_url = default_url
+        self.keep_alive = keep_alive
+        self.keep_alive_seconds = parse_keep_alive(keep_alive)
+        self.cold_start_ms = cold_start_ms
+        self.max_loaded_models = max(1, max_loaded_models)
+        self.timeout = timeout
+
+        # URL -> {model: expiry time (None = never)}, least recently used first
+        self._resident: Dict[str, Dict[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "warm_requests": 0, "load_events": 0, "cold_start_ms": 0.0,
+                      "warm_ups": 0, "residency_picks": 0}
+        self.model_stats: Dict[str, Dict[str, Any]] = {}
+
+    def endpoint_for(self, model: str) -> str:
+        """Get the URL of the Ollama server that runs a model"""
+        return self.endpoints.get(model, self.default_url)
+
+    def is_resident(self, model: str) -> bool:
+        """Check whether a model is loaded on its endpoint"""
+        with self._lock:
+            return self._is_resident(self.endpoint_for(model), model, time.time())
+
+    def resident_models(self, url: str) -> List[str]:
+        """Get the models currently loaded on an endpoint, most recently used last"""
+        now = time.time()
+        with self._lock:
+            return [model for model in self._resident.get(url, {}) if self._is_resident(url, model, now)]
+
+    def choose_model(self, preferred: str, alternative: Optional[str] = None) -> str:
+        """Pick between two models, avoiding a cold start where possible
+
+        Use this when the preferred model is only a preference: if it is not
+        loaded but the alternative is, the alternative is returned. Callers
+        skip it when the question clearly needs a specific model.
+
+        Args:
+            preferred: Model the question would normally use
+            alternative: Model that can also answer the question
+
+        Returns:
+            Model to use
+        """
+        if not alternative or alternative == preferred:
+            return preferred
+        if self.is_resident(preferred) or not self.is_resident(alternative):
+            return preferred
+
+        with self._lock:
+            self.stats["residency_picks"] += 1
+        logger.debug(f"Using resident model {alternative} instead of cold {preferred}")
+        return alternative
+
+    def record_response(self, model: str, response_json: Optional[Dict[str, Any]] = None,
+                        elapsed_seconds: Optional[float] = None, url: Optional[str] = None) -> Dict[str, Any]:
+        """Record a completed Ollama request
+
+        Ollama reports the time spent loading the model as ``load_duration``
+        (nanoseconds); above cold_start_ms the request is counted as a load
+        event and its load time as cold-start penalty.
+
+        Args:
+            model: Model the request was sent to
+            response_json: Raw Ollama response body
+            elapsed_seconds: Wall-clock request time
+            url: Endpoint the request was sent to (default: the model's endpoint)
+
+        Returns:
+            Dictionary with load_ms and cold_start
+        """
+        response_json = response_json or {}
+        url = url or self.endpoint_for(model)
+        load_ns = response_json.get("load_duration")
+        load_ms = round(load_ns / 1e6, 1) if load_ns else 0.0
+        now = time.time()
+
+        with self._lock:
+            was_resident = self._is_resident(url, model, now)
+            # Without a load time, a request to a model we did not know to be
+            # loaded is assumed to have loaded it
+            cold_start = load_ms > self.cold_start_ms if load_ns is not None else not was_resident
+            model_stats = self.model_stats.setdefault(
+                model, {"requests": 0, "load_events": 0, "cold_start_ms": 0.0, "last_load_ms": None}
+            )
+            self.stats["requests"] += 1
+            model_stats["requests"] += 1
+            if cold_start:
+                penalty = load_ms or (round(elapsed_seconds * 1000, 1) if elapsed_seconds else 0.0)
+                self.stats["load_events"] += 1
+                self.stats["cold_start_ms"] += penalty
+                model_stats["load_events"] += 1
+                model_stats["cold_start_ms"] += penalty
+                model_stats["last_load_ms"] = penalty
+            else:
+                self.stats["warm_requests"] += 1
+            self._mark_loaded(url, model, now)
+
+        if cold_start:
+            logger.info(f"Model load: model={model} url={url} load_ms={load_ms} resident_before={was_resident}")
+        return {"load_ms": load_ms, "cold_start": cold_start}
+
+    def refresh(self, url: str) -> List[str]:
+        """Read the loaded models of an endpoint from Ollama's /api/ps
+
+        Args:
+            url: Ollama server URL
+
+        Returns:
+            Names of the loaded models (empty if the server cannot be reached)
+        """
+        try:
+            response = requests.get(f"{url}/api/ps", timeout=5)
+            response.raise_for_status()
+            models = [m.get("name") or m.get("model") for m in response.json().get("models", [])]
+        except Exception as e:
+            logger.debug(f"Could not read loaded models from {url}: {e}")
+            return []
+
+        now = time.time()
+        with self._lock:
+            self._resident[url] = {}
+            for model in models:
+                self._resident[url][model] = self._expiry(now)
+        return models
+
+    def warm_up(self, models: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Load models ahead of the first chat request
+
+        Sends an empty generate request, which makes Ollama load the model
+        and keep it for the keep_alive time.
+
+        Args:
+            models: Models to load (default: every model in endpoints)
+
+        Returns:
+            Model name -> whether it was loaded
+        """
+        models = [model for model in models or list(self.endpoints) if model]
+        # Models Ollama already holds (e.g. after an API server restart) are not load events
+        for url in {self.endpoint_for(model) for model in models}:
+            self.refresh(url)
+
+        results = {}
+        for model in models:
+            url = self.endpoint_for(model)
+            start = time.time()
+            try:
+                response = requests.post(
+                    f"{url}/api/generate",
+                    json={"model": model, "keep_alive": self.keep_alive},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+            except Exception as e:
+                logger.warning(f"Warm-up of {model} on {url} failed: {e}")
+                results[model] = False
+                continue
+
+            self.record_response(model, response.json(), time.time() - start, url=url)
+            with self._lock:
+                self.stats["warm_ups"] += 1
+            logger.info(f"Warmed up {model} on {url} in {time.time() - start:.1f}s")
+            results[model] = True
+        return results
+
+    def warm_up_async(self, models: Optional[List[str]] = None) -> threading.Thread:
+        """Run warm_up in a daemon thread, so server startup does not wait for it"""
+        thread = threading.Thread(target=self.warm_up, args=(models,), name="ollama-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get residency and load statistics"""
+        urls = set(self.endpoints.values()) | {self.default_url}
+        resident = {url: self.resident_models(url) for url in sorted(urls)}
+        with self._lock:
+            return {
+                **self.stats,
+                "resident": resident,
+                "models": {model: dict(stats) for model, stats in self.model_stats.items()},
+            }
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return None if self.keep_alive_seconds is None else now + self.keep_alive_seconds
+
+    def _is_resident(self, url: str, model: str, now: float) -> bool:
+        """Check residency (caller must hold the lock)"""
+        models = self._resident.get(url, {})
+        if model not in models:
+            return False
+        expires_at = models[model]
+        return expires_at is None or expires_at > now
+
+    def _mark_loaded(self, url: str, model: str, now: float):
+        """Record that a model was just used on an endpoint (caller must hold the lock)"""
+        models = self._resident.setdefault(url, {})
+        models.pop(model, None)
+        for name in [name for name in models if not self._is_resident(url, name, now)]:
+            del models[name]
+        while len(models) >= self.max_loaded_models:
+            del models[next(iter(models))]
+        models[model] = self._expiry(now)
+
+
+def get_model_residency() -> ModelResidency:
+    """Get singleton model residency tracker configured from config.json"""
+    if not hasattr(get_model_residency, '_instance'):
+        laptop_url = config.get("ollama.laptop_url", "http://localhost:11434")
+        endpoints = {}
+        homelab_model = config.get("ollama.homelab_model")
+        if homelab_model and config.get("ollama.homelab_url"):
+            endpoints[homelab_model] = config.get("ollama.homelab_url")
+        endpoints[config.get("ollama.laptop_model", "llama3.1:8b")] = laptop_url
+        get_model_residency._instance = ModelResidency(
+            endpoints,
+            default_url=laptop_url,
+            keep_alive=config.get("ollama.keep_alive", "30m"),
+            cold_start_ms=config.get("ollama.cold_start_ms", 1000),
+            max_loaded_models=config.get("ollama.max_loaded_models", 1),
+            timeout=config.get("ollama.timeout", 180),
+        )
+    return get_model_residency._instance
@@ -7,7 +7,6 @@ including provider revenue optimization, caseload management, and automated P&L
 Designed to support operational efficiency and cash flow management for expanding practices.
 """
 
-import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
@@ -16,9 +15,18 @@ import logging
 from dataclasses import dataclass, asdict
 from utils.config import get_config
 from utils.logger import get_logger
+from utils.db_open import connect_db
 
 logger = get_logger(__name__)
 
+# Rolling aggregate of office_provider_revenue: SQL expression for the start
+# of the period a service date falls in (weeks start on Monday)
+REVENUE_ROLLUP_PERIODS = {
+    'day': "date({0})",
+    'week': "date({0}, '-6 days', 'weekday 1')",
+    'month': "strftime('%Y-%m-01', {0})",
+}
+
 @dataclass
 class Office:
     """Office location data structure"""
@@ -78,7 +86,7 @@ class MultiOfficeOperations:
         
     def initialize_tables(self):
         """Initialize multi-office operations tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with connect_db(self.db_path) as conn:
             cursor = conn.cursor()
             
             # Offices table
@@ -129,6 +137,28 @@ class MultiOfficeOperations:
                 )
             ''')
             
+            # Per (period, office, provider) totals of office_provider_revenue,
+            # kept up to date by process_billing_sheets so reports read a few
+            # rows per day/month instead of every billing row
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS office_provider_revenue_rollup (
+                    period_type TEXT NOT NULL,
+                    period_start TEXT NOT NULL,
+                    office_id TEXT NOT NULL,
+                    provider_id TEXT NOT NULL,
+                    sheet_count INTEGER DEFAULT 0,
+                    session_count INTEGER DEFAULT 0,
+                    gross_revenue REAL DEFAULT 0,
+                    provider_cut REAL DEFAULT 0,
+                    company_cut REAL DEFAULT 0,
+                    PRIMARY KEY (period_type, period_start, office_id, provider_id)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_revenue_rollup_provider
+                ON office_provider_revenue_rollup (provider_id, period_type, period_start)
+            ''')
+            
             # Business metrics tracking
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS business_metrics (
@@ -145,13 +175,19 @@ class MultiOfficeOperations:
                 )
             ''')
             
+            # Databases with billing rows from before the rollup existed
+            has_rollup = cursor.execute('SELECT 1 FROM office_provider_revenue_rollup LIMIT 1').fetchone()
+            has_revenue = cursor.execute('SELECT 1 FROM office_provider_revenue LIMIT 1').fetchone()
+            if has_revenue and not has_rollup:
+                self._fill_revenue_rollup(conn)
+            
             conn.commit()
             logger.info("Multi-office operations tables initialized")
     
     def add_office(self, office: Office) -> bool:
         """Add a new office location"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO offices 
@@ -173,7 +209,7 @@ class MultiOfficeOperations:
     def assign_provider_to_office(self, assignment: ProviderAssignment) -> bool:
         """Assign a provider to an office with capacity details"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 # End any existing assignments for this provider/office
@@ -215,60 +251,233 @@ class MultiOfficeOperations:
         Returns:
             Dict with revenue breakdown and profit analysis
         """
-        try:
-            # Get provider contract details
-            provider_contract = self._get_provider_contract(provider_id)
-            if not provider_contract:
-                raise ValueError(f"No contract found for provider {provider_id}")
-            
-            # Calculate totals
-            total_sessions = len(sessions)
-            gross_revenue = sum(session.get('amount', 0) for session in sessions)
-            
-            # Apply provider contract percentages
-            provider_percentage = provider_contract['provider_percentage'] / 100
-            company_percentage = provider_contract['company_percentage'] / 100
+        return self.process_billing_sheets([{
+            'provider_id': provider_id,
+            'office_id': office_id,
+            'service_date': service_date,
+            'sessions': sessions
+        }])[0]
+    
+    def process_billing_sheets(self, sheets: List[Dict]) -> List[Dict]:
+        """
+        Process a batch of billing sheets in one database round trip
+        
+        Contracts, provider names and office names for every referenced
+        provider and office are fetched up front, the revenue splits are
+        computed in one pass, and all rows (and their revenue rollup
+        updates) are written in a single transaction.
+        
+        Args:
+            sheets: Billing sheets, each with provider_id, office_id,
+                service_date and sessions (list of session data with amounts)
             
-            provider_cut = gross_revenue * provider_percentage
-            company_cut = gross_revenue * company_percentage
+        Returns:
+            List of revenue breakdowns in the order of the sheets ({} for a
+            sheet that could not be processed, e.g. no provider contract)
+        """
+        results = [{} for _ in sheets]
+        if not sheets:
+            return results
+        
+        try:
+            provider_ids = list(dict.fromkeys(sheet['provider_id'] for sheet in sheets))
+            office_ids = list(dict.fromkeys(sheet['office_id'] for sheet in sheets))
             
-            # Store in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
+            with connect_db(self.db_path) as conn:
+                contracts = self._get_provider_contracts(conn, provider_ids)
+                provider_names = self._get_provider_names(conn, provider_ids)
+                office_names = self._get_office_names(conn, office_ids)
+                
+                rows = []
+                for index, sheet in enumerate(sheets):
+                    provider_id = sheet['provider_id']
+                    provider_contract = contracts.get(provider_id)
+                    if not provider_contract:
+                        logger.error(f"Error processing billing sheet: No contract found for provider {provider_id}")
+                        continue
+                    # Checked here so one bad sheet does not fail the whole insert
+                    if sheet['office_id'] not in office_names:
+                        logger.error(f"Error processing billing sheet: Unknown office {sheet['office_id']}")
+                        continue
+                    
+                    # Calculate totals
+                    sessions = sheet['sessions']
+                    total_sessions = len(sessions)
+                    gross_revenue = sum(session.get('amount', 0) for session in sessions)
+                    
+                    # Apply provider contract percentages
+                    provider_cut = gross_revenue * provider_contract['provider_percentage'] / 100
+                    company_cut = gross_revenue * provider_contract['company_percentage'] / 100
+                    
+                    rows.append((provider_id, sheet['office_id'], sheet['service_date'], total_sessions,
+                                 gross_revenue, provider_cut, company_cut))
+                    results[index] = {
+                        'provider_id': provider_id,
+                        'provider_name': provider_names[provider_id],
+                        'office_id': sheet['office_id'],
+                        'office_name': office_names[sheet['office_id']],
+                        'service_date': sheet['service_date'],
+                        'total_sessions': total_sessions,
+                        'gross_revenue': gross_revenue,
+                        'provider_cut': provider_cut,
+                        'company_cut': company_cut,
+                        'provider_percentage': provider_contract['provider_percentage'],
+                        'company_percentage': provider_contract['company_percentage'],
+                        'revenue_per_session': gross_revenue / total_sessions if total_sessions > 0 else 0
+                    }
+                
+                # Store in database
+                conn.executemany('''
                     INSERT INTO office_provider_revenue
                     (provider_id, office_id, service_date, session_count, 
                      gross_revenue, provider_cut, company_cut)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (provider_id, office_id, service_date, total_sessions, 
-                      gross_revenue, provider_cut, company_cut))
+                ''', rows)
+                self._add_to_revenue_rollup(conn, rows)
                 conn.commit()
             
-            # Get provider and office names for reporting
-            provider_name = self._get_provider_name(provider_id)
-            office_name = self._get_office_name(office_id)
+            total_revenue = sum(row[4] for row in rows)
+            logger.info(f"Processed {len(rows)}/{len(sheets)} billing sheets: ${total_revenue:.2f} revenue")
+            return results
             
-            result = {
-                'provider_id': provider_id,
-                'provider_name': provider_name,
-                'office_id': office_id,
-                'office_name': office_name,
-                'service_date': service_date,
-                'total_sessions': total_sessions,
-                'gross_revenue': gross_revenue,
-                'provider_cut': provider_cut,
-                'company_cut': company_cut,
-                'provider_percentage': provider_contract['provider_percentage'],
-                'company_percentage': provider_contract['company_percentage'],
-                'revenue_per_session': gross_revenue / total_sessions if total_sessions > 0 else 0
-            }
+        except Exception as e:
+            logger.error(f"Error processing billing sheets: {e}")
+            return [{} for _ in sheets]
+    
+    def _add_to_revenue_rollup(self, conn, rows: List[Tuple]):
+        """Fold new office_provider_revenue rows into the rollup table
+        
+        Args:
+            conn: Connection inside the transaction that inserted the rows
+            rows: (provider_id, office_id, service_date, session_count,
+                gross_revenue, provider_cut, company_cut) tuples
+        """
+        for period_type, period_expr in REVENUE_ROLLUP_PERIODS.items():
+            conn.executemany(f'''
+                INSERT INTO office_provider_revenue_rollup
+                (period_type, period_start, office_id, provider_id, sheet_count,
+                 session_count, gross_revenue, provider_cut, company_cut)
+                VALUES ('{period_type}', COALESCE({period_expr.format("?3")}, ?3), ?2, ?1, 1, ?4, ?5, ?6, ?7)
+                ON CONFLICT (period_type, period_start, office_id, provider_id) DO UPDATE SET
+                    sheet_count = sheet_count + 1,
+                    session_count = session_count + excluded.session_count,
+                    gross_revenue = gross_revenue + excluded.gross_revenue,
+                    provider_cut = provider_cut + excluded.provider_cut,
+                    company_cut = company_cut + excluded.company_cut
+            ''', rows)
+    
+    def _fill_revenue_rollup(self, conn):
+        """Build the rollup table from all office_provider_revenue rows"""
+        for period_type, period_expr in REVENUE_ROLLUP_PERIODS.items():
+            conn.execute(f'''
+                INSERT INTO office_provider_revenue_rollup
+                (period_type, period_start, office_id, provider_id, sheet_count,
+                 session_count, gross_revenue, provider_cut, company_cut)
+                SELECT '{period_type}', COALESCE({period_expr.format("service_date")}, service_date) AS period_start,
+                       office_id, provider_id, COUNT(*), SUM(session_count), SUM(gross_revenue),
+                       SUM(provider_cut), SUM(company_cut)
+                FROM office_provider_revenue
+                GROUP BY period_start, office_id, provider_id
+            ''')
+        logger.info("Built office revenue rollup from billing rows")
+    
+    def rebuild_revenue_rollup(self) -> bool:
+        """Rebuild the revenue rollup, e.g. after editing office_provider_revenue by hand"""
+        try:
+            with connect_db(self.db_path) as conn:
+                conn.execute('DELETE FROM office_provider_revenue_rollup')
+                self._fill_revenue_rollup(conn)
+                conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error rebuilding revenue rollup: {e}")
+            return False
+    
+    @staticmethod
+    def _rollup_ranges(start_date: str, end_date: str) -> List[Tuple[str, str, str]]:
+        """Cover a date range with as few rollup rows as possible
+        
+        Whole calendar months are read from the month rows and the days
+        before and after them from the day rows, so a year-long report
+        reads about as many rows as a month-long one.
+        
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
             
-            logger.info(f"Processed billing sheet for {provider_name} at {office_name}: ${gross_revenue:.2f} revenue")
-            return result
+        Returns:
+            List of (period_type, first period_start, last period_start)
+        """
+        start = datetime.strptime(start_date[:10], '%Y-%m-%d').date()
+        end = datetime.strptime(end_date[:10], '%Y-%m-%d').date()
+        if start > end:
+            return []
+        
+        def next_month(day):
+            return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        
+        first_month = start if start.day == 1 else next_month(start)
+        # Last month that ends on or before end_date
+        last_month = end.replace(day=1)
+        if next_month(last_month) - timedelta(days=1) != end:
+            last_month = (last_month - timedelta(days=1)).replace(day=1)
+        if first_month > last_month:
+            return [('day', start_date, end_date)]
+        
+        ranges = []
+        if start < first_month:
+            ranges.append(('day', start_date, str(first_month - timedelta(days=1))))
+        ranges.append(('month', str(first_month), str(last_month)))
+        if next_month(last_month) <= end:
+            ranges.append(('day', str(next_month(last_month)), end_date))
+        return ranges
+    
+    def get_revenue_trend(self, period_type: str = 'week', start_date: str = None,
+                          end_date: str = None, office_id: str = None,
+                          provider_id: str = None) -> List[Dict]:
+        """Get revenue totals per day, week or month from the rollup table
+        
+        Args:
+            period_type: 'day', 'week' (starting Monday) or 'month'
+            start_date: First period start (default: 12 weeks ago)
+            end_date: Last period start (default: today)
+            office_id: Only this office
+            provider_id: Only this provider
             
-        except Exception as e:
-            logger.error(f"Error processing billing sheet: {e}")
-            return {}
+        Returns:
+            List of period totals, oldest first
+        """
+        if period_type not in REVENUE_ROLLUP_PERIODS:
+            raise ValueError(f"Unknown period type: {period_type}")
+        if not start_date:
+            start_date = (datetime.now() - timedelta(weeks=12)).strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        
+        filters = ["period_type = ?", "period_start BETWEEN ? AND ?"]
+        params = [period_type, start_date, end_date]
+        if office_id:
+            filters.append("office_id = ?")
+            params.append(office_id)
+        if provider_id:
+            filters.append("provider_id = ?")
+            params.append(provider_id)
+        
+        with connect_db(self.db_path) as conn:
+            trend_df = pd.read_sql_query(f'''
+                SELECT 
+                    period_start,
+                    SUM(sheet_count) as sheet_count,
+                    SUM(session_count) as total_sessions,
+                    SUM(gross_revenue) as total_revenue,
+                    SUM(provider_cut) as total_provider_payments,
+                    SUM(company_cut) as total_company_revenue
+                FROM office_provider_revenue_rollup
+                WHERE {" AND ".join(filters)}
+                GROUP BY period_start
+                ORDER BY period_start
+            ''', conn, params=params)
+        return trend_df.round(2).to_dict('records')
     
     def get_provider_caseload_analysis(self, provider_id: str, 
                                      start_date: str = None, end_date: str = None) -> Dict:
@@ -279,18 +488,24 @@ class MultiOfficeOperations:
             if not end_date:
                 end_date = datetime.now().strftime('%Y-%m-%d')
             
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 # Get provider revenue data
                 revenue_df = pd.read_sql_query('''
                     SELECT 
-                        opr.*,
+                        r.period_start as service_date,
+                        r.office_id,
+                        r.sheet_count,
+                        r.session_count,
+                        r.gross_revenue,
+                        r.provider_cut,
+                        r.company_cut,
                         o.name as office_name,
                         o.capacity_sessions_per_day
-                    FROM office_provider_revenue opr
-                    JOIN offices o ON opr.office_id = o.office_id
-                    WHERE opr.provider_id = ? 
-                    AND opr.service_date BETWEEN ? AND ?
-                    ORDER BY opr.service_date
+                    FROM office_provider_revenue_rollup r
+                    JOIN offices o ON r.office_id = o.office_id
+                    WHERE r.provider_id = ? AND r.period_type = 'day'
+                    AND r.period_start BETWEEN ? AND ?
+                    ORDER BY r.period_start
                 ''', conn, params=[provider_id, start_date, end_date])
                 
                 if revenue_df.empty:
@@ -307,20 +522,19 @@ class MultiOfficeOperations:
                 ''', conn, params=[provider_id, start_date, end_date])
             
             # Calculate metrics
-            total_sessions = revenue_df['session_count'].sum()
+            total_sessions = int(revenue_df['session_count'].sum())
             total_revenue = revenue_df['gross_revenue'].sum()
             total_provider_cut = revenue_df['provider_cut'].sum()
             total_company_cut = revenue_df['company_cut'].sum()
             
+            # One rollup row per office and day worked
             working_days = len(revenue_df)
             avg_sessions_per_day = total_sessions / working_days if working_days > 0 else 0
             avg_revenue_per_session = total_revenue / total_sessions if total_sessions > 0 else 0
             
             # Calculate capacity utilization
-            total_capacity = 0
-            for _, assignment in assignments_df.iterrows():
-                days_in_period = min(working_days, assignment['days_per_week'] * 4)  # Approximate month
-                total_capacity += days_in_period * assignment['max_sessions_per_day']
+            days_in_period = assignments_df['days_per_week'].mul(4).clip(upper=working_days)  # Approximate month
+            total_capacity = int(days_in_period.mul(assignments_df['max_sessions_per_day']).sum())
             
             capacity_utilization = (total_sessions / total_capacity * 100) if total_capacity > 0 else 0
             
@@ -358,9 +572,18 @@ class MultiOfficeOperations:
             if not end_date:
                 end_date = datetime.now().strftime('%Y-%m-%d')
             
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 # Base query for all offices or specific office
-                office_filter = f"AND o.office_id = '{office_id}'" if office_id else ""
+                office_filter = "AND o.office_id = ?" if office_id else ""
+                
+                # Read the period from month and day rollup rows
+                ranges = self._rollup_ranges(start_date, end_date) or [('day', start_date, end_date)]
+                range_filter = " OR ".join(
+                    "(r.period_type = ? AND r.period_start BETWEEN ? AND ?)" for _ in ranges
+                )
+                params = [value for period_range in ranges for value in period_range]
+                if office_id:
+                    params.append(office_id)
                 
                 query = f'''
                     SELECT 
@@ -369,19 +592,22 @@ class MultiOfficeOperations:
                         o.overhead_monthly,
                         o.rent_monthly,
                         o.capacity_sessions_per_day,
-                        COUNT(DISTINCT opr.provider_id) as provider_count,
-                        SUM(opr.session_count) as total_sessions,
-                        SUM(opr.gross_revenue) as total_revenue,
-                        SUM(opr.provider_cut) as total_provider_payments,
-                        SUM(opr.company_cut) as total_company_revenue
+                        COUNT(DISTINCT r.provider_id) as provider_count,
+                        SUM(r.session_count) as total_sessions,
+                        SUM(r.gross_revenue) as total_revenue,
+                        SUM(r.provider_cut) as total_provider_payments,
+                        SUM(r.company_cut) as total_company_revenue
                     FROM offices o
-                    LEFT JOIN office_provider_revenue opr ON o.office_id = opr.office_id
-                        AND opr.service_date BETWEEN ? AND ?
+                    LEFT JOIN office_provider_revenue_rollup r ON o.office_id = r.office_id
+                        AND ({range_filter})
                     WHERE o.active = 1 {office_filter}
                     GROUP BY o.office_id, o.name, o.overhead_monthly, o.rent_monthly, o.capacity_sessions_per_day
                 '''
                 
-                office_df = pd.read_sql_query(query, conn, params=[start_date, end_date])
+                office_df = pd.read_sql_query(query, conn, params=params)
+                # Offices with no billing in the period have NULL sums
+                total_columns = ['total_sessions', 'total_revenue', 'total_provider_payments', 'total_company_revenue']
+                office_df[total_columns] = office_df[total_columns].fillna(0)
                 
                 # Calculate profitability metrics
                 report_data = []
@@ -407,8 +633,8 @@ class MultiOfficeOperations:
                     office_data = {
                         'office_id': office['office_id'],
                         'office_name': office['office_name'],
-                        'provider_count': office['provider_count'] or 0,
-                        'total_sessions': office['total_sessions'] or 0,
+                        'provider_count': int(office['provider_count']),
+                        'total_sessions': int(office['total_sessions']),
                         'total_revenue': round(office['total_revenue'] or 0, 2),
                         'total_provider_payments': round(office['total_provider_payments'] or 0, 2),
                         'total_company_revenue': round(office['total_company_revenue'] or 0, 2),
@@ -491,15 +717,15 @@ class MultiOfficeOperations:
                 growth_required = 0
             
             # Get provider metrics for growth recommendations
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 provider_df = pd.read_sql_query('''
                     SELECT 
                         provider_id,
                         SUM(session_count) as total_sessions,
                         SUM(gross_revenue) as total_revenue,
-                        COUNT(DISTINCT service_date) as working_days
-                    FROM office_provider_revenue
-                    WHERE service_date >= ?
+                        COUNT(DISTINCT period_start) as working_days
+                    FROM office_provider_revenue_rollup
+                    WHERE period_type = 'day' AND period_start >= ?
                     GROUP BY provider_id
                 ''', conn, params=[start_date])
             
@@ -509,10 +735,10 @@ class MultiOfficeOperations:
                 provider_metrics.append({
                     'provider_id': provider['provider_id'],
                     'provider_name': self._get_provider_name(provider['provider_id']),
-                    'total_sessions': provider['total_sessions'],
+                    'total_sessions': int(provider['total_sessions']),
                     'total_revenue': provider['total_revenue'],
                     'avg_sessions_per_day': round(avg_sessions_per_day, 2),
-                    'working_days': provider['working_days']
+                    'working_days': int(provider['working_days'])
                 })
             
             return {
@@ -573,31 +799,8 @@ class MultiOfficeOperations:
     def _get_provider_contract(self, provider_id: str) -> Optional[Dict]:
         """Get provider contract details from business intelligence system"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT provider_percentage, company_percentage
-                    FROM business_memory 
-                    WHERE key = ?
-                ''', (f'provider_contract_{provider_id}',))
-                
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'provider_percentage': result[0],
-                        'company_percentage': result[1]
-                    }
-                
-                # Fallback to default contracts if not found in memory
-                default_contracts = {
-                    'dustin': {'provider_percentage': 65, 'company_percentage': 35},
-                    'sidney': {'provider_percentage': 60, 'company_percentage': 40},
-                    'tammy': {'provider_percentage': 91.1, 'company_percentage': 8.9},
-                    'isabel': {'provider_percentage': 100, 'company_percentage': 0}
-                }
-                
-                return default_contracts.get(provider_id.lower())
-                
+            with connect_db(self.db_path) as conn:
+                return self._get_provider_contracts(conn, [provider_id])[provider_id]
         except Exception as e:
             logger.error(f"Error getting provider contract: {e}")
             return None
@@ -605,7 +808,7 @@ class MultiOfficeOperations:
     def _get_provider_name(self, provider_id: str) -> str:
         """Get provider name from database or return formatted ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT provider_name FROM medical_data 
@@ -623,7 +826,7 @@ class MultiOfficeOperations:
     def _get_office_name(self, office_id: str) -> str:
         """Get office name from database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT name FROM offices WHERE office_id = ?', (office_id,))
                 result = cursor.fetchone()
@@ -633,6 +836,67 @@ class MultiOfficeOperations:
             logger.error(f"Error getting office name: {e}")
             return office_id
 
+    def _get_provider_contracts(self, conn, provider_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Get the contracts of several providers, falling back to the default contracts"""
+        try:
+            cursor = conn.execute(f'''
+                SELECT key, provider_percentage, company_percentage
+                FROM business_memory 
+                WHERE key IN ({", ".join("?" * len(provider_ids))})
+            ''', [f'provider_contract_{provider_id}' for provider_id in provider_ids])
+            stored = {
+                key: {'provider_percentage': provider_percentage, 'company_percentage': company_percentage}
+                for key, provider_percentage, company_percentage in cursor.fetchall()
+            }
+        except Exception as e:
+            # business_memory may not have contract columns; use the defaults
+            logger.warning(f"Could not read stored provider contracts, using defaults: {e}")
+            stored = {}
+        
+        default_contracts = {
+            'dustin': {'provider_percentage': 65, 'company_percentage': 35},
+            'sidney': {'provider_percentage': 60, 'company_percentage': 40},
+            'tammy': {'provider_percentage': 91.1, 'company_percentage': 8.9},
+            'isabel': {'provider_percentage': 100, 'company_percentage': 0}
+        }
+        return {
+            provider_id: stored.get(f'provider_contract_{provider_id}') or default_contracts.get(provider_id.lower())
+            for provider_id in provider_ids
+        }
+    
+    def _get_provider_names(self, conn, provider_ids: List[str]) -> Dict[str, str]:
+        """Get the names of several providers (see _get_provider_name)"""
+        names = {provider_id: provider_id.title() for provider_id in provider_ids}
+        try:
+            # One scan for all IDs; rows come back in table order, so each ID
+            # gets the same name as a LIKE ... LIMIT 1 lookup would
+            cursor = conn.execute(f'''
+                SELECT provider_name, MIN(rowid) AS first_row FROM medical_data 
+                WHERE {" OR ".join("provider_name LIKE ?" for _ in provider_ids)}
+                GROUP BY provider_name
+                ORDER BY first_row
+            ''', [f'%{provider_id}%' for provider_id in provider_ids])
+            found = [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting provider names: {e}")
+            return names
+        
+        for provider_id in provider_ids:
+            needle = provider_id.lower()
+            match = next((name for name in found if needle in name.lower()), None)
+            if match:
+                names[provider_id] = match
+        return names
+    
+    def _get_office_names(self, conn, office_ids: List[str]) -> Dict[str, str]:
+        """Get the names of several offices; offices that do not exist are left out"""
+        cursor = conn.execute(
+            f'SELECT office_id, name FROM offices WHERE office_id IN ({", ".join("?" * len(office_ids))})',
+            office_ids
+        )
+        return dict(cursor.fetchall())
+
+
 def main():
     """Demo function showing multi-office operations capabilities"""
     ops = MultiOfficeOperations()
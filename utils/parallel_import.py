@@ -0,0 +1,184 @@
+"""
+Parallel folder import for HVLC_DB.
+
+Runs the CPU-bound part of importing a file (format detection, CSV parsing
+and transformation) for many files at once in a process pool, and funnels
+the results through a single writer on the calling thread. SQLite takes
+one writer at a time, so inserts stay serial and happen in file order,
+exactly as a one-file-at-a-time import would apply them.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence
+
+import pandas as pd
+
+from utils.config import get_config
+from utils.logger import get_logger
+from utils.csv_processor import count_csv_rows, get_optimal_chunksize
+
+logger = get_logger()
+config = get_config()
+
+# Per-process detector/transformer, created on first use in each worker
+_transformer = None
+
+
+def import_worker_count(max_workers: int = None, file_count: int = None) -> int:
+    """Get the number of import worker processes
+
+    Args:
+        max_workers: Requested workers (default: imports.max_workers, then CPU count)
+        file_count: Number of files to import, which caps the worker count
+
+    Returns:
+        Worker count, at least 1
+    """
+    workers = max_workers or config.get("imports.max_workers") or os.cpu_count() or 1
+    if file_count is not None:
+        workers = min(workers, file_count)
+    return max(1, workers)
+
+
+def import_files(file_paths: Sequence[str],
+                 prepare: Callable[[str], Any],
+                 write: Callable[[str, Any], Dict],
+                 max_workers: int = None,
+                 rows_key: str = "total_rows_processed") -> List[Dict]:
+    """Prepare files in parallel and write them in order
+
+    Args:
+        file_paths: Files to import, in the order they should be written
+        prepare: Picklable function run in a worker for each file path
+        write: Function called on this thread with (file_path, prepared) in
+            file order; returns the file's result dictionary
+        max_workers: Worker processes (default: see import_worker_count)
+        rows_key: Result key holding the file's row count, for throughput
+
+    Returns:
+        Result dictionaries, in file order
+    """
+    workers = import_worker_count(max_workers, len(file_paths))
+    start_time = time.time()
+    results = []
+    total_rows = 0
+
+    def finish(index: int, file_path: str, prepared: Any) -> None:
+        nonlocal total_rows
+        write_start = time.time()
+        result = write(file_path, prepared)
+        results.append(result)
+
+        rows = result.get(rows_key) or 0
+        total_rows += rows
+        prepare_time = prepared.get("prepare_time", 0) if isinstance(prepared, dict) else 0
+        elapsed = time.time() - start_time
+        logger.info(
+            f"[{index + 1}/{len(file_paths)}] {os.path.basename(file_path)}: {rows:,} rows, "
+            f"prepared in {prepare_time:.2f}s, written in {time.time() - write_start:.2f}s "
+            f"({total_rows / elapsed if elapsed > 0 else 0:,.0f} rows/s overall)"
+        )
+
+    def prepared_or_error(file_path: str, get: Callable[[], Any]) -> Any:
+        try:
+            return get()
+        except Exception as e:
+            logger.error(f"Error preparing {file_path}: {e}")
+            return {"error": str(e)}
+
+    if workers == 1:
+        for index, file_path in enumerate(file_paths):
+            finish(index, file_path, prepared_or_error(file_path, lambda: prepare(file_path)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded window in flight so prepared DataFrames do not pile up
+            window = workers * 2
+            pending = []
+            for index, file_path in enumerate(file_paths):
+                while len(pending) < window and index + len(pending) < len(file_paths):
+                    pending.append(pool.submit(prepare, file_paths[index + len(pending)]))
+                finish(index, file_path, prepared_or_error(file_path, pending.pop(0).result))
+
+    elapsed = time.time() - start_time
+    logger.info(
+        f"Imported {len(file_paths)} files ({total_rows:,} rows) in {elapsed:.2f}s with {workers} workers "
+        f"({total_rows / elapsed if elapsed > 0 else 0:,.0f} rows/s)"
+    )
+    return results
+
+
+def prepare_transformed_file(file_path: str, format_name: str = None) -> Dict:
+    """Detect the format of a file and transform it (worker side of ImportHelper)
+
+    Args:
+        file_path: Path to CSV file
+        format_name: Optional format name (detected if not provided)
+
+    Returns:
+        Dictionary with format_name, confidence, df and transform_metadata, or
+        with an error if the format could not be detected
+    """
+    global _transformer
+    from utils.format_detector import ReportFormatDetector
+    from utils.report_transformer import ReportTransformer
+
+    start_time = time.time()
+    if _transformer is None:
+        _transformer = ReportTransformer(ReportFormatDetector())
+
+    confidence = None
+    if not format_name:
+        detection_result = _transformer.format_detector.detect_format(file_path)
+        format_name = detection_result.format_name
+        confidence = detection_result.confidence
+        if not format_name:
+            return {"error": f"Could not detect format for {file_path}", "prepare_time": time.time() - start_time}
+
+    df, transform_metadata = _transformer.transform(file_path, format_name)
+    return {
+        "format_name": format_name,
+        "confidence": confidence,
+        "df": df,
+        "transform_metadata": transform_metadata,
+        "prepare_time": time.time() - start_time
+    }
+
+
+def read_csv_chunks(file_path: str, chunk_size: int = None, max_bytes: int = None) -> Dict:
+    """Read a CSV file into chunks (worker side of BulkUploadManager)
+
+    Only files up to ``max_bytes`` are read here. Every chunk is pickled back
+    to the writer, so larger files just get their rows counted and are then
+    streamed chunk by chunk by the writer itself.
+
+    Args:
+        file_path: Path to CSV file
+        chunk_size: Rows per chunk (calculated from the file if not provided)
+        max_bytes: Largest file to read ahead (default: imports.preread_max_mb)
+
+    Returns:
+        Dictionary with total_rows, chunk_size and (for small files) chunks,
+        or with an error
+    """
+    start_time = time.time()
+    if not os.path.exists(file_path):
+        return {"error": f"File not found: {file_path}"}
+
+    if max_bytes is None:
+        max_bytes = (config.get("imports.preread_max_mb") or 0) * 1024 * 1024
+
+    try:
+        chunk_size = chunk_size or get_optimal_chunksize(file_path)
+        prepared = {
+            "total_rows": count_csv_rows(file_path) - 1,  # Subtract header
+            "chunk_size": chunk_size,
+        }
+        if os.path.getsize(file_path) <= max_bytes:
+            prepared["chunks"] = list(pd.read_csv(file_path, chunksize=chunk_size))
+        prepared["prepare_time"] = time.time() - start_time
+        return prepared
+    except Exception as e:
+        logger.error(f"Error reading {file_path}: {e}")
+        return {"error": str(e), "prepare_time": time.time() - start_time}
@@ -6,10 +6,151 @@ This module handles provider compensation calculations based on business rules:
 - Owners get 100% minus fees: 2.9% credit card fee + $35 monthly jitsu fee
 """
 
+import os
 import sqlite3
+import threading
 from datetime import datetime
+from fnmatch import fnmatchcase
 from typing import Dict, List, Tuple, Optional
 from decimal import Decimal, ROUND_HALF_UP
+from utils.db_open import connect_db
+
+EXCLUDED_PROVIDERS = ('Unknown', 'Test Provider', 'Another Provider')
+
+# Deduplicated revenue and "paid at session" payments per provider and month.
+# Duplicate transactions keep only their first occurrence, as in
+# ProviderCompensationCalculator.calculate_monthly_revenue.
+BATCH_REVENUE_SQL = """
+    SELECT provider_name, year, month,
+           COALESCE(SUM(CASE WHEN rn = 1 THEN cash_applied END), 0) as total_revenue,
+           COALESCE(SUM(CASE WHEN paid_at_session THEN cash_applied END), 0) as session_payments
+    FROM (
+        SELECT p.provider_name,
+               CAST(strftime('%Y', pt.transaction_date) AS INTEGER) as year,
+               CAST(strftime('%m', pt.transaction_date) AS INTEGER) as month,
+               pt.cash_applied,
+               LOWER(COALESCE(pt.notes, '')) LIKE '%paid at session%' as paid_at_session,
+               ROW_NUMBER() OVER (
+                   PARTITION BY p.provider_name, pt.transaction_date, pt.cash_applied,
+                                COALESCE(pt.payer_name, ''), COALESCE(pt.claim_number, '')
+                   ORDER BY pt.transaction_id
+               ) as rn
+        FROM payment_transactions pt
+        JOIN providers p ON pt.provider_id = p.provider_id
+        WHERE pt.transaction_date >= ? AND pt.transaction_date < ?
+    ) deduplicated
+    GROUP BY provider_name, year, month
+"""
+
+
+def iter_months(start: Tuple[int, int], end: Tuple[int, int]):
+    """Yield (year, month) pairs from start to end inclusive."""
+    year, month = start
+    while (year, month) <= tuple(end):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _month_start(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}-01"
+
+
+class BillingCSVIndex:
+    """Index of monthly billing CSV exports by (provider, month).
+    
+    The folder listing is cached until the directory's mtime changes and the
+    'Cash Applied' total of each file is cached until that file's mtime or
+    size changes, so month-by-month reports read each CSV at most once.
+    """
+    
+    def __init__(self, csv_folder: str):
+        self.csv_folder = csv_folder
+        self._lock = threading.Lock()
+        self._listing_key = None
+        self._names: List[str] = []
+        self._paths: Dict[Tuple[str, int, int], Optional[str]] = {}
+        self._totals: Dict[str, Tuple[Tuple[int, int], float]] = {}
+    
+    @staticmethod
+    def patterns(provider_name: str, year: int, month: int) -> List[str]:
+        """Filename patterns for a provider's monthly export, in priority order."""
+        first_name = provider_name.split()[0]
+        yy = str(year)[-2:]
+        return [
+            f"{month}-31-{yy}*{first_name}*.csv",
+            f"{month:02d}-31-{yy}*{first_name}*.csv",
+            f"{month}-31-{yy}*Payments*{first_name}*.csv",
+            f"{month:02d}-31-{yy}*Payments*{first_name}*.csv",
+            f"{month}-{yy}*{first_name}*.csv",
+            f"{month:02d}-{yy}*{first_name}*.csv"
+        ]
+    
+    def _refresh(self):
+        try:
+            stat = os.stat(self.csv_folder)
+            listing_key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            listing_key = None
+        if listing_key != self._listing_key:
+            self._names = [] if listing_key is None else [
+                entry.name for entry in os.scandir(self.csv_folder)
+                if not entry.name.startswith('.')
+            ]
+            self._paths.clear()
+            self._listing_key = listing_key
+    
+    def find(self, provider_name: str, year: int, month: int) -> Optional[str]:
+        """Get the CSV export for a provider and month.
+        
+        Args:
+            provider_name: Provider name
+            year: Year
+            month: Month (1-12)
+            
+        Returns:
+            Path of the first file matching the filename patterns, or None
+        """
+        key = (provider_name.split()[0], year, month)
+        with self._lock:
+            self._refresh()
+            if key not in self._paths:
+                self._paths[key] = None
+                for pattern in self.patterns(provider_name, year, month):
+                    matches = [name for name in self._names if fnmatchcase(name, pattern)]
+                    if matches:
+                        self._paths[key] = os.path.join(self.csv_folder, matches[0])
+                        break
+            return self._paths[key]
+    
+    def total(self, path: str) -> float:
+        """Get the sum of 'Cash Applied' in a CSV file, reading it only when it changed."""
+        import pandas as pd
+        
+        stat = os.stat(path)
+        file_key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._totals.get(path)
+        if cached and cached[0] == file_key:
+            return cached[1]
+        
+        print(f"Found CSV file: {path}")
+        total = float(pd.read_csv(path)['Cash Applied'].sum())
+        with self._lock:
+            self._totals[path] = (file_key, total)
+        return total
+
+
+_csv_indexes: Dict[str, BillingCSVIndex] = {}
+_csv_indexes_lock = threading.Lock()
+
+
+def get_billing_csv_index(csv_folder: str) -> BillingCSVIndex:
+    """Get the shared CSV index for a billing folder."""
+    csv_folder = os.path.abspath(csv_folder)
+    with _csv_indexes_lock:
+        if csv_folder not in _csv_indexes:
+            _csv_indexes[csv_folder] = BillingCSVIndex(csv_folder)
+        return _csv_indexes[csv_folder]
 
 
 class ProviderCompensationCalculator:
@@ -28,11 +169,16 @@ class ProviderCompensationCalculator:
         # Owner fees
         self.credit_card_fee_rate = 0.029  # 2.9%
         self.monthly_jitsu_fee = 35.00     # $35
+        
+        # Monthly CSV exports used to cross-check database revenue
+        self.csv_index = get_billing_csv_index(
+            os.path.join(os.path.dirname(self.db_path), 'csv_folder', 'billing')
+        )
     
     def get_provider_info(self, provider_name: str) -> Optional[Dict]:
         """Get provider contract information from database."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -57,37 +203,12 @@ class ProviderCompensationCalculator:
     def calculate_monthly_revenue_from_csv(self, provider_name: str, year: int, month: int) -> float:
         """Calculate monthly revenue directly from CSV files as fallback."""
         try:
-            import pandas as pd
-            import os
-            import glob
-            
             # Look for CSV files matching the pattern - try multiple formats
-            csv_folder = os.path.join(os.path.dirname(self.db_path), 'csv_folder', 'billing')
-            
-            # Try different patterns for the filename
-            patterns = [
-                f"{month}-31-{str(year)[-2:]}*{provider_name.split()[0]}*.csv",
-                f"{month:02d}-31-{str(year)[-2:]}*{provider_name.split()[0]}*.csv", 
-                f"{month}-31-{str(year)[-2:]}*Payments*{provider_name.split()[0]}*.csv",
-                f"{month:02d}-31-{str(year)[-2:]}*Payments*{provider_name.split()[0]}*.csv",
-                f"{month}-{str(year)[-2:]}*{provider_name.split()[0]}*.csv",
-                f"{month:02d}-{str(year)[-2:]}*{provider_name.split()[0]}*.csv"
-            ]
-            
-            csv_files = []
-            for pattern in patterns:
-                csv_files = glob.glob(os.path.join(csv_folder, pattern))
-                if csv_files:
-                    break
+            csv_file = self.csv_index.find(provider_name, year, month)
             
-            if csv_files:
-                csv_file = csv_files[0]
-                print(f"Found CSV file: {csv_file}")
-                df = pd.read_csv(csv_file)
-                
+            if csv_file:
                 # Sum non-null Cash Applied values
-                total_revenue = df['Cash Applied'].sum()
-                return float(total_revenue)
+                return self.csv_index.total(csv_file)
             
             return 0.0
             
@@ -98,7 +219,7 @@ class ProviderCompensationCalculator:
     def calculate_monthly_revenue(self, provider_name: str, year: int, month: int) -> float:
         """Calculate total monthly revenue for a provider."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             # Format month with leading zero if needed
@@ -125,27 +246,61 @@ class ProviderCompensationCalculator:
             db_revenue = float(result[0]) if result else 0.0
             conn.close()
             
-            # If database revenue seems incorrect (too high), try CSV as fallback
-            if db_revenue > 0:
-                csv_revenue = self.calculate_monthly_revenue_from_csv(provider_name, year, month)
-                
-                # If CSV revenue is significantly different and lower, use CSV
-                if csv_revenue > 0 and csv_revenue < db_revenue * 0.9:
-                    print(f"Using CSV revenue ({csv_revenue}) instead of database revenue ({db_revenue}) due to import issues")
-                    return csv_revenue
-            else:
-                # If database revenue is 0, check if CSV has data
-                csv_revenue = self.calculate_monthly_revenue_from_csv(provider_name, year, month)
-                if csv_revenue > 0:
-                    print(f"Using CSV revenue ({csv_revenue}) because database has no data for this period")
-                    return csv_revenue
-            
-            return db_revenue
+            return self.reconcile_revenue(provider_name, year, month, db_revenue)
             
         except Exception as e:
             print(f"Error calculating monthly revenue: {e}")
             return 0.0
     
+    def reconcile_revenue(self, provider_name: str, year: int, month: int, db_revenue: float) -> float:
+        """Cross-check database revenue against the provider's monthly CSV export."""
+        # If database revenue seems incorrect (too high), try CSV as fallback
+        if db_revenue > 0:
+            csv_revenue = self.calculate_monthly_revenue_from_csv(provider_name, year, month)
+            
+            # If CSV revenue is significantly different and lower, use CSV
+            if csv_revenue > 0 and csv_revenue < db_revenue * 0.9:
+                print(f"Using CSV revenue ({csv_revenue}) instead of database revenue ({db_revenue}) due to import issues")
+                return csv_revenue
+        else:
+            # If database revenue is 0, check if CSV has data
+            csv_revenue = self.calculate_monthly_revenue_from_csv(provider_name, year, month)
+            if csv_revenue > 0:
+                print(f"Using CSV revenue ({csv_revenue}) because database has no data for this period")
+                return csv_revenue
+        
+        return db_revenue
+    
+    def calculate_revenue_range(self, start: Tuple[int, int], end: Tuple[int, int]) -> Dict[Tuple[str, int, int], Dict[str, float]]:
+        """Calculate deduplicated revenue for all providers over a range of months.
+        
+        Args:
+            start: First (year, month) of the range
+            end: Last (year, month) of the range, inclusive
+            
+        Returns:
+            Dict of (provider_name, year, month) -> {'total_revenue', 'session_payments'}
+            from the database, for months with transactions
+        """
+        end_year, end_month = end
+        end_year, end_month = (end_year + 1, 1) if end_month == 12 else (end_year, end_month + 1)
+        
+        conn = connect_db(self.db_path)
+        try:
+            rows = conn.execute(
+                BATCH_REVENUE_SQL, (_month_start(*start), _month_start(end_year, end_month))
+            ).fetchall()
+        finally:
+            conn.close()
+        
+        return {
+            (provider_name, year, month): {
+                'total_revenue': float(total_revenue),
+                'session_payments': float(session_payments)
+            }
+            for provider_name, year, month, total_revenue, session_payments in rows
+        }
+    
     def get_tiered_percentage(self, monthly_revenue: float) -> float:
         """Get the appropriate percentage based on monthly revenue tier."""
         for (min_rev, max_rev), percentage in self.tiered_rates.items():
@@ -153,9 +308,11 @@ class ProviderCompensationCalculator:
                 return percentage
         return 0.60  # Default to 60% if no tier matches
     
-    def calculate_contractor_compensation(self, provider_name: str, year: int, month: int) -> Dict:
+    def calculate_contractor_compensation(self, provider_name: str, year: int, month: int,
+                                          monthly_revenue: float = None) -> Dict:
         """Calculate compensation for contractors using tiered system."""
-        monthly_revenue = self.calculate_monthly_revenue(provider_name, year, month)
+        if monthly_revenue is None:
+            monthly_revenue = self.calculate_monthly_revenue(provider_name, year, month)
         percentage = self.get_tiered_percentage(monthly_revenue)
         compensation = monthly_revenue * percentage
         
@@ -170,12 +327,17 @@ class ProviderCompensationCalculator:
             'net_compensation': compensation
         }
     
-    def calculate_owner_compensation(self, provider_name: str, year: int, month: int) -> Dict:
+    def calculate_owner_compensation(self, provider_name: str, year: int, month: int,
+                                     monthly_revenue: float = None, session_payments: float = None) -> Dict:
         """Calculate compensation for owners (100% minus fees)."""
-        monthly_revenue = self.calculate_monthly_revenue(provider_name, year, month)
+        if monthly_revenue is None:
+            monthly_revenue = self.calculate_monthly_revenue(provider_name, year, month)
         
         # Calculate credit card fees (only on "paid at session" transactions)
-        cc_fees = self.calculate_credit_card_fees(provider_name, year, month)
+        if session_payments is None:
+            cc_fees = self.calculate_credit_card_fees(provider_name, year, month)
+        else:
+            cc_fees = session_payments * self.credit_card_fee_rate
         
         # Monthly jitsu fee
         jitsu_fee = self.monthly_jitsu_fee
@@ -199,7 +361,7 @@ class ProviderCompensationCalculator:
     def calculate_credit_card_fees(self, provider_name: str, year: int, month: int) -> float:
         """Calculate credit card fees on 'paid at session' transactions."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             month_str = f"{month:02d}"
@@ -245,30 +407,58 @@ class ProviderCompensationCalculator:
     
     def get_all_provider_compensation(self, year: int, month: int) -> List[Dict]:
         """Get compensation for all active providers for a given month."""
+        return self.get_compensation_range((year, month), (year, month)).get((year, month), [])
+    
+    def get_compensation_range(self, start: Tuple[int, int], end: Tuple[int, int]) -> Dict[Tuple[int, int], List[Dict]]:
+        """Get compensation for all active providers over a range of months.
+        
+        Revenue for every provider and month comes from one grouped query, and
+        each monthly CSV export is read at most once for the cross-check.
+        
+        Args:
+            start: First (year, month) of the range
+            end: Last (year, month) of the range, inclusive
+            
+        Returns:
+            Dict of (year, month) -> list of compensation dicts, one per provider
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT provider_name FROM providers 
+            cursor.execute(f"""
+                SELECT provider_name, contract_type FROM providers 
                 WHERE active = 1 
-                AND provider_name NOT IN ('Unknown', 'Test Provider', 'Another Provider')
-            """)
+                AND provider_name NOT IN ({', '.join('?' for _ in EXCLUDED_PROVIDERS)})
+            """, EXCLUDED_PROVIDERS)
             
-            providers = [row[0] for row in cursor.fetchall()]
+            providers = cursor.fetchall()
             conn.close()
             
-            results = []
-            for provider in providers:
-                compensation = self.calculate_provider_compensation(provider, year, month)
-                if 'error' not in compensation:
-                    results.append(compensation)
+            revenue = self.calculate_revenue_range(start, end)
+            
+            results = {}
+            for year, month in iter_months(start, end):
+                month_results = results[(year, month)] = []
+                for provider, contract_type in providers:
+                    totals = revenue.get((provider, year, month), {})
+                    monthly_revenue = self.reconcile_revenue(
+                        provider, year, month, totals.get('total_revenue', 0.0)
+                    )
+                    if contract_type == 'Owner':
+                        month_results.append(self.calculate_owner_compensation(
+                            provider, year, month, monthly_revenue, totals.get('session_payments', 0.0)
+                        ))
+                    elif contract_type == 'Independent Contractor':
+                        month_results.append(self.calculate_contractor_compensation(
+                            provider, year, month, monthly_revenue
+                        ))
             
             return results
             
         except Exception as e:
             print(f"Error getting all provider compensation: {e}")
-            return []
+            return {}
     
     def format_compensation_report(self, compensation_data: Dict) -> str:
         """Format compensation data into a readable report."""
@@ -12,7 +12,6 @@ Features:
 - Detailed business intelligence dashboards
 """
 
-import sqlite3
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -23,6 +22,7 @@ from dataclasses import dataclass, asdict
 from utils.config import get_config
 from utils.logger import get_logger
 from utils.multi_office_operations import MultiOfficeOperations
+from utils.db_open import connect_db
 
 logger = get_logger(__name__)
 
@@ -92,7 +92,7 @@ class ProviderPerformanceAnalytics:
     
     def initialize_analytics_tables(self):
         """Initialize provider analytics tracking tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with connect_db(self.db_path) as conn:
             cursor = conn.cursor()
             
             # Provider comfort zones and benchmarks
@@ -165,7 +165,7 @@ class ProviderPerformanceAnalytics:
         Calculate comfort zones for providers based on historical data and industry standards
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 # Get provider filter
                 provider_filter = f"WHERE provider_id = '{provider_id}'" if provider_id else ""
                 
@@ -253,7 +253,7 @@ class ProviderPerformanceAnalytics:
         Analyze month-to-month performance trends for providers
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 # Calculate date range
                 end_date = datetime.now()
                 start_date = end_date - timedelta(days=months_back * 30)
@@ -509,7 +509,7 @@ class ProviderPerformanceAnalytics:
         Analyze overall company performance trends and metrics
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 end_date = datetime.now()
                 start_date = end_date - timedelta(days=months_back * 30)
                 
@@ -678,7 +678,7 @@ class ProviderPerformanceAnalytics:
     def _get_average_revenue_per_session(self, provider_id: str) -> float:
         """Get average revenue per session for a provider"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT AVG(gross_revenue / session_count) as avg_revenue
@@ -697,7 +697,7 @@ class ProviderPerformanceAnalytics:
         """Calculate provider utilization rate"""
         try:
             # Get provider capacity from assignments
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT max_sessions_per_day, days_per_week
@@ -724,7 +724,7 @@ class ProviderPerformanceAnalytics:
     def _get_non_owner_providers(self) -> List[str]:
         """Get list of non-owner providers"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT DISTINCT provider_id
@@ -741,7 +741,7 @@ class ProviderPerformanceAnalytics:
     def _get_all_active_providers(self) -> List[str]:
         """Get all active providers"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT DISTINCT provider_id
@@ -758,7 +758,7 @@ class ProviderPerformanceAnalytics:
     def _get_current_performance_metrics(self, provider_id: str) -> Dict:
         """Get current performance metrics for a provider"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT 
@@ -886,7 +886,7 @@ class ProviderPerformanceAnalytics:
     def _save_comfort_zone(self, comfort_zone: ProviderComfortZone):
         """Save comfort zone data to database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO provider_comfort_zones
@@ -909,7 +909,7 @@ class ProviderPerformanceAnalytics:
         """Save monthly performance data to database"""
         try:
             year, month = trend.month.split('-')
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO provider_monthly_performance
@@ -931,7 +931,7 @@ class ProviderPerformanceAnalytics:
     def _get_provider_name(self, provider_id: str) -> str:
         """Get provider name from database or return formatted ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_db(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT provider_name FROM medical_data 
@@ -507,46 +507,60 @@ class ReportTransformer:
             # Read the file
             df = pd.read_csv(file_path)
             
-            # Apply transformation pipeline
-            pipeline = self.transformation_pipelines[format_name]
-            transformation_log = []
-            
-            for rule in pipeline:
-                before_shape = df.shape
-                df = rule.apply(df)
-                after_shape = df.shape
-                
-                # Log transformation
-                transformation_log.append({
-                    "rule": rule.name,
-                    "description": rule.description,
-                    "before_shape": before_shape,
-                    "after_shape": after_shape
-                })
-                
-            # Ensure all canonical columns exist (fill with NaN if missing)
-            for column in self.canonical_columns:
-                if column not in df.columns:
-                    df[column] = np.nan
-                    
-            # Reorder columns to match canonical format
-            df = df[self.canonical_columns]
-            
-            # Validate transformation
-            validation_errors = self._validate_transformation(df, format_name)
-            
-            return df, {
-                "format": format_name,
-                "file_path": file_path,
-                "transformation_log": transformation_log,
-                "validation_errors": validation_errors,
-                "success": len(validation_errors) == 0
-            }
+            df, metadata = self.transform_frame(df, format_name)
+            return df, {"format": format_name, "file_path": file_path, **metadata}
             
         except Exception as e:
             logger.error(f"Error transforming file {file_path}: {e}")
             return pd.DataFrame(), {"error": str(e)}
             
+    def transform_frame(self, df: pd.DataFrame, format_name: str) -> Tuple[pd.DataFrame, Dict]:
+        """Apply a format's transformation pipeline to rows already read
+        
+        Used for files that are transformed chunk by chunk, e.g. while they
+        are uploading.
+        
+        Args:
+            df: Rows in the source format
+            format_name: Format name (must have a pipeline)
+            
+        Returns:
+            Tuple of (transformed dataframe, transformation metadata)
+        """
+        # Apply transformation pipeline
+        pipeline = self.transformation_pipelines[format_name]
+        transformation_log = []
+        
+        for rule in pipeline:
+            before_shape = df.shape
+            df = rule.apply(df)
+            after_shape = df.shape
+            
+            # Log transformation
+            transformation_log.append({
+                "rule": rule.name,
+                "description": rule.description,
+                "before_shape": before_shape,
+                "after_shape": after_shape
+            })
+            
+        # Ensure all canonical columns exist (fill with NaN if missing)
+        for column in self.canonical_columns:
+            if column not in df.columns:
+                df[column] = np.nan
+                
+        # Reorder columns to match canonical format
+        df = df[self.canonical_columns]
+        
+        # Validate transformation
+        validation_errors = self._validate_transformation(df, format_name)
+        
+        return df, {
+            "transformation_log": transformation_log,
+            "validation_errors": validation_errors,
+            "success": len(validation_errors) == 0
+        }
+        
     def _validate_transformation(self, df: pd.DataFrame, format_name: str) -> List[Dict]:
         """Validate transformed data
         
@@ -0,0 +1,251 @@
+"""
+Response Cache for Ada chat
+
+This module caches LLM answers to repeated analytic questions. Entries are
+keyed on the normalized question, the data sections used to answer it and
+the current data version, and near-duplicate questions are matched by
+embedding similarity.
+"""
+
+import re
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from utils.config import get_config
+from utils.logger import get_logger
+from utils.data_version import register_invalidation_listener
+
+logger = get_logger()
+config = get_config()
+
+# Words that do not change the meaning of an analytic question
+FILLER_WORDS = {
+    "a", "an", "the", "please", "can", "could", "would", "you", "me",
+    "tell", "show", "give", "what", "whats", "is", "are", "how", "hey", "ada",
+}
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookup
+
+    Args:
+        question: Raw user question
+
+    Returns:
+        Lowercased question with punctuation and filler words removed
+    """
+    text = question.lower().replace("'", "")
+    text = re.sub(r"[^a-z0-9$.%\s]", " ", text)
+    words = [w.strip(".") for w in text.split()]
+    return " ".join(w for w in words if w and w not in FILLER_WORDS)
+
+
+def _ollama_embedding(text: str) -> Optional[List[float]]:
+    """Get an embedding for text from the laptop Ollama endpoint"""
+    url = config.get("ollama.laptop_url", "http://localhost:11434")
+    model = config.get("response_cache.embedding_model") or config.get("ollama.laptop_model", "llama3.1:8b")
+
+    try:
+        response = requests.post(
+            f"{url}/api/embeddings",
+            json={"model": model, "prompt": text},
+            timeout=config.get("response_cache.embedding_timeout", 5),
+        )
+        if response.status_code == 200:
+            return response.json().get("embedding") or None
+    except Exception as e:
+        logger.debug(f"Embedding request failed, semantic matching skipped: {e}")
+
+    return None
+
+
+def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
+    """Calculate cosine similarity between two vectors
+
+    Args:
+        vec1: First vector
+        vec2: Second vector
+
+    Returns:
+        Cosine similarity, or 0.0 if either vector is empty
+    """
+    if not vec1 or not vec2 or len(vec1) != len(vec2):
+        return 0.0
+
+    dot = sum(a * b for a, b in zip(vec1, vec2))
+    norm = math.sqrt(sum(a * a for a in vec1)) * math.sqrt(sum(b * b for b in vec2))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """LRU/TTL cache of chat responses with semantic near-duplicate matching"""
+
+    def __init__(self,
+                 max_entries: int = 256,
+                 ttl_seconds: int = 3600,
+                 similarity_threshold: float = 0.92,
+                 embed_fn: Optional[Callable[[str], Optional[List[float]]]] = None,
+                 semantic_matching: bool = True):
+        """Initialize response cache
+
+        Args:
+            max_entries: Maximum number of cached responses (LRU eviction)
+            ttl_seconds: Seconds before a cached response expires
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embed_fn: Function returning an embedding for a text
+            semantic_matching: Whether to match near-duplicate questions
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn or _ollama_embedding
+        self.semantic_matching = semantic_matching
+
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._embeddings: "OrderedDict[str, Optional[List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(normalized: str, sections: Iterable[str], data_version: str) -> Tuple:
+        """Build the exact-match cache key"""
+        return (normalized, tuple(sorted(set(sections))), data_version)
+
+    def get(self, question: str, sections: Iterable[str], data_version: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response
+
+        Args:
+            question: Raw user question
+            sections: Data sections the answer would be built from
+            data_version: Current data version
+
+        Returns:
+            Dictionary with 'response' and 'match' ('exact' or 'semantic'), or None
+        """
+        normalized = normalize_question(question)
+        key = self.make_key(normalized, sections, data_version)
+
+        with self._lock:
+            self._expire()
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return {"response": entry["response"], "match": "exact", "similarity": 1.0}
+
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if k[1] == key[1] and k[2] == data_version and e.get("embedding")
+            ]
+
+        if self.semantic_matching and candidates:
+            query_embedding = self._embed(normalized)
+            if query_embedding:
+                best_key, best_score = None, 0.0
+                for cand_key, cand in candidates:
+                    score = cosine_similarity(query_embedding, cand["embedding"])
+                    if score > best_score:
+                        best_key, best_score = cand_key, score
+
+                if best_key is not None and best_score >= self.similarity_threshold:
+                    with self._lock:
+                        entry = self._entries.get(best_key)
+                        if entry is not None:
+                            self._entries.move_to_end(best_key)
+                            self.stats["hits"] += 1
+                            self.stats["semantic_hits"] += 1
+                            return {"response": entry["response"], "match": "semantic", "similarity": best_score}
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, question: str, sections: Iterable[str], data_version: str, response: str):
+        """Store a response in the cache
+
+        Args:
+            question: Raw user question
+            sections: Data sections the answer was built from
+            data_version: Data version the answer was built against
+            response: Response text to cache
+        """
+        normalized = normalize_question(question)
+        key = self.make_key(normalized, sections, data_version)
+        embedding = self._embed(normalized) if self.semantic_matching else None
+
+        with self._lock:
+            self._entries[key] = {
+                "response": response,
+                "embedding": embedding,
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self):
+        """Drop every cached response, e.g. after an upload changed the data"""
+        with self._lock:
+            if self._entries:
+                logger.info(f"Invalidating {len(self._entries)} cached chat responses")
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+    def _expire(self):
+        """Remove expired entries (caller must hold the lock)"""
+        if not self.ttl_seconds:
+            return
+
+        cutoff = time.time() - self.ttl_seconds
+        expired = [k for k, e in self._entries.items() if e["created_at"] < cutoff]
+        for k in expired:
+            del self._entries[k]
+            self.stats["evictions"] += 1
+
+    def _embed(self, normalized: str) -> Optional[List[float]]:
+        """Get an embedding for a normalized question, memoized"""
+        with self._lock:
+            if normalized in self._embeddings:
+                self._embeddings.move_to_end(normalized)
+                return self._embeddings[normalized]
+
+        embedding = self.embed_fn(normalized)
+
+        with self._lock:
+            self._embeddings[normalized] = embedding
+            while len(self._embeddings) > self.max_entries * 2:
+                self._embeddings.popitem(last=False)
+
+        return embedding
+
+
+def get_response_cache() -> ResponseCache:
+    """Get singleton response cache instance configured from config.json"""
+    if not hasattr(get_response_cache, '_instance'):
+        cache = ResponseCache(
+            max_entries=config.get("response_cache.max_entries", 256),
+            ttl_seconds=config.get("response_cache.ttl_seconds", 3600),
+            similarity_threshold=config.get("response_cache.similarity_threshold", 0.92),
+            semantic_matching=config.get("response_cache.semantic_matching", True),
+        )
+        register_invalidation_listener(cache.invalidate)
+        get_response_cache._instance = cache
+    return get_response_cache._instance
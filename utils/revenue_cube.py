@@ -0,0 +1,466 @@
+"""
+Revenue Cube for HVLC_DB
+
+Keeps a materialized rollup of payment_transactions keyed by
+(year, month, provider_id, payer_name) so business summaries and trend
+queries read a few hundred pre-aggregated cells instead of scanning every
+transaction with strftime(). Each cell stores sums, counts, min/max and a
+HyperLogLog sketch of distinct patients, so cells can be merged for any
+coarser grouping.
+
+The cube is folded forward incrementally from the last transaction_id it has
+seen, and only rebuilt when rows were deleted or replaced.
+"""
+
+import math
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.config import get_config
+from utils.data_version import get_data_version
+from utils.logger import get_logger
+from utils.db_open import connect_db
+
+logger = get_logger()
+config = get_config()
+
+# 2^12 registers: about 1.6% standard error, under 1% below ~10,000 patients
+SKETCH_PRECISION = 12
+SKETCH_REGISTERS = 1 << SKETCH_PRECISION
+
+CUBE_KEYS = ("year", "month", "provider_id", "payer_name")
+QUERY_CACHE_ENTRIES = 64
+
+CREATE_CUBE_SQL = """
+CREATE TABLE IF NOT EXISTS revenue_cube (
+    year INTEGER NOT NULL,              -- 0 when transaction_date is missing or unparseable
+    month INTEGER NOT NULL,
+    provider_id INTEGER NOT NULL,       -- 0 when missing
+    payer_name TEXT NOT NULL,           -- '' when missing
+    txn_count INTEGER NOT NULL,
+    cash_count INTEGER NOT NULL,        -- rows with a cash_applied value
+    revenue REAL NOT NULL,
+    positive_revenue REAL NOT NULL,
+    positive_count INTEGER NOT NULL,
+    nonpositive_count INTEGER NOT NULL,
+    min_cash REAL,
+    max_cash REAL,
+    min_date TEXT,
+    max_date TEXT,
+    patient_sketch BLOB,
+    PRIMARY KEY (year, month, provider_id, payer_name)
+) WITHOUT ROWID;
+-- Patients per month across all providers and payers, so yearly and monthly
+-- distinct counts merge a handful of sketches instead of one per cell
+CREATE TABLE IF NOT EXISTS revenue_cube_patients (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    patient_sketch BLOB NOT NULL,
+    PRIMARY KEY (year, month)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS revenue_cube_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_transaction_id INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CELL_SELECT = """
+    COALESCE(CAST(strftime('%Y', transaction_date) AS INTEGER), 0) AS year,
+    COALESCE(CAST(strftime('%m', transaction_date) AS INTEGER), 0) AS month,
+    COALESCE(provider_id, 0) AS provider_id,
+    COALESCE(payer_name, '') AS payer_name
+"""
+
+DELTA_SQL = f"""
+SELECT {CELL_SELECT},
+    COUNT(*) AS txn_count,
+    COUNT(cash_applied) AS cash_count,
+    COALESCE(SUM(cash_applied), 0) AS revenue,
+    COALESCE(SUM(CASE WHEN cash_applied > 0 THEN cash_applied END), 0) AS positive_revenue,
+    SUM(CASE WHEN cash_applied > 0 THEN 1 ELSE 0 END) AS positive_count,
+    SUM(CASE WHEN cash_applied <= 0 THEN 1 ELSE 0 END) AS nonpositive_count,
+    MIN(cash_applied) AS min_cash,
+    MAX(cash_applied) AS max_cash,
+    MIN(transaction_date) AS min_date,
+    MAX(transaction_date) AS max_date
+FROM payment_transactions
+WHERE transaction_id > ? AND transaction_id <= ?
+GROUP BY 1, 2, 3, 4
+"""
+
+DELTA_PATIENTS_SQL = f"""
+SELECT {CELL_SELECT}, patient_id
+FROM payment_transactions
+WHERE transaction_id > ? AND transaction_id <= ? AND patient_id IS NOT NULL
+"""
+
+UPSERT_SQL = """
+INSERT INTO revenue_cube (
+    year, month, provider_id, payer_name, txn_count, cash_count, revenue, positive_revenue,
+    positive_count, nonpositive_count, min_cash, max_cash, min_date, max_date, patient_sketch
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (year, month, provider_id, payer_name) DO UPDATE SET
+    txn_count = txn_count + excluded.txn_count,
+    cash_count = cash_count + excluded.cash_count,
+    revenue = revenue + excluded.revenue,
+    positive_revenue = positive_revenue + excluded.positive_revenue,
+    positive_count = positive_count + excluded.positive_count,
+    nonpositive_count = nonpositive_count + excluded.nonpositive_count,
+    min_cash = CASE WHEN min_cash IS NULL OR excluded.min_cash < min_cash THEN excluded.min_cash ELSE min_cash END,
+    max_cash = CASE WHEN max_cash IS NULL OR excluded.max_cash > max_cash THEN excluded.max_cash ELSE max_cash END,
+    min_date = CASE WHEN min_date IS NULL OR excluded.min_date < min_date THEN excluded.min_date ELSE min_date END,
+    max_date = CASE WHEN max_date IS NULL OR excluded.max_date > max_date THEN excluded.max_date ELSE max_date END,
+    patient_sketch = sketch_merge(patient_sketch, excluded.patient_sketch)
+"""
+
+UPSERT_PATIENTS_SQL = """
+INSERT INTO revenue_cube_patients (year, month, patient_sketch) VALUES (?, ?, ?)
+ON CONFLICT (year, month) DO UPDATE SET
+    patient_sketch = sketch_merge(patient_sketch, excluded.patient_sketch)
+"""
+
+
+def decode_sketch(blob: Optional[bytes]) -> np.ndarray:
+    """Decode a stored patient sketch into its registers"""
+    if blob is None:
+        return np.zeros(SKETCH_REGISTERS, dtype=np.uint8)
+    if len(blob) != SKETCH_REGISTERS:
+        blob = zlib.decompress(blob)
+    return np.frombuffer(blob, dtype=np.uint8)
+
+
+def encode_sketch(registers: np.ndarray) -> bytes:
+    """Encode sketch registers for storage
+
+    Mostly-empty sketches are stored compressed; dense ones are stored raw
+    so merging them does not pay for decompression.
+    """
+    raw = registers.astype(np.uint8).tobytes()
+    compressed = zlib.compress(raw)
+    return compressed if len(compressed) < SKETCH_REGISTERS // 2 else raw
+
+
+def _hash_registers(values: pd.Series) -> tuple:
+    """Hash identifiers to (register index, rank) arrays"""
+    # Stable 64-bit hashes, so sketches built in different runs can be merged
+    hashes = pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy(dtype=np.uint64)
+    index = (hashes & np.uint64(SKETCH_REGISTERS - 1)).astype(np.intp)
+    remainder = hashes >> np.uint64(SKETCH_PRECISION)
+    # Rank is the position of the leftmost 1-bit in the remaining bits
+    _, bit_length = np.frexp(remainder.astype(np.float64))
+    ranks = ((64 - SKETCH_PRECISION) - bit_length + 1).astype(np.uint8)
+    return index, ranks
+
+
+def build_sketch(values: pd.Series) -> np.ndarray:
+    """Build HyperLogLog registers for a series of identifiers
+
+    Args:
+        values: Identifiers (nulls are ignored)
+
+    Returns:
+        Register array of length SKETCH_REGISTERS
+    """
+    registers = np.zeros(SKETCH_REGISTERS, dtype=np.uint8)
+    values = values.dropna()
+    if not values.empty:
+        index, ranks = _hash_registers(values)
+        np.maximum.at(registers, index, ranks)
+    return registers
+
+
+def build_grouped_sketches(df: pd.DataFrame, keys: Sequence[str], column: str) -> Dict[tuple, np.ndarray]:
+    """Build one sketch per group of a DataFrame in a single vectorized pass
+
+    Args:
+        df: Rows with the key columns and the identifier column
+        keys: Columns identifying a group
+        column: Identifier column
+
+    Returns:
+        Dictionary mapping group key tuples to register arrays
+    """
+    df = df[df[column].notna()]
+    if df.empty:
+        return {}
+
+    codes, groups = pd.factorize(pd.MultiIndex.from_frame(df[list(keys)]))
+    index, ranks = _hash_registers(df[column])
+    registers = np.zeros(len(groups) * SKETCH_REGISTERS, dtype=np.uint8)
+    np.maximum.at(registers, codes * SKETCH_REGISTERS + index, ranks)
+    registers = registers.reshape(len(groups), SKETCH_REGISTERS)
+    return {key: registers[i] for i, key in enumerate(groups)}
+
+
+def estimate_cardinality(registers: np.ndarray) -> int:
+    """Estimate the number of distinct identifiers in a sketch"""
+    m = SKETCH_REGISTERS
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Linear counting is more accurate for small cardinalities
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+def _sketch_merge(a: Optional[bytes], b: Optional[bytes]) -> Optional[bytes]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return encode_sketch(np.maximum(decode_sketch(a), decode_sketch(b)))
+
+
+class _DistinctCount:
+    """SQLite aggregate: distinct count of the union of patient sketches"""
+
+    def __init__(self):
+        self.registers = None
+
+    def step(self, blob):
+        if blob is None:
+            return
+        registers = decode_sketch(blob)
+        self.registers = registers.copy() if self.registers is None else np.maximum(self.registers, registers)
+
+    def finalize(self):
+        return 0 if self.registers is None else estimate_cardinality(self.registers)
+
+
+def register_cube_functions(conn: sqlite3.Connection):
+    """Register sketch_merge() and distinct_patients() on a connection"""
+    conn.create_function("sketch_merge", 2, _sketch_merge)
+    conn.create_aggregate("distinct_patients", 1, _DistinctCount)
+
+
+class RevenueCube:
+    """Incrementally maintained revenue rollup for one SQLite database"""
+
+    def __init__(self, db_path: str, batch_rows: int = None):
+        """Initialize revenue cube
+
+        Args:
+            db_path: Path to the SQLite database
+            batch_rows: Transaction id range folded per batch (bounds memory)
+        """
+        self.db_path = db_path
+        self.batch_rows = batch_rows or config.get("analytics.cube_batch_rows", 200000)
+        self._synced_version = None
+        self._lock = threading.Lock()
+        # Query results for the current data version, most recently used last
+        self._results: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+        self.stats = {"syncs": 0, "rebuilds": 0, "rows_folded": 0}
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection with the cube's SQL functions registered"""
+        conn = connect_db(self.db_path)
+        register_cube_functions(conn)
+        return conn
+
+    def sync(self, conn: sqlite3.Connection = None) -> Dict[str, Any]:
+        """Bring the cube up to date with payment_transactions
+
+        Costs a file stat when nothing has changed since the last sync.
+
+        Args:
+            conn: Connection to use (e.g. the uploader's own connection)
+
+        Returns:
+            Dictionary with 'folded' (rows added) and 'rebuilt'
+        """
+        with self._lock:
+            if self._synced_version == get_data_version(self.db_path):
+                return {"folded": 0, "rebuilt": False}
+
+            if conn is None:
+                with closing(self.connect()) as own_conn:
+                    result = self._sync(own_conn)
+            else:
+                register_cube_functions(conn)
+                result = self._sync(conn)
+
+            self._synced_version = get_data_version(self.db_path)
+            self._results.clear()
+            return result
+
+    def _sync(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        conn.executescript(CREATE_CUBE_SQL)
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'payment_transactions'"
+        ).fetchone():
+            return {"folded": 0, "rebuilt": False}
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            state = conn.execute(
+                "SELECT last_transaction_id, row_count FROM revenue_cube_state WHERE id = 1"
+            ).fetchone()
+            max_id = conn.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM payment_transactions").fetchone()[0]
+            total_rows = conn.execute("SELECT COUNT(*) FROM payment_transactions").fetchone()[0]
+
+            stored = tuple(state) if state is not None else None
+            rebuilt = False
+            if state is not None:
+                last_id, row_count = state
+                new_rows = conn.execute(
+                    "SELECT COUNT(*) FROM payment_transactions WHERE transaction_id > ?", (last_id,)
+                ).fetchone()[0]
+                # Deleted or replaced rows cannot be subtracted from the sketches
+                if max_id < last_id or row_count + new_rows != total_rows:
+                    state = None
+
+            if state is None:
+                conn.execute("DELETE FROM revenue_cube")
+                conn.execute("DELETE FROM revenue_cube_patients")
+                last_id = 0
+                rebuilt = True
+
+            folded = 0
+            for low in range(last_id, max_id, self.batch_rows):
+                folded += self._fold(conn, low, min(low + self.batch_rows, max_id))
+
+            if folded == 0 and not rebuilt and stored == (max_id, total_rows):
+                # Nothing changed; writing the state would touch the file and
+                # look like new data to every other reader of get_data_version
+                conn.rollback()
+            else:
+                conn.execute("""
+                    INSERT OR REPLACE INTO revenue_cube_state (id, last_transaction_id, row_count, updated_at)
+                    VALUES (1, ?, ?, CURRENT_TIMESTAMP)
+                """, (max_id, total_rows))
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        self.stats["syncs"] += 1
+        self.stats["rows_folded"] += folded
+        if rebuilt:
+            self.stats["rebuilds"] += 1
+        if folded:
+            logger.debug(f"Revenue cube {'rebuilt' if rebuilt else 'updated'}: folded {folded} transactions")
+        return {"folded": folded, "rebuilt": rebuilt}
+
+    def _fold(self, conn: sqlite3.Connection, low: int, high: int) -> int:
+        """Aggregate transactions with low < transaction_id <= high into the cube"""
+        cells = pd.read_sql_query(DELTA_SQL, conn, params=(low, high))
+        if cells.empty:
+            return 0
+
+        patients = pd.read_sql_query(DELTA_PATIENTS_SQL, conn, params=(low, high))
+        sketches = build_grouped_sketches(patients, CUBE_KEYS, "patient_id")
+
+        rows = []
+        for cell in cells.itertuples(index=False):
+            key = (cell.year, cell.month, cell.provider_id, cell.payer_name)
+            rows.append((
+                int(cell.year), int(cell.month), int(cell.provider_id), cell.payer_name,
+                int(cell.txn_count), int(cell.cash_count), float(cell.revenue), float(cell.positive_revenue),
+                int(cell.positive_count), int(cell.nonpositive_count),
+                _optional_float(cell.min_cash), _optional_float(cell.max_cash),
+                _optional_str(cell.min_date), _optional_str(cell.max_date),
+                encode_sketch(sketches[key]) if key in sketches else None,
+            ))
+        conn.executemany(UPSERT_SQL, rows)
+
+        monthly = build_grouped_sketches(patients, ("year", "month"), "patient_id")
+        conn.executemany(UPSERT_PATIENTS_SQL, [
+            (int(year), int(month), encode_sketch(registers)) for (year, month), registers in monthly.items()
+        ])
+        return int(cells["txn_count"].sum())
+
+    def rebuild(self):
+        """Discard the cube so the next sync rebuilds it from scratch"""
+        with self._lock, closing(self.connect()) as conn:
+            conn.executescript(CREATE_CUBE_SQL)
+            conn.execute("DELETE FROM revenue_cube_state")
+            conn.commit()
+            self._synced_version = None
+            self._results.clear()
+
+    def query(self, sql: str, params: Sequence[Any] = None) -> pd.DataFrame:
+        """Run a query against the up-to-date cube
+
+        Args:
+            sql: SQL over revenue_cube and revenue_cube_patients (may use
+                distinct_patients(patient_sketch))
+            params: Query parameters
+
+        Returns:
+            DataFrame with query results (cached until the data changes)
+        """
+        self.sync()
+        key = (sql, tuple(params or ()))
+
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key].copy()
+
+        with closing(self.connect()) as conn:
+            result = pd.read_sql_query(sql, conn, params=params)
+
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > QUERY_CACHE_ENTRIES:
+                self._results.popitem(last=False)
+        return result.copy()
+
+
+def _optional_float(value) -> Optional[float]:
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def _optional_str(value) -> Optional[str]:
+    return None if value is None or pd.isna(value) else str(value)
+
+
+def year_filter(years: Optional[List[str]], column: str = "year") -> tuple:
+    """Build a cube WHERE fragment for a list of years
+
+    Args:
+        years: Years as strings or integers, or None for all years
+        column: Year column to filter
+
+    Returns:
+        Tuple of (SQL fragment starting with AND, parameter list)
+    """
+    if not years:
+        return "", []
+    placeholders = ",".join("?" for _ in years)
+    return f"AND {column} IN ({placeholders})", [int(year) for year in years]
+
+
+_cubes: Dict[str, RevenueCube] = {}
+_cubes_lock = threading.Lock()
+
+
+def cube_enabled() -> bool:
+    """Whether analytics should read from the revenue cube"""
+    return bool(config.get("analytics.revenue_cube", True))
+
+
+def get_revenue_cube(db_path: Optional[str] = None) -> RevenueCube:
+    """Get the shared revenue cube for a database
+
+    Args:
+        db_path: Path to the SQLite database (default: database.db_path)
+
+    Returns:
+        RevenueCube instance
+    """
+    db_path = db_path or config.get_db_path()
+    with _cubes_lock:
+        if db_path not in _cubes:
+            _cubes[db_path] = RevenueCube(db_path)
+        return _cubes[db_path]
@@ -0,0 +1,245 @@
+"""
+Schema Catalog for HVLC_DB
+
+Caches table and column definitions so the SQL agent, DB connector and the
+database API routes do not re-run PRAGMA/information_schema queries on every
+call. The cache is keyed on a cheap schema version (``PRAGMA schema_version``
+for SQLite, a digest of pg_class for PostgreSQL) and only reloads when DDL
+changes.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+
+from utils.config import get_config
+from utils.logger import get_logger
+from utils.db_open import connect_db
+
+logger = get_logger()
+config = get_config()
+
+# Digest of user tables and their column counts. Column type changes that keep
+# the column count are not detected; call SchemaCatalog.invalidate() after those.
+POSTGRES_VERSION_QUERY = """
+    SELECT md5(coalesce(string_agg(c.oid::text || ':' || c.relnatts::text, ',' ORDER BY c.oid), '')) AS version
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public' AND c.relkind = 'r'
+"""
+
+
+class SchemaCatalog:
+    """Cached schema information for one database"""
+
+    def __init__(self, db: str, engine=None):
+        """Initialize schema catalog
+
+        Args:
+            db: SQLAlchemy URL or SQLite file path
+            engine: SQLAlchemy engine for PostgreSQL or in-memory SQLite (optional)
+        """
+        self.db = db
+        self.engine = engine
+        self.sqlite_path = None
+
+        if "://" not in db:
+            self.sqlite_path = db
+        elif db.startswith("sqlite:///"):
+            self.sqlite_path = db[len("sqlite:///"):]
+
+        self.dialect = "sqlite" if self.sqlite_path is not None else "postgresql"
+        if self.sqlite_path not in (None, ":memory:"):
+            # File-backed SQLite is read directly, independent of any engine
+            self.engine = None
+        elif self.engine is None:
+            self.engine = create_engine(db)
+
+        self.version = None
+        self._tables: Dict[str, List[Dict[str, Any]]] = {}
+        self._rendered: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "reloads": 0}
+
+    def _rows(self, sql: str) -> List[Dict[str, Any]]:
+        """Run a catalog query and return rows as dictionaries"""
+        if self.engine is None:
+            # Read-only so a missing database file is not created as a side effect
+            uri = f"file:{self.sqlite_path}?mode=ro"
+            with closing(connect_db(uri, uri=True)) as conn:
+                conn.row_factory = sqlite3.Row
+                return [dict(row) for row in conn.execute(sql)]
+
+        with self.engine.connect() as conn:
+            result = conn.execute(text(sql))
+            return [dict(row._mapping) for row in result]
+
+    def _read_version(self) -> str:
+        """Read the current schema version"""
+        if self.dialect == "sqlite":
+            version = self._rows("PRAGMA schema_version")[0]["schema_version"]
+            # A swapped-in database file can reuse the same schema_version
+            inode = os.stat(self.sqlite_path).st_ino if self.engine is None else 0
+            return f"{version}:{inode}"
+        return self._rows(POSTGRES_VERSION_QUERY)[0]["version"]
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load table and column definitions"""
+        tables = {}
+
+        if self.dialect == "sqlite":
+            names = self._rows(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+            for row in names:
+                name = row["name"]
+                tables[name] = [
+                    {
+                        "name": col["name"],
+                        "type": col["type"],
+                        "notnull": bool(col["notnull"]),
+                        "default_value": col["dflt_value"],
+                        "primary_key": bool(col["pk"]),
+                    }
+                    for col in self._rows(f'PRAGMA table_info("{name}")')
+                ]
+            return tables
+
+        for row in self._rows("""
+            SELECT t.table_name FROM information_schema.tables t
+            WHERE t.table_schema = 'public' AND t.table_type = 'BASE TABLE'
+            ORDER BY t.table_name
+        """):
+            tables[row["table_name"]] = []
+
+        for col in self._rows("""
+            SELECT c.table_name, c.column_name, c.data_type, c.is_nullable, c.column_default,
+                   EXISTS (
+                       SELECT 1 FROM information_schema.table_constraints tc
+                       JOIN information_schema.key_column_usage k
+                         ON k.constraint_name = tc.constraint_name AND k.table_name = tc.table_name
+                       WHERE tc.constraint_type = 'PRIMARY KEY'
+                         AND tc.table_name = c.table_name AND k.column_name = c.column_name
+                   ) AS primary_key
+            FROM information_schema.columns c
+            WHERE c.table_schema = 'public'
+            ORDER BY c.table_name, c.ordinal_position
+        """):
+            tables.setdefault(col["table_name"], []).append({
+                "name": col["column_name"],
+                "type": col["data_type"],
+                "notnull": col["is_nullable"] == "NO",
+                "default_value": col["column_default"],
+                "primary_key": bool(col["primary_key"]),
+            })
+        return tables
+
+    def _ensure_current(self):
+        """Reload the catalog if the schema version changed"""
+        version = self._read_version()
+        with self._lock:
+            self.stats["lookups"] += 1
+            if version == self.version:
+                return
+            self._tables = self._load()
+            self._rendered = {}
+            self.version = version
+            self.stats["reloads"] += 1
+            logger.debug(f"Schema catalog for {self.db} loaded at version {version}")
+
+    def invalidate(self):
+        """Force a reload on the next lookup"""
+        with self._lock:
+            self.version = None
+
+    def get_version(self) -> str:
+        """Get the schema version the catalog is current with"""
+        self._ensure_current()
+        return self.version
+
+    def list_tables(self) -> List[str]:
+        """Get the names of all user tables"""
+        self._ensure_current()
+        return list(self._tables)
+
+    def get_columns(self, table_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the column definitions of a table
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            List of column dictionaries (name, type, notnull, default_value,
+            primary_key), or None if the table does not exist
+        """
+        self._ensure_current()
+        columns = self._tables.get(table_name)
+        return list(columns) if columns is not None else None
+
+    def get_schema_str(self, tables: Optional[Sequence[str]] = None) -> str:
+        """Get a compact schema description for LLM prompts
+
+        Each table is rendered on one line as
+        ``table(column TYPE PK, column TYPE NOT NULL, ...)``.
+
+        Args:
+            tables: Tables to include (default: all)
+
+        Returns:
+            Schema text, pre-rendered once per schema version
+        """
+        self._ensure_current()
+        key = tuple(tables) if tables else ()
+
+        with self._lock:
+            if key not in self._rendered:
+                lines = []
+                for name in (tables or self._tables):
+                    columns = self._tables.get(name)
+                    if columns is None:
+                        continue
+                    parts = []
+                    for col in columns:
+                        part = f"{col['name']} {col['type']}".strip()
+                        if col["primary_key"]:
+                            part += " PK"
+                        elif col["notnull"]:
+                            part += " NOT NULL"
+                        parts.append(part)
+                    lines.append(f"{name}({', '.join(parts)})")
+                self._rendered[key] = "\n".join(lines)
+            return self._rendered[key]
+
+    def get_hash(self) -> str:
+        """Get a short hash of the schema, e.g. to key cached SQL"""
+        return hashlib.sha1(self.get_schema_str().encode()).hexdigest()[:16]
+
+
+_catalogs: Dict[str, SchemaCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_schema_catalog(db: Optional[str] = None, engine=None) -> SchemaCatalog:
+    """Get the shared schema catalog for a database
+
+    Args:
+        db: SQLAlchemy URL or SQLite file path (default: database.db_path)
+        engine: SQLAlchemy engine for PostgreSQL or in-memory SQLite (optional)
+
+    Returns:
+        SchemaCatalog instance
+    """
+    db = db or config.get("database.db_path")
+
+    # In-memory databases are private to their engine, so never share them
+    if db.endswith(":memory:"):
+        return SchemaCatalog(db, engine=engine)
+
+    with _catalogs_lock:
+        if db not in _catalogs:
+            _catalogs[db] = SchemaCatalog(db, engine=engine)
+        return _catalogs[db]
@@ -0,0 +1,186 @@
+"""
+Keyword Search Index for HVLC_DB
+
+This module keeps a persistent SQLite FTS5 index of processed documents so
+keyword search is ranked with BM25 (with a title boost) instead of scanning
+every processed JSON file. Results can be merged with vector search results
+for hybrid search using reciprocal rank fusion.
+"""
+
+import re
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.config import get_config
+from utils.logger import get_logger
+from utils.db_open import connect_db
+
+logger = get_logger()
+config = get_config()
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn a free-text query into an FTS5 MATCH expression
+
+    Each word is quoted (so punctuation and FTS5 operators in user input are
+    harmless) and words are OR-ed so BM25 can rank partial matches.
+
+    Args:
+        query: Free-text query
+
+    Returns:
+        MATCH expression, or None if the query has no searchable words
+    """
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    return " OR ".join(f'"{word}"' for word in dict.fromkeys(words))
+
+
+class DocumentSearchIndex:
+    """Persistent BM25 keyword index over processed documents"""
+
+    def __init__(self, index_path: str, title_weight: float = None):
+        """Initialize search index
+
+        Args:
+            index_path: Path of the SQLite index file
+            title_weight: BM25 weight of the title column relative to the body
+        """
+        self.index_path = index_path
+        self.title_weight = title_weight or config.get("document_search.title_weight", 5.0)
+        self._available = None
+
+    @property
+    def available(self) -> bool:
+        """Whether FTS5 is usable; the index file is created on first use"""
+        if self._available is not None:
+            return self._available
+
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+                        file_path UNINDEXED,
+                        filename UNINDEXED,
+                        file_type UNINDEXED,
+                        title,
+                        body,
+                        tokenize = 'porter unicode61'
+                    )
+                """)
+                conn.commit()
+            self._available = True
+        except sqlite3.Error as e:
+            # SQLite builds without FTS5 fall back to the linear scan
+            logger.warning(f"Keyword search index unavailable ({e}); using linear document scan")
+            self._available = False
+        return self._available
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect_db(self.index_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add_document(self, file_path: str, filename: str, file_type: str, title: str, body: str):
+        """Add or replace a document in the index
+
+        Args:
+            file_path: Path of the source document (the document key)
+            filename: Base file name
+            file_type: Document type (pdf, text, markdown)
+            title: Document title
+            body: Full document text
+        """
+        if not self.available:
+            return
+
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM documents WHERE file_path = ?", (file_path,))
+            conn.execute(
+                "INSERT INTO documents (file_path, filename, file_type, title, body) VALUES (?, ?, ?, ?, ?)",
+                (file_path, filename, file_type, title or "", body or ""),
+            )
+            conn.commit()
+
+    def remove_document(self, file_path: str):
+        """Remove a document from the index"""
+        if not self.available:
+            return
+
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM documents WHERE file_path = ?", (file_path,))
+            conn.commit()
+
+    def indexed_paths(self) -> set:
+        """Get the file paths currently in the index"""
+        if not self.available:
+            return set()
+
+        with closing(self._connect()) as conn:
+            return {row["file_path"] for row in conn.execute("SELECT file_path FROM documents")}
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search the index with BM25 ranking
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+
+        Returns:
+            List of dictionaries with file_path, file_type, filename, title
+            and relevance (higher is better)
+        """
+        match = build_match_query(query)
+        if not self.available or not match:
+            return []
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT file_path, file_type, filename, title,
+                       -bm25(documents, 0, 0, 0, ?, 1.0) AS relevance
+                FROM documents
+                WHERE documents MATCH ?
+                ORDER BY relevance DESC
+                LIMIT ?
+                """,
+                (self.title_weight, match, limit),
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+
+def reciprocal_rank_fusion(result_lists: Iterable[List[Dict[str, Any]]],
+                           key: str = "file_path",
+                           k: int = 60,
+                           limit: int = 5) -> List[Dict[str, Any]]:
+    """Merge ranked result lists with reciprocal rank fusion
+
+    Each result contributes ``1 / (k + rank)`` to the score of its key, so
+    keyword (BM25) and vector (cosine) results can be combined without
+    normalizing their scores. The first result seen for a key is kept.
+
+    Args:
+        result_lists: Ranked result lists, best first
+        key: Result field identifying the same item across lists
+        k: Rank damping constant
+        limit: Maximum number of merged results
+
+    Returns:
+        Merged results with a 'fused_score' field, best first
+    """
+    merged: Dict[Any, Dict[str, Any]] = {}
+
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            item_key = result.get(key)
+            if item_key is None:
+                continue
+            if item_key not in merged:
+                merged[item_key] = {**result, "fused_score": 0.0}
+            merged[item_key]["fused_score"] += 1.0 / (k + rank)
+
+    ranked = sorted(merged.values(), key=lambda r: r["fused_score"], reverse=True)
+    return ranked[:limit]
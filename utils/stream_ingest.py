@@ -0,0 +1,227 @@
+"""
+Streaming CSV ingest for HVLC_DB.
+
+Imports a CSV export while it is still being uploaded. Each block of the
+request body is written to the on-disk copy, added to a running SHA-256
+and handed to an incremental CSV parser. The format is detected from the
+first bytes and chunked inserts start before the upload has finished.
+
+The parser runs on its own thread behind a bounded queue of blocks, so
+peak memory is a few blocks plus one chunk of rows, whatever the file
+size. A slow database slows the upload down rather than buffering it.
+"""
+
+import hashlib
+import queue
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, Optional
+
+import pandas as pd
+
+from utils.config import get_config
+from utils.logger import get_logger
+
+logger = get_logger()
+config = get_config()
+
+# Marks the end of the request body in the block queue
+_EOF = None
+
+
+class _BlockReader:
+    """File-like reader over the blocks queued by StreamIngest
+
+    Like a socket, read() returns what has arrived so far (at most size
+    bytes) instead of waiting for size bytes, so the parser can emit a
+    chunk as soon as its rows are in. b"" means end of stream.
+    """
+
+    def __init__(self, blocks: "queue.Queue[Optional[bytes]]"):
+        self.blocks = blocks
+        self.buffer = b""
+        self.eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.eof and (size < 0 or not self.buffer):
+            block = self.blocks.get()
+            if block is _EOF:
+                self.eof = True
+            else:
+                self.buffer += block
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class StreamIngest:
+    """Save, hash, detect and import a CSV file in a single pass over its bytes"""
+
+    def __init__(self, db_path: str = None, chunk_size: int = None, block_size: int = None,
+                 queue_blocks: int = None, detect_bytes: int = None):
+        """Initialize the ingest
+
+        Args:
+            db_path: Path to the billing database (default: from config)
+            chunk_size: Rows per insert chunk (default: stream_ingest.chunk_size)
+            block_size: Bytes read from the request per block (default: stream_ingest.block_size)
+            queue_blocks: Blocks buffered ahead of the parser (default: stream_ingest.queue_blocks)
+            detect_bytes: Bytes used for format detection (default: stream_ingest.detect_bytes)
+        """
+        self.db_path = db_path or config.get_db_path()
+        self.chunk_size = chunk_size or config.get("stream_ingest.chunk_size", 10000)
+        self.block_size = block_size or config.get("stream_ingest.block_size", 65536)
+        self.queue_blocks = queue_blocks or config.get("stream_ingest.queue_blocks", 16)
+        self.detect_bytes = detect_bytes or config.get("stream_ingest.detect_bytes", 65536)
+
+    def ingest(self, stream: BinaryIO, file_path: str) -> Dict:
+        """Ingest a CSV file from a stream
+
+        Args:
+            stream: Binary stream with the CSV file (e.g. the request body)
+            file_path: Where to save the on-disk copy
+
+        Returns:
+            Dictionary with the saved file's size and sha256, the format
+            detection and the import result
+        """
+        from utils.format_detector import ReportFormatDetector
+
+        start_time = time.time()
+        digest = hashlib.sha256()
+        size = 0
+        blocks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=self.queue_blocks)
+        parser = None
+        outcome: Dict = {}
+        head = []
+        head_size = 0
+
+        def start_parser(detection):
+            nonlocal parser
+            parser = threading.Thread(target=self._import_blocks, name="stream-ingest",
+                                      args=(blocks, file_path, detection, outcome), daemon=True)
+            parser.start()
+            for block in head:
+                self._put(blocks, block, parser)
+
+        try:
+            with open(file_path, "wb") as f:
+                while True:
+                    block = stream.read(self.block_size)
+                    if not block:
+                        break
+                    f.write(block)
+                    digest.update(block)
+                    size += len(block)
+
+                    if parser is None:
+                        head.append(block)
+                        head_size += len(block)
+                        if head_size >= self.detect_bytes:
+                            start_parser(self._detect(ReportFormatDetector(), b"".join(head), file_path))
+                            head = []
+                    else:
+                        self._put(blocks, block, parser)
+
+            if parser is None:
+                start_parser(self._detect(ReportFormatDetector(), b"".join(head), file_path))
+                head = []
+        finally:
+            if parser is not None:
+                self._put(blocks, _EOF, parser)
+                parser.join()
+
+        elapsed = time.time() - start_time
+        result = outcome.get("result", {"success": False, "error": outcome.get("error", "Import did not run")})
+        logger.info(f"Ingested {file_path}: {size:,} bytes, {result.get('total_rows_processed', 0):,} rows "
+                    f"in {elapsed:.2f}s")
+
+        return {
+            "success": result.get("success", False),
+            "path": file_path,
+            "size": size,
+            "sha256": digest.hexdigest(),
+            "format_detection": outcome.get("detection"),
+            "result": result,
+            "elapsed_time": elapsed,
+        }
+
+    @staticmethod
+    def _put(blocks: queue.Queue, block: Optional[bytes], parser: threading.Thread):
+        # Once the parser has stopped (e.g. a malformed file) keep saving the
+        # upload instead of blocking on a queue nobody reads
+        while parser.is_alive():
+            try:
+                blocks.put(block, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _detect(self, detector, head: bytes, file_path: str) -> Dict:
+        # Only complete lines are used, so the last sample row is not cut off
+        text = head.decode("utf-8", errors="replace")
+        if len(head) >= self.detect_bytes and "\n" in text:
+            text = text[:text.rindex("\n") + 1]
+        return detector.detect_format_from_text(text, source=file_path).to_dict()
+
+    def _import_blocks(self, blocks: queue.Queue, file_path: str, detection: Dict, outcome: Dict):
+        """Parser thread: insert the queued blocks in chunks as they arrive"""
+        from medical_billing_db import MedicalBillingDB
+
+        outcome["detection"] = detection
+        reader = _BlockReader(blocks)
+        db = None
+        try:
+            db = MedicalBillingDB(self.db_path, bulk_load=True)
+            chunks = pd.read_csv(reader, chunksize=self.chunk_size)
+            format_name = detection.get("format_name")
+            transformer = self._transformer(format_name)
+            if transformer:
+                chunks = self._transform_chunks(transformer, format_name, chunks)
+
+            outcome["result"] = db.upload_csv_file(
+                file_path,
+                prepared={"total_rows": None, "chunk_size": self.chunk_size, "chunks": chunks},
+            )
+            if transformer:
+                outcome["result"]["format"] = format_name
+        except Exception as e:
+            logger.error(f"Error ingesting {file_path}: {e}")
+            outcome["error"] = str(e)
+        finally:
+            if db:
+                db.close()
+            # Drain the rest of the upload so the request thread never blocks
+            while not reader.eof and blocks.get() is not _EOF:
+                pass
+
+    @staticmethod
+    def _transformer(format_name: Optional[str]):
+        if not format_name:
+            return None
+        from utils.report_transformer import ReportTransformer
+        transformer = ReportTransformer()
+        return transformer if format_name in transformer.transformation_pipelines else None
+
+    @staticmethod
+    def _transform_chunks(transformer, format_name: str, chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Transform chunks to the canonical format
+
+        The last row of the previous chunk is transformed along with each
+        chunk and then dropped, so forward-filled columns carry across
+        chunk boundaries as they would in a whole-file transform.
+        """
+        previous = None
+        for chunk in chunks:
+            if previous is None:
+                df, metadata = transformer.transform_frame(chunk, format_name)
+            else:
+                df, metadata = transformer.transform_frame(
+                    pd.concat([previous, chunk], ignore_index=True), format_name
+                )
+                df = df.iloc[1:]
+            for error in metadata.get("validation_errors", []):
+                logger.warning(f"  {error['message']}")
+            previous = chunk.iloc[-1:]
+            yield df.reset_index(drop=True)
@@ -0,0 +1,162 @@
+"""
+Text Chunker for HVLC_DB
+
+Splits document text into overlapping chunks for embedding in one pass.
+Boundaries (paragraph, sentence, line, word) are found with a single regex
+scan, chunks are sized by an approximate token count, and chunks are yielded
+lazily so a large document never has all of its chunks in memory.
+"""
+
+import re
+from collections import deque
+from typing import Iterator, NamedTuple
+
+# Split boundaries, strongest first
+PARAGRAPH, SENTENCE, LINE, WORD, NO_BOUNDARY = 3, 2, 1, 0, -1
+
+BOUNDARY_RE = re.compile(r"[.!?]+[\"')\]]*\s+|\s+")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class TextUnit(NamedTuple):
+    """A run of text ending at a split boundary"""
+    start: int
+    end: int
+    tokens: int
+    boundary: int
+
+
+def count_tokens(text: str) -> int:
+    """Approximate the token count of text as words plus punctuation marks
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate number of tokens
+    """
+    return len(TOKEN_RE.findall(text))
+
+
+def _boundary_kind(separator: str) -> int:
+    """Classify the separator that ends a unit"""
+    if separator.count("\n") >= 2:
+        return PARAGRAPH
+    if separator[0] in ".!?":
+        return SENTENCE
+    if "\n" in separator:
+        return LINE
+    return WORD
+
+
+def _split_oversized(text: str, start: int, end: int, boundary: int, max_tokens: int) -> Iterator[TextUnit]:
+    """Cut a unit with more than max_tokens tokens at token positions"""
+    piece_start, tokens = start, 0
+    for match in TOKEN_RE.finditer(text, start, end):
+        if tokens == max_tokens:
+            yield TextUnit(piece_start, match.start(), tokens, NO_BOUNDARY)
+            piece_start, tokens = match.start(), 0
+        tokens += 1
+    yield TextUnit(piece_start, end, tokens, boundary)
+
+
+def iter_units(text: str, max_tokens: int) -> Iterator[TextUnit]:
+    """Yield the text as consecutive units ending at split boundaries
+
+    Args:
+        text: Text to scan
+        max_tokens: Units above this size are cut at token positions
+
+    Yields:
+        TextUnit covering the text from start to end without gaps
+    """
+    position = 0
+    for match in BOUNDARY_RE.finditer(text):
+        end = match.end()
+        tokens = count_tokens(text[position:end])
+        kind = _boundary_kind(match.group())
+        if tokens > max_tokens:
+            yield from _split_oversized(text, position, end, kind, max_tokens)
+        else:
+            yield TextUnit(position, end, tokens, kind)
+        position = end
+
+    if position < len(text):
+        tokens = count_tokens(text[position:])
+        if tokens > max_tokens:
+            yield from _split_oversized(text, position, len(text), PARAGRAPH, max_tokens)
+        else:
+            yield TextUnit(position, len(text), tokens, PARAGRAPH)
+
+
+def _best_cut(units: list, first: int, total_tokens: int) -> int:
+    """Pick the unit index to end a chunk at
+
+    The strongest boundary in the second half of the chunk wins, with ties
+    going to the later one; index ``first`` is the earliest allowed cut.
+    """
+    best, best_kind, running = len(units) - 1, NO_BOUNDARY - 1, 0
+    for i, unit in enumerate(units):
+        running += unit.tokens
+        if i < first or running * 2 < total_tokens:
+            continue
+        if unit.boundary >= best_kind:
+            best, best_kind = i, unit.boundary
+    return best
+
+
+def iter_text_chunks(text: str, max_tokens: int = 250, overlap_tokens: int = 50) -> Iterator[str]:
+    """Split text into overlapping chunks of at most max_tokens tokens
+
+    Chunks end at the strongest boundary (paragraph, sentence, line, word)
+    in their second half. The next chunk repeats up to overlap_tokens of
+    whole units from the end of the previous chunk, but always starts later
+    and always contains new text, so no near-duplicate chunks are produced.
+
+    Args:
+        text: Text to split
+        max_tokens: Maximum approximate tokens per chunk
+        overlap_tokens: Maximum approximate tokens repeated between chunks
+
+    Yields:
+        Chunk text
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    window = deque()
+    window_tokens = 0
+    fresh = 0  # index of the first unit not yet emitted in a chunk
+
+    for unit in iter_units(text, max_tokens):
+        while window and window_tokens + unit.tokens > max_tokens:
+            if fresh >= len(window):
+                # Only overlap is left; drop it rather than emit a duplicate
+                window_tokens -= window.popleft().tokens
+                fresh -= 1
+                continue
+
+            units = list(window)
+            cut = _best_cut(units, fresh, window_tokens)
+            chunk = text[units[0].start:units[cut].end]
+            if chunk.strip():
+                yield chunk
+
+            # Carry trailing units as overlap, never including the chunk's first unit
+            keep_from, carried = cut + 1, 0
+            while keep_from - 1 >= 1 and carried + units[keep_from - 1].tokens <= overlap_tokens:
+                keep_from -= 1
+                carried += units[keep_from].tokens
+
+            window = deque(units[keep_from:])
+            window_tokens = sum(u.tokens for u in window)
+            fresh = cut + 1 - keep_from
+
+        window.append(unit)
+        window_tokens += unit.tokens
+
+    if fresh < len(window):
+        chunk = text[window[0].start:window[-1].end]
+        if chunk.strip():
+            yield chunk
@@ -0,0 +1,477 @@
+"""
+Columnar Transaction Snapshot for HVLC_DB
+
+Keeps a Parquet copy of payment_transactions next to the SQLite database,
+partitioned by transaction year and month:
+
+    medical_billing.db.parquet/
+        _state.json
+        year=2024/month=1/part-000000000000-000000200000.parquet
+        ...
+
+Analytical jobs read only the columns and months they need, from
+memory-mapped files, instead of pulling rows through the sqlite3 cursor.
+
+Like the revenue cube, the snapshot is brought forward incrementally from
+the last transaction_id it has seen (each upload adds one part file per
+month it touches) and only rebuilt when rows were deleted or replaced.
+Months that collect many small parts are compacted into one file. The
+state file lists the parts that make up the snapshot, so a sync that fails
+halfway leaves the previous snapshot intact.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from utils.config import get_config
+from utils.data_version import get_data_version
+from utils.logger import get_logger
+from utils.db_open import connect_db
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = get_logger()
+config = get_config()
+
+SNAPSHOT_FORMAT = 1
+STATE_FILE = "_state.json"
+
+# payment_transactions columns and their snapshot types
+TRANSACTION_COLUMNS = [
+    ("transaction_id", "int"),
+    ("provider_id", "int"),
+    ("transaction_date", "str"),
+    ("patient_id", "str"),
+    ("service_date", "str"),
+    ("cash_applied", "float"),
+    ("insurance_payment", "float"),
+    ("patient_payment", "float"),
+    ("adjustment_amount", "float"),
+    ("cpt_code", "str"),
+    ("diagnosis_code", "str"),
+    ("payer_name", "str"),
+    ("claim_number", "str"),
+    ("upload_batch", "str"),
+    ("notes", "str"),
+    ("created_date", "str"),
+]
+COLUMN_NAMES = [name for name, _ in TRANSACTION_COLUMNS]
+PARTITION_COLUMNS = ("year", "month")
+
+# Text columns are cast in SQL: NUMERIC affinity (DATE, DECIMAL) can store
+# the same column as integers on some rows and text on others
+EXPORT_SQL = "SELECT {columns},\n    {partition}\nFROM payment_transactions\nWHERE transaction_id > ? AND transaction_id <= ?".format(
+    columns=",\n    ".join(
+        f"CAST({name} AS TEXT) AS {name}" if kind == "str" else name for name, kind in TRANSACTION_COLUMNS
+    ),
+    partition=(
+        # Year and month 0 hold rows whose transaction_date is missing or unparseable
+        "COALESCE(CAST(strftime('%Y', transaction_date) AS INTEGER), 0) AS year,\n"
+        "    COALESCE(CAST(strftime('%m', transaction_date) AS INTEGER), 0) AS month"
+    ),
+)
+
+
+def _arrow_type(kind: str):
+    return {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}[kind]
+
+
+def _file_schema():
+    return pa.schema([(name, _arrow_type(kind)) for name, kind in TRANSACTION_COLUMNS])
+
+
+def _partition_schema():
+    return pa.schema([(name, pa.int32()) for name in PARTITION_COLUMNS])
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {"format": SNAPSHOT_FORMAT, "last_transaction_id": 0, "row_count": 0, "files": []}
+
+
+def _month_key(date: str) -> tuple:
+    """(year, month) of a 'YYYY-MM-DD' date"""
+    return int(date[:4]), int(date[5:7])
+
+
+class TransactionSnapshot:
+    """Incrementally maintained Parquet copy of payment_transactions"""
+
+    def __init__(self, db_path: str, snapshot_dir: str = None, batch_rows: int = None,
+                 max_parts: int = None):
+        """Initialize transaction snapshot
+
+        Args:
+            db_path: Path to the SQLite database
+            snapshot_dir: Snapshot directory (default: <db_path>.parquet)
+            batch_rows: Transaction id range exported per batch (bounds memory)
+            max_parts: Part files a month may collect before it is compacted
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for the transaction snapshot (pip install pyarrow)")
+        self.db_path = db_path
+        self.path = snapshot_dir or config.get("analytics.snapshot_dir") or f"{db_path}.parquet"
+        self.batch_rows = batch_rows or config.get("analytics.snapshot_batch_rows", 200000)
+        self.max_parts = max_parts or config.get("analytics.snapshot_max_parts", 8)
+        self._synced_version = None
+        self._state = None
+        self._lock = threading.Lock()
+        self.stats = {"syncs": 0, "rebuilds": 0, "rows_exported": 0, "compactions": 0}
+
+    def sync(self, conn: sqlite3.Connection = None) -> Dict[str, Any]:
+        """Bring the snapshot up to date with payment_transactions
+
+        Costs a file stat when nothing has changed since the last sync.
+
+        Args:
+            conn: Connection to use (e.g. the uploader's own connection)
+
+        Returns:
+            Dictionary with 'exported' (rows added), 'rebuilt' and 'compacted'
+            (months rewritten)
+        """
+        with self._lock:
+            if self._synced_version == get_data_version(self.db_path):
+                return {"exported": 0, "rebuilt": False, "compacted": 0}
+
+            if conn is None:
+                with closing(connect_db(self.db_path)) as own_conn:
+                    result = self._sync(own_conn)
+            else:
+                result = self._sync(conn)
+
+            self._synced_version = get_data_version(self.db_path)
+            return result
+
+    def _sync(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        state = self._read_state()
+        self._sweep(state)
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'payment_transactions'"
+        ).fetchone():
+            self._state = state
+            return {"exported": 0, "rebuilt": False, "compacted": 0}
+
+        try:
+            # Holds off writers, so every batch sees the same transactions
+            conn.execute("BEGIN IMMEDIATE")
+            max_id = conn.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM payment_transactions").fetchone()[0]
+            total_rows = conn.execute("SELECT COUNT(*) FROM payment_transactions").fetchone()[0]
+
+            last_id, row_count = state["last_transaction_id"], state["row_count"]
+            new_rows = conn.execute(
+                "SELECT COUNT(*) FROM payment_transactions WHERE transaction_id > ?", (last_id,)
+            ).fetchone()[0]
+            # Deleted or replaced rows cannot be removed from the part files
+            rebuilt = bool(state["files"] or last_id) and (max_id < last_id or row_count + new_rows != total_rows)
+            if rebuilt:
+                state, last_id = _empty_state(), 0
+
+            files = list(state["files"])
+            exported = 0
+            for low in range(last_id, max_id, self.batch_rows):
+                high = min(low + self.batch_rows, max_id)
+                added, rows = self._export(conn, low, high)
+                files += added
+                exported += rows
+        finally:
+            conn.rollback()
+
+        compacted = self._compact(files)
+        if exported or rebuilt or compacted or not os.path.exists(os.path.join(self.path, STATE_FILE)):
+            state = {
+                "format": SNAPSHOT_FORMAT,
+                "last_transaction_id": max_id,
+                "row_count": total_rows,
+                "files": files,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._write_state(state)
+        self._state = state
+
+        self.stats["syncs"] += 1
+        self.stats["rows_exported"] += exported
+        self.stats["compactions"] += compacted
+        if rebuilt:
+            self.stats["rebuilds"] += 1
+        if exported:
+            logger.debug(f"Transaction snapshot {'rebuilt' if rebuilt else 'updated'}: "
+                         f"exported {exported} transactions")
+        return {"exported": exported, "rebuilt": rebuilt, "compacted": compacted}
+
+    def _export(self, conn: sqlite3.Connection, low: int, high: int) -> tuple:
+        """Write transactions with low < transaction_id <= high, one part per month
+
+        Returns:
+            Tuple of (new file entries, rows written)
+        """
+        df = pd.read_sql_query(EXPORT_SQL, conn, params=(low, high))
+        if df.empty:
+            return [], 0
+
+        for name, kind in TRANSACTION_COLUMNS:
+            if kind == "int":
+                df[name] = pd.to_numeric(df[name], errors="coerce").astype("Int64")
+            elif kind == "float":
+                df[name] = pd.to_numeric(df[name], errors="coerce").astype("float64")
+
+        entries = []
+        for (year, month), part in df.groupby(list(PARTITION_COLUMNS), sort=True):
+            entry = {
+                "path": f"year={int(year)}/month={int(month)}/part-{low:012d}-{high:012d}.parquet",
+                "year": int(year), "month": int(month), "rows": len(part), "low": low, "high": high,
+            }
+            table = pa.Table.from_pandas(part[COLUMN_NAMES], schema=_file_schema(), preserve_index=False)
+            self._write_part(entry["path"], table)
+            entries.append(entry)
+        return entries, len(df)
+
+    def _compact(self, files: List[Dict[str, Any]]) -> int:
+        """Merge the parts of months with more than max_parts files (in place)
+
+        Returns:
+            Number of months compacted
+        """
+        by_month: Dict[tuple, List[Dict[str, Any]]] = {}
+        for entry in files:
+            by_month.setdefault((entry["year"], entry["month"]), []).append(entry)
+
+        compacted = 0
+        for (year, month), entries in by_month.items():
+            if len(entries) <= self.max_parts:
+                continue
+            low, high = min(e["low"] for e in entries), max(e["high"] for e in entries)
+            table = pa.concat_tables(
+                pq.read_table(os.path.join(self.path, e["path"]), schema=_file_schema()) for e in entries
+            ).sort_by("transaction_id")
+            merged = {
+                "path": f"year={year}/month={month}/part-{low:012d}-{high:012d}.parquet",
+                "year": year, "month": month, "rows": table.num_rows, "low": low, "high": high,
+            }
+            self._write_part(merged["path"], table)
+            # The replaced parts are deleted by the next sync's sweep
+            files[:] = [e for e in files if e not in entries] + [merged]
+            compacted += 1
+        if compacted:
+            files.sort(key=lambda e: (e["year"], e["month"], e["low"]))
+        return compacted
+
+    def _write_part(self, relative_path: str, table: "pa.Table"):
+        path = os.path.join(self.path, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _read_state(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, STATE_FILE), "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return _empty_state()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable transaction snapshot state, rebuilding: {e}")
+            return _empty_state()
+        return state if state.get("format") == SNAPSHOT_FORMAT else _empty_state()
+
+    def _write_state(self, state: Dict[str, Any]):
+        os.makedirs(self.path, exist_ok=True)
+        state_path = os.path.join(self.path, STATE_FILE)
+        with open(f"{state_path}.tmp", "w") as f:
+            json.dump(state, f, indent=1)
+        os.replace(f"{state_path}.tmp", state_path)
+
+    def _sweep(self, state: Dict[str, Any]):
+        """Delete part files the state does not list (replaced or left by a failed sync)"""
+        if not os.path.isdir(self.path):
+            return
+        listed = {os.path.normpath(entry["path"]) for entry in state["files"]}
+        for dirpath, dirnames, filenames in os.walk(self.path, topdown=False):
+            for filename in filenames:
+                relative = os.path.normpath(os.path.relpath(os.path.join(dirpath, filename), self.path))
+                if filename != STATE_FILE and relative not in listed:
+                    os.remove(os.path.join(dirpath, filename))
+            if dirpath != self.path and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+    def rebuild(self):
+        """Discard the snapshot so the next sync exports everything again"""
+        with self._lock:
+            self._write_state(_empty_state())
+            self._synced_version = None
+            self._state = None
+
+    def files(self, start: str = None, end: str = None, years: Sequence[int] = None) -> List[str]:
+        """Get the part files holding a date range (partition pruning)
+
+        Args:
+            start: First transaction date (YYYY-MM-DD)
+            end: Last transaction date (YYYY-MM-DD)
+            years: Only these years
+
+        Returns:
+            Absolute paths of the part files of the matching months
+        """
+        self.sync()
+        with self._lock:
+            entries = list(self._state["files"])
+
+        if years:
+            years = {int(year) for year in years}
+            entries = [e for e in entries if e["year"] in years]
+        if start or end:
+            # Undated rows (year 0) never fall inside a date range
+            entries = [e for e in entries if e["year"]]
+        if start:
+            entries = [e for e in entries if (e["year"], e["month"]) >= _month_key(start)]
+        if end:
+            entries = [e for e in entries if (e["year"], e["month"]) <= _month_key(end)]
+        return [os.path.join(self.path, e["path"]) for e in entries]
+
+    def dataset(self, start: str = None, end: str = None, years: Sequence[int] = None) -> "ds.Dataset":
+        """Get a pyarrow dataset over the part files of a date range
+
+        Files are memory-mapped; year and month are available as partition
+        columns.
+
+        Args:
+            start: First transaction date (YYYY-MM-DD)
+            end: Last transaction date (YYYY-MM-DD)
+            years: Only these years
+
+        Returns:
+            pyarrow.dataset.Dataset
+        """
+        return ds.dataset(
+            self.files(start, end, years),
+            schema=pa.unify_schemas([_file_schema(), _partition_schema()]),
+            format="parquet",
+            partitioning=ds.partitioning(_partition_schema(), flavor="hive"),
+            partition_base_dir=self.path,
+            filesystem=pafs.LocalFileSystem(use_mmap=True),
+        )
+
+    def load(self, columns: Sequence[str] = None, start: str = None, end: str = None,
+             years: Sequence[int] = None, provider_ids: Sequence[int] = None) -> pd.DataFrame:
+        """Load transactions from the snapshot
+
+        Args:
+            columns: Columns to read (default: all payment_transactions
+                columns); may include year, month and provider_name
+            start: First transaction date (YYYY-MM-DD, inclusive)
+            end: Last transaction date (YYYY-MM-DD, inclusive)
+            years: Only these years
+            provider_ids: Only these providers
+
+        Returns:
+            DataFrame of matching transactions
+        """
+        read_columns, filter_expr = self._scan_args(columns, start, end, provider_ids)
+        table = self.dataset(start, end, years).to_table(columns=read_columns, filter=filter_expr)
+        return self._finish(table.to_pandas(), columns)
+
+    def iter_batches(self, columns: Sequence[str] = None, start: str = None, end: str = None,
+                     years: Sequence[int] = None, provider_ids: Sequence[int] = None,
+                     batch_size: int = 65536) -> Iterator[pd.DataFrame]:
+        """Scan transactions in batches, for jobs that do not fit in memory
+
+        Takes the same arguments as load(), plus the batch size in rows.
+
+        Yields:
+            DataFrames of at most batch_size transactions
+        """
+        read_columns, filter_expr = self._scan_args(columns, start, end, provider_ids)
+        provider_names = None
+        for batch in self.dataset(start, end, years).to_batches(
+            columns=read_columns, filter=filter_expr, batch_size=batch_size
+        ):
+            if batch.num_rows:
+                if columns and "provider_name" in columns and provider_names is None:
+                    provider_names = self._provider_names()
+                yield self._finish(batch.to_pandas(), columns, provider_names)
+
+    def _scan_args(self, columns, start, end, provider_ids) -> tuple:
+        """Get the columns to read and the row filter for a scan"""
+        if columns is None:
+            read_columns = list(COLUMN_NAMES)
+        else:
+            read_columns = [c for c in columns if c != "provider_name"]
+            if "provider_name" in columns and "provider_id" not in read_columns:
+                read_columns.append("provider_id")
+
+        filter_expr = None
+        conditions = []
+        if start:
+            conditions.append(ds.field("transaction_date") >= start)
+        if end:
+            conditions.append(ds.field("transaction_date") <= end)
+        if provider_ids:
+            conditions.append(ds.field("provider_id").isin([int(p) for p in provider_ids]))
+        for condition in conditions:
+            filter_expr = condition if filter_expr is None else filter_expr & condition
+        return read_columns, filter_expr
+
+    def _finish(self, df: pd.DataFrame, columns: Optional[Sequence[str]],
+                provider_names: Dict[int, str] = None) -> pd.DataFrame:
+        """Add provider names and put the requested columns in order"""
+        if not columns:
+            return df
+        if "provider_name" in columns:
+            names = provider_names if provider_names is not None else self._provider_names()
+            df["provider_name"] = df["provider_id"].map(names)
+        return df[list(columns)]
+
+    def _provider_names(self) -> Dict[int, str]:
+        # Names come from SQLite, so a renamed provider needs no re-export
+        with closing(connect_db(self.db_path)) as conn:
+            return dict(conn.execute("SELECT provider_id, provider_name FROM providers").fetchall())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get snapshot statistics"""
+        with self._lock:
+            state = self._state or self._read_state()
+            return {
+                **self.stats,
+                "path": self.path,
+                "files": len(state["files"]),
+                "rows": sum(entry["rows"] for entry in state["files"]),
+                "last_transaction_id": state["last_transaction_id"],
+            }
+
+
+_snapshots: Dict[str, TransactionSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def snapshot_enabled() -> bool:
+    """Whether the Parquet transaction snapshot is maintained and read"""
+    return PYARROW_AVAILABLE and bool(config.get("analytics.parquet_snapshot", True))
+
+
+def get_transaction_snapshot(db_path: Optional[str] = None) -> TransactionSnapshot:
+    """Get the shared transaction snapshot for a database
+
+    Args:
+        db_path: Path to the SQLite database (default: database.db_path)
+
+    Returns:
+        TransactionSnapshot instance
+    """
+    db_path = db_path or config.get_db_path()
+    with _snapshots_lock:
+        if db_path not in _snapshots:
+            _snapshots[db_path] = TransactionSnapshot(db_path)
+        return _snapshots[db_path]
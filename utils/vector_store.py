@@ -14,10 +14,12 @@ import logging
 from pathlib import Path
 import requests
 from datetime import datetime
+from itertools import islice
 
 from utils.config import get_config
 from utils.logger import get_logger
 from utils.document_processor import DocumentProcessor, get_document_processor
+from utils.search_index import reciprocal_rank_fusion
 
 logger = get_logger()
 config = get_config()
@@ -122,16 +124,12 @@ class VectorStore:
             logger.info(f"Document already processed: {file_path}")
             return True
         
-        # Extract chunks from document
-        chunks = self.doc_processor.extract_chunks(file_path)
-        if not chunks:
-            logger.warning(f"No chunks extracted from document: {file_path}")
-            return False
-        
-        # Create embeddings for chunks
-        logger.info(f"Creating embeddings for {len(chunks)} chunks from {file_path}")
+        # Create embeddings for chunks as they are extracted
+        logger.info(f"Creating embeddings for chunks from {file_path}")
+        chunk_count = 0
         
-        for i, chunk in enumerate(chunks):
+        for i, chunk in enumerate(self.doc_processor.iter_chunks(file_path)):
+            chunk_count += 1
             chunk_id = f"{file_path}_{i}"
             
             # Check if we already have an embedding for this chunk
@@ -163,6 +161,10 @@ class VectorStore:
             except Exception as e:
                 logger.error(f"Error saving embedding for chunk {i} of {file_path}: {e}")
         
+        if not chunk_count:
+            logger.warning(f"No chunks extracted from document: {file_path}")
+            return False
+        
         # Save updated index
         self._save_index()
         return True
@@ -265,6 +267,32 @@ class VectorStore:
         # Return top k results
         return results[:top_k]
     
+    def hybrid_search(self, query: str, top_k: int = 5) -> List[Dict]:
+        """Search with both the keyword index and vector embeddings
+        
+        Keyword (BM25) results and vector results are merged per document with
+        reciprocal rank fusion; the best matching chunk of each document is
+        kept when the vector search found one.
+        
+        Args:
+            query: Query string
+            top_k: Number of results to return
+            
+        Returns:
+            List of results with a 'fused_score' field
+        """
+        keyword_results = self.doc_processor.search_documents(query, limit=top_k * 2)
+        
+        # search() is sorted best first, so the first chunk per file is its best
+        vector_results = []
+        seen_files = set()
+        for result in self.search(query, top_k=top_k * 4):
+            if result["file_path"] not in seen_files:
+                seen_files.add(result["file_path"])
+                vector_results.append(result)
+        
+        return reciprocal_rank_fusion([vector_results, keyword_results], limit=top_k)
+    
     def get_chunks_text(self, search_results: List[Dict]) -> List[Dict]:
         """Get text for chunks from search results
         
@@ -286,13 +314,13 @@ class VectorStore:
             if not doc_content:
                 continue
             
-            # Get chunks
-            chunks = self.doc_processor.extract_chunks(file_path)
-            if not chunks or chunk_index >= len(chunks):
+            # Chunk the document only as far as the requested chunk
+            chunk = next(islice(self.doc_processor.iter_chunks(file_path), chunk_index, None), None)
+            if chunk is None:
                 continue
             
             # Get text for this chunk
-            chunk_text = chunks[chunk_index]["text"]
+            chunk_text = chunk["text"]
             
             # Add to results
             result_with_text = result.copy()
@@ -18,6 +18,7 @@ from advanced_analytics_queries import AdvancedAnalytics
 from medical_billing_db import MedicalBillingDB
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.db_open import connect_db
 
 logger = get_logger()
 config = get_config()
@@ -96,10 +97,9 @@ class WeeklyWorkflow:
         """
         
         # Execute queries
-        import sqlite3
         import pandas as pd
         
-        conn = sqlite3.connect(self.analytics.db_path)
+        conn = connect_db(self.analytics.db_path)
         
         recent_summary = pd.read_sql_query(recent_summary_query, conn)
         provider_activity = pd.read_sql_query(provider_activity_query, conn)
@@ -157,9 +157,7 @@ class WeeklyWorkflow:
     
     def _check_missing_providers(self) -> Dict:
         """Check for transactions with missing provider information"""
-        import sqlite3
-        
-        conn = sqlite3.connect(self.analytics.db_path)
+        conn = connect_db(self.analytics.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -180,9 +178,7 @@ class WeeklyWorkflow:
     
     def _check_date_anomalies(self) -> Dict:
         """Check for unusual date patterns"""
-        import sqlite3
-        
-        conn = sqlite3.connect(self.analytics.db_path)
+        conn = connect_db(self.analytics.db_path)
         cursor = conn.cursor()
         
         # Check for future dates
@@ -215,10 +211,9 @@ class WeeklyWorkflow:
     
     def _check_revenue_anomalies(self) -> Dict:
         """Check for unusual revenue patterns"""
-        import sqlite3
         import pandas as pd
         
-        conn = sqlite3.connect(self.analytics.db_path)
+        conn = connect_db(self.analytics.db_path)
         
         # Get revenue statistics
         df = pd.read_sql_query("""
@@ -255,9 +250,7 @@ class WeeklyWorkflow:
     
     def _check_recent_uploads(self) -> Dict:
         """Check recent upload history"""
-        import sqlite3
-        
-        conn = sqlite3.connect(self.analytics.db_path)
+        conn = connect_db(self.analytics.db_path)
         cursor = conn.cursor()
         
         # Check for recent successful uploads
@@ -308,9 +301,7 @@ class WeeklyWorkflow:
     
     def _get_total_transactions(self) -> int:
         """Get total transaction count"""
-        import sqlite3
-        
-        conn = sqlite3.connect(self.analytics.db_path)
+        conn = connect_db(self.analytics.db_path)
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM payment_transactions")
         count = cursor.fetchone()[0]
@@ -319,22 +310,28 @@ class WeeklyWorkflow:
     
     def _get_total_providers(self) -> int:
         """Get total provider count"""
-        import sqlite3
-        
-        conn = sqlite3.connect(self.analytics.db_path)
+        conn = connect_db(self.analytics.db_path)
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM providers WHERE active = 1")
         count = cursor.fetchone()[0]
         conn.close()
         return count
     
-    def run_complete_workflow(self, reports_folder: str, backup: bool = True) -> Dict:
-        """Run the complete weekly workflow"""
+    def run_complete_workflow(self, reports_folder: str, backup: bool = True, staged: bool = None) -> Dict:
+        """Run the complete weekly workflow
+        
+        Args:
+            reports_folder: Folder containing the new reports
+            backup: Create a database backup before uploading
+            staged: Upload into a shadow database that is published when the
+                upload finishes (default: database.staged_loads)
+        """
         
         workflow_start = time.time()
         
         # Step 1: Upload new reports
-        upload_result = self.upload_new_reports(reports_folder, backup)
+        with self.upload_manager.staged(staged):
+            upload_result = self.upload_new_reports(reports_folder, backup)
         
         # Step 2: Generate insights (only if upload was successful)
         if upload_result.get('success', False):
@@ -378,6 +375,8 @@ def main():
     parser.add_argument('reports_folder', help='Path to folder containing new reports')
     parser.add_argument('--no-backup', action='store_true', help='Skip database backup')
     parser.add_argument('--insights-only', action='store_true', help='Generate insights without uploading')
+    parser.add_argument('--staged', action='store_true', default=None,
+                        help='Upload into a shadow database and publish it when the upload finishes')
     
     args = parser.parse_args()
     
@@ -393,7 +392,8 @@ def main():
             # Run complete workflow
             result = workflow.run_complete_workflow(
                 args.reports_folder, 
-                backup=not args.no_backup
+                backup=not args.no_backup,
+                staged=args.staged
             )
             
             if result['success']:
@@ -17,18 +17,29 @@ import re
 from medical_billing_db import MedicalBillingDB
 from utils.logger import get_logger
 from utils.config import get_config
+from utils.db_open import backup_database, connect_db
 
 # Configure logging
 logger = get_logger()
 config = get_config()
 
+# Fields of a combined transaction, in the order _create_transaction_from_row builds them
+TRANSACTION_FIELDS = ['check_date', 'date_posted', 'check_number', 'payment_from', 'reference',
+                      'check_amount', 'cash_applied', 'provider_name', 'session_info']
+
 class WorkingCSVProcessor:
     """Processes CSV files with continuation rows by combining them properly"""
     
-    def __init__(self, db_path: str = None):
-        """Initialize the processor"""
+    def __init__(self, db_path: str = None, vectorized: bool = True):
+        """Initialize the processor
+        
+        Args:
+            db_path: Path to the SQLite database
+            vectorized: Combine and insert rows column-wise instead of row by row
+        """
         self.db_path = db_path or config.get("database.db_path", "medical_billing.db")
         self.db = MedicalBillingDB(self.db_path)
+        self.vectorized = vectorized
         
     def process_csv_file(self, file_path: str) -> Dict:
         """Process a single CSV file, handling continuation rows"""
@@ -44,11 +55,13 @@ class WorkingCSVProcessor:
             # Remove empty rows
             df = df.dropna(how='all')
             
-            # Process the data to combine continuation rows
-            processed_data = self._combine_continuation_rows(df)
-            
-            # Insert into database
-            result = self._insert_processed_data(processed_data, file_path)
+            # Process the data to combine continuation rows, then insert into database
+            if self.vectorized:
+                processed_frame = self._combine_continuation_rows_vectorized(df)
+                result = self._insert_processed_frame(processed_frame, file_path)
+            else:
+                processed_data = self._combine_continuation_rows(df)
+                result = self._insert_processed_data(processed_data, file_path)
             
             print(f"   ✅ Success: {result['successful_rows']} rows in {result['processing_time']:.1f}s")
             if result.get('issues'):
@@ -112,6 +125,77 @@ class WorkingCSVProcessor:
         
         return processed_rows
     
+    def _combine_continuation_rows_vectorized(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Combine continuation rows with their parent rows, column-wise
+        
+        Gives the same transactions as _combine_continuation_rows: each
+        continuation row belongs to the closest transaction row above it, the
+        last non-zero continuation amount replaces the parent's cash applied,
+        and the last continuation 'Sess:' reference becomes its session info.
+        
+        Args:
+            df: CSV rows as strings
+            
+        Returns:
+            DataFrame with one row per transaction and TRANSACTION_FIELDS columns
+        """
+        def text(column: str) -> pd.Series:
+            # Matches str(row.get(column, '')).strip(), including 'nan' for missing cells
+            if column not in df.columns:
+                return pd.Series('', index=df.index, dtype=object)
+            values = df[column].astype(object)
+            return values.where(values.notna(), 'nan').astype(str).str.strip()
+        
+        check_date = text('Check Date')
+        cash_applied = text('Cash Applied')
+        reference = text('Reference')
+        
+        is_continuation = check_date.isin(['', 'nan']) & ~cash_applied.isin(['', 'nan'])
+        group = (~is_continuation).cumsum()
+        is_parent = ~is_continuation
+        is_child = is_continuation & (group > 0)
+        
+        transactions = pd.DataFrame({
+            'check_date': self._parse_dates(check_date[is_parent]),
+            'date_posted': self._parse_dates(text('Date Posted')[is_parent]),
+            'check_number': text('Check Number')[is_parent],
+            'payment_from': text('Payment From')[is_parent],
+            'reference': reference[is_parent],
+            'check_amount': self._parse_amounts(text('Check Amount')[is_parent]),
+            'cash_applied': self._parse_amounts(cash_applied[is_parent]),
+            'provider_name': text('Provider')[is_parent].replace('nan', ''),
+            'session_info': ''
+        }, columns=TRANSACTION_FIELDS)
+        transactions.index = group[is_parent]
+        
+        # Continuation rows: the last non-zero amount and last session reference win
+        child_amounts = self._parse_amounts(cash_applied[is_child])
+        child_amounts = child_amounts[child_amounts != 0]
+        last_amounts = child_amounts.groupby(group[child_amounts.index]).last()
+        transactions.loc[last_amounts.index, 'cash_applied'] = last_amounts
+        
+        child_references = reference[is_child]
+        child_references = child_references[child_references.str.contains('Sess:', regex=False)]
+        last_sessions = child_references.groupby(group[child_references.index]).last()
+        transactions.loc[last_sessions.index, 'session_info'] = last_sessions
+        
+        transactions = transactions.reset_index(drop=True).astype(object)
+        return transactions.where(transactions.notna(), None)
+    
+    def _parse_dates(self, values: pd.Series) -> pd.Series:
+        """Parse a column of date strings, parsing each distinct value once"""
+        parsed = {value: self._parse_date(value) for value in values.unique()}
+        return values.map(parsed)
+    
+    def _parse_amounts(self, values: pd.Series) -> pd.Series:
+        """Parse a column of amount strings like _parse_amount"""
+        cleaned = values.str.replace(r'[^\d.-]', '', regex=True)
+        blank = cleaned.isin(['', '-'])
+        amounts = pd.to_numeric(cleaned.where(~blank), errors='coerce')
+        for amount_str in cleaned[amounts.isna() & ~blank]:
+            logger.warning(f"Could not parse amount '{amount_str}'")
+        return amounts.fillna(0.0).astype(float)
+    
     def _create_transaction_from_row(self, row: pd.Series) -> Dict:
         """Create a transaction dictionary from a CSV row"""
         # Parse dates
@@ -202,7 +286,7 @@ class WorkingCSVProcessor:
         
         try:
             # Connect to database
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_db(self.db_path)
             cursor = conn.cursor()
             
             for transaction in processed_data:
@@ -286,6 +370,84 @@ class WorkingCSVProcessor:
                 'issues': issues
             }
     
+    def _insert_processed_frame(self, transactions: pd.DataFrame, file_path: str) -> Dict:
+        """Insert combined transactions with one bulk insert
+        
+        Providers are added and mapped to ids once per file, and the
+        transactions go in with a single executemany. If the bulk insert
+        fails, the file is retried row by row with _insert_processed_data so
+        the per-row issues are reported as before.
+        
+        Args:
+            transactions: Output of _combine_continuation_rows_vectorized
+            file_path: Source CSV path
+            
+        Returns:
+            Same result dictionary as _insert_processed_data
+        """
+        start_time = datetime.now()
+        
+        has_provider = transactions['provider_name'] != ''
+        has_check_date = transactions['check_date'].notna()
+        issues = [
+            f"Missing check date for {provider_name}" if provider_name else "Missing provider name in transaction"
+            for provider_name in transactions.loc[~(has_provider & has_check_date), 'provider_name']
+        ]
+        valid = transactions[has_provider & has_check_date]
+        
+        conn = connect_db(self.db_path)
+        try:
+            with conn:
+                # One attempt per transaction, as in the row path: ignored inserts still
+                # advance the AUTOINCREMENT sequence, so this keeps provider ids identical
+                conn.executemany("""
+                    INSERT OR IGNORE INTO providers (provider_name, contract_type, base_percentage)
+                    VALUES (?, ?, ?)
+                """, [(name, 'Independent Contractor', 0.0) for name in valid['provider_name']])
+                
+                provider_names = list(dict.fromkeys(valid['provider_name']))
+                
+                provider_ids = {}
+                for offset in range(0, len(provider_names), 500):
+                    batch = provider_names[offset:offset + 500]
+                    provider_ids.update(
+                        (name, provider_id) for provider_id, name in conn.execute(
+                            f"SELECT provider_id, provider_name FROM providers "
+                            f"WHERE provider_name IN ({', '.join('?' for _ in batch)})", batch
+                        )
+                    )
+                if len(provider_ids) < len(provider_names):
+                    raise sqlite3.IntegrityError("provider_id lookup failed")
+                
+                conn.executemany("""
+                    INSERT INTO payment_transactions 
+                    (provider_id, transaction_date, service_date, cash_applied, 
+                     patient_payment, payer_name, notes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, zip(
+                    valid['provider_name'].map(provider_ids),
+                    valid['check_date'],
+                    valid['check_date'],  # Use check_date as service_date
+                    valid['cash_applied'],
+                    valid['check_amount'],  # Use check_amount as patient_payment
+                    valid['payment_from'],  # Use payment_from as payer_name
+                    "Reference: " + valid['reference'] + "; Session: " + valid['session_info']
+                ))
+        except sqlite3.Error as e:
+            logger.warning(f"Bulk insert failed for {file_path}, retrying row by row: {e}")
+            return self._insert_processed_data(transactions.to_dict('records'), file_path)
+        finally:
+            conn.close()
+        
+        return {
+            'success': True,
+            'successful_rows': len(valid),
+            'failed_rows': len(issues),
+            'total_rows_processed': len(transactions),
+            'processing_time': (datetime.now() - start_time).total_seconds(),
+            'issues': issues
+        }
+    
     def process_folder(self, folder_path: str) -> Dict:
         """Process all CSV files in a folder"""
         folder_path = Path(folder_path)
@@ -344,11 +506,10 @@ def main():
     
     # Create backup if requested
     if args.backup:
-        import shutil
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = f"backups/database_backup_{timestamp}.db"
         os.makedirs("backups", exist_ok=True)
-        shutil.copy2("medical_billing.db", backup_path)
+        backup_database("medical_billing.db", backup_path)
         print(f"✅ Database backup created: {backup_path}")
     
     # Process the folder